@@ -13,19 +13,105 @@
  */
 package org.apache.aurora.scheduler.http;
 
+import java.io.IOException;
+import java.io.OutputStream;
+import java.util.Map;
+
+import javax.annotation.Nullable;
 import javax.inject.Inject;
+import javax.servlet.ServletException;
+import javax.servlet.http.HttpServlet;
+import javax.servlet.http.HttpServletRequest;
+import javax.servlet.http.HttpServletResponse;
+
+import com.google.common.annotations.VisibleForTesting;
+import com.google.common.collect.ImmutableMap;
 
 import org.apache.aurora.gen.AuroraAdmin;
+import org.apache.thrift.TException;
+import org.apache.thrift.TProcessor;
+import org.apache.thrift.protocol.TBinaryProtocol;
+import org.apache.thrift.protocol.TCompactProtocol;
 import org.apache.thrift.protocol.TJSONProtocol;
-import org.apache.thrift.server.TServlet;
+import org.apache.thrift.protocol.TProtocolFactory;
+import org.apache.thrift.transport.TIOStreamTransport;
+import org.apache.thrift.transport.TTransport;
 
 /**
- * A servlet that exposes the scheduler Thrift API over HTTP/JSON.
+ * A servlet that exposes the scheduler Thrift API over HTTP.
+ *
+ * <p>Calls are read and answered in the protocol named by the Content-Type of the request. Requests
+ * of any other content type, including the generic application/x-thrift, use the JSON protocol.
  */
-class SchedulerAPIServlet extends TServlet {
+class SchedulerAPIServlet extends HttpServlet {
+
+  @VisibleForTesting
+  static final String DEFAULT_CONTENT_TYPE = "application/x-thrift";
+
+  /**
+   * Maximum number of bytes a binary or compact call may claim for its strings and binary fields.
+   * Their lengths are read from the request before the data, so without a limit a malformed length
+   * would make the servlet allocate that much up front.
+   */
+  @VisibleForTesting
+  static final int MAX_READ_BYTES = 64 * 1024 * 1024;
+
+  @VisibleForTesting
+  static final Map<String, TProtocolFactory> PROTOCOLS =
+      ImmutableMap.<String, TProtocolFactory>of(
+          "application/vnd.apache.thrift.json", new TJSONProtocol.Factory(),
+          "application/vnd.apache.thrift.binary",
+          new TBinaryProtocol.Factory(false, true, MAX_READ_BYTES),
+          "application/vnd.apache.thrift.compact", new TCompactProtocol.Factory(MAX_READ_BYTES));
+
+  private static final TProtocolFactory DEFAULT_PROTOCOL = new TJSONProtocol.Factory();
+
+  private final TProcessor processor;
 
   @Inject
   SchedulerAPIServlet(AuroraAdmin.Iface schedulerThriftInterface) {
-    super(new AuroraAdmin.Processor<>(schedulerThriftInterface), new TJSONProtocol.Factory());
+    this.processor = new AuroraAdmin.Processor<>(schedulerThriftInterface);
+  }
+
+  @VisibleForTesting
+  @Nullable
+  static String mediaType(@Nullable String contentType) {
+    if (contentType == null) {
+      return null;
+    }
+    int parameters = contentType.indexOf(';');
+    String mediaType = parameters == -1 ? contentType : contentType.substring(0, parameters);
+    return mediaType.trim().toLowerCase();
+  }
+
+  @Override
+  protected void doPost(HttpServletRequest request, HttpServletResponse response)
+      throws ServletException, IOException {
+
+    String contentType = mediaType(request.getContentType());
+    TProtocolFactory protocolFactory = contentType == null ? null : PROTOCOLS.get(contentType);
+    if (protocolFactory == null) {
+      contentType = DEFAULT_CONTENT_TYPE;
+      protocolFactory = DEFAULT_PROTOCOL;
+    }
+    response.setContentType(contentType);
+
+    OutputStream out = response.getOutputStream();
+    TTransport transport = new TIOStreamTransport(request.getInputStream(), out);
+    try {
+      processor.process(
+          protocolFactory.getProtocol(transport),
+          protocolFactory.getProtocol(transport));
+      out.flush();
+    } catch (TException e) {
+      throw new ServletException(e);
+    }
+  }
+
+  @Override
+  protected void doGet(HttpServletRequest request, HttpServletResponse response)
+      throws ServletException, IOException {
+
+    doPost(request, response);
   }
 }
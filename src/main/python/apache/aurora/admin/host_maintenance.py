@@ -19,6 +19,7 @@ from twitter.common.quantity import Amount, Time
 
 from apache.aurora.admin.admin_util import format_sla_results, print_results
 from apache.aurora.client.api import AuroraClientAPI
+from apache.aurora.client.api.sla import DomainTaskSnapshot
 from apache.aurora.client.base import check_and_log_response, DEFAULT_GROUPING, group_hosts
 
 from gen.apache.aurora.api.ttypes import Hosts, MaintenanceMode
@@ -38,10 +39,12 @@ class HostMaintenance(object):
   """
 
   START_MAINTENANCE_DELAY = Amount(30, Time.SECONDS)
+  MIN_DRAIN_POLL_DELAY = Amount(5, Time.SECONDS)
 
   SLA_MIN_JOB_INSTANCE_COUNT = 20
   SLA_UPTIME_PERCENTAGE_LIMIT = 95
   SLA_UPTIME_DURATION_LIMIT = Amount(30, Time.MINUTES)
+  SLA_SNAPSHOT_MAX_AGE = Amount(5, Time.MINUTES)
 
 
   @classmethod
@@ -103,7 +106,8 @@ class HostMaintenance(object):
     for hostname in drained_hosts.hostNames:
       callback(hostname)
 
-  def _check_sla(self, hostnames, grouping_function, percentage=None, duration=None):
+  def _check_sla(self, hostnames, grouping_function, percentage=None, duration=None,
+      down_hostnames=None, sla_snapshot=None):
     """Check if the provided list of hosts passes the job uptime SLA check.
 
     This is an all-or-nothing check, meaning that all provided hosts must pass their job
@@ -117,16 +121,22 @@ class HostMaintenance(object):
     :type percentage: float
     :param duration: SLA uptime duration override
     :type duration: twitter.common.quantity.Amount
+    :param down_hostnames: hosts already being drained, whose tasks are considered down
+    :type down_hostnames: set of strings
+    :param sla_snapshot: job tasks to reuse from the previous SLA checks of a maintenance
+    :type sla_snapshot: apache.aurora.client.api.sla.DomainTaskSnapshot
     :rtype: set of unsafe hosts
     """
     sla_percentage = percentage or self.SLA_UPTIME_PERCENTAGE_LIMIT
     sla_duration = duration or self.SLA_UPTIME_DURATION_LIMIT
 
-    vector = self._client.sla_get_safe_domain_vector(self.SLA_MIN_JOB_INSTANCE_COUNT, hostnames)
+    vector = self._client.sla_get_safe_domain_vector(
+        self.SLA_MIN_JOB_INSTANCE_COUNT, hostnames, sla_snapshot)
     host_groups = vector.probe_hosts(
       sla_percentage,
       sla_duration.as_(Time.SECONDS),
-      grouping_function)
+      grouping_function,
+      down_hostnames)
 
     # Given that maintenance is performed 1 group at a time, any result longer than 1 group
     # should be considered a batch failure.
@@ -142,6 +152,123 @@ class HostMaintenance(object):
 
     return unsafe_hostnames
 
+  def _check_group_sla(self, hosts, grouping_function, percentage, duration,
+      not_drained_hostnames, draining_hostnames=None, sla_snapshot=None):
+    """Check the SLA of a group of hosts, ending maintenance for the hosts that do not pass it.
+
+    :param hosts: Hosts of the group to check
+    :type hosts: gen.apache.aurora.ttypes.Hosts
+    :param grouping_function: grouping function to apply to the given hosts
+    :type grouping_function: function
+    :param percentage: SLA uptime percentage override
+    :type percentage: float
+    :param duration: SLA uptime duration override
+    :type duration: twitter.common.quantity.Amount
+    :param not_drained_hostnames: set to add the hosts that did not pass the SLA check to
+    :type not_drained_hostnames: set of strings
+    :param draining_hostnames: hosts of other groups that are being drained
+    :type draining_hostnames: set of strings
+    :param sla_snapshot: job tasks to reuse from the previous SLA checks of a maintenance
+    :type sla_snapshot: apache.aurora.client.api.sla.DomainTaskSnapshot
+    :rtype: Hosts that passed the SLA check, or None if no host did
+    """
+    log.info('Beginning SLA check for %s' % hosts.hostNames)
+    unsafe_hostnames = self._check_sla(
+        list(hosts.hostNames),
+        grouping_function,
+        percentage,
+        duration,
+        draining_hostnames,
+        sla_snapshot)
+
+    if unsafe_hostnames:
+      log.warning('Some hosts did not pass SLA check and will not be drained! '
+                  'Skipping hosts: %s' % unsafe_hostnames)
+      self._complete_maintenance(Hosts(unsafe_hostnames))
+      not_drained_hostnames |= unsafe_hostnames
+      drainable_hostnames = hosts.hostNames - unsafe_hostnames
+      return Hosts(drainable_hostnames) if drainable_hostnames else None
+
+    log.info('All hosts passed SLA check.')
+    return hosts
+
+  def _perform_concurrent_maintenance(self, batches, grouping_function, callback, percentage,
+      duration, not_drained_hostnames, max_groups_in_flight, clock, sla_snapshot=None):
+    """Drain up to max_groups_in_flight groups of hosts at once.
+
+    A group starts draining once it passes its SLA check, with the hosts of the groups already
+    draining considered down. The maintenance status of all draining hosts is polled with a single
+    call. Polls follow each other after MIN_DRAIN_POLL_DELAY while hosts keep draining, backing off
+    to START_MAINTENANCE_DELAY otherwise. The callback runs on the hosts of a group, and their
+    maintenance ends, as soon as the whole group is drained.
+
+    :param batches: Hosts of every group, in order
+    :type batches: iterable of gen.apache.aurora.ttypes.Hosts
+    :param not_drained_hostnames: set to add the hosts that did not pass the SLA check to
+    :type not_drained_hostnames: set of strings
+    :param max_groups_in_flight: maximum number of groups to drain at once
+    :type max_groups_in_flight: int
+    :param clock: time module for testing
+    :type clock: time
+    :param sla_snapshot: job tasks to reuse across the SLA checks
+    :type sla_snapshot: apache.aurora.client.api.sla.DomainTaskSnapshot
+    """
+    batches = iter(batches)
+    in_flight = []
+    delay_secs = self.MIN_DRAIN_POLL_DELAY.as_(Time.SECONDS)
+    while True:
+      while len(in_flight) < max_groups_in_flight:
+        hosts = next(batches, None)
+        if hosts is None:
+          break
+        draining_hostnames = set().union(*[group.hostNames for group, _ in in_flight])
+        hosts = self._check_group_sla(hosts, grouping_function, percentage, duration,
+            not_drained_hostnames, draining_hostnames, sla_snapshot)
+        if hosts:
+          check_and_log_response(self._client.drain_hosts(hosts))
+          in_flight.append((hosts, set(hosts.hostNames)))
+
+      if not in_flight:
+        return
+
+      log.info('Sleeping for %s seconds.' % delay_secs)
+      clock.sleep(delay_secs)
+      drained_hostnames = self._poll_drained_hosts(
+          set().union(*[not_ready for _, not_ready in in_flight]))
+      for hosts, not_ready_hostnames in list(in_flight):
+        not_ready_hostnames -= drained_hostnames
+        if not not_ready_hostnames:
+          in_flight.remove((hosts, not_ready_hostnames))
+          if sla_snapshot is not None:
+            sla_snapshot.hosts_drained(hosts.hostNames)
+          if callback:
+            self._operate_on_hosts(hosts, callback)
+          self._complete_maintenance(hosts)
+
+      if drained_hostnames:
+        delay_secs = self.MIN_DRAIN_POLL_DELAY.as_(Time.SECONDS)
+      else:
+        delay_secs = min(2 * delay_secs, self.START_MAINTENANCE_DELAY.as_(Time.SECONDS))
+
+  def _poll_drained_hosts(self, hostnames):
+    """Query the maintenance status of hosts being drained.
+
+    :param hostnames: hosts that are not drained yet
+    :type hostnames: set of strings
+    :rtype: set of the hosts that are drained
+    """
+    resp = self._client.maintenance_status(Hosts(set(hostnames)))
+    if not resp.result.maintenanceStatusResult.statuses:
+      return set(hostnames)
+    drained_hostnames = set()
+    for host_status in resp.result.maintenanceStatusResult.statuses:
+      if host_status.mode != MaintenanceMode.DRAINED:
+        log.warning('%s is currently in status %s' %
+            (host_status.host, MaintenanceMode._VALUES_TO_NAMES[host_status.mode]))
+      else:
+        drained_hostnames.add(host_status.host)
+    return drained_hostnames
+
   def end_maintenance(self, hostnames):
     """Pull a list of hostnames out of maintenance mode.
 
@@ -162,7 +289,8 @@ class HostMaintenance(object):
     check_and_log_response(self._client.start_maintenance(Hosts(set(hostnames))))
 
   def perform_maintenance(self, hostnames, grouping_function=DEFAULT_GROUPING,
-                          callback=None, percentage=None, duration=None, output_file=None):
+                          callback=None, percentage=None, duration=None, output_file=None,
+                          max_groups_in_flight=1, clock=time):
     """Wrap a callback in between sending hosts into maintenance mode and back.
 
     Walk through the process of putting hosts into maintenance, draining them of tasks,
@@ -181,34 +309,43 @@ class HostMaintenance(object):
     :type duration: twitter.common.quantity.Time
     :param output_file: file to write hosts that were not drained due to failed SLA check
     :type output_file: string
+    :param max_groups_in_flight: maximum number of groups to drain at once
+    :type max_groups_in_flight: int
+    :param clock: time module for testing
+    :type clock: time
     """
     self.start_maintenance(hostnames)
     not_drained_hostnames = set()
-
-    for hosts in self.iter_batches(hostnames, grouping_function):
-      log.info('Beginning SLA check for %s' % hosts.hostNames)
-      unsafe_hostnames = self._check_sla(
-          list(hosts.hostNames),
+    # The groups mostly share the same jobs, reuse their tasks across the SLA checks. Refetch
+    # them at least once per SLA duration, so that restarted tasks do not keep their old uptimes.
+    sla_snapshot = DomainTaskSnapshot(max_age_secs=min(
+        self.SLA_SNAPSHOT_MAX_AGE.as_(Time.SECONDS),
+        (duration or self.SLA_UPTIME_DURATION_LIMIT).as_(Time.SECONDS)))
+
+    if max_groups_in_flight > 1:
+      self._perform_concurrent_maintenance(
+          self.iter_batches(hostnames, grouping_function),
           grouping_function,
+          callback,
           percentage,
-          duration)
-
-      if unsafe_hostnames:
-        log.warning('Some hosts did not pass SLA check and will not be drained! '
-                    'Skipping hosts: %s' % unsafe_hostnames)
-        self._complete_maintenance(Hosts(unsafe_hostnames))
-        not_drained_hostnames |= unsafe_hostnames
-        drainable_hostnames = hosts.hostNames - unsafe_hostnames
-        if not drainable_hostnames:
+          duration,
+          not_drained_hostnames,
+          max_groups_in_flight,
+          clock,
+          sla_snapshot)
+    else:
+      for hosts in self.iter_batches(hostnames, grouping_function):
+        hosts = self._check_group_sla(
+            hosts, grouping_function, percentage, duration, not_drained_hostnames,
+            sla_snapshot=sla_snapshot)
+        if not hosts:
           continue
-        hosts = Hosts(drainable_hostnames)
-      else:
-        log.info('All hosts passed SLA check.')
 
-      self._drain_hosts(hosts)
-      if callback:
-        self._operate_on_hosts(hosts, callback)
-      self._complete_maintenance(hosts)
+        self._drain_hosts(hosts)
+        sla_snapshot.hosts_drained(hosts.hostNames)
+        if callback:
+          self._operate_on_hosts(hosts, callback)
+        self._complete_maintenance(hosts)
 
     if not_drained_hostnames:
       output = '\n'.join(list(not_drained_hostnames))
@@ -14,14 +14,19 @@
 
 from __future__ import print_function
 
+from copy import copy
+from threading import Lock
+
 from twitter.common import log
+from twitter.common.concurrent import ThreadPoolExecutor
 
 from apache.aurora.common.aurora_job_key import AuroraJobKey
 from apache.aurora.common.auth import make_session_key
 from apache.aurora.common.cluster import Cluster
 
+from .paging import DEFAULT_PAGE_SIZE, iter_tasks
 from .restarter import Restarter
-from .scheduler_client import SchedulerProxy
+from .scheduler_client import SchedulerProxy, SchedulerProxyPool
 from .sla import Sla
 from .updater import Updater
 
@@ -32,18 +37,27 @@ from gen.apache.aurora.api.ttypes import Identity, ResourceAggregate, ResponseCo
 class AuroraClientAPI(object):
   """This class provides the API to talk to the twitter scheduler"""
 
+  DEFAULT_MAX_CONCURRENCY = 4
+
   class Error(Exception): pass
   class TypeError(Error, TypeError): pass
   class ClusterMismatch(Error, ValueError): pass
   class ThriftInternalError(Error): pass
 
-  def __init__(self, cluster, verbose=False, session_key_factory=make_session_key):
+  def __init__(self, cluster, verbose=False, session_key_factory=make_session_key,
+               max_concurrency=DEFAULT_MAX_CONCURRENCY):
     if not isinstance(cluster, Cluster):
       raise TypeError('AuroraClientAPI expects instance of Cluster for "cluster", got %s' %
           type(cluster))
     self._scheduler_proxy = SchedulerProxy(
         cluster, verbose=verbose, session_key_factory=session_key_factory)
     self._cluster = cluster
+    self._proxy_pool = SchedulerProxyPool(
+        lambda: SchedulerProxy(cluster, verbose=verbose, session_key_factory=session_key_factory),
+        max_concurrency)
+    self._max_concurrency = max_concurrency
+    self._executor = None
+    self._executor_lock = Lock()
 
   @property
   def cluster(self):
@@ -53,6 +67,32 @@ class AuroraClientAPI(object):
   def scheduler_proxy(self):
     return self._scheduler_proxy
 
+  def submit(self, method_name, *args, **kwargs):
+    """Calls an API method in the background, returning a concurrent.futures.Future of its result.
+
+    At most max_concurrency calls run at once, each over a scheduler connection of its own taken
+    from a pool; further calls wait for one to finish.  The method runs on a pool thread, so it
+    must not itself wait for calls submitted to the same API.
+
+    Arguments:
+    method_name -- name of the AuroraClientAPI method to call, e.g. 'check_status'.
+    args, kwargs -- arguments of the method.
+    """
+    method = getattr(self, method_name)
+    if not callable(method):
+      raise TypeError('%s is not an AuroraClientAPI method' % method_name)
+
+    def call():
+      with self._proxy_pool.proxy() as scheduler_proxy:
+        api = copy(self)
+        api._scheduler_proxy = scheduler_proxy
+        return getattr(api, method_name)(*args, **kwargs)
+
+    with self._executor_lock:
+      if self._executor is None:
+        self._executor = ThreadPoolExecutor(max_workers=self._max_concurrency)
+    return self._executor.submit(call)
+
   def create_job(self, config, lock=None):
     log.info('Creating job %s' % config.name())
     log.debug('Full configuration: %s' % config.job())
@@ -117,6 +157,23 @@ class AuroraClientAPI(object):
     except SchedulerProxy.ThriftInternalError as e:
       raise self.ThriftInternalError(e.args[0])
 
+  def iter_tasks(self, query, page_size=DEFAULT_PAGE_SIZE):
+    """Yields all matching tasks, fetched page_size at a time. Raises paging.QueryError if the
+    scheduler fails to return a page."""
+    try:
+      for task in iter_tasks(self._scheduler_proxy.getTasksStatus, query, page_size):
+        yield task
+    except SchedulerProxy.ThriftInternalError as e:
+      raise self.ThriftInternalError(e.args[0])
+
+  def query_no_configs(self, query):
+    """Returns all matching tasks without TaskConfig.executorConfig set. Only meant for callers
+    that never show the task configs, e.g. pollers and monitors."""
+    try:
+      return self._scheduler_proxy.getTasksWithoutConfigs(query)
+    except SchedulerProxy.ThriftInternalError as e:
+      raise self.ThriftInternalError(e.args[0])
+
   def update_job(self, config, health_check_interval_seconds=3, instances=None):
     """Run a job update for a given config, for the specified instances.  If
        instances is left unspecified, update all instances.  Returns whether or not
@@ -214,11 +271,12 @@ class AuroraClientAPI(object):
     self._assert_valid_job_key(job_key)
     return Sla(self._scheduler_proxy).get_job_uptime_vector(job_key)
 
-  def sla_get_safe_domain_vector(self, min_instance_count, hosts=None):
+  def sla_get_safe_domain_vector(self, min_instance_count, hosts=None, snapshot=None):
     return Sla(self._scheduler_proxy).get_domain_uptime_vector(
         self._cluster,
         min_instance_count,
-        hosts)
+        hosts,
+        snapshot)
 
   def _assert_valid_job_key(self, job_key):
     if not isinstance(job_key, AuroraJobKey):
@@ -23,12 +23,13 @@ from pystachio import Environment, Required, String
 from twitter.common import log
 
 from apache.aurora.client.api import AuroraClientAPI
+from apache.aurora.client.api.paging import QueryError
 from apache.aurora.common.cluster import Cluster
 from apache.aurora.config.schema.base import MesosContext
 from apache.thermos.config.schema import ThermosContext
 
 from gen.apache.aurora.api.constants import LIVE_STATES
-from gen.apache.aurora.api.ttypes import Identity, ResponseCode, TaskQuery
+from gen.apache.aurora.api.ttypes import Identity, TaskQuery
 
 
 class CommandRunnerTrait(Cluster.Trait):
@@ -117,12 +118,11 @@ class DistributedCommandRunner(object):
 
   def resolve(self):
     for job in self._jobs:
-      resp = self._api.query(self.query_from(self._role, self._env, job))
-      if resp.responseCode != ResponseCode.OK:
+      try:
+        for task in self._api.iter_tasks(self.query_from(self._role, self._env, job)):
+          yield task
+      except QueryError:
         self._log(logging.ERROR, 'Failed to query job: %s' % job)
-        continue
-      for task in resp.result.scheduleStatusResult.tasks:
-        yield task
 
   def process_arguments(self, command, **kw):
     for task in self.resolve():
@@ -155,11 +155,12 @@ class InstanceDistributedCommandRunner(DistributedCommandRunner):
     self.instances = instances
 
   def resolve(self):
-    resp = self._api.query(self.query_from(self._role, self._env, self._job, self.instances))
-    if resp.responseCode == ResponseCode.OK:
-      for task in resp.result.scheduleStatusResult.tasks:
+    try:
+      for task in self._api.iter_tasks(
+          self.query_from(self._role, self._env, self._job, self.instances)):
         yield task
-    else:
+    except QueryError as e:
+      message = e.response.messageDEPRECATED
       self._log(logging.ERROR,
-          "Error: could not retrieve task information for run command: %s" % resp.messageDEPRECATED)
-      raise ValueError("Could not retrieve task information: %s" % resp.messageDEPRECATED)
+          "Error: could not retrieve task information for run command: %s" % message)
+      raise ValueError("Could not retrieve task information: %s" % message)
@@ -13,12 +13,14 @@
 #
 
 import time
+from functools import partial
 
 from twitter.common import log
 
 from .health_check import StatusHealthCheck
+from .job_monitor import JobMonitor
 
-from gen.apache.aurora.api.ttypes import Identity, ResponseCode, ScheduleStatus, TaskQuery
+from gen.apache.aurora.api.ttypes import ScheduleStatus
 
 
 class Instance(object):
@@ -35,21 +37,121 @@ class Instance(object):
     return ('[birthday=%s, healthy=%s, finished=%s]' % (self.birthday, self.healthy, self.finished))
 
 
+class InstanceWatch(object):
+  """Tracks the health of a set of instances watched since start_time."""
+
+  def __init__(self, instance_ids, start_time, restart_threshold, watch_secs, health_check):
+    self.instance_ids = set(instance_ids)
+    self._restart_threshold = restart_threshold
+    self._watch_secs = watch_secs
+    self._health_check = health_check
+    self._expected_healthy_by = start_time + restart_threshold
+    self._max_time = start_time + restart_threshold + watch_secs
+    self._instance_states = {}
+
+  def _finished_instances(self):
+    return dict((s_id, s) for s_id, s in self._instance_states.items() if s.finished)
+
+  def _set_instance_healthy(self, instance_id, now):
+    if instance_id not in self._instance_states:
+      self._instance_states[instance_id] = Instance(now)
+    instance = self._instance_states.get(instance_id)
+    if now > (instance.birthday + self._watch_secs):
+      log.info('Instance %s has been up and healthy for at least %d seconds' % (
+        instance_id, self._watch_secs))
+      instance.set_healthy(True)
+
+  def _maybe_set_instance_unhealthy(self, instance_id, retriable, now):
+    # An instance that was previously healthy and currently unhealthy has failed.
+    if instance_id in self._instance_states:
+      log.info('Instance %s is unhealthy' % instance_id)
+      self._instance_states[instance_id].set_healthy(False)
+    # If the restart threshold has expired or if the instance cannot be retried it is unhealthy.
+    elif now > self._expected_healthy_by or not retriable:
+      log.info('Instance %s was not reported healthy within %d seconds' % (
+        instance_id, self._restart_threshold))
+      self._instance_states[instance_id] = Instance(finished=True)
+
+  def update(self, tasks_by_instance, now):
+    """Applies the health of the running tasks observed at a point in time.
+
+    Arguments:
+    tasks_by_instance -- dict of instance ID to its running ScheduledTask.
+    now -- the time the tasks were observed at.
+
+    Returns a set of instances that are considered failed once the watch is complete, or None if
+    any instance has yet to be decided.
+    """
+    for instance_id in self.instance_ids:
+      if instance_id not in self._finished_instances():
+        running_task = tasks_by_instance.get(instance_id)
+        if running_task is not None:
+          task_healthy, retriable = self._health_check.health(running_task)
+          if task_healthy:
+            self._set_instance_healthy(instance_id, now)
+          else:
+            self._maybe_set_instance_unhealthy(instance_id, retriable, now)
+        else:
+          # Set retriable=True since an instance should be retried if it has not been healthy.
+          self._maybe_set_instance_unhealthy(instance_id, True, now)
+
+    log.debug('Instances health: %s' % ['%s: %s' % val for val in self._instance_states.items()])
+
+    # Return if all tasks are finished.
+    if set(self._finished_instances().keys()) == self.instance_ids:
+      return set([s_id for s_id, s in self._instance_states.items() if not s.healthy])
+
+    # Return if time is up.
+    if now > self._max_time:
+      return set([s_id for s_id in self.instance_ids if s_id not in self._instance_states
+                                             or not self._instance_states[s_id].healthy])
+
+    return None
+
+
 class InstanceWatcher(object):
+  """Watches the health of instances of a job.
+
+  The watches are polled by a JobMonitor, which may be shared with other waiters on the same job,
+  e.g. the kills of an update, so that one query serves all of them.
+  """
+
   def __init__(self,
                scheduler,
                job_key,
                restart_threshold,
                watch_secs,
                health_check_interval_seconds,
-               clock=time):
+               clock=time,
+               job_monitor=None):
 
-    self._scheduler = scheduler
-    self._job_key = job_key
     self._restart_threshold = restart_threshold
     self._watch_secs = watch_secs
     self._health_check_interval_seconds = health_check_interval_seconds
     self._clock = clock
+    self._job_monitor = job_monitor or JobMonitor(scheduler, job_key, clock=clock)
+    self._futures = {}
+
+  def start(self, instance_ids, health_check=None):
+    """Starts watching a set of instances without blocking.
+
+    Arguments:
+    instance_ids -- set of instances to watch.
+
+    Returns an InstanceWatch to pass to watch_any.
+    """
+    log.info('Watching instances: %s' % instance_ids)
+    watch = InstanceWatch(
+        instance_ids,
+        self._clock.time(),
+        self._restart_threshold,
+        self._watch_secs,
+        health_check or StatusHealthCheck())
+    self._futures[watch] = self._job_monitor.watch_tasks(
+        partial(self._update_watch, watch),
+        instances=watch.instance_ids,
+        poll_interval=self._health_check_interval_seconds)
+    return watch
 
   def watch(self, instance_ids, health_check=None):
     """Watches a set of instances and detects failures based on a delegated health check.
@@ -59,87 +161,32 @@ class InstanceWatcher(object):
 
     Returns a set of instances that are considered failed.
     """
-    log.info('Watching instances: %s' % instance_ids)
-    instance_ids = set(instance_ids)
-    health_check = health_check or StatusHealthCheck()
-    now = self._clock.time()
-    expected_healthy_by = now + self._restart_threshold
-    max_time = now + self._restart_threshold + self._watch_secs
-
-    instance_states = {}
-
-    def finished_instances():
-      return dict((s_id, s) for s_id, s in instance_states.items() if s.finished)
-
-    def set_instance_healthy(instance_id, now):
-      if instance_id not in instance_states:
-        instance_states[instance_id] = Instance(now)
-      instance = instance_states.get(instance_id)
-      if now > (instance.birthday + self._watch_secs):
-        log.info('Instance %s has been up and healthy for at least %d seconds' % (
-          instance_id, self._watch_secs))
-        instance.set_healthy(True)
-
-    def maybe_set_instance_unhealthy(instance_id, retriable):
-      # An instance that was previously healthy and currently unhealthy has failed.
-      if instance_id in instance_states:
-        log.info('Instance %s is unhealthy' % instance_id)
-        instance_states[instance_id].set_healthy(False)
-      # If the restart threshold has expired or if the instance cannot be retried it is unhealthy.
-      elif now > expected_healthy_by or not retriable:
-        log.info('Instance %s was not reported healthy within %d seconds' % (
-          instance_id, self._restart_threshold))
-        instance_states[instance_id] = Instance(finished=True)
-
-    while True:
-      running_tasks = self._get_tasks_by_instance_id(instance_ids)
-      now = self._clock.time()
-      tasks_by_instance = dict((task.assignedTask.instanceId, task) for task in running_tasks)
-      for instance_id in instance_ids:
-        if instance_id not in finished_instances():
-          running_task = tasks_by_instance.get(instance_id)
-          if running_task is not None:
-            task_healthy, retriable = health_check.health(running_task)
-            if task_healthy:
-              set_instance_healthy(instance_id, now)
-            else:
-              maybe_set_instance_unhealthy(instance_id, retriable)
-          else:
-            # Set retriable=True since an instance should be retried if it has not been healthy.
-            maybe_set_instance_unhealthy(instance_id, retriable=True)
-
-      log.debug('Instances health: %s' % ['%s: %s' % val for val in instance_states.items()])
-
-      # Return if all tasks are finished.
-      if set(finished_instances().keys()) == instance_ids:
-        return set([s_id for s_id, s in instance_states.items() if not s.healthy])
-
-      # Return if time is up.
-      if now > max_time:
-        return set([s_id for s_id in instance_ids if s_id not in instance_states
-                                             or not instance_states[s_id].healthy])
-
-      self._clock.sleep(self._health_check_interval_seconds)
-
-  def _get_tasks_by_instance_id(self, instance_ids):
-    log.debug('Querying instance statuses.')
-    query = TaskQuery()
-    query.owner = Identity(role=self._job_key.role)
-    query.environment = self._job_key.environment
-    query.jobName = self._job_key.name
-    query.statuses = set([ScheduleStatus.RUNNING])
-
-    query.instanceIds = instance_ids
-    try:
-      resp = self._scheduler.getTasksStatus(query)
-    except IOError as e:
-      log.error('IO Exception during scheduler call: %s' % e)
-      return []
-
-    tasks = []
-    if resp.responseCode == ResponseCode.OK:
-      tasks = resp.result.scheduleStatusResult.tasks
-
-    log.debug('Response from scheduler: %s (message: %s)'
-        % (ResponseCode._VALUES_TO_NAMES[resp.responseCode], resp.messageDEPRECATED))
-    return tasks
+    watch = self.start(instance_ids, health_check)
+    return self.watch_any([watch])[watch]
+
+  def watch_any(self, watches):
+    """Polls several started watches until at least one of them completes.
+
+    Arguments:
+    watches -- list of InstanceWatch objects returned by start.
+
+    Returns a dict of each completed InstanceWatch to its set of failed instances.
+    """
+    self._job_monitor.wait_any([self._futures[watch] for watch in watches])
+    return dict((watch, self._futures.pop(watch).result())
+                for watch in watches if self._futures[watch].done())
+
+  def stop(self, watches):
+    """Stops polling started watches that will not be waited for.
+
+    Arguments:
+    watches -- list of InstanceWatch objects returned by start.
+    """
+    for watch in watches:
+      self._futures.pop(watch).cancel()
+
+  @classmethod
+  def _update_watch(cls, watch, tasks_by_instance, now):
+    running_tasks = dict((instance_id, task) for instance_id, task in tasks_by_instance.items()
+                         if task.status == ScheduleStatus.RUNNING)
+    return watch.update(running_tasks, now)
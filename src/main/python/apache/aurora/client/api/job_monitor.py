@@ -12,19 +12,79 @@
 # limitations under the License.
 #
 
+import threading
 import time
 
 from thrift.transport import TTransport
 from twitter.common import log
+from twitter.common.concurrent import Future
 from twitter.common.quantity import Amount, Time
 
 from gen.apache.aurora.api.constants import LIVE_STATES, TERMINAL_STATES
-from gen.apache.aurora.api.ttypes import Identity, TaskQuery
+from gen.apache.aurora.api.ttypes import Identity, ResponseCode, TaskQuery
 
 
 class JobMonitor(object):
-  MIN_POLL_INTERVAL = Amount(2, Time.SECONDS)
-  MAX_POLL_INTERVAL = Amount(150, Time.SECONDS)
+  """Waits for the tasks of a job to reach given states.
+
+  Any number of waiters, e.g. the kills and the health watches of the batches of an update, may
+  wait on the same monitor at once.  They are all served by one polling loop that queries the
+  scheduler for the union of their instances, and that runs on whichever thread is blocked in
+  wait(), wait_any() or wait_until(), one at a time.
+
+  The polling interval of state waiters adapts to the pending transitions: it drops to
+  min_poll_interval after a poll that saw any of them complete and otherwise grows with the age of
+  the youngest waiter, up to max_poll_interval, so that quick transitions are noticed promptly and
+  stalled ones are not polled needlessly.  Task observers are polled at least as often as their own
+  poll interval.
+  """
+
+  MIN_POLL_INTERVAL = Amount(1, Time.SECONDS)
+  MAX_POLL_INTERVAL = Amount(30, Time.SECONDS)
+  WAIT_TIMEOUT = Amount(4, Time.MINUTES)
+
+  # Fraction of the age of the youngest waiter to wait before polling again.
+  BACKOFF_FRACTION = 0.25
+
+  class Waiter(object):
+    """Resolves its future once the latest task of each of its instances meets a predicate."""
+
+    def __init__(self, predicate, instances, started, deadline, poll_interval=None):
+      self.future = Future()
+      self.predicate = predicate
+      self.instances = frozenset(int(s) for s in instances) if instances else None
+      self.started = started
+      self.deadline = deadline
+      self.poll_interval = poll_interval
+      self.pending = None
+
+    def update(self, tasks_by_instance, now):
+      """Returns whether any of the instances met the predicate since the previous poll."""
+      pending = sum(1 for task in tasks_by_instance.values() if not self.predicate(task.status))
+      progress = False
+      if pending == 0:
+        self.future.set_result(True)
+        progress = True
+      elif self.deadline is not None and now >= self.deadline:
+        self.future.set_result(False)
+      elif self.pending is not None and pending < self.pending:
+        progress = True
+      self.pending = pending
+      return progress
+
+  class Observer(Waiter):
+    """Feeds the latest tasks of its instances to a callback until the callback returns a result,
+    which its future then resolves to."""
+
+    def __init__(self, callback, instances, started, poll_interval):
+      super(JobMonitor.Observer, self).__init__(None, instances, started, None, poll_interval)
+      self.callback = callback
+
+    def update(self, tasks_by_instance, now):
+      result = self.callback(tasks_by_instance, now)
+      if result is not None:
+        self.future.set_result(result)
+      return False
 
   @classmethod
   def running_or_finished(cls, status):
@@ -35,32 +95,41 @@ class JobMonitor(object):
     return status in TERMINAL_STATES
 
   def __init__(self, scheduler, job_key, clock=time,
-               min_poll_interval=MIN_POLL_INTERVAL, max_poll_interval=MAX_POLL_INTERVAL):
+               min_poll_interval=MIN_POLL_INTERVAL, max_poll_interval=MAX_POLL_INTERVAL,
+               wait_timeout=WAIT_TIMEOUT):
     self._scheduler = scheduler
     self._job_key = job_key
     self._clock = clock
-    self._min_poll_interval = min_poll_interval
-    self._max_poll_interval = max_poll_interval
+    self._min_poll_interval = min_poll_interval.as_(Time.SECONDS)
+    self._max_poll_interval = max_poll_interval.as_(Time.SECONDS)
+    self._wait_timeout = wait_timeout.as_(Time.SECONDS)
+    self._lock = threading.Lock()
+    self._waiters = []
+    self._next_poll = None
 
   def iter_query(self, query):
     try:
-      res = self._scheduler.getTasksStatus(query)
-    except TTransport.TTransportException as e:
+      res = self._scheduler.getTasksWithoutConfigs(query)
+    except (IOError, TTransport.TTransportException) as e:
       log.error('Failed to query tasks from scheduler: %s' % e)
       return
-    if res is None or res.result is None:
+    if res is None or res.responseCode != ResponseCode.OK or res.result is None:
       return
     for task in res.result.scheduleStatusResult.tasks:
       yield task
 
-  def states(self, query):
-    states = {}
+  def tasks(self, query):
+    """Returns a dict of instance ID to the latest task of that instance matching a query."""
+    tasks = {}
     for task in self.iter_query(query):
-      status, instance_id = task.status, task.assignedTask.instanceId
-      first_timestamp = task.taskEvents[0].timestamp
-      if instance_id not in states or first_timestamp > states[instance_id][0]:
-        states[instance_id] = (first_timestamp, status)
-    return dict((instance_id, status[1]) for (instance_id, status) in states.items())
+      instance_id = task.assignedTask.instanceId
+      if (instance_id not in tasks or
+          task.taskEvents[0].timestamp > tasks[instance_id].taskEvents[0].timestamp):
+        tasks[instance_id] = task
+    return tasks
+
+  def states(self, query):
+    return dict((instance_id, task.status) for (instance_id, task) in self.tasks(query).items())
 
   def create_query(self, instances=None):
     return TaskQuery(
@@ -69,6 +138,105 @@ class JobMonitor(object):
         jobName=self._job_key.name,
         instanceIds=frozenset([int(s) for s in instances]) if instances else None)
 
+  def watch_until(self, predicate, instances=None, with_timeout=False):
+    """Starts waiting until all requested instances return true for a predicate, without blocking.
+
+    Arguments:
+    predicate -- predicate (from ScheduleStatus => Boolean) to check completion with.
+    instances -- optional subset of job instances to wait for.
+    with_timeout -- if set, gives up after the monitor's wait timeout.
+
+    Returns a Future that resolves to True once the predicate is met, or to False once the timeout
+    has expired.  The Future only progresses while some thread is blocked in wait(), wait_any() or
+    wait_until().
+    """
+    now = self._clock.time()
+    return self._add(
+        self.Waiter(predicate, instances, now, now + self._wait_timeout if with_timeout else None))
+
+  def watch_tasks(self, callback, instances=None, poll_interval=None):
+    """Starts feeding the latest tasks of the requested instances to a callback, without blocking.
+
+    Arguments:
+    callback -- callable from (dict of instance ID to ScheduledTask, poll time) to a result, or to
+                None while the result is not known yet.
+    instances -- optional subset of job instances to observe.
+    poll_interval -- optional longest time in seconds between two polls for this callback.
+
+    Returns a Future that resolves to the first result of the callback.  Cancelling the Future
+    stops the polls for it.  The Future only progresses while some thread is blocked in wait(),
+    wait_any() or wait_until().
+    """
+    return self._add(self.Observer(callback, instances, self._clock.time(), poll_interval))
+
+  def _add(self, waiter):
+    with self._lock:
+      self._waiters.append(waiter)
+      # A new waiter is likely to complete soon, poll for it right away.
+      self._next_poll = waiter.started
+    return waiter.future
+
+  def wait(self, futures):
+    """Polls on behalf of all waiters until the given futures from this monitor are all done."""
+    self._wait(futures, all)
+
+  def wait_any(self, futures):
+    """Polls on behalf of all waiters until any of the given futures from this monitor is done."""
+    self._wait(futures, any)
+
+  def _wait(self, futures, done):
+    futures = list(futures)
+    awake = None
+    while futures and not done(future.done() for future in futures):
+      with self._lock:
+        # A sleep lasts at least as long as requested, even if the clock does not tell.
+        now = self._clock.time() if awake is None else max(self._clock.time(), awake)
+        if self._next_poll is not None and now >= self._next_poll:
+          self._poll(now)
+        delay = self._next_poll - now if self._next_poll is not None else 0
+      if delay > 0 and not done(future.done() for future in futures):
+        self._clock.sleep(delay)
+        awake = now + delay
+
+  def _poll(self, now):
+    waiters = [waiter for waiter in self._waiters if not waiter.future.done()]
+    if not waiters:
+      self._waiters, self._next_poll = [], None
+      return
+
+    if any(waiter.instances is None for waiter in waiters):
+      tasks = self.tasks(self.create_query())
+    else:
+      tasks = self.tasks(self.create_query(frozenset().union(
+          *[waiter.instances for waiter in waiters])))
+
+    progress = False
+    for waiter in waiters:
+      if waiter.instances is None:
+        progress = waiter.update(tasks, now) or progress
+      else:
+        progress = waiter.update(dict((instance_id, task) for instance_id, task in tasks.items()
+                                      if instance_id in waiter.instances), now) or progress
+
+    self._waiters = [waiter for waiter in waiters if not waiter.future.done()]
+    if not self._waiters:
+      self._next_poll = None
+      return
+
+    next_polls = [now + waiter.poll_interval for waiter in self._waiters
+                  if waiter.poll_interval is not None]
+    next_polls.extend(waiter.deadline for waiter in self._waiters if waiter.deadline is not None)
+    adaptive = [waiter for waiter in self._waiters if waiter.poll_interval is None]
+    if adaptive:
+      if progress:
+        interval = self._min_poll_interval
+      else:
+        youngest = now - max(waiter.started for waiter in adaptive)
+        interval = min(self._max_poll_interval,
+                       max(self._min_poll_interval, youngest * self.BACKOFF_FRACTION))
+      next_polls.append(now + interval)
+    self._next_poll = min(next_polls)
+
   def wait_until(self, predicate, instances=None, with_timeout=False):
     """Given a predicate (from ScheduleStatus => Boolean), wait until all requested instances
        return true for that predicate OR the timeout expires (if with_timeout=True)
@@ -76,16 +244,10 @@ class JobMonitor(object):
     Arguments:
     predicate -- predicate to check completion with.
     instances -- optional subset of job instances to wait for.
-    with_timeout -- if set, caps waiting time to the MAX_POLL_INTERVAL.
+    with_timeout -- if set, caps waiting time to the monitor's wait timeout.
 
     Returns: True if predicate is met or False if timeout has expired.
     """
-    poll_interval = self._min_poll_interval
-    while not all(predicate(state) for state in self.states(self.create_query(instances)).values()):
-      if with_timeout and poll_interval >= self._max_poll_interval:
-        return False
-
-      self._clock.sleep(poll_interval.as_(Time.SECONDS))
-      poll_interval = min(self._max_poll_interval, 2 * poll_interval)
-
-    return True
+    future = self.watch_until(predicate, instances, with_timeout)
+    self.wait([future])
+    return future.result()
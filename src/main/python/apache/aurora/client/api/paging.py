@@ -0,0 +1,71 @@
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+from copy import copy
+
+from gen.apache.aurora.api.ttypes import ResponseCode
+
+DEFAULT_PAGE_SIZE = 500
+
+
+class QueryError(Exception):
+  """Raised when a page of a task query fails. Carries the failed Response."""
+
+  def __init__(self, response):
+    super(QueryError, self).__init__(
+        'Task query failed: %s' % ResponseCode._VALUES_TO_NAMES.get(response.responseCode))
+    self.response = response
+
+
+def iter_tasks(fetch, query, page_size=DEFAULT_PAGE_SIZE):
+  """Yields the tasks matching a TaskQuery, fetching them a page at a time using the offset and
+  limit of the query, so that at most page_size tasks are held by a response.
+
+  Pages are not read from a single snapshot. The scheduler applies the offset and limit to its task
+  store in hash order, which is not stable: a task inserted or removed anywhere in the cluster
+  between two pages shifts the offsets of the following pages, so unrelated tasks may be silently
+  missed, and tasks already yielded by an earlier page are skipped when a later page repeats them.
+  Only use it where an incomplete result is acceptable, e.g. to display or address tasks; fetch
+  the query in one call where every matching task must be seen.
+
+  Arguments:
+  fetch -- the query RPC, e.g. scheduler.getTasksStatus or scheduler.getTasksWithoutConfigs.
+  query -- TaskQuery to page through. Its own offset and limit, if any, are honoured.
+  page_size -- maximum number of tasks to request at a time.
+
+  Raises QueryError if a page fails.
+  """
+  if page_size <= 0:
+    raise ValueError('page_size must be positive, got %s' % page_size)
+  offset = query.offset or 0
+  remaining = query.limit
+  seen = set()
+  while remaining is None or remaining > 0:
+    page = copy(query)
+    page.offset = offset
+    page.limit = page_size if remaining is None else min(page_size, remaining)
+    resp = fetch(page)
+    if resp.responseCode != ResponseCode.OK:
+      raise QueryError(resp)
+    tasks = resp.result.scheduleStatusResult.tasks or []
+    for task in tasks:
+      if task.assignedTask.taskId is None or task.assignedTask.taskId not in seen:
+        yield task
+    seen.update(task.assignedTask.taskId for task in tasks)
+    if len(tasks) < page.limit:
+      return
+    offset += len(tasks)
+    if remaining is not None:
+      remaining -= len(tasks)
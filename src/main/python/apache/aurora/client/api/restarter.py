@@ -15,6 +15,7 @@
 from twitter.common import log
 
 from .instance_watcher import InstanceWatcher
+from .job_monitor import JobMonitor
 from .updater_util import FailureThreshold
 
 from gen.apache.aurora.api.constants import ACTIVE_STATES
@@ -28,24 +29,27 @@ class Restarter(object):
                health_check_interval_seconds,
                scheduler,
                instance_watcher=None,
-               lock=None):
+               lock=None,
+               job_monitor=None):
     self._job_key = job_key
     self._update_config = update_config
     self.health_check_interval_seconds = health_check_interval_seconds
     self._scheduler = scheduler
     self._lock = lock
+    self._job_monitor = job_monitor or JobMonitor(scheduler, job_key)
     self._instance_watcher = instance_watcher or InstanceWatcher(
         scheduler,
-        job_key.to_thrift(),
+        job_key,
         update_config.restart_threshold,
         update_config.watch_secs,
-        health_check_interval_seconds)
+        health_check_interval_seconds,
+        job_monitor=self._job_monitor)
 
   def restart(self, instances):
     # Verify that this operates on a valid job.
     query = self._job_key.to_thrift_query()
     query.statuses = ACTIVE_STATES
-    status = self._scheduler.getTasksStatus(query)
+    status = self._scheduler.getTasksWithoutConfigs(query)
     if status.responseCode != ResponseCode.OK:
       return status
 
@@ -12,13 +12,19 @@
 # limitations under the License.
 #
 
+import errno
 import functools
+import json
+import os
+import tempfile
 import threading
 import time
 import traceback
+from contextlib import contextmanager
+from Queue import Queue
 
 from pystachio import Default, Integer, String
-from thrift.protocol import TJSONProtocol
+from thrift.protocol import TBinaryProtocol, TCompactProtocol, TJSONProtocol
 from thrift.transport import THttpClient, TTransport
 from twitter.common import log
 from twitter.common.quantity import Amount, Time
@@ -27,7 +33,7 @@ from twitter.common.zookeeper.serverset import ServerSet
 
 from apache.aurora.common.auth import make_session_key, SessionKeyError
 from apache.aurora.common.cluster import Cluster
-from apache.aurora.common.transport import TRequestsTransport
+from apache.aurora.common.transport import DEFAULT_CONTENT_TYPE, TRequestsTransport
 
 from gen.apache.aurora.api import AuroraAdmin
 from gen.apache.aurora.api.constants import CURRENT_API_VERSION
@@ -45,6 +51,17 @@ class SchedulerClientTrait(Cluster.Trait):
   scheduler_uri     = String  # noqa
   proxy_url         = String  # noqa
   auth_mechanism    = Default(String, 'UNAUTHENTICATED')  # noqa
+  thrift_protocol   = Default(String, 'json')  # noqa
+
+
+# Protocol factory and HTTP content type of each thrift_protocol.  The binary protocol uses the C
+# accelerated codec when the thrift library was built with it, and falls back to pure python.
+THRIFT_PROTOCOLS = {
+  'json': (TJSONProtocol.TJSONProtocolFactory(), DEFAULT_CONTENT_TYPE),
+  'binary': (TBinaryProtocol.TBinaryProtocolAcceleratedFactory(),
+             'application/vnd.apache.thrift.binary'),
+  'compact': (TCompactProtocol.TCompactProtocolFactory(), 'application/vnd.apache.thrift.compact'),
+}
 
 
 class SchedulerClient(object):
@@ -62,31 +79,46 @@ class SchedulerClient(object):
     if not isinstance(cluster, Cluster):
       raise TypeError('"cluster" must be an instance of Cluster, got %s' % type(cluster))
     cluster = cluster.with_trait(SchedulerClientTrait)
+    if cluster.thrift_protocol not in THRIFT_PROTOCOLS:
+      raise ValueError('"cluster" specifies an unknown thrift_protocol %r, expected one of %s' % (
+          cluster.thrift_protocol, ', '.join(sorted(THRIFT_PROTOCOLS))))
     if cluster.zk:
-      return ZookeeperSchedulerClient(cluster, port=cluster.zk_port, **kwargs)
+      kwargs.setdefault('uri_cache', SchedulerUriCache())
+      return ZookeeperSchedulerClient(cluster, port=cluster.zk_port,
+          thrift_protocol=cluster.thrift_protocol, **kwargs)
     elif cluster.scheduler_uri:
-      return DirectSchedulerClient(cluster.scheduler_uri)
+      return DirectSchedulerClient(cluster.scheduler_uri, thrift_protocol=cluster.thrift_protocol)
     else:
       raise ValueError('"cluster" does not specify zk or scheduler_uri')
 
-  def __init__(self, verbose=False):
+  def __init__(self, verbose=False, thrift_protocol='json'):
     self._client = None
     self._verbose = verbose
+    self._thrift_protocol = thrift_protocol
 
   def get_thrift_client(self):
     if self._client is None:
       self._client = self._connect()
     return self._client
 
+  def invalidate(self):
+    """Forgets the address of the scheduler after failing to reach it.
+
+    Returns True if that address was cached rather than freshly resolved, in which case it is worth
+    retrying right away.
+    """
+    return False
+
   # per-class implementation -- mostly meant to set up a valid host/port
   # pair and then delegate the opening to SchedulerClient._connect_scheduler
   def _connect(self):
     return None
 
   @classmethod
-  def _connect_scheduler(cls, uri, clock=time):
-    transport = TRequestsTransport(uri)
-    protocol = TJSONProtocol.TJSONProtocol(transport)
+  def _connect_scheduler(cls, uri, clock=time, thrift_protocol='json'):
+    protocol_factory, content_type = THRIFT_PROTOCOLS[thrift_protocol]
+    transport = TRequestsTransport(uri, content_type=content_type)
+    protocol = protocol_factory.getProtocol(transport)
     schedulerClient = AuroraAdmin.Client(protocol)
     for _ in range(cls.THRIFT_RETRIES):
       try:
@@ -102,6 +134,65 @@ class SchedulerClient(object):
     raise cls.CouldNotConnect('Could not connect to %s' % uri)
 
 
+class SchedulerUriCache(object):
+  """An on-disk cache of the scheduler uris resolved from ZooKeeper, one file per cluster.
+
+  It lets a series of client invocations skip setting up a ZooKeeper session, within a short TTL:
+  a scheduler restarted in place answers at its old address without being the leader.  Entries
+  record the ensemble and path they were resolved from, and are ignored once the cluster points
+  elsewhere.
+  """
+  DEFAULT_PATH = os.path.expanduser('~/.aurora/scheduler_uris')
+  DEFAULT_TTL = Amount(1, Time.MINUTES)
+
+  def __init__(self, path=DEFAULT_PATH, ttl=DEFAULT_TTL, clock=time):
+    self._path = path
+    self._ttl = ttl
+    self._clock = clock
+
+  def _filename(self, cluster):
+    return os.path.join(self._path, '%s.json' % cluster.name.replace(os.sep, '_'))
+
+  @classmethod
+  def _source(cls, cluster, port):
+    return {'zk': '%s:%s' % (cluster.zk, port), 'scheduler_zk_path': cluster.scheduler_zk_path}
+
+  def get(self, cluster, port):
+    """Returns the cached uri of the cluster's scheduler, or None if absent or expired."""
+    try:
+      with open(self._filename(cluster)) as fp:
+        entry = json.load(fp)
+      resolved = entry['resolved']
+      uri = entry['uri']
+      source = dict((key, entry[key]) for key in ('zk', 'scheduler_zk_path'))
+    except (IOError, OSError, ValueError, KeyError, TypeError):
+      return None
+    if source != self._source(cluster, port):
+      return None
+    if not 0 <= self._clock.time() - resolved < self._ttl.as_(Time.SECONDS):
+      return None
+    return uri
+
+  def put(self, cluster, port, uri):
+    entry = dict(self._source(cluster, port), uri=uri, resolved=self._clock.time())
+    try:
+      if not os.path.isdir(self._path):
+        os.makedirs(self._path)
+      fd, temp = tempfile.mkstemp(dir=self._path, prefix='.%s.' % cluster.name)
+      with os.fdopen(fd, 'w') as fp:
+        json.dump(entry, fp)
+      os.rename(temp, self._filename(cluster))
+    except (IOError, OSError) as e:
+      log.debug('Failed to cache the scheduler uri of %s: %s' % (cluster.name, e))
+
+  def invalidate(self, cluster):
+    try:
+      os.unlink(self._filename(cluster))
+    except OSError as e:
+      if e.errno != errno.ENOENT:
+        log.debug('Failed to invalidate the scheduler uri of %s: %s' % (cluster.name, e))
+
+
 class ZookeeperSchedulerClient(SchedulerClient):
   SERVERSET_TIMEOUT = Amount(10, Time.SECONDS)
 
@@ -115,15 +206,30 @@ class ZookeeperSchedulerClient(SchedulerClient):
     zk = TwitterKazooClient.make(str('%s:%s' % (cluster.zk, port)), verbose=verbose)
     return zk, ServerSet(zk, cluster.scheduler_zk_path, **kw)
 
-  def __init__(self, cluster, port=2181, verbose=False):
-    SchedulerClient.__init__(self, verbose=verbose)
+  def __init__(self, cluster, port=2181, verbose=False, thrift_protocol='json', uri_cache=None):
+    SchedulerClient.__init__(self, verbose=verbose, thrift_protocol=thrift_protocol)
     self._cluster = cluster
     self._zkport = port
     self._endpoint = None
     self._uri = None
+    self._uri_cache = uri_cache
+    self._uri_cached = False
+
+  def invalidate(self):
+    if self._uri_cache is not None:
+      self._uri_cache.invalidate(self._cluster)
+    uri_cached, self._uri_cached = self._uri_cached, False
+    self._uri = None
+    return uri_cached
 
   def _resolve(self):
-    """Resolve the uri associated with this scheduler from zookeeper."""
+    """Resolve the uri associated with this scheduler, from the uri cache if any, or from
+    zookeeper."""
+    if self._uri_cache is not None:
+      self._uri = self._uri_cache.get(self._cluster, self._zkport)
+      if self._uri is not None:
+        self._uri_cached = True
+        return
     joined = threading.Event()
     def on_join(elements):
       joined.set()
@@ -141,12 +247,15 @@ class ZookeeperSchedulerClient(SchedulerClient):
       endpoint = instance.additional_endpoints['http']
       self._uri = 'http://%s:%s' % (endpoint.host, endpoint.port)
     zk.stop()
+    if self._uri is not None and self._uri_cache is not None:
+      self._uri_cache.put(self._cluster, self._zkport, self._uri)
 
   def _connect(self):
     if self._uri is None:
       self._resolve()
     if self._uri is not None:
-      return self._connect_scheduler(urljoin(self._uri, 'api'))
+      return self._connect_scheduler(urljoin(self._uri, 'api'),
+          thrift_protocol=self._thrift_protocol)
 
   @property
   def url(self):
@@ -160,12 +269,12 @@ class ZookeeperSchedulerClient(SchedulerClient):
 
 
 class DirectSchedulerClient(SchedulerClient):
-  def __init__(self, uri):
-    SchedulerClient.__init__(self, verbose=True)
+  def __init__(self, uri, thrift_protocol='json'):
+    SchedulerClient.__init__(self, verbose=True, thrift_protocol=thrift_protocol)
     self._uri = uri
 
   def _connect(self):
-    return self._connect_scheduler(urljoin(self._uri, 'api'))
+    return self._connect_scheduler(urljoin(self._uri, 'api'), thrift_protocol=self._thrift_protocol)
 
   @property
   def url(self):
@@ -184,6 +293,7 @@ class SchedulerProxy(object):
   UNAUTHENTICATED_RPCS = frozenset([
     'populateJobConfig',
     'getTasksStatus',
+    'getTasksWithoutConfigs',
     'getJobs',
     'getQuota',
     'getVersion',
@@ -213,7 +323,10 @@ class SchedulerProxy(object):
     return _wrapper
 
   def invalidate(self):
+    """Drops the connection to the scheduler, returning True if its address was stale."""
+    stale = self._scheduler_client is not None and self._scheduler_client.invalidate()
     self._client = self._scheduler_client = None
+    return stale
 
   @with_scheduler
   def client(self):
@@ -277,8 +390,8 @@ class SchedulerProxy(object):
           return method(*(args + auth_args))
         except (TTransport.TTransportException, self.TimeoutError) as e:
           log.warning('Connection error with scheduler: %s, reconnecting...' % e)
-          self.invalidate()
-          time.sleep(self.RPC_RETRY_INTERVAL.as_(Time.SECONDS))
+          if not self.invalidate():
+            time.sleep(self.RPC_RETRY_INTERVAL.as_(Time.SECONDS))
         except Exception as e:
           # Take any error that occurs during the RPC call, and transform it
           # into something clients can handle.
@@ -288,3 +401,31 @@ class SchedulerProxy(object):
           method_name, self.cluster.name))
 
     return method_wrapper
+
+
+class SchedulerProxyPool(object):
+  """A bounded pool of SchedulerProxy instances, for calls issued from several threads at once.
+
+  A SchedulerProxy holds a single connection and is not safe to share between threads.  The pool
+  creates proxies on demand, up to its size, and lends each to one caller at a time; callers beyond
+  that wait for a proxy to be returned.
+  """
+
+  def __init__(self, proxy_factory, size):
+    if size <= 0:
+      raise ValueError('size must be positive, got %s' % size)
+    self._proxy_factory = proxy_factory
+    self._idle = Queue()
+    # Placeholders for the proxies not created yet.
+    for _ in range(size):
+      self._idle.put(None)
+
+  @contextmanager
+  def proxy(self):
+    proxy = self._idle.get()
+    try:
+      if proxy is None:
+        proxy = self._proxy_factory()
+      yield proxy
+    finally:
+      self._idle.put(proxy)
@@ -14,11 +14,15 @@
 
 import math
 import time
+from bisect import bisect_left
 from collections import defaultdict, namedtuple
+from itertools import chain
 
 from apache.aurora.client.base import DEFAULT_GROUPING, group_hosts, log_response
 from apache.aurora.common.aurora_job_key import AuroraJobKey
 
+from .paging import QueryError
+
 from gen.apache.aurora.api.constants import LIVE_STATES
 from gen.apache.aurora.api.ttypes import Identity, ResponseCode, ScheduleStatus, TaskQuery
 
@@ -55,20 +59,96 @@ def task_query(job_key=None, hosts=None, job_keys=None):
       statuses=LIVE_STATES)
 
 
+def task_running_timestamp(task):
+  """Returns the time in ms a ScheduledTask became RUNNING, or None if it has never been RUNNING.
+
+  Arguments:
+  task -- ScheduledTask to get the RUNNING timestamp of.
+  """
+  for event in task.taskEvents:
+    if event.status == ScheduleStatus.RUNNING:
+      return event.timestamp
+  return None
+
+
+def task_uptime(task, now):
+  """Returns the uptime of a ScheduledTask in seconds, or None if it has never been RUNNING.
+
+  Arguments:
+  task -- ScheduledTask to get the uptime of.
+  now -- time to measure the uptime at.
+  """
+  return record_uptime(task_record(task), now)
+
+
+TaskRecord = namedtuple('TaskRecord', ['task_id', 'host', 'instance_id', 'running_timestamp'])
+
+
+def task_record(task):
+  """Reduces a ScheduledTask to the TaskRecord its uptime and placement are computed from.
+
+  Arguments:
+  task -- ScheduledTask to reduce.
+  """
+  return TaskRecord(
+      task.assignedTask.taskId,
+      task.assignedTask.slaveHost,
+      task.assignedTask.instanceId,
+      task_running_timestamp(task))
+
+
+def record_uptime(record, now):
+  """Returns the uptime of a TaskRecord in seconds, or None if it has never been RUNNING.
+
+  Arguments:
+  record -- TaskRecord to get the uptime of.
+  now -- time to measure the uptime at.
+  """
+  if record.running_timestamp is None:
+    return None
+  return math.floor(now - record.running_timestamp / 1000)
+
+
 class JobUpTimeSlaVector(object):
   """A grouping of job active tasks by:
       - instance: Map of instance ID -> instance uptime in seconds.
      Exposes an API for converting raw instance uptime data into job SLA metrics.
+
+     Instance uptimes are kept in a sorted array, so every query is answered by a bisection or
+     by indexing rather than by a scan.
   """
 
   def __init__(self, tasks, now=None):
     self._tasks = tasks
     self._now = now or time.time()
-    self._uptime_map = self._instance_uptime()
+    self._uptimes = sorted(self._instance_uptime().values())
+
+  @classmethod
+  def from_sorted_uptimes(cls, uptimes, now=None):
+    """Creates a vector from a list of instance uptimes sorted in non-decreasing order."""
+    vector = cls([], now)
+    vector._uptimes = uptimes
+    return vector
+
+  def without(self, uptimes):
+    """Returns a new vector with one instance of each of the given uptimes removed.
+
+    Arguments:
+    uptimes -- iterable of uptimes present in this vector.
+    """
+    removed = sorted(uptimes)
+    remaining = []
+    index = 0
+    for uptime in self._uptimes:
+      if index < len(removed) and removed[index] == uptime:
+        index += 1
+      else:
+        remaining.append(uptime)
+    return self.from_sorted_uptimes(remaining, self._now)
 
   def total_tasks(self):
     """Returns the total count of active tasks."""
-    return len(self._uptime_map)
+    return len(self._uptimes)
 
   def get_wait_time_to_sla(self, percentile, duration, total_tasks=None):
     """Returns an approximate wait time until the job reaches the specified SLA
@@ -88,7 +168,7 @@ class JobUpTimeSlaVector(object):
     # - Find the desired index (x) in the instance list sorted in non-decreasing order of uptimes.
     #   If desired index outside of current element count -> return None for "infeasible".
     # - Calculate wait time as: duration - duration(x)
-    elements = len(self._uptime_map)
+    elements = len(self._uptimes)
     total = total_tasks or elements
     target_count = math.ceil(total * percentile / 100.0)
     index = elements - int(target_count)
@@ -96,7 +176,7 @@ class JobUpTimeSlaVector(object):
     if index < 0 or index >= elements:
       return None
     else:
-      return duration - sorted(self._uptime_map.values())[index]
+      return duration - self._uptimes[index]
 
   def get_task_up_count(self, duration, total_tasks=None):
     """Returns the percentage of job tasks that stayed up longer than duration.
@@ -105,9 +185,16 @@ class JobUpTimeSlaVector(object):
     duration -- uptime duration in seconds.
     total_tasks -- optional total task count to calculate against.
     """
-    total = total_tasks or len(self._uptime_map)
-    above = len([uptime for uptime in self._uptime_map.values() if uptime >= duration])
-    return 100.0 * above / total if total else 0
+    total = total_tasks or len(self._uptimes)
+    return 100.0 * self.count_up(duration) / total if total else 0
+
+  def count_up(self, duration):
+    """Returns the number of job tasks that stayed up longer than duration.
+
+    Arguments:
+    duration -- uptime duration in seconds.
+    """
+    return len(self._uptimes) - bisect_left(self._uptimes, duration)
 
   def get_job_uptime(self, percentile):
     """Returns the uptime (in seconds) of the job at the specified percentile.
@@ -118,19 +205,17 @@ class JobUpTimeSlaVector(object):
     if percentile <= 0 or percentile >= 100:
       raise ValueError('Percentile must be within (0, 100), got %r instead.' % percentile)
 
-    total = len(self._uptime_map)
+    total = len(self._uptimes)
     value = math.floor(percentile / 100.0 * total)
     index = total - int(value) - 1
-    return sorted(self._uptime_map.values())[index] if 0 <= index < total else 0
+    return self._uptimes[index] if 0 <= index < total else 0
 
   def _instance_uptime(self):
     instance_map = {}
     for task in self._tasks:
-      for event in task.taskEvents:
-        if event.status == ScheduleStatus.RUNNING:
-          instance_map[task.assignedTask.instanceId] = math.floor(
-              self._now - event.timestamp / 1000)
-          break
+      uptime = task_uptime(task, self._now)
+      if uptime is not None:
+        instance_map[task.assignedTask.instanceId] = uptime
     return instance_map
 
 
@@ -141,20 +226,36 @@ JobUpTimeDetails = namedtuple('JobUpTimeDetails',
     ['job', 'predicted_percentage', 'safe', 'safe_in_secs'])
 
 
+JobGroupEstimate = namedtuple('JobGroupEstimate', ['hosts', 'predicted_percentage'])
+
+
 class DomainUpTimeSlaVector(object):
   """A grouping of all active tasks in the cluster by:
-      - job: Map of job_key -> task. Provides logical mapping between jobs and their active tasks.
-      - host: Map of hostname -> job_key. Provides logical mapping between hosts and their jobs.
+      - job: Map of job ID -> uptime vector. Provides the uptimes of the active job tasks.
+      - host: Map of hostname -> job ID. Provides logical mapping between hosts and their jobs.
      Exposes an API for querying safe domain details.
+
+     Tasks may be any iterable, e.g. a generator. It is consumed once, and every production
+     task is reduced to a (host ID, instance ID, uptime) record of its job ID as it is read, so
+     that no task is retained. Job IDs index the job keys, host IDs index the hostnames.
+     Production tasks already reduced to TaskRecords, e.g. by a DomainTaskSnapshot, may be given
+     as records_by_job instead.
   """
   DEFAULT_MIN_INSTANCE_COUNT = 2
 
-  def __init__(self, cluster, tasks, min_instance_count=DEFAULT_MIN_INSTANCE_COUNT, hosts=None):
+  def __init__(self, cluster, tasks, min_instance_count=DEFAULT_MIN_INSTANCE_COUNT, hosts=None,
+      records_by_job=None):
     self._cluster = cluster
-    self._tasks = tasks
     self._now = time.time()
-    self._tasks_by_job, self._jobs_by_host, self._hosts_by_job = self._init_mappings(
-        min_instance_count)
+    self._job_keys = []
+    self._hosts = []
+    records = self._iter_task_records(tasks)
+    if records_by_job:
+      records = chain(records, ((job_key, record)
+                                for job_key, job_records in records_by_job.items()
+                                for record in job_records))
+    (self._task_counts, self._jobs_by_host, self._vectors_by_job,
+        self._uptimes_by_host) = self._init_mappings(self._ingest(records), min_instance_count)
     self._host_filter = hosts
 
   def get_safe_hosts(self,
@@ -172,20 +273,22 @@ class DomainUpTimeSlaVector(object):
                      replaces default percentage/duration within the job context.
        grouping_function -- grouping function to use to group hosts.
     """
+    def job_limit(job_key):
+      if job_limits and job_key in job_limits:
+        return job_limits[job_key].percentage, job_limits[job_key].duration_secs
+      return percentage, duration
+
     safe_groups = []
-    for hosts, job_keys in self._iter_groups(
-        self._jobs_by_host.keys(), grouping_function, self._host_filter):
+    for hosts, job_estimates in self._iter_groups(
+        self._jobs_by_host.keys(),
+        grouping_function,
+        lambda job_key: job_limit(job_key)[1],
+        self._host_filter):
 
       safe_hosts = defaultdict(list)
-      for job_key in job_keys:
-        job_hosts = hosts.intersection(self._hosts_by_job[job_key])
-        job_duration = duration
-        job_percentage = percentage
-        if job_limits and job_key in job_limits:
-          job_duration = job_limits[job_key].duration_secs
-          job_percentage = job_limits[job_key].percentage
-
-        filtered_percentage, _, _ = self._simulate_hosts_down(job_key, job_hosts, job_duration)
+      for job_id, (job_hosts, filtered_percentage) in job_estimates:
+        job_key = self._job_keys[job_id]
+        job_percentage, job_duration = job_limit(job_key)
         if filtered_percentage < job_percentage:
           break
 
@@ -197,7 +300,8 @@ class DomainUpTimeSlaVector(object):
 
     return safe_groups
 
-  def probe_hosts(self, percentage, duration, grouping_function=DEFAULT_GROUPING):
+  def probe_hosts(self, percentage, duration, grouping_function=DEFAULT_GROUPING,
+      down_hosts=None):
     """Returns predicted job SLAs following the removal of provided hosts.
 
        For every given host creates a list of JobUpTimeDetails with predicted job SLA details
@@ -209,19 +313,26 @@ class DomainUpTimeSlaVector(object):
        percentage -- task up count percentage.
        duration -- task uptime duration in seconds.
        grouping_function -- grouping function to use to group hosts.
+       down_hosts -- optional hosts already going down, e.g. being drained. Their tasks are
+                     considered down along with every group.
     """
+    down_hosts = set(down_hosts or ())
     probed_groups = []
-    for hosts, job_keys in self._iter_groups(self._host_filter or [], grouping_function):
-      probed_hosts = defaultdict(list)
-      for job_key in job_keys:
-        job_hosts = hosts.intersection(self._hosts_by_job[job_key])
-        filtered_percentage, total_count, filtered_vector = self._simulate_hosts_down(
-            job_key, job_hosts, duration)
+    for hosts, job_estimates in self._iter_groups(
+        self._host_filter or [], grouping_function, lambda job_key: duration,
+        down_hosts=down_hosts):
 
+      probed_hosts = defaultdict(list)
+      for job_id, (job_hosts, filtered_percentage) in job_estimates:
+        job_key = self._job_keys[job_id]
         # Calculate wait time to SLA in case down host violates job's SLA.
         if filtered_percentage < percentage:
           safe = False
-          wait_to_sla = filtered_vector.get_wait_time_to_sla(percentage, duration, total_count)
+          filtered_vector = self._vectors_by_job[job_id].without(
+              uptime for host in job_hosts | down_hosts
+              for uptime in self._uptimes_by_host.get(host, {}).get(job_id, ()))
+          wait_to_sla = filtered_vector.get_wait_time_to_sla(
+              percentage, duration, self._task_counts[job_id])
         else:
           safe = True
           wait_to_sla = 0
@@ -235,57 +346,207 @@ class DomainUpTimeSlaVector(object):
 
     return probed_groups
 
-  def _iter_groups(self, hosts_to_group, grouping_function, host_filter=None):
+  def _iter_groups(self, hosts_to_group, grouping_function, job_duration, host_filter=None,
+      down_hosts=None):
+    """Yields every group of hosts along with the predicted SLA of the jobs it affects.
+
+    The prediction for a group takes a single pass over the jobs of its hosts, subtracting the
+    up count of each job on each host from the up count of the job.
+
+    Arguments:
+    hosts_to_group -- hosts to group.
+    grouping_function -- grouping function to use to group hosts.
+    job_duration -- function of job key -> uptime duration in seconds to predict the SLA at.
+    host_filter -- optional hosts to restrict the jobs affected by a group to.
+    down_hosts -- optional hosts to consider down along with every group.
+
+    Yields tuples of the group hosts and an iterable of (job ID, JobGroupEstimate) for every job
+    with tasks on the group hosts, or on the filtered group hosts if host_filter is specified.
+    Estimates are computed as they are iterated.
+    """
+    durations = {}
+    up_counts = {}
+
+    def up_count(job_id):
+      if job_id not in up_counts:
+        durations[job_id] = job_duration(self._job_keys[job_id])
+        up_counts[job_id] = self._vectors_by_job[job_id].count_up(durations[job_id])
+      return up_counts[job_id]
+
+    def estimate(job_id, job_hosts, down_count):
+      # Calculate the SLA that would be in effect should the group hosts go down.
+      total_count = self._task_counts[job_id]
+      filtered_count = up_count(job_id) - down_count
+      return JobGroupEstimate(job_hosts, 100.0 * filtered_count / total_count if total_count else 0)
+
+    def count_down(host, down_counts):
+      for job_id, uptimes in self._uptimes_by_host.get(host, {}).items():
+        up_count(job_id)
+        down_counts[job_id] += len(uptimes) - bisect_left(uptimes, durations[job_id])
+
+    down_hosts = down_hosts or set()
+    hosts_down_counts = defaultdict(int)
+    for host in down_hosts:
+      count_down(host, hosts_down_counts)
+
     groups = group_hosts(hosts_to_group, grouping_function)
     for _, hosts in sorted(groups.items(), key=lambda v: v[0]):
-      job_keys = set()
+      job_ids = set()
+      job_hosts = defaultdict(set)
+      down_counts = defaultdict(int, hosts_down_counts)
       for host in hosts:
-        if host_filter and host not in self._host_filter:
-          continue
-        job_keys = job_keys.union(self._jobs_by_host.get(host, set()))
-      yield hosts, job_keys
+        host_jobs = self._jobs_by_host.get(host, ())
+        if not host_filter or host in host_filter:
+          job_ids.update(host_jobs)
+        for job_id in host_jobs:
+          job_hosts[job_id].add(host)
+        if host not in down_hosts:
+          count_down(host, down_counts)
+
+      yield hosts, ((job_id, estimate(job_id, job_hosts[job_id], down_counts[job_id]))
+                    for job_id in job_ids)
 
   def _create_group_results(self, group, uptime_details):
     result = defaultdict(list)
     for host in group.keys():
       result[host].append(uptime_details)
 
-  def _simulate_hosts_down(self, job_key, hosts, duration):
-    unfiltered_tasks = self._tasks_by_job[job_key]
+  def _iter_task_records(self, tasks):
+    """Yields a (job key, TaskRecord) pair for every production task, as the tasks are read."""
+    job_keys = {}
+    for task in tasks:
+      config = task.assignedTask.task
+      if not config.production:
+        continue
+
+      job = (config.owner.role, config.environment, config.jobName)
+      job_key = job_keys.get(job)
+      if job_key is None:
+        job_key = job_keys[job] = job_key_from_scheduled(task, self._cluster)
+      yield job_key, task_record(task)
+
+  def _ingest(self, records):
+    """Reduces (job key, TaskRecord) pairs to lists of (host ID, instance ID, uptime) by job ID."""
+    job_ids = {}
+    host_ids = {}
+    records_by_job = defaultdict(list)
+    for job_key, record in records:
+      job_id = job_ids.get(job_key)
+      if job_id is None:
+        job_id = job_ids[job_key] = len(self._job_keys)
+        self._job_keys.append(job_key)
+
+      host_id = host_ids.get(record.host)
+      if host_id is None:
+        host_id = host_ids[record.host] = len(self._hosts)
+        self._hosts.append(record.host)
+
+      records_by_job[job_id].append(
+          (host_id, record.instance_id, record_uptime(record, self._now)))
+    return records_by_job
+
+  def _init_mappings(self, records_by_job, count):
+    task_counts = {}
+    jobs_by_host = defaultdict(set)
+    vectors_by_job = {}
+    uptimes_by_host = defaultdict(dict)
+    for job_id, records in records_by_job.items():
+      # Filter jobs by the min instance count.
+      if len(records) < count:
+        continue
+
+      # Like JobUpTimeSlaVector, count the uptime of the last running task seen per instance.
+      instances = {}
+      for host_id, instance_id, uptime in records:
+        host = self._hosts[host_id]
+        jobs_by_host[host].add(job_id)
+        if uptime is not None:
+          instances[instance_id] = (host, uptime)
+
+      for host, uptime in instances.values():
+        uptimes_by_host[host].setdefault(job_id, []).append(uptime)
+      task_counts[job_id] = len(records)
+      vectors_by_job[job_id] = JobUpTimeSlaVector.from_sorted_uptimes(
+          sorted(uptime for _, uptime in instances.values()), self._now)
+
+    # Sort the uptimes of every job on every host, to count the ones up on a host by bisection.
+    for host_uptimes in uptimes_by_host.values():
+      for uptimes in host_uptimes.values():
+        uptimes.sort()
+
+    return task_counts, jobs_by_host, vectors_by_job, uptimes_by_host
+
+
+class DomainTaskSnapshot(object):
+  """The production tasks of the jobs seen by a series of domain SLA checks, e.g. of the groups of
+  a maintenance. Passed to Sla.get_domain_uptime_vector, it lets a check reuse the tasks fetched by
+  earlier ones, refetching only the jobs with tasks on hosts marked as drained since, the jobs
+  whose tasks on the checked hosts have changed and the jobs fetched more than max_age_secs ago.
+
+  Tasks are kept as TaskRecords under one job key per job, never as ScheduledTasks, so that a
+  maintenance touching most jobs does not hold the task configs of the cluster for its duration.
+  """
+  DEFAULT_MAX_AGE_SECS = 300
 
-    # Get total job task count to use in SLA calculation.
-    total_count = len(unfiltered_tasks)
+  def __init__(self, max_age_secs=DEFAULT_MAX_AGE_SECS, clock=time):
+    self._max_age_secs = max_age_secs
+    self._clock = clock
+    self._records_by_job = {}
+    self._fetched_at_by_job = {}
+    self._jobs_by_host = defaultdict(set)
+    self._drained_hosts = set()
 
-    # Get a list of job tasks that would remain after the affected hosts go down
-    # and create an SLA vector with these tasks.
-    filtered_tasks = [task for task in unfiltered_tasks
-                      if task.assignedTask.slaveHost not in hosts]
-    filtered_vector = JobUpTimeSlaVector(filtered_tasks, self._now)
+  @property
+  def drained_hosts(self):
+    """Hosts marked as drained since the snapshot was last refreshed."""
+    return frozenset(self._drained_hosts)
 
-    # Calculate the SLA that would be in effect should the host go down.
-    filtered_percentage = filtered_vector.get_task_up_count(duration, total_count)
+  def hosts_drained(self, hostnames):
+    """Marks hosts as drained, so that the jobs with tasks on them are refetched by the next check.
 
-    return filtered_percentage, total_count, filtered_vector
+    Arguments:
+    hostnames -- hosts whose tasks have moved.
+    """
+    self._drained_hosts.update(hostnames)
 
-  def _init_mappings(self, count):
-    tasks_by_job = defaultdict(list)
-    for task in self._tasks:
-      if task.assignedTask.task.production:
-        tasks_by_job[job_key_from_scheduled(task, self._cluster)].append(task)
+  def jobs(self):
+    return set(self._records_by_job)
 
-    # Filter jobs by the min instance count.
-    tasks_by_job = defaultdict(list, ((job, tasks) for job, tasks
-        in tasks_by_job.items() if len(tasks) >= count))
+  def expired_jobs(self):
+    """Jobs whose tasks were fetched more than max_age_secs ago. Their task events may be stale,
+    e.g. a task restarted since would still report the uptime of the task it replaced.
+    """
+    expired_at = self._clock.time() - self._max_age_secs
+    return set(job_key for job_key, fetched_at in self._fetched_at_by_job.items()
+               if fetched_at < expired_at)
 
-    jobs_by_host = defaultdict(set)
-    hosts_by_job = defaultdict(set)
-    for job_key, tasks in tasks_by_job.items():
-      for task in tasks:
-        host = task.assignedTask.slaveHost
-        jobs_by_host[host].add(job_key)
-        hosts_by_job[job_key].add(host)
+  def jobs_on_hosts(self, hostnames):
+    return set().union(*[self._jobs_by_host.get(host, set()) for host in hostnames])
+
+  def task_ids(self, job_key, hostnames):
+    return set(record.task_id for record in self._records_by_job.get(job_key, ())
+               if record.host in hostnames)
+
+  def records(self, job_keys):
+    """Returns a map of job key -> TaskRecords of its production tasks, for the given jobs."""
+    return dict((job_key, self._records_by_job[job_key])
+                for job_key in job_keys if job_key in self._records_by_job)
 
-    return tasks_by_job, jobs_by_host, hosts_by_job
+  def refresh(self, records_by_job):
+    """Replaces the task records of jobs, and clears the drained hosts.
+
+    Arguments:
+    records_by_job -- map of job key -> list of TaskRecords of its production tasks.
+    """
+    now = self._clock.time()
+    for job_key, records in records_by_job.items():
+      for record in self._records_by_job.get(job_key, ()):
+        self._jobs_by_host[record.host].discard(job_key)
+      for record in records:
+        self._jobs_by_host[record.host].add(job_key)
+      self._records_by_job[job_key] = tuple(records)
+      self._fetched_at_by_job[job_key] = now
+    self._drained_hosts.clear()
 
 
 class Sla(object):
@@ -302,28 +563,85 @@ class Sla(object):
     """
     return JobUpTimeSlaVector(self._get_tasks(task_query(job_key=job_key)))
 
-  def get_domain_uptime_vector(self, cluster, min_instance_count, hosts=None):
+  def get_domain_uptime_vector(self, cluster, min_instance_count, hosts=None, snapshot=None):
     """Returns a DomainUpTimeSlaVector object with all available job uptimes.
 
     Arguments:
     cluster -- Cluster to get vector for.
     min_instance_count -- Minimum job instance count to consider for domain uptime calculations.
     hosts -- optional list of hostnames to query by.
+    snapshot -- optional DomainTaskSnapshot to reuse and refresh the job tasks of, if hosts are
+                specified.
     """
-    tasks = self._get_tasks(task_query(hosts=hosts)) if hosts else None
-    job_keys = set(job_key_from_scheduled(t, cluster) for t in tasks) if tasks else None
-
-    # Avoid full cluster pull if job_keys are missing for any reason but the hosts are specified.
-    job_tasks = [] if hosts and not job_keys else self._get_tasks(task_query(job_keys=job_keys))
-    return DomainUpTimeSlaVector(
-        cluster,
-        job_tasks,
-        min_instance_count=min_instance_count,
-        hosts=hosts)
+    try:
+      records_by_job = None
+      if hosts and snapshot is not None:
+        job_tasks = []
+        records_by_job = self._get_snapshot_records(cluster, hosts, snapshot)
+      else:
+        job_keys = set(job_key_from_scheduled(t, cluster)
+                       for t in self._query_tasks(task_query(hosts=hosts))) if hosts else None
+
+        # Avoid full cluster pull if job_keys are missing for any reason but the hosts are
+        # specified.
+        job_tasks = (
+            [] if hosts and not job_keys else self._query_tasks(task_query(job_keys=job_keys)))
+      return DomainUpTimeSlaVector(
+          cluster,
+          job_tasks,
+          min_instance_count=min_instance_count,
+          hosts=hosts,
+          records_by_job=records_by_job)
+    except QueryError as e:
+      # Never evaluate the SLA of a partially fetched domain.
+      log_response(e.response)
+      return DomainUpTimeSlaVector(cluster, [], min_instance_count=min_instance_count, hosts=hosts)
+
+  def _get_snapshot_records(self, cluster, hosts, snapshot):
+    """Returns a map of job key -> TaskRecords of the production tasks of the jobs on the hosts.
+    Fetches only the jobs missing from the snapshot, the jobs with tasks on its drained hosts, the
+    jobs whose production task IDs on the hosts differ from the snapshot and the jobs that expired
+    from it.
+    """
+    hosts = set(hosts)
+    drained_hosts = snapshot.drained_hosts
+    job_keys = set()
+    moved_job_keys = snapshot.jobs_on_hosts(drained_hosts)
+    task_ids_by_job = defaultdict(set)
+    for task in self._query_tasks(task_query(hosts=hosts | drained_hosts)):
+      job_key = job_key_from_scheduled(task, cluster)
+      if task.assignedTask.slaveHost in hosts:
+        job_keys.add(job_key)
+        if task.assignedTask.task.production:
+          task_ids_by_job[job_key].add(task.assignedTask.taskId)
+      if task.assignedTask.slaveHost in drained_hosts:
+        moved_job_keys.add(job_key)
+
+    changed_job_keys = set(job_key for job_key in job_keys
+                           if snapshot.task_ids(job_key, hosts) != task_ids_by_job[job_key])
+    stale_job_keys = ((job_keys - snapshot.jobs()) | (job_keys & snapshot.expired_jobs())
+                      | changed_job_keys | moved_job_keys)
+    records_by_job = dict((job_key, []) for job_key in stale_job_keys)
+    if stale_job_keys:
+      for task in self._query_tasks(task_query(job_keys=stale_job_keys)):
+        if task.assignedTask.task.production:
+          records_by_job[job_key_from_scheduled(task, cluster)].append(task_record(task))
+    snapshot.refresh(records_by_job)
+
+    return snapshot.records(job_keys)
+
+  def _query_tasks(self, task_query):
+    # Uptimes only need the task identity and events, leave the executor configs on the scheduler.
+    # The query is not paged: pages are offsets into an unstable task order, and a task dropped by
+    # a shifted page would make the SLA of its job look better than it is.
+    resp = self._scheduler.getTasksWithoutConfigs(task_query)
+    if resp.responseCode != ResponseCode.OK:
+      raise QueryError(resp)
+    return resp.result.scheduleStatusResult.tasks or []
 
   def _get_tasks(self, task_query):
-    resp = self._scheduler.getTasksStatus(task_query)
-    log_response(resp)
-    if resp.responseCode != ResponseCode.OK:
+    try:
+      return list(self._query_tasks(task_query))
+    except QueryError as e:
+      log_response(e.response)
       return []
-    return resp.result.scheduleStatusResult.tasks
@@ -12,19 +12,15 @@
 # limitations under the License.
 #
 
-import json
 from collections import namedtuple
-from difflib import unified_diff
 
-from thrift.protocol import TJSONProtocol
-from thrift.TSerialization import serialize
 from twitter.common import log
 
 from .instance_watcher import InstanceWatcher
 from .job_monitor import JobMonitor
 from .quota_check import CapacityRequest, QuotaCheck
 from .scheduler_client import SchedulerProxy
-from .updater_util import FailureThreshold, UpdaterConfig
+from .updater_util import diff_configs, FailureThreshold, TaskConfigFingerprints, UpdaterConfig
 
 from gen.apache.aurora.api.constants import ACTIVE_STATES
 from gen.apache.aurora.api.ttypes import (
@@ -74,12 +70,14 @@ class Updater(object):
     except ValueError as e:
       raise self.Error(str(e))
     self._lock = None
+    self._fingerprints = TaskConfigFingerprints()
     self._watcher = instance_watcher or InstanceWatcher(
         self._scheduler,
-        self._job_key,
+        self._config.job_key(),
         self._update_config.restart_threshold,
         self._update_config.watch_secs,
-        self._health_check_interval_seconds)
+        self._health_check_interval_seconds,
+        job_monitor=self._job_monitor)
 
   def _start(self):
     """Starts an update by applying an exclusive lock on a job being updated.
@@ -131,34 +129,20 @@ class Updater(object):
     ]
 
     log.info('Starting job update.')
-    while remaining_instances and not failure_threshold.is_failed_update():
-      batch_instances = remaining_instances[0:self._update_config.batch_size]
-      remaining_instances = list(set(remaining_instances) - set(batch_instances))
-      instances_to_restart = [s.instance_id for s in batch_instances if s.is_updated]
-      instances_to_update = [s.instance_id for s in batch_instances if not s.is_updated]
-
-      instances_to_watch = []
-      if instances_to_restart:
-        instances_to_watch += self._restart_instances(instances_to_restart)
-
-      if instances_to_update:
-        instances_to_watch += self._update_instances(instances_to_update, instance_operation)
-
-      failed_instances = self._watcher.watch(instances_to_watch) if instances_to_watch else set()
+    if self._update_config.max_batches_in_flight > 1:
+      remaining_instances = self._update_pipelined(
+          remaining_instances, instance_operation, failure_threshold)
+    else:
+      while remaining_instances and not failure_threshold.is_failed_update():
+        batch_instances = remaining_instances[0:self._update_config.batch_size]
+        remaining_instances = list(set(remaining_instances) - set(batch_instances))
+        instances_to_watch = self._start_batch(batch_instances, instance_operation)
 
-      if failed_instances:
-        log.error('Failed instances: %s' % failed_instances)
+        failed_instances = (
+            self._watcher.watch(instances_to_watch) if instances_to_watch else set())
 
-      unretryable_instances = failure_threshold.update_failure_counts(failed_instances)
-      if unretryable_instances:
-        log.warn('Not restarting failed instances %s, which exceeded '
-                 'maximum allowed instance failure limit of %s' %
-                 (unretryable_instances, self._update_config.max_per_instance_failures))
-      retryable_instances = list(set(failed_instances) - set(unretryable_instances))
-      remaining_instances += [
-          InstanceState(instance_id, is_updated=True) for instance_id in retryable_instances
-      ]
-      remaining_instances.sort(key=lambda tup: tup.instance_id)
+        remaining_instances += self._record_failures(failed_instances, failure_threshold)
+        remaining_instances.sort(key=lambda tup: tup.instance_id)
 
     if failure_threshold.is_failed_update():
       untouched_instances = [s.instance_id for s in remaining_instances if not s.is_updated]
@@ -169,6 +153,115 @@ class Updater(object):
 
     return not failure_threshold.is_failed_update()
 
+  def _update_pipelined(self, remaining_instances, instance_operation, failure_threshold):
+    """Updates instances with up to max_batches_in_flight batches being watched at once. A new
+    batch starts as soon as any batch in flight completes.
+
+    Arguments:
+    remaining_instances -- sorted list of InstanceStates to update.
+    instance_operation -- OperationConfigs with update details.
+    failure_threshold -- FailureThreshold to record the failed instances with.
+
+    Returns the list of InstanceStates that were not started when the update failed. Batches
+    still in flight at that point are left to the rollback.
+    """
+    in_flight = []
+    while (remaining_instances or in_flight) and not failure_threshold.is_failed_update():
+      while remaining_instances and len(in_flight) < self._update_config.max_batches_in_flight:
+        batches = []
+        while (remaining_instances and
+               len(in_flight) + len(batches) < self._update_config.max_batches_in_flight):
+          batches.append(remaining_instances[0:self._update_config.batch_size])
+          remaining_instances = remaining_instances[self._update_config.batch_size:]
+        for instances_to_watch in self._start_batches(batches, instance_operation):
+          if instances_to_watch:
+            in_flight.append(self._watcher.start(instances_to_watch))
+
+      if not in_flight:
+        continue
+
+      completed = self._watcher.watch_any(in_flight)
+      for watch in [watch for watch in in_flight if watch in completed]:
+        in_flight.remove(watch)
+        remaining_instances += self._record_failures(completed[watch], failure_threshold)
+      remaining_instances.sort(key=lambda tup: tup.instance_id)
+
+    if in_flight:
+      log.warn('Abandoning watch of instances: %s' % sorted(
+          set().union(*[watch.instance_ids for watch in in_flight])))
+      self._watcher.stop(in_flight)
+    return remaining_instances
+
+  def _start_batch(self, batch_instances, instance_operation):
+    """Restarts the previously updated instances of a batch and updates the others.
+
+    Arguments:
+    batch_instances -- list of InstanceStates in the batch.
+    instance_operation -- OperationConfigs with update details.
+
+    Returns a list of instances to watch.
+    """
+    instances_to_restart = [s.instance_id for s in batch_instances if s.is_updated]
+    instances_to_update = [s.instance_id for s in batch_instances if not s.is_updated]
+
+    instances_to_watch = []
+    if instances_to_restart:
+      instances_to_watch += self._restart_instances(instances_to_restart)
+
+    if instances_to_update:
+      instances_to_watch += self._update_instances(instances_to_update, instance_operation)
+    return instances_to_watch
+
+  def _start_batches(self, batches, instance_operation):
+    """Starts several batches at once, as _start_batch does one. The instances to kill in all of
+    them are killed first and waited for together, so that the job monitor polls for all batches at
+    once, then the instances to add are added.
+
+    Arguments:
+    batches -- list of lists of InstanceStates, one per batch.
+    instance_operation -- OperationConfigs with update details.
+
+    Returns a list of instances to watch per batch.
+    """
+    instances_to_watch, to_kill, to_add = [], [], []
+    for batch_instances in batches:
+      instances_to_restart = [s.instance_id for s in batch_instances if s.is_updated]
+      instances_to_update = [s.instance_id for s in batch_instances if not s.is_updated]
+
+      instances_to_watch.append(
+          self._restart_instances(instances_to_restart) if instances_to_restart else [])
+      batch_to_kill, batch_to_add = (
+          self._examine_instances(instances_to_update, instance_operation)
+          if instances_to_update else ([], []))
+      to_kill.append(batch_to_kill)
+      to_add.append(batch_to_add)
+
+    self._kill_batches(to_kill)
+    for batch_to_watch, batch_to_add in zip(instances_to_watch, to_add):
+      self._add_instances(batch_to_add, instance_operation.to_config)
+      batch_to_watch += batch_to_add
+    return instances_to_watch
+
+  def _record_failures(self, failed_instances, failure_threshold):
+    """Records the failed instances of a batch against the failure threshold.
+
+    Arguments:
+    failed_instances -- set of instances that failed in the batch.
+    failure_threshold -- FailureThreshold to record the failed instances with.
+
+    Returns a list of InstanceStates to retry.
+    """
+    if failed_instances:
+      log.error('Failed instances: %s' % failed_instances)
+
+    unretryable_instances = failure_threshold.update_failure_counts(failed_instances)
+    if unretryable_instances:
+      log.warn('Not restarting failed instances %s, which exceeded '
+               'maximum allowed instance failure limit of %s' %
+               (unretryable_instances, self._update_config.max_per_instance_failures))
+    retryable_instances = list(set(failed_instances) - set(unretryable_instances))
+    return [InstanceState(instance_id, is_updated=True) for instance_id in retryable_instances]
+
   def _rollback(self, instances_to_rollback, instance_configs):
     """Performs a rollback operation for the failed instances.
 
@@ -197,31 +290,6 @@ class Updater(object):
     if failed_instances:
       log.error('Rollback failed for instances: %s' % failed_instances)
 
-  def _hashable(self, element):
-    if isinstance(element, (list, set)):
-      return tuple(sorted(self._hashable(item) for item in element))
-    elif isinstance(element, dict):
-      return tuple(
-          sorted((self._hashable(key), self._hashable(value)) for (key, value) in element.items())
-      )
-    return element
-
-  def _thrift_to_json(self, config):
-    return json.loads(
-        serialize(config, protocol_factory=TJSONProtocol.TSimpleJSONProtocolFactory()))
-
-  def _diff_configs(self, from_config, to_config):
-    # Thrift objects do not correctly compare against each other due to the unhashable nature
-    # of python sets. That results in occasional diff failures with the following symptoms:
-    # - Sets are not equal even though their reprs are identical;
-    # - Items are reordered within thrift structs;
-    # - Items are reordered within sets;
-    # To overcome all the above, thrift objects are converted into JSON dicts to flatten out
-    # thrift type hierarchy. Next, JSONs are recursively converted into nested tuples to
-    # ensure proper ordering on compare.
-    return ''.join(unified_diff(repr(self._hashable(self._thrift_to_json(from_config))),
-                                repr(self._hashable(self._thrift_to_json(to_config)))))
-
   def _create_kill_add_lists(self, instance_ids, operation_configs):
     """Determines a particular action (kill or add) to use for every instance in instance_ids.
 
@@ -238,10 +306,10 @@ class Updater(object):
       to_config = operation_configs.to_config.get(instance_id)
 
       if from_config and to_config:
-        diff_output = self._diff_configs(from_config, to_config)
-        if diff_output:
-          log.debug('Task configuration changed for instance [%s]:\n%s' % (
-              instance_id, diff_output))
+        if not self._fingerprints.equal(from_config, to_config):
+          if log.logger().isEnabledFor(log.DEBUG):
+            log.debug('Task configuration changed for instance [%s]:\n%s' % (
+                instance_id, diff_configs(from_config, to_config)))
           to_kill.append(instance_id)
           to_add.append(instance_id)
       elif from_config and not to_config:
@@ -262,6 +330,20 @@ class Updater(object):
 
     Returns a list of added instances.
     """
+    to_kill, to_add = self._examine_instances(instance_ids, operation_configs)
+    self._kill_instances(to_kill)
+    self._add_instances(to_add, operation_configs.to_config)
+    return to_add
+
+  def _examine_instances(self, instance_ids, operation_configs):
+    """Determines the instances of a batch to kill and to add, and logs the unchanged ones.
+
+    Arguments:
+    instance_ids -- current batch of IDs to process.
+    operation_configs -- OperationConfigs with update details.
+
+    Returns lists of instances to kill and to add.
+    """
     log.info('Examining instances: %s' % instance_ids)
 
     to_kill, to_add = self._create_kill_add_lists(instance_ids, operation_configs)
@@ -269,10 +351,7 @@ class Updater(object):
     unchanged = list(set(instance_ids) - set(to_kill + to_add))
     if unchanged:
       log.info('Skipping unchanged instances: %s' % unchanged)
-
-    self._kill_instances(to_kill)
-    self._add_instances(to_add, operation_configs.to_config)
-    return to_add
+    return to_kill, to_add
 
   def _kill_instances(self, instance_ids):
     """Instructs the scheduler to kill instances and waits for completion.
@@ -281,14 +360,36 @@ class Updater(object):
     instance_ids -- list of IDs to kill.
     """
     if instance_ids:
-      log.info('Killing instances: %s' % instance_ids)
-      query = self._create_task_query(instanceIds=frozenset(int(s) for s in instance_ids))
-      self._check_and_log_response(self._scheduler.killTasks(query, self._lock))
+      self._request_kill(instance_ids)
       res = self._job_monitor.wait_until(JobMonitor.terminal, instance_ids, with_timeout=True)
       if not res:
         raise self.Error('Tasks were not killed in time.')
       log.info('Instances killed')
 
+  def _kill_batches(self, instance_ids_by_batch):
+    """Instructs the scheduler to kill the instances of several batches, and waits for all of them
+    on the job monitor at once.
+
+    Arguments:
+    instance_ids_by_batch -- list of lists of IDs to kill, one per batch.
+    """
+    watches = []
+    for instance_ids in instance_ids_by_batch:
+      if instance_ids:
+        self._request_kill(instance_ids)
+        watches.append(
+            self._job_monitor.watch_until(JobMonitor.terminal, instance_ids, with_timeout=True))
+    if watches:
+      self._job_monitor.wait(watches)
+      if not all(watch.result() for watch in watches):
+        raise self.Error('Tasks were not killed in time.')
+      log.info('Instances killed')
+
+  def _request_kill(self, instance_ids):
+    log.info('Killing instances: %s' % instance_ids)
+    query = self._create_task_query(instanceIds=frozenset(int(s) for s in instance_ids))
+    self._check_and_log_response(self._scheduler.killTasks(query, self._lock))
+
   def _add_instances(self, instance_ids, to_config):
     """Instructs the scheduler to add instances.
 
@@ -362,10 +463,12 @@ class Updater(object):
     """
     # Load existing tasks and populate remote config map and instance list.
     assigned_tasks = self._get_existing_tasks()
+    self._fingerprints = TaskConfigFingerprints()
     remote_config_map = {}
     remote_instances = []
     for assigned_task in assigned_tasks:
-      remote_config_map[assigned_task.instanceId] = assigned_task.task
+      # Instances running identical configs share a single TaskConfig in the working set.
+      remote_config_map[assigned_task.instanceId] = self._fingerprints.dedupe(assigned_task.task)
       remote_instances.append(assigned_task.instanceId)
 
     # Validate local job config and populate local task config.
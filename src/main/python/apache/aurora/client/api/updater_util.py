@@ -13,6 +13,11 @@
 #
 
 import collections
+import json
+from difflib import unified_diff
+
+from thrift.protocol import TJSONProtocol
+from thrift.TSerialization import serialize
 
 from twitter.common import log
 
@@ -29,6 +34,9 @@ class UpdaterConfig(object):
   When an update is initiated, an instance is expected to be "healthy" before restart_threshold.
   An instance is also expected to remain healthy for at least watch_secs. If these conditions are
   not satisfied, the instance is deemed unhealthy.
+
+  Up to max_batches_in_flight batches are watched at the same time. The next batch starts as soon
+  as one of the batches in flight completes, rather than after the previous batch completed.
   """
 
   def __init__(self,
@@ -37,7 +45,8 @@ class UpdaterConfig(object):
                watch_secs,
                max_per_shard_failures,
                max_total_failures,
-               rollback_on_failure=True):
+               rollback_on_failure=True,
+               max_batches_in_flight=1):
 
     if batch_size <= 0:
       raise ValueError('Batch size should be greater than 0')
@@ -45,12 +54,15 @@ class UpdaterConfig(object):
       raise ValueError('Restart Threshold should be greater than 0')
     if watch_secs <= 0:
       raise ValueError('Watch seconds should be greater than 0')
+    if max_batches_in_flight <= 0:
+      raise ValueError('Max batches in flight should be greater than 0')
     self.batch_size = batch_size
     self.restart_threshold = restart_threshold
     self.watch_secs = watch_secs
     self.max_total_failures = max_total_failures
     self.max_per_instance_failures = max_per_shard_failures
     self.rollback_on_failure = rollback_on_failure
+    self.max_batches_in_flight = max_batches_in_flight
 
 
 class FailureThreshold(object):
@@ -92,3 +104,76 @@ class FailureThreshold(object):
     """Checks if the per instance failure is greater than a threshold."""
     return sum(count > self._max_per_instance_failures
                for count in self._failures_by_instance.values())
+
+
+class TaskConfigFingerprints(object):
+  """Canonical, cached fingerprints of TaskConfigs.
+
+  Thrift objects do not correctly compare against each other due to the unhashable nature of
+  python sets: sets with identical content may still compare unequal, and items may be reordered
+  within structs and sets. A TaskConfig is therefore reduced once to a canonical form where structs
+  become tuples of their sorted fields and sets and maps become frozensets. Identical canonical
+  forms are interned to the same small integer fingerprint, so two configs compare in O(1) and
+  remote configs with identical content collapse onto a single representative.
+
+  Fingerprints are cached by object identity, so configs must not be mutated once fingerprinted.
+  """
+
+  def __init__(self):
+    self._by_identity = {}
+    self._by_canonical = {}
+
+  @classmethod
+  def _canonical(cls, element):
+    if hasattr(element, 'thrift_spec'):
+      return (element.__class__.__name__, tuple(
+          (name, cls._canonical(value)) for name, value in sorted(element.__dict__.items())))
+    elif isinstance(element, (set, frozenset)):
+      return frozenset(cls._canonical(item) for item in element)
+    elif isinstance(element, dict):
+      return frozenset(
+          (cls._canonical(key), cls._canonical(value)) for key, value in element.items())
+    elif isinstance(element, list):
+      return tuple(cls._canonical(item) for item in element)
+    return element
+
+  def _lookup(self, config):
+    cached = self._by_identity.get(id(config))
+    if cached is None:
+      entry = self._by_canonical.setdefault(
+          self._canonical(config), (len(self._by_canonical), config))
+      # The config is pinned next to its entry so that its id() cannot be reused while cached.
+      cached = self._by_identity[id(config)] = (config, entry)
+    return cached[1]
+
+  def fingerprint(self, config):
+    """Returns an integer that is equal for and only for configs with identical content."""
+    return self._lookup(config)[0]
+
+  def dedupe(self, config):
+    """Returns the first fingerprinted config with content identical to config."""
+    return self._lookup(config)[1]
+
+  def equal(self, from_config, to_config):
+    return from_config is to_config or self.fingerprint(from_config) == self.fingerprint(to_config)
+
+
+def _hashable(element):
+  if isinstance(element, (list, set)):
+    return tuple(sorted(_hashable(item) for item in element))
+  elif isinstance(element, dict):
+    return tuple(sorted((_hashable(key), _hashable(value)) for (key, value) in element.items()))
+  return element
+
+
+def _thrift_to_json(config):
+  return json.loads(serialize(config, protocol_factory=TJSONProtocol.TSimpleJSONProtocolFactory()))
+
+
+def diff_configs(from_config, to_config):
+  """Returns a human-readable diff between two TaskConfigs, empty if their content is identical.
+
+  This is expensive and meant for debug output only, use TaskConfigFingerprints to compare configs.
+  """
+  return ''.join(unified_diff(repr(_hashable(_thrift_to_json(from_config))),
+                              repr(_hashable(_thrift_to_json(to_config)))))
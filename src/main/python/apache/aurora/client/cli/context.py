@@ -15,9 +15,13 @@
 from __future__ import print_function
 
 import logging
+import threading
 from collections import namedtuple
 from fnmatch import fnmatch
 
+from twitter.common.concurrent import Future, wait
+from twitter.common.quantity import Amount, Time
+
 from apache.aurora.client.base import synthesize_url
 from apache.aurora.client.cli import (
     Context,
@@ -26,6 +30,7 @@ from apache.aurora.client.cli import (
     EXIT_INVALID_CONFIGURATION,
     EXIT_INVALID_PARAMETER
 )
+from apache.aurora.client.cli.job_list_cache import JobListCache
 from apache.aurora.client.cli.logsetup import TRANSCRIPT
 from apache.aurora.client.config import get_config
 from apache.aurora.client.factory import make_client
@@ -43,6 +48,9 @@ class AuroraCommandContext(Context):
   and common operations.
   """
 
+  # How long listing the jobs of a group of clusters waits for the slowest cluster.
+  JOB_LIST_TIMEOUT = Amount(30, Time.SECONDS)
+
   def __init__(self):
     super(AuroraCommandContext, self).__init__()
     self.apis = {}
@@ -117,26 +125,82 @@ class AuroraCommandContext(Context):
       parts.append('*')
     return PartialJobKey(*parts)
 
-  def get_job_list(self, clusters, role=None):
+  def _list_jobs(self, cluster, role):
+    """Calls getJobs on a cluster in a thread of its own, returning a Future of the response.
+    The thread does not keep the client from exiting, should the cluster never answer.
+    """
+    future = Future()
+
+    def list_jobs():
+      try:
+        future.set_result(self.get_api(cluster).get_jobs(role))
+      except Exception as e:
+        future.set_exception(e)
+
+    thread = threading.Thread(target=list_jobs, name='get_jobs(%s)' % cluster)
+    thread.daemon = True
+    thread.start()
+    return future
+
+  def get_job_list(self, clusters, role=None, cache_secs=0):
     """Get a list of jobs from a group of clusters.
+
+    The clusters are queried concurrently. A cluster which fails, or does not answer within
+    JOB_LIST_TIMEOUT, is reported and its jobs left out, unless no cluster could be listed.
     :param clusters: the clusters to query for jobs
     :param role: if specified, only return jobs for the role; otherwise, return all jobs.
+    :param cache_secs: if positive, reuse the jobs of a cluster listed at most this many seconds
+        ago, and cache the jobs listed now.
     """
-    result = []
-    if '*' in role:
+    if role is not None and '*' in role:
       role = None
+    cache = JobListCache() if cache_secs > 0 else None
+    jobs = {}
     for cluster in clusters:
-      api = self.get_api(cluster)
-      resp = api.get_jobs(role)
-      self.check_and_log_response(resp, err_code=EXIT_COMMAND_FAILURE)
-      result.extend([AuroraJobKey(cluster, job.key.role, job.key.environment, job.key.name)
-          for job in resp.result.getJobsResult.configs])
-    return result
+      if cache is not None:
+        jobs[cluster] = cache.get(cluster, role, cache_secs)
+      if jobs.get(cluster) is None:
+        jobs[cluster] = self._list_jobs(cluster, role)
 
-  def get_jobs_matching_key(self, key):
+    futures = [listing for listing in jobs.values() if isinstance(listing, Future)]
+    wait(futures, timeout=self.JOB_LIST_TIMEOUT.as_(Time.SECONDS))
+
+    failures = []
+    for cluster in clusters:
+      listing = jobs[cluster]
+      if not isinstance(listing, Future):
+        continue
+      jobs[cluster] = None
+      if not listing.done():
+        # The API stays busy with the call, so do not hand it out again.
+        self.apis.pop(cluster, None)
+        failures.append((cluster, 'Timed out listing jobs'))
+      elif listing.exception() is not None:
+        failures.append((cluster, 'Failed to list jobs: %s' % listing.exception()))
+      else:
+        resp = listing.result()
+        self.log_response(resp)
+        if resp.responseCode != ResponseCode.OK:
+          failures.append((cluster, resp.messageDEPRECATED))
+        else:
+          jobs[cluster] = [(job.key.role, job.key.environment, job.key.name)
+              for job in resp.result.getJobsResult.configs]
+          if cache is not None:
+            cache.put(cluster, role, jobs[cluster])
+
+    if failures and len(failures) == len(clusters):
+      raise self.CommandError(EXIT_COMMAND_FAILURE, '\n'.join(
+          message if len(clusters) == 1 else '%s: %s' % (cluster, message)
+          for cluster, message in failures))
+    for cluster, message in failures:
+      self.print_err('Warning: leaving out the jobs of cluster %s: %s' % (cluster, message))
+
+    return [AuroraJobKey(cluster, *job) for cluster in clusters for job in jobs[cluster] or ()]
+
+  def get_jobs_matching_key(self, key, cache_secs=0):
     """Finds all jobs matching a key containing wildcard segments.
-    This is potentially slow!
-    TODO(mchucarroll): insert a warning to users about slowness if the key contains wildcards!
+    Wildcards other than in the cluster require listing the jobs of the clusters, which may be
+    served from a local cache no older than cache_secs seconds; see get_job_list.
     """
 
     def is_fully_bound(key):
@@ -158,7 +222,7 @@ class AuroraCommandContext(Context):
     if is_fully_bound(key):
       return [AuroraJobKey(key.cluster, key.role, key.env, key.name)]
     else:
-      jobs = filter_job_list(self.get_job_list(clusters_to_search, key.role),
+      jobs = filter_job_list(self.get_job_list(clusters_to_search, key.role, cache_secs),
           key.role, key.env, key.name)
       return jobs
 
@@ -169,6 +233,18 @@ class AuroraCommandContext(Context):
     self.check_and_log_response(resp, err_code=EXIT_INVALID_PARAMETER)
     return resp.result.scheduleStatusResult.tasks or None
 
+  def get_job_statuses(self, keys):
+    """Returns the task instances of each of several jobs, in order, as get_job_status would.
+    The jobs are queried concurrently, with the bounded concurrency of each cluster's API.
+    """
+    futures = [self.get_api(key.cluster).submit('check_status', key) for key in keys]
+    result = []
+    for future in futures:
+      resp = future.result()
+      self.check_and_log_response(resp, err_code=EXIT_INVALID_PARAMETER)
+      result.append(resp.result.scheduleStatusResult.tasks or None)
+    return result
+
   def get_active_instances(self, key):
     """Returns a list of the currently active instances of a job"""
     return [task.assignedTask.instanceId for task in self.get_job_status(key)]
@@ -0,0 +1,70 @@
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+import errno
+import json
+import os
+import tempfile
+import time
+
+from twitter.common import log
+
+
+class JobListCache(object):
+  """An on-disk cache of the jobs listed by the scheduler of each cluster, per role.
+
+  Used to expand several job key patterns in a row without listing every cluster's jobs anew.
+  Entries are only as fresh as the caller asks for: each lookup states the oldest listing it
+  accepts.
+  """
+  DEFAULT_PATH = os.path.expanduser('~/.aurora/job_lists')
+  ALL_ROLES = '*'
+
+  def __init__(self, path=DEFAULT_PATH, clock=time):
+    self._path = path
+    self._clock = clock
+
+  def _filename(self, cluster, role):
+    return os.path.join(self._path, cluster.replace(os.sep, '_'),
+        '%s.json' % (role or self.ALL_ROLES).replace(os.sep, '_'))
+
+  def get(self, cluster, role, max_age_secs):
+    """Returns the (role, env, name) of the jobs listed for the role, or all roles if role is None,
+    at most max_age_secs ago, or None if there is no such listing."""
+    try:
+      with open(self._filename(cluster, role)) as fp:
+        entry = json.load(fp)
+      listed, jobs = entry['listed'], [tuple(job) for job in entry['jobs']]
+    except (IOError, OSError, ValueError, KeyError, TypeError):
+      return None
+    if not 0 <= self._clock.time() - listed < max_age_secs:
+      return None
+    return jobs
+
+  def put(self, cluster, role, jobs):
+    filename = self._filename(cluster, role)
+    entry = {'listed': self._clock.time(), 'jobs': [list(job) for job in jobs]}
+    try:
+      try:
+        os.makedirs(os.path.dirname(filename))
+      except OSError as e:
+        if e.errno != errno.EEXIST:
+          raise
+      fd, temp = tempfile.mkstemp(dir=os.path.dirname(filename), prefix='.jobs.')
+      with os.fdopen(fd, 'w') as fp:
+        json.dump(entry, fp)
+      os.rename(temp, filename)
+    except (IOError, OSError) as e:
+      log.debug('Failed to cache the jobs of %s: %s' % (cluster, e))
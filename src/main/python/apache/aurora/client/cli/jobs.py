@@ -48,6 +48,7 @@ from apache.aurora.client.cli.options import (
     FORCE_OPTION,
     HEALTHCHECK_OPTION,
     INSTANCES_SPEC_ARGUMENT,
+    JOBS_CACHE_OPTION,
     JOBSPEC_ARGUMENT,
     JSON_READ_OPTION,
     JSON_WRITE_OPTION,
@@ -394,10 +395,11 @@ class ListJobsCommand(Verb):
     return "list"
 
   def get_options(self):
-    return [WILDCARD_JOBKEY_OPTION]
+    return [JOBS_CACHE_OPTION, WILDCARD_JOBKEY_OPTION]
 
   def execute(self, context):
-    jobs = context.get_jobs_matching_key(context.options.jobspec)
+    jobs = context.get_jobs_matching_key(context.options.jobspec,
+        cache_secs=context.options.jobs_cache_secs)
     for j in jobs:
       context.print_out("%s/%s/%s/%s" % (j.cluster, j.role, j.env, j.name))
     return EXIT_OK
@@ -498,7 +500,7 @@ The jobspec parameter can omit parts of the jobkey, or use shell-style globs."""
     return "status"
 
   def get_options(self):
-    return [JSON_WRITE_OPTION, WILDCARD_JOBKEY_OPTION]
+    return [JOBS_CACHE_OPTION, JSON_WRITE_OPTION, WILDCARD_JOBKEY_OPTION]
 
   def render_tasks_json(self, jobkey, active_tasks, inactive_tasks):
     """Render the tasks running for a job in machine-processable JSON format."""
@@ -552,8 +554,7 @@ The jobspec parameter can omit parts of the jobkey, or use shell-style globs."""
       return task.status in ACTIVE_STATES
 
     result = []
-    for jk in jobkeys:
-      job_tasks = context.get_job_status(jk)
+    for jk, job_tasks in zip(jobkeys, context.get_job_statuses(jobkeys)):
       active_tasks = [t for t in job_tasks if is_active(t)]
       inactive_tasks = [t for t in job_tasks if not is_active(t)]
       if context.options.write_json:
@@ -566,7 +567,8 @@ The jobspec parameter can omit parts of the jobkey, or use shell-style globs."""
       return ''.join(result)
 
   def execute(self, context):
-    jobs = context.get_jobs_matching_key(context.options.jobspec)
+    jobs = context.get_jobs_matching_key(context.options.jobspec,
+        cache_secs=context.options.jobs_cache_secs)
     result = self.get_status_for_jobs(jobs, context)
     context.print_out(result)
     return EXIT_OK
@@ -234,6 +234,12 @@ JOBSPEC_ARGUMENT = CommandOption('jobspec', type=AuroraJobKey.from_path,
     help='Fully specified job key, in CLUSTER/ROLE/ENV/NAME format')
 
 
+JOBS_CACHE_OPTION = CommandOption('--jobs-cache-secs', type=int, default=0,
+    dest='jobs_cache_secs',
+    help='Expand job key wildcards from the jobs each cluster reported at most this many seconds '
+         'ago, as cached locally, instead of querying every cluster anew. 0 disables the cache.')
+
+
 JSON_READ_OPTION = CommandOption('--read-json', default=False, dest='read_json',
     action='store_true',
     help='Read job configuration in json format')
@@ -33,6 +33,7 @@ from apache.aurora.admin.admin_util import (
     print_results
 )
 from apache.aurora.client.api import AuroraClientAPI
+from apache.aurora.client.api.paging import QueryError
 from apache.aurora.client.api.sla import JobUpTimeLimit
 from apache.aurora.client.base import (
     check_and_log_response,
@@ -46,7 +47,7 @@ from apache.aurora.common.clusters import CLUSTERS
 from apache.aurora.common.shellify import shellify
 
 from gen.apache.aurora.api.constants import ACTIVE_STATES, TERMINAL_STATES
-from gen.apache.aurora.api.ttypes import ResponseCode, ScheduleStatus, TaskQuery
+from gen.apache.aurora.api.ttypes import ScheduleStatus, TaskQuery
 
 """Command-line client for managing admin-only interactions with the aurora scheduler."""
 
@@ -142,18 +143,14 @@ def query(args, options):
     die('--force is required for expensive queries (states outside ACTIVE states')
 
   api = AuroraClientAPI(CLUSTERS[cluster], options.verbosity)
-  query_info = api.query(api.build_query(role, job, instances=instances, statuses=states))
-  if query_info.responseCode != ResponseCode.OK:
-    die('Failed to query scheduler: %s' % query_info.messageDEPRECATED)
-
-  tasks = query_info.result.scheduleStatusResult.tasks
-  if tasks is None:
-    return
+  tasks = api.iter_tasks(api.build_query(role, job, instances=instances, statuses=states))
 
   try:
     for task in tasks:
       d = flatten_task(task)
       print(listformat % map_values(d))
+  except QueryError as e:
+    die('Failed to query scheduler: %s' % e.response.messageDEPRECATED)
   except KeyError:
     msg = "Unknown key in format string.  Valid keys are:\n"
     msg += ','.join(d.keys())
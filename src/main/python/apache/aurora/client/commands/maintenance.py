@@ -74,6 +74,9 @@ def end_maintenance_hosts(cluster):
          'maintenance ticket number.')
 @app.command_option('--unsafe_hosts_file', dest='unsafe_hosts_filename', default=None,
     help='Output file to write host names that did not pass SLA check.')
+@app.command_option('--max_groups_in_flight', dest='max_groups_in_flight', type=int, default=1,
+    help='Maximum number of host groups to drain at once. Every group is checked for SLA with '
+         'the hosts of the groups already draining considered down.')
 @app.command_option(FILENAME_OPTION)
 @app.command_option(HOSTS_OPTION)
 @app.command_option(GROUPING_OPTION)
@@ -86,6 +89,7 @@ def perform_maintenance_hosts(cluster):
                                       [--override_duration=duration]
                                       [--override_reason=reason]
                                       [--unsafe_hosts_file=unsafe_hosts_filename]
+                                      [--max_groups_in_flight=count]
                                       cluster
 
   Asks the scheduler to remove any running tasks from the machine and remove it
@@ -101,6 +105,9 @@ def perform_maintenance_hosts(cluster):
   if has_override != all_overrides:
     die('All --override_* options are required when attempting to override default SLA values.')
 
+  if options.max_groups_in_flight < 1:
+    die('--max_groups_in_flight must be at least 1.')
+
   percentage = parse_sla_percentage(options.percentage) if options.percentage else None
   duration = parse_time(options.duration) if options.duration else None
   if options.reason:
@@ -123,7 +130,8 @@ def perform_maintenance_hosts(cluster):
       callback=drained_callback,
       percentage=percentage,
       duration=duration,
-      output_file=options.unsafe_hosts_filename)
+      output_file=options.unsafe_hosts_filename,
+      max_groups_in_flight=options.max_groups_in_flight)
 
 
 @app.command
@@ -16,7 +16,14 @@ from io import BytesIO
 
 import requests
 from requests import exceptions as request_exceptions
-from thrift.transport.TTransport import TTransportBase, TTransportException
+from requests.adapters import HTTPAdapter
+from thrift.transport.TTransport import CReadableTransport, TTransportBase, TTransportException
+
+try:
+  from cStringIO import StringIO as ReadBuffer
+except ImportError:
+  # io.BytesIO shares the bytes it is initialized with until written to.
+  from io import BytesIO as ReadBuffer
 
 try:
   from urlparse import urlparse
@@ -24,16 +31,36 @@ except ImportError:
   from urllib.parse import urlparse
 
 
-def default_requests_session_factory():
+DEFAULT_POOL_SIZE = 4
+DEFAULT_CONTENT_TYPE = 'application/x-thrift'
+
+
+def default_requests_session_factory(pool_size=DEFAULT_POOL_SIZE):
+  """Produces a requests.Session keeping at most pool_size connections alive per host.
+
+  The pool blocks rather than opening connections beyond pool_size when it is shared by threads.
+  """
   session = requests.session()
   session.headers['User-Agent'] = 'Python TRequestsTransport v1.0'
+  adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True)
+  session.mount('http://', adapter)
+  session.mount('https://', adapter)
   return session
 
 
-class TRequestsTransport(TTransportBase):
-  """A Thrift HTTP client based upon the requests module."""
+class TRequestsTransport(TTransportBase, CReadableTransport):
+  """A Thrift HTTP client based upon the requests module.
+
+  The underlying session is opened on the first call and kept across calls, so that its pooled
+  keep-alive connections are reused.  A session that fails a call is discarded along with its
+  connections, and the next call opens a new one.
+
+  Replies are read in full before being decoded, so that the transport is also readable by the C
+  accelerated binary protocol.
+  """
 
-  def __init__(self, uri, auth=None, session_factory=default_requests_session_factory):
+  def __init__(self, uri, auth=None, session_factory=default_requests_session_factory,
+               content_type=DEFAULT_CONTENT_TYPE):
     """Construct a TRequestsTransport.
 
     Construct a Thrift transport based upon the requests module.  URI is the
@@ -45,13 +72,15 @@ class TRequestsTransport(TTransportBase):
     :param uri: The endpoint uri
     :type uri: str
     :keyword auth: The requests authentication context.
+    :keyword content_type: The content type naming the thrift protocol of the calls.  Replies of
+                           any other content type are rejected unless it is the default.
     """
     self.__session = None
     self.__session_factory = session_factory
     if not callable(session_factory):
       raise TypeError('session_factory should be a callable that produces a requests.Session!')
     self.__wbuf = BytesIO()
-    self.__rbuf = BytesIO()
+    self.__rbuf = ReadBuffer(b'')
     self.__uri = uri
     try:
       self.__urlparse = urlparse(uri)
@@ -59,6 +88,7 @@ class TRequestsTransport(TTransportBase):
       raise TTransportException('Failed to parse uri %r' % (uri,))
     self.__timeout = None
     self.__auth = auth
+    self.__content_type = content_type
 
   def isOpen(self):
     return self.__session is not None
@@ -68,7 +98,8 @@ class TRequestsTransport(TTransportBase):
 
   def close(self):
     session, self.__session = self.__session, None
-    session.close()
+    if session is not None:
+      session.close()
 
   def setTimeout(self, ms):
     self.__timeout = ms / 1000.0
@@ -79,32 +110,56 @@ class TRequestsTransport(TTransportBase):
   def write(self, buf):
     self.__wbuf.write(buf)
 
-  def flush(self):
-    if self.isOpen():
-      self.close()
+  @property
+  def cstringio_buf(self):
+    return self.__rbuf
 
-    self.open()
+  def cstringio_refill(self, partialread, reqlen):
+    # The buffer already holds the whole reply.
+    raise EOFError()
+
+  def flush(self):
+    if not self.isOpen():
+      self.open()
 
     data = self.__wbuf.getvalue()
     self.__wbuf = BytesIO()
 
-    self.__session.headers['Content-Type'] = 'application/x-thrift'
-    self.__session.headers['Content-Length'] = str(len(data))
-    self.__session.headers['Host'] = self.__urlparse.hostname
+    headers = {
+      'Content-Type': self.__content_type,
+      'Host': self.__urlparse.hostname,
+    }
 
     try:
       response = self.__session.post(
           self.__uri,
           data=data,
+          headers=headers,
           timeout=self.__timeout,
           auth=self.__auth)
-    except request_exceptions.Timeout:
-      raise TTransportException(
-          type=TTransportException.TIMED_OUT,
-          message='Timed out talking to %s' % self.__uri)
+      try:
+        content = response.content
+      finally:
+        # Hands the connection back to the pool.
+        response.close()
     except request_exceptions.RequestException as e:
+      # The failure may have left pooled connections unusable, e.g. after a reset by the server.
+      self.close()
+      if isinstance(e, request_exceptions.Timeout):
+        raise TTransportException(
+            type=TTransportException.TIMED_OUT,
+            message='Timed out talking to %s' % self.__uri)
       raise TTransportException(
           type=TTransportException.UNKNOWN,
           message='Unknown error talking to %s: %s' % (self.__uri, e))
 
-    self.__rbuf = BytesIO(response.content)
+    if self.__content_type != DEFAULT_CONTENT_TYPE:
+      # A server without support for the protocol answers in another, or with an error page.
+      reply_type = response.headers.get('Content-Type', '').split(';')[0].strip()
+      if reply_type != self.__content_type:
+        raise TTransportException(
+            type=TTransportException.UNKNOWN,
+            message='Expected a reply of type %s from %s, got %r (HTTP %s)' % (
+                self.__content_type, self.__uri, reply_type, response.status_code))
+
+    self.__rbuf = ReadBuffer(content)
@@ -40,6 +40,7 @@ from apache.thermos.core.helper import TaskKiller
 from apache.thermos.core.inspector import CheckpointInspector
 from apache.thermos.monitoring.detector import TaskDetector
 from apache.thermos.monitoring.garbage import TaskGarbageCollector
+from apache.thermos.monitoring.index import CheckpointIndex
 
 from .common.sandbox import DirectorySandbox
 from .executor_base import ExecutorBase
@@ -121,6 +122,7 @@ class ThermosGCExecutor(ExecutorBase, ExceptionalThread, Observable):
     self._task_id = None  # the task_id currently being executed by the ThermosGCExecutor, if any
     self._start_time = None  # the start time of a task currently being executed, if any
     self._detector = executor_detector()
+    self._index = CheckpointIndex(checkpoint_root)
     self._collector = task_garbage_collector(root=checkpoint_root)
     self._clock = clock
     self._task_killer = task_killer
@@ -153,14 +155,17 @@ class ThermosGCExecutor(ExecutorBase, ExceptionalThread, Observable):
 
   def get_states(self, task_id):
     """Returns the (timestamp, status) tuples of the task or [] if could not replay."""
-    statuses = CheckpointDispatcher.iter_statuses(self._runner_ckpt(task_id))
-    try:
-      return [(state.timestamp_ms / 1000.0, state.state) for state in statuses]
-    except CheckpointDispatcher.ErrorRecoveringState:
+    state = self._index.get(task_id)
+    if state is None or state.statuses is None:
       return []
+    return [(status.timestamp_ms / 1000.0, status.state) for status in state.statuses]
 
   def get_sandbox(self, task_id):
     """Returns the sandbox of the task, or None if it has not yet been initialized."""
+    state = self._index.get(task_id)
+    if state is not None:
+      return state.header.sandbox if state.header else None
+    # The checkpoint may be corrupt past its header, which is all that is needed here.
     try:
       for update in CheckpointDispatcher.iter_updates(self._runner_ckpt(task_id)):
         if update.runner_header and update.runner_header.sandbox:
@@ -72,6 +72,14 @@ app.add_option(
      help="chroot tasks to the sandbox before executing them.")
 
 
+app.add_option(
+     "--watch_checkpoints",
+     dest="watch_checkpoints",
+     default=False,
+     action='store_true',
+     help="use inotify to wait for process checkpoint updates rather than polling them.")
+
+
 app.add_option(
      "--port",
      type='string',
@@ -134,7 +142,8 @@ def proxy_main(args, opts):
       user=opts.setuid,
       portmap=prebound_ports,
       chroot=opts.chroot,
-      planner_class=CappedTaskPlanner
+      planner_class=CappedTaskPlanner,
+      watch_checkpoints=opts.watch_checkpoints,
   )
 
   for sig in (signal.SIGUSR1, signal.SIGUSR2):
@@ -41,9 +41,16 @@ from apache.thermos.core.helper import TaskRunnerHelper
 from apache.thermos.core.runner import TaskRunner
 from apache.thermos.monitoring.detector import TaskDetector
 from apache.thermos.monitoring.garbage import DefaultCollector, TaskGarbageCollector
+from apache.thermos.monitoring.index import CheckpointIndex
 from apache.thermos.monitoring.monitor import TaskMonitor
 
-from gen.apache.thermos.ttypes import ProcessState, RunnerCkpt, RunnerState, TaskState
+from gen.apache.thermos.ttypes import (
+    ProcessState,
+    RunnerCkpt,
+    RunnerSnapshot,
+    RunnerState,
+    TaskState
+)
 
 app.add_option("--root", dest="root", metavar="PATH",
                default=TaskPath.DEFAULT_CHECKPOINT_ROOT,
@@ -295,6 +302,8 @@ def simplerun(args, options):
 @app.command
 @app.command_option("--simple", default=False, dest='simple', action='store_true',
                     help="Only print the checkpoint records, do not replay them.")
+@app.command_option("--no_snapshot", default=True, dest='use_snapshot', action='store_false',
+                    help="Replay the full checkpoint stream even if it has a snapshot.")
 def read(args, options):
   """Replay a thermos checkpoint.
 
@@ -302,17 +311,43 @@ def read(args, options):
   Options:
     --simple	Do not replay the full task state machine.  Only print out the contents of
                 each checkpoint log message.
+    --no_snapshot	Replay the full checkpoint stream, ignoring any snapshot of it.
+
+  If checkpoint_filename is a runner checkpoint snapshot, print the snapshot instead.
   """
   if len(args) != 1:
     app.error('Expected one checkpoint file, got %s' % len(args))
   if not os.path.exists(args[0]):
     app.error('Could not find %s' % args[0])
 
+  if args[0].endswith(CheckpointDispatcher.SNAPSHOT_SUFFIX):
+    with open(args[0], 'r') as fp:
+      try:
+        snapshot = ThriftRecordReader(fp, RunnerSnapshot).try_read()
+      except RecordIO.Error as err:
+        print("Failed to read snapshot %s: %s" % (fp.name, err))
+        return
+    if snapshot is None:
+      print('Snapshot CORRUPT or outdated format')
+      return
+    print('SNAPSHOT: offset=%s' % snapshot.offset)
+    pprint.pprint(snapshot.state, indent=4)
+    return
+
   dispatcher = CheckpointDispatcher()
   state = RunnerState(processes={})
+  offset = 0
+  snapshot = CheckpointDispatcher.read_snapshot(args[0]) if options.use_snapshot else None
+  if snapshot is not None:
+    if options.simple:
+      print('SNAPSHOT: offset=%s' % snapshot.offset)
+    else:
+      print('Recovered from snapshot covering %s bytes.' % snapshot.offset)
+      state, offset = snapshot.state, snapshot.offset
   with open(args[0], 'r') as fp:
+    fp.seek(offset)
     try:
-      for record in ThriftRecordReader(fp, RunnerCkpt):
+      for record in iter(ThriftRecordReader(fp, RunnerCkpt).read, None):
         if not options.simple:
           dispatcher.dispatch(state, record)
         else:
@@ -488,6 +523,7 @@ def status(args, options):
       --only=TYPE	    Only print tasks of TYPE (options: active finished)
   """
   detector = TaskDetector(root=options.root)
+  index = CheckpointIndex(options.root)
 
   def format_task(task_id):
     checkpoint_filename = detector.get_checkpoint(task_id)
@@ -500,7 +536,11 @@ def status(args, options):
     if options.verbose == 0:
       print()
     if options.verbose > 0:
-      state = CheckpointDispatcher.from_file(checkpoint_filename)
+      # The process table reports the number of runs, which the index summary does not retain.
+      if options.verbose > 2:
+        state = CheckpointDispatcher.from_file(checkpoint_filename)
+      else:
+        state = index.get(task_id)
       if state is None or state.header is None:
         print(' - checkpoint stream CORRUPT or outdated format')
         return
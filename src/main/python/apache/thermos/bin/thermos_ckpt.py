@@ -23,7 +23,7 @@ from twitter.common.recordio import RecordIO, ThriftRecordReader
 
 from apache.thermos.common.ckpt import CheckpointDispatcher
 
-from gen.apache.thermos.ttypes import RunnerCkpt, RunnerState, TaskState
+from gen.apache.thermos.ttypes import RunnerCkpt, RunnerSnapshot, RunnerState, TaskState
 
 app.add_option(
     "--checkpoint",
@@ -38,6 +38,13 @@ app.add_option(
     default=True,
     help="whether or not to replay the checkpoint records.")
 
+app.add_option(
+    "--use_snapshot",
+    dest="use_snapshot",
+    default=False,
+    action="store_true",
+    help="when assembling, start from the snapshot of the checkpoint if one exists.")
+
 
 def main(args):
   values = app.get_options()
@@ -52,12 +59,28 @@ def main(args):
     app.help()
     sys.exit(1)
 
+  if values.ckpt.endswith(CheckpointDispatcher.SNAPSHOT_SUFFIX):
+    try:
+      snapshot = ThriftRecordReader(file(values.ckpt, "r"), RunnerSnapshot).try_read()
+    except RecordIO.Error as err:
+      print('Error reading snapshot: %s' % err, file=sys.stderr)
+      return
+    print('Snapshot covering %s bytes:' % (snapshot.offset if snapshot else None))
+    pprint.pprint(snapshot.state if snapshot else None, indent=4)
+    return
+
   fp = file(values.ckpt, "r")
-  rr = ThriftRecordReader(fp, RunnerCkpt)
   wrs = RunnerState(processes={})
+  if values.assemble is True and values.use_snapshot:
+    snapshot = CheckpointDispatcher.read_snapshot(values.ckpt)
+    if snapshot is not None:
+      print('Recovering from snapshot covering %s bytes' % snapshot.offset)
+      wrs = snapshot.state
+      fp.seek(snapshot.offset)
+  rr = ThriftRecordReader(fp, RunnerCkpt)
   dispatcher = CheckpointDispatcher()
   try:
-    for wts in rr:
+    for wts in iter(rr.read, None):
       print('Recovering: %s' % wts)
       if values.assemble is True:
         dispatcher.dispatch(wrs, wts)
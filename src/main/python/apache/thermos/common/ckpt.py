@@ -20,15 +20,22 @@ state of the Thermos runner and its constituent processes.
 It also defines several Handler interfaces to define behaviour on transitions in the Process and
 Task state machines.
 
+Runner checkpoint streams of long-lived tasks may be accompanied by a snapshot (a RunnerSnapshot
+record stored beside the stream) which contains the RunnerState covering a prefix of the stream, so
+that readers need only replay the records written after it.
+
 """
 
+import os
+
 from twitter.common import log
-from twitter.common.recordio import RecordIO, ThriftRecordReader
+from twitter.common.recordio import RecordIO, ThriftRecordReader, ThriftRecordWriter
 
 from gen.apache.thermos.ttypes import (
     ProcessState,
     ProcessStatus,
     RunnerCkpt,
+    RunnerSnapshot,
     RunnerState,
     TaskState
 )
@@ -157,12 +164,16 @@ class CheckpointDispatcher(object):
   class InvalidSequenceNumber(Error): pass
   class InvalidHandler(Error): pass
 
+  SNAPSHOT_SUFFIX = '.snapshot'
+
   @classmethod
-  def iter_updates(cls, filename):
+  def iter_updates(cls, filename, offset=0):
     try:
       with open(filename) as fp:
+        fp.seek(offset)
         rr = ThriftRecordReader(fp, RunnerCkpt)
-        for update in rr:
+        # Iterating over a RecordIO reader directly would rewind to the beginning of the stream.
+        for update in iter(rr.read, None):
           yield update
     except (IOError, OSError, RecordIO.Error) as err:
       raise cls.ErrorRecoveringState(err)
@@ -174,20 +185,135 @@ class CheckpointDispatcher(object):
         yield update.task_status
 
   @classmethod
-  def from_file(cls, filename, truncate=False):
+  def from_file(cls, filename, truncate=False, use_snapshot=True):
     """Reconstruct a RunnerState from a checkpoint stream contained in a file
 
+      If use_snapshot is True and a valid snapshot of the stream exists, only the records written
+      after the snapshot are replayed.
+
       Returns a hydrated RunnerState, or None on any failures.
     """
     state = RunnerState(processes={})
+    offset = 0
+    snapshot = cls.read_snapshot(filename) if use_snapshot else None
+    if snapshot is not None:
+      state, offset = snapshot.state, snapshot.offset
+      if truncate:
+        cls.truncate_state(state)
     builder = cls()
     try:
-      for update in cls.iter_updates(filename):
+      for update in cls.iter_updates(filename, offset=offset):
         builder.dispatch(state, update, truncate=truncate)
       return state
     except cls.Error as e:
       log.error('Failed to recover from %s: %s' % (filename, e))
 
+  @classmethod
+  def snapshot_filename(cls, filename):
+    """The filename of the snapshot of the checkpoint stream contained in filename."""
+    return filename + cls.SNAPSHOT_SUFFIX
+
+  @classmethod
+  def read_snapshot(cls, filename):
+    """Read the snapshot of the checkpoint stream contained in filename.
+
+      Returns a RunnerSnapshot, or None if there is no usable snapshot.
+    """
+    snapshot_filename = cls.snapshot_filename(filename)
+    try:
+      with open(snapshot_filename) as fp:
+        snapshot = ThriftRecordReader(fp, RunnerSnapshot).try_read()
+      ckpt_size = os.path.getsize(filename)
+    except (IOError, OSError, RecordIO.Error) as err:
+      if os.path.exists(snapshot_filename):
+        log.warning('Ignoring unreadable snapshot %s: %s' % (snapshot_filename, err))
+      return None
+    if snapshot is None or snapshot.state is None or snapshot.offset is None:
+      log.warning('Ignoring incomplete snapshot %s' % snapshot_filename)
+      return None
+    if snapshot.offset > ckpt_size:
+      log.warning('Ignoring snapshot %s past the end of its checkpoint stream (%d > %d)' % (
+          snapshot_filename, snapshot.offset, ckpt_size))
+      return None
+    if snapshot.state.processes is None:
+      snapshot.state.processes = {}
+    return snapshot
+
+  @classmethod
+  def write_snapshot(cls, filename, state, offset):
+    """Atomically write a snapshot of state, covering the first offset bytes of filename."""
+    snapshot_filename = cls.snapshot_filename(filename)
+    temporary_filename = snapshot_filename + '.tmp'
+    with open(temporary_filename, 'w') as fp:
+      ThriftRecordWriter(fp).write(RunnerSnapshot(state=state, offset=offset))
+      fp.flush()
+      os.fsync(fp.fileno())
+    os.rename(temporary_filename, snapshot_filename)
+
+  @staticmethod
+  def truncate_state(state):
+    """Drop all but the latest task status and process run, as if replayed with truncate=True."""
+    if state.statuses:
+      state.statuses = state.statuses[-1:]
+    for process, runs in state.processes.items():
+      state.processes[process] = runs[-1:]
+
+  @classmethod
+  def _iter_run_updates(cls, process, run):
+    """Synthesize the (timestamp, ProcessStatus) transitions that led to a process run."""
+    path = [ProcessState.WAITING]
+    if run.state != ProcessState.WAITING:
+      path.append(ProcessState.FORKED)
+      if run.state in (ProcessState.RUNNING, ProcessState.SUCCESS, ProcessState.FAILED) or (
+          run.state in (ProcessState.KILLED, ProcessState.LOST) and run.start_time is not None):
+        path.append(ProcessState.RUNNING)
+      if run.state not in path:
+        path.append(run.state)
+
+    timestamp = None
+    for seq, state in enumerate(path, start=run.seq - len(path) + 1):
+      update = ProcessStatus(seq=seq, process=process, state=state)
+      if state == ProcessState.WAITING:
+        timestamp = run.fork_time
+      elif state == ProcessState.FORKED:
+        update.fork_time, update.coordinator_pid = run.fork_time, run.coordinator_pid
+      elif state == ProcessState.RUNNING:
+        update.start_time, update.pid = run.start_time, run.pid
+        timestamp = run.start_time
+      elif state != ProcessState.LOST:
+        update.stop_time, update.return_code = run.stop_time, run.return_code
+        timestamp = run.stop_time
+      yield timestamp, update
+
+  @classmethod
+  def iter_state_updates(cls, state):
+    """Synthesize a sequence of RunnerCkpts that reconstructs state when dispatched.
+
+      Used to drive handlers from a snapshot as if the covered stream had been replayed.  Task
+      and process transitions are interleaved by timestamp, which preserves the original order of
+      the stream for all transitions that matter to the runner.
+    """
+    if state.header is not None:
+      yield RunnerCkpt(runner_header=state.header)
+
+    updates = []
+    for task_status in state.statuses or []:
+      updates.append((task_status.timestamp_ms / 1000.0, len(updates),
+          RunnerCkpt(task_status=task_status)))
+    for process, runs in state.processes.items():
+      # Timestamps are made monotonic per process so that sequence numbers remain ordered.
+      high_watermark = 0
+      for run in runs:
+        for timestamp, update in cls._iter_run_updates(process, run):
+          # Never-forked runs are still WAITING and sort to the end of the stream.
+          if timestamp is None and run.state == ProcessState.WAITING:
+            timestamp = float('inf')
+          high_watermark = max(high_watermark, timestamp or 0)
+          updates.append((high_watermark, len(updates), RunnerCkpt(process_status=update)))
+
+    for _, _, update in sorted(updates):
+      yield update
+
   def __init__(self):
     self._task_handlers = []
     self._process_handlers = []
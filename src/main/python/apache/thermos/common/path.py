@@ -60,6 +60,7 @@ class TaskPath(object):
       'checkpoint_path': ['%(root)s', 'checkpoints', '%(task_id)s'],
       'runner_checkpoint': ['%(root)s', 'checkpoints', '%(task_id)s', 'runner'],
       'process_checkpoint': ['%(root)s', 'checkpoints', '%(task_id)s', 'coordinator.%(process)s'],
+      'resource_history': ['%(root)s', 'checkpoints', '%(task_id)s', 'resources'],
       'process_logbase': ['%(log_dir)s'],
       'process_logdir': ['%(log_dir)s', '%(process)s', '%(run)s']
   }
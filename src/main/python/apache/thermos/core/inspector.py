@@ -47,6 +47,24 @@ class CheckpointInspector(object):
           return stamp
     return 0
 
+  def _iter_runner_records(self, task_id):
+    """
+      Iterate over the records of the runner checkpoint, synthesizing the records covered by its
+      snapshot if one exists.
+    """
+    ckpt_file = self._path.given(task_id=task_id).getpath('runner_checkpoint')
+    offset = 0
+    snapshot = CheckpointDispatcher.read_snapshot(ckpt_file)
+    if snapshot is not None:
+      for record in CheckpointDispatcher.iter_state_updates(snapshot.state):
+        yield record
+      offset = snapshot.offset
+    with open(ckpt_file) as fp:
+      fp.seek(offset)
+      with closing(ThriftRecordReader(fp, RunnerCkpt)) as ckpt:
+        for record in iter(ckpt.read, None):
+          yield record
+
   def inspect(self, task_id):
     """
       Reconstructs the checkpoint stream and returns a CheckpointInspection.
@@ -78,21 +96,19 @@ class CheckpointInspector(object):
     runner_pid = None
     runner_latest_update = 0
     try:
-      with open(self._path.given(task_id=task_id).getpath('runner_checkpoint')) as fp:
-        with closing(ThriftRecordReader(fp, RunnerCkpt)) as ckpt:
-          for record in ckpt:
-            dispatcher.dispatch(state, record)
-            runner_latest_update = max(runner_latest_update,
-                self.get_timestamp(record.process_status))
-            # collect all bound runners
-            if record.task_status:
-              if record.task_status.runner_pid != runner_pid:
-                runner_processes.append((record.task_status.runner_pid,
-                                         record.task_status.runner_uid or 0,
-                                         record.task_status.timestamp_ms))
-                runner_pid = record.task_status.runner_pid
-            elif record.process_status:
-              consume_process_record(record)
+      for record in self._iter_runner_records(task_id):
+        dispatcher.dispatch(state, record)
+        runner_latest_update = max(runner_latest_update,
+            self.get_timestamp(record.process_status))
+        # collect all bound runners
+        if record.task_status:
+          if record.task_status.runner_pid != runner_pid:
+            runner_processes.append((record.task_status.runner_pid,
+                                     record.task_status.runner_uid or 0,
+                                     record.task_status.timestamp_ms))
+            runner_pid = record.task_status.runner_pid
+        elif record.process_status:
+          consume_process_record(record)
     except (IOError, OSError, RecordIO.Error) as err:
       log.debug('Error inspecting task runner checkpoint: %s' % err)
       return
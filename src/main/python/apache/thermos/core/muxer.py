@@ -14,12 +14,64 @@
 
 import errno
 import os
+import threading
 
 from twitter.common import log
 from twitter.common.recordio import ThriftRecordReader
 
 from gen.apache.thermos.ttypes import RunnerCkpt
 
+try:
+  from watchdog.events import FileCreatedEvent, FileModifiedEvent, FileSystemEventHandler
+  from watchdog.observers import Observer as WatchdogObserver
+except ImportError:
+  FileSystemEventHandler = object
+  WatchdogObserver = None
+
+
+class CheckpointWatcher(FileSystemEventHandler):
+  """
+    Watch the checkpoint directory of a task using inotify (through the watchdog module) and
+    signal whenever a coordinator checkpoint is created or grows.
+  """
+
+  COORDINATOR_PREFIX = 'coordinator.'
+
+  class Unavailable(Exception): pass
+
+  @classmethod
+  def available(cls):
+    return WatchdogObserver is not None
+
+  def __init__(self, path):
+    if not self.available():
+      raise self.Unavailable('watchdog is not available.')
+    self._path = path
+    self._event = threading.Event()
+    self._observer = WatchdogObserver()
+    self._observer.schedule(self, path=self._path, recursive=False)
+    self._observer.daemon = True
+    self._observer.start()
+
+  def dispatch(self, event):
+    if isinstance(event, (FileCreatedEvent, FileModifiedEvent)) and (
+        os.path.basename(event.src_path).startswith(self.COORDINATOR_PREFIX)):
+      self._event.set()
+
+  def clear(self):
+    self._event.clear()
+
+  def wait(self, timeout=None):
+    """
+      Block until a coordinator checkpoint changes or timeout seconds elapse.  Returns True if
+      a change was observed.
+    """
+    self._event.wait(timeout)
+    return self._event.is_set()
+
+  def stop(self):
+    self._observer.stop()
+
 
 class ProcessMuxer(object):
   class Error(Exception): pass
@@ -27,14 +79,42 @@ class ProcessMuxer(object):
   class ProcessNotFound(Error): pass
   class CorruptCheckpoint(Error): pass
 
-  def __init__(self, pathspec):
+  def __init__(self, pathspec, watch=False):
+    """
+      pathspec (TaskPath) = the path specification of the task whose coordinators are multiplexed
+      watch (boolean) = if True, use inotify to wake up waiters when coordinator checkpoints
+                        change.  Falls back to polling if inotify is unavailable.
+    """
     self._processes = {}  # process_name => fp
     self._watermarks = {}  # process_name => sequence high watermark
     self._pathspec = pathspec
+    self._watcher = None
+    if watch:
+      self._watcher = self._create_watcher()
+
+  def _create_watcher(self):
+    checkpoint_path = self._pathspec.getpath('checkpoint_path')
+    try:
+      if not os.path.isdir(checkpoint_path):
+        os.makedirs(checkpoint_path)
+      return CheckpointWatcher(checkpoint_path)
+    except CheckpointWatcher.Unavailable:
+      log.debug('ProcessMuxer: inotify unavailable, falling back to polling.')
+    except (IOError, OSError) as e:
+      log.warning('ProcessMuxer: unable to watch %s, falling back to polling: %s' % (
+          checkpoint_path, e))
+    return None
+
+  @property
+  def watching(self):
+    """Returns True if changes in coordinator checkpoints can be waited upon via wait()."""
+    return self._watcher is not None
 
   def __del__(self):
     for fp in filter(None, self._processes.values()):
       fp.close()
+    if self._watcher is not None:
+      self._watcher.stop()
 
   def register(self, process_name, watermark=0):
     log.debug('registering %s' % process_name)
@@ -122,6 +202,17 @@ class ProcessMuxer(object):
       return True
     return False
 
+  def wait(self, timeout):
+    """
+      Block until a coordinator checkpoint may have new data or timeout seconds elapse.
+
+      Returns True if a change was observed.  Only meaningful if watching, otherwise returns
+      False immediately and the caller is expected to sleep between calls to select().
+    """
+    if self._watcher is None:
+      return False
+    return self._watcher.wait(timeout)
+
   def select(self):
     """
       Read and multiplex checkpoint records from all the forked off process coordinators.
@@ -133,6 +224,9 @@ class ProcessMuxer(object):
       Returns a list of RunnerCkpt objects that were successfully read, or an empty
       list if none were read.
     """
+    if self._watcher is not None:
+      # Clear before reading so that writes racing with this select() wake up the next wait().
+      self._watcher.clear()
     self._bind_processes()
     updates = []
     for handle in filter(None, self._processes.values()):
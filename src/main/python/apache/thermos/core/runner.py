@@ -382,6 +382,9 @@ class TaskRunner(object):
   # exec'ed the child process.
   LOST_TIMEOUT = Amount(60, Time.SECONDS)
 
+  # Number of runner checkpoint records written between snapshots of the runner state.
+  SNAPSHOT_INTERVAL = 1000
+
   # Active task stages
   STAGES = {
     TaskState.ACTIVE: TaskRunnerStage_ACTIVE,
@@ -417,7 +420,7 @@ class TaskRunner(object):
 
   def __init__(self, task, checkpoint_root, sandbox, log_dir=None,
                task_id=None, portmap=None, user=None, chroot=False, clock=time,
-               universal_handler=None, planner_class=TaskPlanner):
+               universal_handler=None, planner_class=TaskPlanner, watch_checkpoints=False):
     """
       required:
         task (config.Task) = the task to run
@@ -439,6 +442,9 @@ class TaskRunner(object):
         universal_handler = checkpoint record handler (only used for testing)
         planner_class (TaskPlanner class) = TaskPlanner class to use for constructing the task
                             planning policy.
+        watch_checkpoints (boolean) = use inotify to wait for coordinator checkpoint updates
+                            instead of polling them every COORDINATOR_INTERVAL_SLEEP.  Falls
+                            back to polling if inotify is unavailable.
     """
     if not issubclass(planner_class, TaskPlanner):
       raise TypeError('planner_class must be a TaskPlanner.')
@@ -488,12 +494,13 @@ class TaskRunner(object):
     self._sandbox = sandbox
     self._terminal_state = None
     self._ckpt = None
+    self._records_since_snapshot = 0
     self._process_map = dict((p.name().get(), p) for p in self._task.processes())
     self._task_processes = {}
     self._stages = dict((state, stage(self)) for state, stage in self.STAGES.items())
     self._finalization_start = None
     self._preemption_deadline = None
-    self._watcher = ProcessMuxer(self._pathspec)
+    self._watcher = ProcessMuxer(self._pathspec, watch=watch_checkpoints)
     self._state = RunnerState(processes={})
 
     # create runner state
@@ -573,6 +580,20 @@ class TaskRunner(object):
     """
     if not self._recovery:
       self._ckpt.write(record)
+      self._records_since_snapshot += 1
+      if self._records_since_snapshot >= self.SNAPSHOT_INTERVAL:
+        self._write_snapshot()
+
+  def _write_snapshot(self):
+    """
+      Snapshot the runner state so that recovery need only replay records written after it.
+    """
+    ckpt_file = self._pathspec.getpath('runner_checkpoint')
+    try:
+      CheckpointDispatcher.write_snapshot(ckpt_file, self._state, os.path.getsize(ckpt_file))
+    except (IOError, OSError) as e:
+      log.error('Failed to snapshot runner checkpoint %s: %s' % (ckpt_file, e))
+    self._records_since_snapshot = 0
 
   def _replay(self, checkpoints):
     """
@@ -587,9 +608,17 @@ class TaskRunner(object):
     """
     ckpt_file = self._pathspec.getpath('runner_checkpoint')
     if os.path.exists(ckpt_file):
+      offset = 0
+      snapshot = CheckpointDispatcher.read_snapshot(ckpt_file)
+      if snapshot is not None:
+        log.debug('Replaying runner snapshot covering %d bytes' % snapshot.offset)
+        for record in CheckpointDispatcher.iter_state_updates(snapshot.state):
+          self._dispatcher.dispatch(self._state, record, recovery=True)
+        offset = snapshot.offset
       with open(ckpt_file, 'r') as fp:
+        fp.seek(offset)
         ckpt_recover = ThriftRecordReader(fp, RunnerCkpt)
-        for record in ckpt_recover:
+        for record in iter(ckpt_recover.read, None):
           log.debug('Replaying runner checkpoint record: %s' % record)
           self._dispatcher.dispatch(self._state, record, recovery=True)
 
@@ -817,8 +846,16 @@ class TaskRunner(object):
           return len(process_updates)
         if timeout and total_time >= timeout:
           break
-        total_time += sleep_interval
-        self._clock.sleep(sleep_interval)
+        if self._watcher.watching:
+          # Block until a coordinator checkpoint changes, bounded by the remaining timeout.
+          wait_time = (timeout - total_time if timeout
+              else self.MAX_ITERATION_TIME.as_(Time.SECONDS))
+          start = self._clock.time()
+          self._watcher.wait(wait_time)
+          total_time += max(self._clock.time() - start, 0.0)
+        else:
+          total_time += sleep_interval
+          self._clock.sleep(sleep_interval)
     return 0
 
   def is_terminal(self):
@@ -14,16 +14,33 @@
 
 """Detect Thermos tasks on disk
 
-This module contains the TaskDetector, used to detect Thermos tasks within a given checkpoint root.
+This module contains the TaskDetector, used to detect Thermos tasks within a given checkpoint root,
+and the TaskWatcher, used to be notified of tasks being added, finished or removed.
 
 """
 
 import glob
 import os
 import re
+import threading
+from collections import namedtuple
+
+from twitter.common.dirutil import safe_mkdir
 
 from apache.thermos.common.path import TaskPath
 
+try:
+  from watchdog.events import (
+      FileCreatedEvent,
+      FileDeletedEvent,
+      FileMovedEvent,
+      FileSystemEventHandler
+  )
+  from watchdog.observers import Observer as WatchdogObserver
+except ImportError:
+  FileSystemEventHandler = object
+  WatchdogObserver = None
+
 
 class TaskDetector(object):
   """
@@ -103,3 +120,96 @@ class TaskDetector(object):
       except Exception:
         continue
       yield path
+
+
+class TaskEvent(namedtuple('TaskEvent', ['action', 'state', 'task_id'])):
+  """
+    A change to the set of tasks on disk.  action is one of ADDED, MOVED or REMOVED, and state
+    is the state directory the task was added to, moved to or removed from.
+  """
+  ADDED = 'added'
+  MOVED = 'moved'
+  REMOVED = 'removed'
+
+
+class TaskWatcher(FileSystemEventHandler):
+  """
+    Watch the active and finished task directories of a checkpoint root using inotify (through
+    the watchdog module) and buffer the resulting TaskEvents until they are drained.
+
+    inotify may drop events if its queue overflows, so consumers should still periodically
+    reconcile against TaskDetector.get_task_ids.
+  """
+
+  STATES = ('active', 'finished')
+
+  class Unavailable(Exception): pass
+
+  @classmethod
+  def available(cls):
+    return WatchdogObserver is not None
+
+  def __init__(self, root):
+    if not self.available():
+      raise self.Unavailable('watchdog is not available.')
+    self._pathspec = TaskPath(root=root)
+    self._tasks_path = os.path.dirname(self._state_path('active'))
+    for state in self.STATES:
+      safe_mkdir(self._state_path(state))
+    self._events = []
+    self._condition = threading.Condition()
+    self._observer = WatchdogObserver()
+    # A single recursive watch on the tasks directory lets inotify pair the two halves of a rename
+    # from active to finished into one move event.
+    self._observer.schedule(self, path=self._tasks_path, recursive=True)
+    self._observer.daemon = True
+    self._observer.start()
+
+  def _state_path(self, state):
+    return os.path.dirname(self._pathspec.given(state=state, task_id='_').getpath('task_path'))
+
+  def _classify(self, path):
+    """Return the (state, task_id) of a task path, or None if path is not a task."""
+    if path is None:
+      return None
+    dirname, task_id = os.path.split(path)
+    if task_id.startswith('.') or os.path.dirname(dirname) != self._tasks_path:
+      return None
+    state = os.path.basename(dirname)
+    return (state, task_id) if state in self.STATES else None
+
+  def _translate(self, event):
+    if isinstance(event, FileCreatedEvent):
+      task = self._classify(event.src_path)
+      return [TaskEvent(TaskEvent.ADDED, *task)] if task else []
+    if isinstance(event, FileDeletedEvent):
+      task = self._classify(event.src_path)
+      return [TaskEvent(TaskEvent.REMOVED, *task)] if task else []
+    if isinstance(event, FileMovedEvent):
+      source, destination = self._classify(event.src_path), self._classify(event.dest_path)
+      if source and destination and source[1] == destination[1]:
+        return [TaskEvent(TaskEvent.MOVED, *destination)]
+      return ([TaskEvent(TaskEvent.REMOVED, *source)] if source else []) + (
+              [TaskEvent(TaskEvent.ADDED, *destination)] if destination else [])
+    return []
+
+  def dispatch(self, event):
+    events = self._translate(event)
+    if events:
+      with self._condition:
+        self._events.extend(events)
+        self._condition.notify_all()
+
+  def drain(self, timeout=None):
+    """
+      Block until at least one TaskEvent is available or timeout seconds elapse, then return
+      (and forget) all buffered TaskEvents in the order they were observed.
+    """
+    with self._condition:
+      if not self._events:
+        self._condition.wait(timeout)
+      events, self._events = self._events, []
+    return events
+
+  def stop(self):
+    self._observer.stop()
@@ -17,21 +17,26 @@
 This module provides threads which can be used to gather information on the disk utilisation
 under a particular path.
 
-Currently, there are two threads available:
+Currently, there are three threads available:
   - DiskCollectorThread, which periodically uses a basic brute-force approach (os.stat()ing every
     file within the path)
   - InotifyDiskCollectorThread, which updates disk utilisation dynamically by using inotify to
     monitor disk changes within the path
+  - IncrementalDiskCollectorThread, which periodically updates a DirectorySizeCache, only
+    rescanning directories which changed since the previous collection
 
 """
 
+import json
 import os
+import stat
 import threading
 import time
+from collections import namedtuple
 from Queue import Queue
 
 from twitter.common import log
-from twitter.common.dirutil import du, safe_bsize
+from twitter.common.dirutil import du, safe_bsize, safe_mkdir
 from twitter.common.exceptions import ExceptionalThread
 from twitter.common.lang import Lockable
 from twitter.common.quantity import Amount, Time
@@ -195,3 +200,173 @@ class InotifyDiskCollector(object):
   @property
   def completed_event(self):
     return threading.Event()
+
+
+class DirectorySizeCache(object):
+  """ Cache of the disk usage of the files directly within each directory under a path, keyed by the
+    (inode, mtime) of the directory.
+
+    A directory's mtime only changes when entries are added, removed or renamed, so directories
+    whose (inode, mtime) is unchanged are not listed again.  Files growing in place do not change
+    the mtime of their directory, so the sizes of recently modified ("hot") files are re-stat()ed on
+    every update, and every FULL_RESCAN_INTERVAL updates all directories are listed again to bound
+    the error from cold files which are modified again.  Memory is O(directories + hot files).
+  """
+
+  class Entry(namedtuple('Entry', 'inode mtime size subdirs hot')):
+    """ size: bytes used by files directly within the directory, including the hot files
+        subdirs: names of the subdirectories
+        hot: filename => size, for files modified within HOT_WINDOW of the last listing """
+
+  HOT_WINDOW = Amount(10, Time.MINUTES)
+  FULL_RESCAN_INTERVAL = 10
+  # Directories modified this recently may be modified again without their mtime changing.
+  MTIME_GRANULARITY = Amount(1, Time.SECONDS)
+
+  def __init__(self, path):
+    self._path = path
+    self._entries = {}  # directory path => Entry
+    self._updates = 0
+
+  @property
+  def path(self):
+    return self._path
+
+  def __len__(self):
+    return len(self._entries)
+
+  @classmethod
+  def _file_size(cls, path, st):
+    if stat.S_ISREG(st.st_mode):
+      return 512 * st.st_blocks
+    if stat.S_ISLNK(st.st_mode) and not os.path.isdir(path):
+      return len(os.readlink(path))
+    return 0
+
+  def _list(self, path, st, now):
+    size, subdirs, hot = 0, [], {}
+    hot_after = now - self.HOT_WINDOW.as_(Time.SECONDS)
+    for name in os.listdir(path):
+      child = os.path.join(path, name)
+      try:
+        child_st = os.lstat(child)
+        if stat.S_ISDIR(child_st.st_mode):
+          subdirs.append(name)
+          continue
+        child_size = self._file_size(child, child_st)
+      except OSError:
+        continue
+      size += child_size
+      if child_st.st_mtime >= hot_after:
+        hot[name] = child_size
+    mtime = st.st_mtime if now - st.st_mtime >= self.MTIME_GRANULARITY.as_(Time.SECONDS) else None
+    return self.Entry(st.st_ino, mtime, size, subdirs, hot)
+
+  def _refresh(self, path, entry, now):
+    size, hot = entry.size, {}
+    hot_after = now - self.HOT_WINDOW.as_(Time.SECONDS)
+    for name, old_size in entry.hot.items():
+      size -= old_size
+      try:
+        child = os.path.join(path, name)
+        child_st = os.lstat(child)
+        new_size = self._file_size(child, child_st)
+      except OSError:
+        continue
+      size += new_size
+      if child_st.st_mtime >= hot_after:
+        hot[name] = new_size
+    return entry._replace(size=size, hot=hot)
+
+  def update(self):
+    """ Bring the cache up to date and return the disk usage of all files under the path """
+    full = self._updates % self.FULL_RESCAN_INTERVAL == 0
+    self._updates += 1
+    now = time.time()
+    entries, total, stack = {}, 0, [self._path]
+    while stack:
+      path = stack.pop()
+      try:
+        st = os.lstat(path)
+        if not stat.S_ISDIR(st.st_mode):
+          continue
+        entry = self._entries.get(path)
+        if (not full and entry is not None and entry.mtime is not None and
+            (entry.inode, entry.mtime) == (st.st_ino, st.st_mtime)):
+          entry = self._refresh(path, entry, now)
+        else:
+          entry = self._list(path, st, now)
+      except OSError:
+        continue
+      entries[path] = entry
+      total += entry.size
+      stack.extend(os.path.join(path, name) for name in entry.subdirs)
+    self._entries = entries
+    return total
+
+  def load(self, filename):
+    """ Load entries previously saved by save(), e.g. before the observer restarted. """
+    try:
+      with open(filename) as fp:
+        data = json.load(fp)
+    except (IOError, OSError, ValueError) as e:
+      log.debug('Unable to load directory size cache %s: %s' % (filename, e))
+      return
+    if data.get('path') != self._path:
+      return
+    self._entries = dict((path, self.Entry(*entry)) for path, entry in data['entries'].items())
+    # Loaded entries may be arbitrarily stale, so the first update only trusts their mtimes.
+    self._updates = 1
+
+  def save(self, filename):
+    safe_mkdir(os.path.dirname(filename))
+    temporary_filename = filename + '.tmp'
+    with open(temporary_filename, 'w') as fp:
+      json.dump(dict(path=self._path, entries=self._entries), fp)
+    os.rename(temporary_filename, filename)
+
+
+class IncrementalDiskCollectorThread(ExceptionalThread):
+  """ Thread to update a DirectorySizeCache and calculate aggregate disk usage under its path """
+
+  def __init__(self, cache, cache_file=None):
+    self.cache = cache
+    self.cache_file = cache_file
+    self.value = None
+    self.event = threading.Event()
+    super(IncrementalDiskCollectorThread, self).__init__()
+    self.daemon = True
+
+  def run(self):
+    log.debug("IncrementalDiskCollectorThread: starting collection of %s" % self.cache.path)
+    self.value = self.cache.update()
+    log.debug("IncrementalDiskCollectorThread: finished collection of %s (%d directories)" % (
+        self.cache.path, len(self.cache)))
+    if self.cache_file:
+      try:
+        self.cache.save(self.cache_file)
+      except (IOError, OSError) as e:
+        log.warning('Unable to save directory size cache %s: %s' % (self.cache_file, e))
+    self.event.set()
+
+  def finished(self):
+    return self.event.is_set()
+
+
+class IncrementalDiskCollector(DiskCollector):
+  """ Spawn a background thread to incrementally sample disk usage, retaining a DirectorySizeCache
+      between samples (and, if cache_file is given, between restarts) """
+
+  def __init__(self, root, cache_file=None):
+    super(IncrementalDiskCollector, self).__init__(root)
+    self._cache = DirectorySizeCache(root)
+    self._cache_file = cache_file
+    if cache_file:
+      self._cache.load(cache_file)
+
+  @Lockable.sync
+  def sample(self):
+    """ Trigger collection of sample, if not already begun """
+    if self._thread is None:
+      self._thread = IncrementalDiskCollectorThread(self._cache, self._cache_file)
+      self._thread.start()
@@ -22,22 +22,20 @@ from twitter.common.dirutil import safe_bsize, safe_delete, safe_rmtree
 from twitter.common.lang import Interface
 from twitter.common.quantity import Amount, Data, Time
 
-from apache.thermos.common.ckpt import CheckpointDispatcher
 from apache.thermos.common.path import TaskPath
 
 from .detector import TaskDetector
+from .index import CheckpointIndex
 
 
 class TaskGarbageCollector(object):
-  def __init__(self, root):
+  def __init__(self, root, index=None):
     self._root = root
     self._detector = TaskDetector(root=self._root)
-    self._states = {}
+    self._index = index or CheckpointIndex(self._root)
 
   def state(self, task_id):
-    if task_id not in self._states:
-      self._states[task_id] = CheckpointDispatcher.from_file(self._detector.get_checkpoint(task_id))
-    return self._states[task_id]
+    return self._index.get(task_id)
 
   def get_age(self, task_id):
     return os.path.getmtime(self._detector.get_checkpoint(task_id))
@@ -49,7 +47,9 @@ class TaskGarbageCollector(object):
     runner_ckpt = self._detector.get_checkpoint(task_id)
     process_ckpts = [ckpt for ckpt in self._detector.get_process_checkpoints(task_id)]
     json_spec = TaskPath(root=self._root, task_id=task_id, state='finished').getpath('task_path')
-    for path in [json_spec, runner_ckpt] + process_ckpts:
+    resource_history = TaskPath(root=self._root, task_id=task_id).getpath('resource_history')
+    resource_history = [resource_history] if os.path.exists(resource_history) else []
+    for path in [json_spec, runner_ckpt] + process_ckpts + resource_history:
       if with_size:
         yield path, safe_bsize(path)
       else:
@@ -84,6 +84,7 @@ class TaskGarbageCollector(object):
     for fn in self.get_metadata(task_id, with_size=False):
       safe_delete(fn)
     safe_rmtree(TaskPath(root=self._root, task_id=task_id).getpath('checkpoint_path'))
+    self._index.forget(task_id)
 
   def erase_logs(self, task_id):
     for fn in self.get_logs(task_id, with_size=False):
@@ -0,0 +1,212 @@
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+"""Compact storage of numeric time series
+
+This module contains the ColumnarRingBuffer, which stores rows of floats in one array per column
+rather than as a Python object per row, and supports bisection on its first (timestamp) column, and
+the SampleLog, an append-only file of such rows which is read back through mmap.
+
+"""
+
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_left, bisect_right
+
+from twitter.common import log
+
+
+class ColumnarRingBuffer(object):
+  """
+    A fixed-capacity FIFO of rows of floats, sorted by their first column.  Columns grow on demand
+    up to capacity, after which the oldest row is overwritten.
+  """
+
+  class _Column(object):
+    """Sequence view of a column in row order, e.g. for bisection."""
+
+    def __init__(self, buffer, column):
+      self._buffer = buffer
+      self._column = buffer._columns[column]
+
+    def __len__(self):
+      return len(self._buffer)
+
+    def __getitem__(self, index):
+      return self._column[self._buffer._physical(index)]
+
+  def __init__(self, capacity, width):
+    if not capacity >= 1:
+      raise ValueError("capacity must be greater than 0")
+    self._capacity = capacity
+    self._columns = [array('d') for _ in range(width)]
+    self._start = 0  # physical index of the oldest row
+
+  @property
+  def capacity(self):
+    return self._capacity
+
+  def __len__(self):
+    return len(self._columns[0])
+
+  def _physical(self, index):
+    length = len(self)
+    if index < 0:
+      index += length
+    if not 0 <= index < length:
+      raise IndexError('ColumnarRingBuffer index out of range')
+    return (self._start + index) % length
+
+  def append(self, row):
+    if len(self) < self._capacity:
+      for column, value in zip(self._columns, row):
+        column.append(value)
+    else:
+      for column, value in zip(self._columns, row):
+        column[self._start] = value
+      self._start = (self._start + 1) % self._capacity
+
+  def __getitem__(self, index):
+    physical = self._physical(index)
+    return tuple(column[physical] for column in self._columns)
+
+  def __iter__(self):
+    for index in range(len(self)):
+      yield self[index]
+
+  def bisect_left(self, key):
+    """Index of the first row whose first column is >= key"""
+    return bisect_left(self._Column(self, 0), key)
+
+  def bisect_right(self, key):
+    """Index of the first row whose first column is > key"""
+    return bisect_right(self._Column(self, 0), key)
+
+  def range(self, start, end):
+    """Rows whose first column is within [start, end]"""
+    return [self[index] for index in range(self.bisect_left(start), self.bisect_right(end))]
+
+  @property
+  def nbytes(self):
+    return sum(column.itemsize * len(column) for column in self._columns)
+
+
+class SampleLog(object):
+  """
+    An append-only file of fixed-width rows of floats, read back through mmap.  Once the log holds
+    more than twice max_rows rows, it is compacted to its latest max_rows rows.
+  """
+
+  MAGIC = 'TSL1'
+  HEADER = struct.Struct('<4sI')  # magic, row width
+
+  def __init__(self, filename, width, max_rows=None):
+    self._filename = filename
+    self._width = width
+    self._row = struct.Struct('<%dd' % width)
+    self._max_rows = max_rows
+    self._fp = None
+
+  @property
+  def filename(self):
+    return self._filename
+
+  def _valid_header(self, fp):
+    header = fp.read(self.HEADER.size)
+    if len(header) < self.HEADER.size:
+      return False
+    magic, width = self.HEADER.unpack(header)
+    if (magic, width) != (self.MAGIC, self._width):
+      log.warning('Ignoring sample log %s with unexpected header' % self._filename)
+      return False
+    return True
+
+  def __len__(self):
+    try:
+      size = os.path.getsize(self._filename)
+    except OSError:
+      return 0
+    return max(0, (size - self.HEADER.size) // self._row.size)
+
+  def rows(self):
+    """Return the complete rows in the log.  A partially written final row is ignored."""
+    try:
+      fp = open(self._filename, 'rb')
+    except IOError:
+      return []
+    with fp:
+      if not self._valid_header(fp):
+        return []
+      count = len(self)
+      if count == 0:
+        return []
+      mapped = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+      try:
+        return [self._row.unpack_from(mapped, self.HEADER.size + index * self._row.size)
+                for index in range(count)]
+      finally:
+        mapped.close()
+
+  def last(self):
+    """Return the last complete row in the log, or None."""
+    count = len(self)
+    if count == 0:
+      return None
+    with open(self._filename, 'rb') as fp:
+      if not self._valid_header(fp):
+        return None
+      fp.seek(self.HEADER.size + (count - 1) * self._row.size)
+      return self._row.unpack(fp.read(self._row.size))
+
+  def _open(self):
+    directory = os.path.dirname(self._filename)
+    if directory and not os.path.isdir(directory):
+      os.makedirs(directory)
+    count = len(self)
+    valid = False
+    if os.path.exists(self._filename):
+      with open(self._filename, 'rb') as fp:
+        valid = self._valid_header(fp)
+    if not valid:
+      self._rewrite([])
+    else:
+      # Drop any partially written row left by a crash, so that appended rows stay aligned.
+      with open(self._filename, 'r+b') as fp:
+        fp.truncate(self.HEADER.size + count * self._row.size)
+    self._fp = open(self._filename, 'ab')
+
+  def _rewrite(self, rows):
+    temporary_filename = self._filename + '.tmp'
+    with open(temporary_filename, 'wb') as fp:
+      fp.write(self.HEADER.pack(self.MAGIC, self._width))
+      for row in rows:
+        fp.write(self._row.pack(*row))
+    os.rename(temporary_filename, self._filename)
+
+  def append(self, row):
+    if self._fp is None:
+      self._open()
+    self._fp.write(self._row.pack(*row))
+    self._fp.flush()
+    if self._max_rows is not None and len(self) > 2 * self._max_rows:
+      self.close()
+      self._rewrite(self.rows()[-self._max_rows:])
+
+  def close(self):
+    if self._fp is not None:
+      self._fp.close()
+      self._fp = None
@@ -0,0 +1,170 @@
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+"""Index the runner checkpoints of Thermos tasks
+
+This module contains the CheckpointIndex, which maintains a RunnerCkptSummary (the header, every
+task status and the latest run of each process) for each task in a checkpoint root.  Summaries are
+persisted beside each runner checkpoint and keyed by its size and mtime, so that consumers such as
+the observer, the garbage collector and the thermos CLI only read checkpoint records written since
+the last time any of them looked.
+
+"""
+
+import copy
+import os
+import threading
+
+from twitter.common import log
+from twitter.common.recordio import RecordIO, ThriftRecordReader, ThriftRecordWriter
+
+from apache.thermos.common.ckpt import CheckpointDispatcher
+from apache.thermos.common.path import TaskPath
+
+from gen.apache.thermos.ttypes import RunnerCkpt, RunnerCkptSummary, RunnerState
+
+
+class CheckpointIndex(object):
+  """
+    Incrementally maintained summaries of the runner checkpoints under a checkpoint root.
+  """
+
+  INDEX_SUFFIX = '.index'
+
+  def __init__(self, root, persist=True):
+    """
+      root (path) = the checkpoint root
+      persist (boolean) = whether or not to write summaries back to disk.  Summaries written by
+                          other processes are read regardless.
+    """
+    self._pathspec = TaskPath(root=root)
+    self._persist = persist
+    self._summaries = {}  # task_id => RunnerCkptSummary
+    self._corrupt = {}  # task_id => (size, mtime) of a checkpoint that could not be read
+    self._lock = threading.Lock()
+
+  def _checkpoint(self, task_id):
+    return self._pathspec.given(task_id=task_id).getpath('runner_checkpoint')
+
+  @classmethod
+  def index_filename(cls, checkpoint):
+    return checkpoint + cls.INDEX_SUFFIX
+
+  @classmethod
+  def _read_summary(cls, checkpoint):
+    try:
+      with open(cls.index_filename(checkpoint)) as fp:
+        summary = ThriftRecordReader(fp, RunnerCkptSummary).try_read()
+    except (IOError, OSError, RecordIO.Error):
+      return None
+    if summary is None or summary.state is None or summary.offset is None:
+      return None
+    if summary.state.processes is None:
+      summary.state.processes = {}
+    return summary
+
+  @classmethod
+  def _write_summary(cls, checkpoint, summary):
+    filename = cls.index_filename(checkpoint)
+    temporary_filename = filename + '.tmp'
+    try:
+      with open(temporary_filename, 'w') as fp:
+        ThriftRecordWriter(fp).write(summary)
+      os.rename(temporary_filename, filename)
+    except (IOError, OSError) as e:
+      log.debug('Unable to persist checkpoint index %s: %s' % (filename, e))
+
+  @classmethod
+  def _initial_summary(cls, checkpoint):
+    snapshot = CheckpointDispatcher.read_snapshot(checkpoint)
+    if snapshot is None:
+      return RunnerCkptSummary(state=RunnerState(processes={}), offset=0)
+    for process, runs in snapshot.state.processes.items():
+      snapshot.state.processes[process] = runs[-1:]
+    return RunnerCkptSummary(state=snapshot.state, offset=snapshot.offset)
+
+  @classmethod
+  def _apply_tail(cls, checkpoint, summary):
+    """
+      Apply the records written past summary.offset.  Raises CheckpointDispatcher.Error or
+      RecordIO.Error if the stream is corrupt.
+    """
+    dispatcher = CheckpointDispatcher()
+    with open(checkpoint) as fp:
+      fp.seek(summary.offset)
+      rr = ThriftRecordReader(fp, RunnerCkpt)
+      for record in iter(rr.try_read, None):
+        # Keep every task status, but only the latest run of each process.
+        dispatcher.dispatch(summary.state, record, truncate=record.task_status is None)
+      summary.offset = fp.tell()
+
+  def _refresh(self, task_id):
+    checkpoint = self._checkpoint(task_id)
+    try:
+      stat = os.stat(checkpoint)
+    except OSError:
+      self._summaries.pop(task_id, None)
+      return None
+
+    if self._corrupt.get(task_id) == (stat.st_size, stat.st_mtime):
+      return None
+
+    summary = self._summaries.get(task_id)
+    if summary is not None and (summary.offset, summary.mtime) == (stat.st_size, stat.st_mtime):
+      return summary
+
+    for candidate in (summary, self._read_summary(checkpoint)):
+      if candidate is not None and candidate.offset <= stat.st_size:
+        summary = candidate
+        break
+    else:
+      summary = self._initial_summary(checkpoint)
+
+    advanced = summary.offset < stat.st_size
+    if advanced:
+      # Never mutate a summary that may have been handed out to callers.
+      summary = copy.deepcopy(summary)
+      try:
+        self._apply_tail(checkpoint, summary)
+      except (IOError, OSError, RecordIO.Error, CheckpointDispatcher.Error) as e:
+        log.error('Failed to index checkpoint of %s: %s' % (task_id, e))
+        self._summaries.pop(task_id, None)
+        self._corrupt[task_id] = (stat.st_size, stat.st_mtime)
+        return None
+
+    if summary.mtime != stat.st_mtime:
+      summary = RunnerCkptSummary(state=summary.state, offset=summary.offset, mtime=stat.st_mtime)
+    # Runners touch their checkpoints periodically, so only persist when new records were read.
+    if advanced and self._persist:
+      self._write_summary(checkpoint, summary)
+    self._corrupt.pop(task_id, None)
+    self._summaries[task_id] = summary
+    return summary
+
+  def get(self, task_id):
+    """
+      Return a RunnerState summarizing the runner checkpoint of task_id, or None if the checkpoint
+      does not exist or is corrupt.  The summary contains every task status but only the latest
+      run of each process.  It must not be mutated by the caller.
+    """
+    with self._lock:
+      summary = self._refresh(task_id)
+      return summary.state if summary is not None else None
+
+  def forget(self, task_id):
+    """Drop any in-memory summary of task_id, e.g. once it has been garbage collected."""
+    with self._lock:
+      self._summaries.pop(task_id, None)
+      self._corrupt.pop(task_id, None)
@@ -64,6 +64,11 @@ class TaskMonitor(object):
       ckpt_offset = os.stat(self._runner_ckpt).st_size
 
       updated = False
+      if self._ckpt_head == 0:
+        snapshot = CheckpointDispatcher.read_snapshot(self._runner_ckpt)
+        if snapshot is not None:
+          self._runnerstate, self._ckpt_head = snapshot.state, snapshot.offset
+          updated = True
       if self._ckpt_head < ckpt_offset:
         with open(self._runner_ckpt, 'r') as fp:
           fp.seek(self._ckpt_head)
@@ -78,7 +83,7 @@ class TaskMonitor(object):
               log.error('Checkpoint stream is corrupt: %s' % e)
               break
           new_ckpt_head = fp.tell()
-          updated = self._ckpt_head != new_ckpt_head
+          updated = updated or self._ckpt_head != new_ckpt_head
           self._ckpt_head = new_ckpt_head
       return updated
     except OSError as e:
@@ -14,12 +14,18 @@
 
 """Represent resource consumption statistics for processes
 
-This module exposes one class: the ProcessSample, used to represent resource consumption. A single
+This module exposes the ProcessSample, used to represent resource consumption. A single
 ProcessSample might correspond to one individual process, or to an aggregate of multiple processes.
 
+It also exposes the ProcessTableCollectorBase, which aggregates ProcessSamples for many process
+trees from one scan of the process table, leaving the scan and the sampling of each process to its
+subclasses.
+
 """
 
 from collections import namedtuple
+from operator import attrgetter
+from time import time
 
 
 class ProcessSample(namedtuple('ProcessSample', 'rate user system rss vms nice status threads')):
@@ -62,3 +68,77 @@ class ProcessSample(namedtuple('ProcessSample', 'rate user system rss vms nice s
         status=str(self.status),
         threads=self.threads,
     )
+
+
+class ProcessTableCollectorBase(object):
+  """ Collect resource consumption statistics for many process trees from a single scan of the
+      process table.  Subclasses implement _scan and _sample_process. """
+
+  def __init__(self):
+    self._sampled = {}  # pid => ProcessSample, for every pid in a tree during the last scan
+    self._trees = {}  # root pid => (procs, ProcessSample)
+    self._stamp = None
+
+  def _scan(self):
+    """ Scan the process table.
+        Returns (processes, children): a dictionary of pid => process, as passed to _sample_process,
+        and a dictionary of pid => list of child pids.  Returns None if the scan failed.
+    """
+    raise NotImplementedError
+
+  def _sample_process(self, process):
+    """ Return a current ProcessSample of a process returned by _scan """
+    raise NotImplementedError
+
+  @classmethod
+  def _descendants(cls, pid, children):
+    tree, stack = [], [pid]
+    while stack:
+      pid = stack.pop()
+      tree.append(pid)
+      stack.extend(children.get(pid, ()))
+    return tree
+
+  def sample(self, pids):
+    """ Scan the process table once, then collate and aggregate ProcessSamples for the process tree
+        rooted at each of pids.
+        Returns None: results are retrieved with value(pid) and procs(pid)
+    """
+    scan = self._scan()
+    if scan is None:
+      self._sampled, self._trees = {}, {}
+      return
+    processes, children = scan
+
+    last_stamp, self._stamp = self._stamp, time()
+    samples, trees = {}, {}
+    for root in set(pids):
+      if root not in processes:
+        continue
+      tree = self._descendants(root, children)
+      for pid in tree:
+        if pid not in samples:
+          samples[pid] = self._sample_process(processes[pid])
+      new = [samples[pid] for pid in tree]
+      aggregate = sum(new, ProcessSample.empty())
+      # A tree must have been sampled before to calculate a rate.
+      rate = 0.0
+      if root in self._trees and last_stamp:
+        old = [self._sampled.get(pid, ProcessSample.empty()) for pid in tree]
+        new_user_sys = sum(map(attrgetter('user'), new)) + sum(map(attrgetter('system'), new))
+        old_user_sys = sum(map(attrgetter('user'), old)) + sum(map(attrgetter('system'), old))
+        rate = (new_user_sys - old_user_sys) / (self._stamp - last_stamp)
+      trees[root] = (len(tree), aggregate._replace(rate=rate))
+    self._sampled, self._trees = samples, trees
+
+  def sampled(self, pid):
+    """ Whether the tree rooted at pid was collected in the last scan """
+    return pid in self._trees
+
+  def value(self, pid):
+    """ Aggregated ProcessSample representing resource consumption of the tree rooted at pid """
+    return self._trees.get(pid, (0, ProcessSample.empty()))[1]
+
+  def procs(self, pid):
+    """ Number of active processes in the tree rooted at pid """
+    return self._trees.get(pid, (0, ProcessSample.empty()))[0]
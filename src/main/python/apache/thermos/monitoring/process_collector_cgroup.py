@@ -0,0 +1,263 @@
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+""" Sample resource consumption statistics for the cgroup a process runs in
+
+Reading the cpuacct, memory and blkio counters of a cgroup costs O(1) per sample regardless of the
+number of processes in it, and the cumulative CPU counters include the usage of children which
+exited between samples.  Both the legacy (v1) and unified (v2) cgroup hierarchies are supported.
+
+Note that a cgroup typically contains every process of a task, including the Thermos runner and
+executor, so a single CgroupCollector accounts for all of them.
+
+"""
+
+import os
+from abc import abstractmethod, abstractproperty
+from collections import namedtuple
+from operator import attrgetter
+from time import time
+
+from twitter.common import log
+from twitter.common.lang import Interface
+
+from .process import ProcessSample
+from .process_collector_psutil import ProcessTreeCollector
+
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+
+
+class CgroupUsage(namedtuple('CgroupUsage',
+    'user system rss procs threads read_bytes write_bytes')):
+  """ Cumulative CPU (seconds) and io (bytes) counters, and current rss, process and thread counts
+  of a cgroup """
+
+
+def read_keyed(filename):
+  """ Read a flat keyed file (e.g. memory.stat) into a dictionary of key => int """
+  values = {}
+  with open(filename) as fp:
+    for line in fp:
+      fields = line.split()
+      if len(fields) == 2:
+        values[fields[0]] = int(fields[1])
+  return values
+
+
+def count_lines(filename):
+  with open(filename) as fp:
+    return sum(1 for line in fp if line.strip())
+
+
+class Cgroup(Interface):
+  """ A cgroup whose counters can be read """
+
+  @abstractproperty
+  def scope(self):
+    """ A path uniquely identifying the cgroup """
+
+  @abstractmethod
+  def read(self):
+    """ Return the current CgroupUsage.  Raises IOError/OSError if the cgroup is gone. """
+
+  @classmethod
+  def from_pid(cls, pid, cgroup_root='/sys/fs/cgroup', proc='/proc'):
+    """ Return the Cgroup that pid runs in, or None if it does not run in a (non-root) cgroup with
+        cpu and memory accounting. """
+    controllers = {}  # controller => cgroup path relative to its hierarchy
+    try:
+      with open(os.path.join(proc, str(pid), 'cgroup')) as fp:
+        for line in fp:
+          _, names, path = line.strip().split(':', 2)
+          for name in (names.split(',') if names else ['']):
+            controllers[name] = (names, path)
+    except (IOError, OSError, ValueError):
+      return None
+
+    cpuacct, memory = controllers.get('cpuacct'), controllers.get('memory')
+    if cpuacct and memory and '/' not in (cpuacct[1], memory[1]):
+      blkio = controllers.get('blkio')
+      return CgroupV1(
+          cls._v1_path(cgroup_root, 'cpuacct', *cpuacct),
+          cls._v1_path(cgroup_root, 'memory', *memory),
+          cls._v1_path(cgroup_root, 'blkio', *blkio) if blkio and blkio[1] != '/' else None)
+
+    unified = controllers.get('')
+    if unified and unified[1] != '/':
+      path = os.path.join(cgroup_root, unified[1].lstrip('/'))
+      if os.path.exists(os.path.join(path, 'cpu.stat')):
+        return CgroupV2(path)
+
+    return None
+
+  @classmethod
+  def _v1_path(cls, cgroup_root, controller, names, path):
+    # Co-mounted controllers (e.g. cpu,cpuacct) are mounted under their joint name, and usually
+    # symlinked under each individual name.
+    for mount in (names, controller):
+      candidate = os.path.join(cgroup_root, mount, path.lstrip('/'))
+      if os.path.isdir(candidate):
+        return candidate
+    return os.path.join(cgroup_root, controller, path.lstrip('/'))
+
+
+class CgroupV1(Cgroup):
+  def __init__(self, cpuacct, memory, blkio=None):
+    self.cpuacct, self.memory, self.blkio = cpuacct, memory, blkio
+
+  @property
+  def scope(self):
+    return self.cpuacct
+
+  def _io(self):
+    read_bytes = write_bytes = 0
+    if self.blkio is None:
+      return read_bytes, write_bytes
+    try:
+      with open(os.path.join(self.blkio, 'blkio.throttle.io_service_bytes')) as fp:
+        for line in fp:
+          fields = line.split()
+          if len(fields) == 3 and fields[1] == 'Read':
+            read_bytes += int(fields[2])
+          elif len(fields) == 3 and fields[1] == 'Write':
+            write_bytes += int(fields[2])
+    except (IOError, OSError):
+      pass
+    return read_bytes, write_bytes
+
+  def read(self):
+    cpu = read_keyed(os.path.join(self.cpuacct, 'cpuacct.stat'))
+    memory = read_keyed(os.path.join(self.memory, 'memory.stat'))
+    return CgroupUsage(
+        float(cpu.get('user', 0)) / CLOCK_TICKS,
+        float(cpu.get('system', 0)) / CLOCK_TICKS,
+        memory.get('total_rss', memory.get('rss', 0)),
+        count_lines(os.path.join(self.memory, 'cgroup.procs')),
+        count_lines(os.path.join(self.memory, 'tasks')),
+        *self._io())
+
+
+class CgroupV2(Cgroup):
+  def __init__(self, path):
+    self.path = path
+
+  @property
+  def scope(self):
+    return self.path
+
+  def _io(self):
+    read_bytes = write_bytes = 0
+    try:
+      with open(os.path.join(self.path, 'io.stat')) as fp:
+        for line in fp:
+          for field in line.split()[1:]:
+            key, _, value = field.partition('=')
+            if key == 'rbytes':
+              read_bytes += int(value)
+            elif key == 'wbytes':
+              write_bytes += int(value)
+    except (IOError, OSError):
+      pass
+    return read_bytes, write_bytes
+
+  def read(self):
+    cpu = read_keyed(os.path.join(self.path, 'cpu.stat'))
+    memory = read_keyed(os.path.join(self.path, 'memory.stat'))
+    return CgroupUsage(
+        cpu.get('user_usec', 0) / 1e6,
+        cpu.get('system_usec', 0) / 1e6,
+        memory.get('anon', 0),
+        count_lines(os.path.join(self.path, 'cgroup.procs')),
+        count_lines(os.path.join(self.path, 'cgroup.threads')),
+        *self._io())
+
+
+class CgroupCollector(object):
+  """ Collect resource consumption statistics for the cgroup a process runs in, falling back to
+      sampling its process tree if it does not run in one.  Interchangeable with
+      ProcessTreeCollector, e.g. as the process_collector of a TaskResourceMonitor. """
+
+  def __init__(self, pid, cgroup_root='/sys/fs/cgroup', proc='/proc',
+               fallback=ProcessTreeCollector):
+    """ Given a pid """
+    self._pid = pid
+    self._cgroup_root = cgroup_root
+    self._proc = proc
+    self._fallback_factory = fallback
+    self._cgroup = None
+    self._fallback = None
+    self._usage = None
+    self._stamp = None
+    self._rate = 0.0
+
+  def _bind(self):
+    self._cgroup = Cgroup.from_pid(self._pid, cgroup_root=self._cgroup_root, proc=self._proc)
+    if self._cgroup is None:
+      log.debug('No cgroup found for pid %s, sampling its process tree instead' % self._pid)
+      self._fallback = self._fallback_factory(self._pid)
+    else:
+      log.debug('Collecting resources of pid %s from cgroup %s' % (self._pid, self._cgroup.scope))
+
+  def sample(self):
+    """ Read the counters of the cgroup
+        Returns None: result is stored in self.value
+    """
+    if self._cgroup is None and self._fallback is None:
+      self._bind()
+    if self._fallback is not None:
+      self._fallback.sample()
+      return
+
+    try:
+      usage = self._cgroup.read()
+    except (IOError, OSError, ValueError) as e:
+      log.warning('Error during cgroup sampling [pid=%s]: %s' % (self._pid, e))
+      self._usage, self._stamp, self._rate = None, None, 0.0
+      return
+
+    last_usage, last_stamp = self._usage, self._stamp
+    self._usage, self._stamp = usage, time()
+    if last_usage is not None and self._stamp > last_stamp:
+      cpu = attrgetter('user', 'system')
+      self._rate = (sum(cpu(usage)) - sum(cpu(last_usage))) / (self._stamp - last_stamp)
+
+  @property
+  def scope(self):
+    """ The cgroup sampled, shared by all collectors of processes in the same cgroup, or None """
+    return self._cgroup.scope if self._cgroup is not None else None
+
+  @property
+  def value(self):
+    """ ProcessSample representing resource consumption of the cgroup """
+    if self._fallback is not None:
+      return self._fallback.value
+    if self._usage is None:
+      return ProcessSample.empty()
+    return ProcessSample.empty()._replace(rate=self._rate, user=self._usage.user,
+        system=self._usage.system, rss=self._usage.rss, threads=self._usage.threads)
+
+  @property
+  def procs(self):
+    """ Number of active processes in the cgroup """
+    if self._fallback is not None:
+      return self._fallback.procs
+    return self._usage.procs if self._usage is not None else 0
+
+  @property
+  def io(self):
+    """ Cumulative (read, write) bytes of block io by the cgroup, if known """
+    if self._usage is None:
+      return (0, 0)
+    return (self._usage.read_bytes, self._usage.write_bytes)
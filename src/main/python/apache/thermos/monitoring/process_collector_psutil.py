@@ -14,14 +14,15 @@
 
 """ Sample resource consumption statistics for processes using psutil """
 
+from collections import defaultdict
 from operator import attrgetter
 from time import time
 
 from psutil import Error as PsutilError
-from psutil import AccessDenied, NoSuchProcess, Process
+from psutil import AccessDenied, NoSuchProcess, Process, process_iter
 from twitter.common import log
 
-from .process import ProcessSample
+from .process import ProcessSample, ProcessTableCollectorBase
 
 
 def process_to_sample(process):
@@ -103,3 +104,25 @@ class ProcessTreeCollector(object):
   def procs(self):
     """ Number of active processes in the tree """
     return len(self._sampled_tree)
+
+
+class ProcessTableCollector(ProcessTableCollectorBase):
+  """ Collect resource consumption statistics for many process trees from a single scan of the
+      process table, rather than one scan per tree as with ProcessTreeCollector """
+
+  def _scan(self):
+    processes, children = {}, defaultdict(list)
+    try:
+      for process in process_iter():
+        try:
+          children[process.ppid].append(process.pid)
+        except NoSuchProcess:
+          continue
+        processes[process.pid] = process
+    except PsutilError as e:
+      log.warning('Error during process table scan: %s' % e)
+      return None
+    return processes, children
+
+  def _sample_process(self, process):
+    return process_to_sample(process)
@@ -25,24 +25,28 @@ canonical/reference implementation of a ResourceMonitor is the TaskResourceMonit
 actively monitors resources for a particular task by periodically polling process information and
 disk consumption and retaining a limited (FIFO) in-memory history of this data.
 
+Running one TaskResourceMonitor thread per task does not scale to hosts with many tasks, as each
+thread walks the entire process table.  The HostResourceSampler is a single thread which scans the
+process table once per interval on behalf of every registered SharedResourceMonitor, each of which
+is a thin per-task view implementing ResourceMonitorBase.
+
 """
 
 import threading
 import time
 from abc import abstractmethod
-from bisect import bisect_left
 from collections import namedtuple
 from operator import attrgetter
 
 from twitter.common import log
-from twitter.common.collections import RingBuffer
 from twitter.common.concurrent import EventMuxer
 from twitter.common.lang import Interface
 from twitter.common.quantity import Amount, Time
 
 from .disk import DiskCollector
+from .history import ColumnarRingBuffer, SampleLog
 from .process import ProcessSample
-from .process_collector_psutil import ProcessTreeCollector
+from .process_collector_psutil import ProcessTableCollector, ProcessTreeCollector
 
 
 class ResourceMonitorBase(Interface):
@@ -74,39 +78,243 @@ class ResourceMonitorBase(Interface):
     Returns a ProcessSample
     """
 
+  def sample_range(self, start, end):
+    """ Return samples of the resource consumption between the specified times, at the finest
+    resolution retained
+
+    Returns a list of tuples of (timestamp, ResourceResult)
+    """
+    return [self.sample_at(end)]
+
 
 class ResourceHistory(object):
-  """Simple class to contain a RingBuffer (fixed-length FIFO) history of resource samples, with the
-       mapping: timestamp => (number_of_procs, ProcessSample, disk_usage_in_bytes)
+  """History of resource samples, with the mapping:
+       timestamp => (number_of_procs, ProcessSample, disk_usage_in_bytes)
+
+     Samples are stored in ColumnarRingBuffers of floats, one column per field, rather than as a
+     tuple of namedtuples per sample.  The latest maxlen samples are kept at full resolution, and
+     every sample is also rolled up into coarser tiers (by default 1 minute for a day and 10 minutes
+     for a week) which serve queries older than the full resolution history.
+
+     If given a SampleLog, samples are also appended to it, and the history is reloaded from it
+     the first time it is read.
   """
 
-  def __init__(self, maxlen, initialize=True):
+  # (resolution, retention) of each rollup tier, from finest to coarsest.
+  ROLLUPS = (
+    (Amount(1, Time.MINUTES), Amount(1, Time.DAYS)),
+    (Amount(10, Time.MINUTES), Amount(7, Time.DAYS)),
+  )
+
+  # timestamp, num_procs, rate, user, system, rss, vms, nice, status, threads, disk_usage
+  WIDTH = 11
+  # Rollups average these gauges, and keep the latest value of cumulative and categorical fields.
+  AVERAGED = (1, 2, 5, 6, 9, 10)
+  NONE = float('nan')
+  # Process statuses as named by psutil, with stable indices so that they can be persisted.
+  STATUSES = ('running', 'sleeping', 'disk-sleep', 'stopped', 'tracing-stop', 'zombie', 'dead',
+              'wake-kill', 'waking', 'idle', 'locked', 'waiting')
+
+  class Rollup(object):
+    """Aggregates consecutive samples into one row per resolution seconds."""
+
+    def __init__(self, resolution, capacity):
+      self.resolution = resolution
+      self.values = ColumnarRingBuffer(capacity, ResourceHistory.WIDTH)
+      self._bucket = None  # start time of the bucket being aggregated
+      self._sums = None
+      self._count = 0
+      self._last = None
+
+    def add(self, row):
+      bucket = row[0] - row[0] % self.resolution
+      if self._bucket is not None and bucket != self._bucket:
+        self._flush()
+      if self._bucket is None:
+        self._bucket, self._sums, self._count = bucket, [0.0] * len(row), 0
+      for index in ResourceHistory.AVERAGED:
+        self._sums[index] += row[index]
+      self._count += 1
+      self._last = row
+
+    def _flush(self):
+      row = list(self._last)
+      row[0] = self._bucket
+      for index in ResourceHistory.AVERAGED:
+        row[index] = self._sums[index] / self._count
+      self.values.append(row)
+      self._bucket = None
+
+  def __init__(self, maxlen, initialize=True, rollups=ROLLUPS, log=None):
     if not maxlen >= 1:
       raise ValueError("maxlen must be greater than 0")
     self._maxlen = maxlen
-    self._values = RingBuffer(maxlen, None)
-    if initialize:
+    self._values = ColumnarRingBuffer(maxlen, self.WIDTH)
+    self._rollups = [
+        self.Rollup(resolution.as_(Time.SECONDS),
+                    int(retention.as_(Time.SECONDS) / resolution.as_(Time.SECONDS)))
+        for resolution, retention in rollups]
+    # Distinct ProcessSample statuses, stored in the status column by index.  Statuses beyond the
+    # well-known ones are not persisted.
+    self._statuses = list(self.STATUSES)
+    self._log = log
+    self._loaded = log is None
+    self._closed = False
+    self._lock = threading.Lock()
+    if initialize and (log is None or len(log) == 0):
       self.add(time.time(), ResourceMonitorBase.ResourceResult(0, ProcessSample.empty(), 0))
 
+  @classmethod
+  def retention(cls, rollups=ROLLUPS):
+    """The time for which samples are retained by the coarsest tier"""
+    return max(retention for _, retention in rollups) if rollups else Amount(0, Time.SECONDS)
+
+  @classmethod
+  def persisted(cls, maxlen, filename, interval, initialize=True, rollups=ROLLUPS):
+    """Return a ResourceHistory backed by a SampleLog at filename, which retains enough samples
+    (recorded every interval seconds) to rebuild every rollup tier."""
+    max_rows = max(maxlen, int(cls.retention(rollups).as_(Time.SECONDS) / interval))
+    return cls(maxlen, initialize=initialize, rollups=rollups,
+               log=SampleLog(filename, cls.WIDTH, max_rows=max_rows))
+
+  def close(self):
+    """Stop persisting samples"""
+    with self._lock:
+      self._closed = True
+      if self._log is not None:
+        self._log.close()
+
+  def _load(self):
+    with self._lock:
+      if self._loaded:
+        return
+      self._loaded = True
+      for row in self._log.rows():
+        if len(self._values) and not row[0] >= self._values[-1][0]:
+          continue
+        self._append(row)
+
+  def _append(self, row):
+    self._values.append(row)
+    for rollup in self._rollups:
+      rollup.add(row)
+
+  @classmethod
+  def _number(cls, value):
+    return cls.NONE if value is None else value
+
+  @classmethod
+  def _integer(cls, value):
+    return None if value != value else int(round(value))
+
+  def _encode(self, timestamp, value):
+    sample = value.process_sample
+    if sample.status is None:
+      status = self.NONE
+    else:
+      if sample.status not in self._statuses:
+        self._statuses.append(sample.status)
+      status = self._statuses.index(sample.status)
+    return (timestamp, self._number(value.num_procs), self._number(sample.rate),
+            self._number(sample.user), self._number(sample.system), self._number(sample.rss),
+            self._number(sample.vms), self._number(sample.nice), status,
+            self._number(sample.threads), self._number(value.disk_usage))
+
+  def _decode(self, row):
+    timestamp, num_procs, rate, user, system, rss, vms, nice, status, threads, disk_usage = row
+    integer = self._integer
+    if status != status or status >= len(self._statuses):
+      status = None
+    else:
+      status = self._statuses[int(status)]
+    sample = ProcessSample(
+        rate=None if rate != rate else rate,
+        user=None if user != user else user,
+        system=None if system != system else system,
+        rss=integer(rss),
+        vms=integer(vms),
+        nice=integer(nice),
+        status=status,
+        threads=integer(threads))
+    return (timestamp,
+            ResourceMonitorBase.ResourceResult(integer(num_procs), sample, integer(disk_usage)))
+
   def add(self, timestamp, value):
     """Store a new resource sample corresponding to the given timestamp"""
-    if self._values and not timestamp >= self._values[-1][0]:
-      raise ValueError("Refusing to add timestamp in the past!")
-    self._values.append((timestamp, value))
+    with self._lock:
+      if self._loaded:
+        last = self._values[-1] if len(self._values) else None
+      else:
+        last = self._log.last()
+      if last is not None and not timestamp >= last[0]:
+        raise ValueError("Refusing to add timestamp in the past!")
+      row = self._encode(timestamp, value)
+      if self._log is not None and not self._closed:
+        self._persist(row)
+      # Until loaded, samples are only appended to the log, from which they are loaded later.
+      if self._loaded:
+        self._append(row)
+
+  def _persist(self, row):
+    if row[8] >= len(self.STATUSES):
+      row = row[:8] + (self.NONE,) + row[9:]
+    try:
+      self._log.append(row)
+    except (IOError, OSError) as e:
+      log.warning('Failed to persist resource sample to %s: %s' % (self._log.filename, e))
+
+  def _tier(self, timestamp):
+    """The (values, resolution) of the finest tier holding samples as old as timestamp, or else of
+       the tier holding the oldest samples.  Full resolution samples have a resolution of 0."""
+    tiers = [(self._values, 0)] + [(rollup.values, rollup.resolution) for rollup in self._rollups]
+    tiers = [tier for tier in tiers if len(tier[0])]
+    for values, resolution in tiers:
+      if values[0][0] <= timestamp:
+        return values, resolution
+    return tiers[-1] if tiers else (self._values, 0)
 
   def get(self, timestamp):
-    """Get the resource sample nearest to the given timestamp"""
-    closest = min(bisect_left(self._values, (timestamp, None)), len(self) - 1)
-    return self._values[closest]
+    """Get the resource sample nearest to the given timestamp.  Rolled up rows are stamped with the
+       start of their bucket, so from a rollup tier this is the row of the bucket holding
+       timestamp."""
+    self._load()
+    values, resolution = self._tier(timestamp)
+    if resolution:
+      closest = max(values.bisect_right(timestamp) - 1, 0)
+    else:
+      closest = min(values.bisect_left(timestamp), len(values) - 1)
+    return self._decode(values[closest])
+
+  def range(self, start, end):
+    """Get the resource samples between start and end, at the finest resolution available for
+       start.  Samples more recent than the latest rollup are included at full resolution."""
+    self._load()
+    values, resolution = self._tier(start)
+    rows = values.range(start, end)
+    if resolution:
+      since = rows[-1][0] + resolution if rows else start
+      rows.extend(self._values.range(since, end))
+    return [self._decode(row) for row in rows]
 
   def __iter__(self):
-    return iter(self._values)
+    self._load()
+    return (self._decode(row) for row in self._values)
 
   def __len__(self):
+    self._load()
     return len(self._values)
 
+  @property
+  def loaded(self):
+    return self._loaded
+
+  @property
+  def nbytes(self):
+    """Bytes used by the stored samples"""
+    return self._values.nbytes + sum(rollup.values.nbytes for rollup in self._rollups)
+
   def __repr__(self):
-    return 'ResourceHistory(%s)' % ', '.join([str(r) for r in self._values])
+    return 'ResourceHistory(%s)' % ', '.join([str(r) for r in self])
 
 
 class TaskResourceMonitor(ResourceMonitorBase, threading.Thread):
@@ -122,10 +330,11 @@ class TaskResourceMonitor(ResourceMonitorBase, threading.Thread):
                process_collector=ProcessTreeCollector, disk_collector=DiskCollector,
                process_collection_interval=Amount(20, Time.SECONDS),
                disk_collection_interval=Amount(1, Time.MINUTES),
-               history_time=Amount(1, Time.HOURS)):
+               history_time=Amount(1, Time.HOURS), history_path=None):
     """
       task_monitor: TaskMonitor object specifying the task whose resources should be monitored
       sandbox: Directory for which to monitor disk utilisation
+      history_path: If specified, file to which resource samples are persisted
     """
     self._task_monitor = task_monitor  # exposes PIDs, sandbox
     self._task_id = task_monitor._task_id
@@ -143,7 +352,11 @@ class TaskResourceMonitor(ResourceMonitorBase, threading.Thread):
     if history_length > self.MAX_HISTORY:
       raise ValueError("Requested history length too large")
     log.debug("Initialising ResourceHistory of length %s" % history_length)
-    self._history = ResourceHistory(history_length)
+    if history_path is None:
+      self._history = ResourceHistory(history_length)
+    else:
+      self._history = ResourceHistory.persisted(
+          history_length, history_path, min_collection_interval)
     self._kill_signal = threading.Event()
     threading.Thread.__init__(self)
     self.daemon = True
@@ -156,6 +369,9 @@ class TaskResourceMonitor(ResourceMonitorBase, threading.Thread):
   def sample_at(self, timestamp):
     return self._history.get(timestamp)
 
+  def sample_range(self, start, end):
+    return self._history.range(start, end)
+
   def sample_by_process(self, process_name):
     try:
       process = [process for process in self._get_active_processes()
@@ -178,6 +394,18 @@ class TaskResourceMonitor(ResourceMonitorBase, threading.Thread):
     """Signal that the thread should cease collecting resources and terminate"""
     self._kill_signal.set()
 
+  @staticmethod
+  def _unique_collectors(collectors):
+    """Collectors exposing the same non-None scope (e.g. processes in the same cgroup) report the
+    same resources, so only one of each is aggregated."""
+    unique, scopes = [], set()
+    for collector in collectors:
+      scope = getattr(collector, 'scope', None)
+      if scope is None or scope not in scopes:
+        unique.append(collector)
+        scopes.add(scope)
+    return unique
+
   def run(self):
     """Thread entrypoint. Loop indefinitely, polling collectors at self._collection_interval and
     collating samples."""
@@ -213,9 +441,9 @@ class TaskResourceMonitor(ResourceMonitorBase, threading.Thread):
         self._disk_collector.sample()
 
       try:
-        aggregated_procs = sum(map(attrgetter('procs'), self._process_collectors.values()))
-        aggregated_sample = sum(map(attrgetter('value'), self._process_collectors.values()),
-                                ProcessSample.empty())
+        collectors = self._unique_collectors(self._process_collectors.values())
+        aggregated_procs = sum(map(attrgetter('procs'), collectors))
+        aggregated_sample = sum(map(attrgetter('value'), collectors), ProcessSample.empty())
         self._history.add(now, self.ResourceResult(aggregated_procs, aggregated_sample,
                                                    self._disk_collector.value))
         log.debug("Recorded resource sample at %s" % now)
@@ -232,4 +460,198 @@ class TaskResourceMonitor(ResourceMonitorBase, threading.Thread):
       EventMuxer(self._kill_signal, self._disk_collector.completed_event
                 ).wait(timeout=max(0, next_collection))
 
+    self._history.close()
     log.debug('Stopping resource monitoring for task "%s"' % self._task_id)
+
+
+class HostResourceSampler(threading.Thread):
+  """ Thread which collects resource consumption for the processes of all registered
+      SharedResourceMonitors with a single scan of the process table per collection interval.
+  """
+
+  _DEFAULT = None
+  _DEFAULT_LOCK = threading.Lock()
+
+  @classmethod
+  def default(cls):
+    """Return the running HostResourceSampler shared by all SharedResourceMonitors in a process"""
+    with cls._DEFAULT_LOCK:
+      if cls._DEFAULT is None:
+        cls._DEFAULT = cls()
+        cls._DEFAULT.start()
+      return cls._DEFAULT
+
+  def __init__(self, process_collector=ProcessTableCollector,
+               process_collection_interval=Amount(20, Time.SECONDS),
+               disk_collection_interval=Amount(1, Time.MINUTES),
+               history_time=Amount(1, Time.HOURS)):
+    self._process_collector = process_collector()
+    self._process_collection_interval = process_collection_interval.as_(Time.SECONDS)
+    self._disk_collection_interval = disk_collection_interval.as_(Time.SECONDS)
+    self._collection_interval = min(
+        self._process_collection_interval, self._disk_collection_interval)
+    self._history_length = int(history_time.as_(Time.SECONDS) / self._collection_interval)
+    if self._history_length > TaskResourceMonitor.MAX_HISTORY:
+      raise ValueError("Requested history length too large")
+    self._monitors = set()
+    self._lock = threading.Lock()
+    self._wakeup = threading.Event()
+    self._kill_signal = threading.Event()
+    threading.Thread.__init__(self)
+    self.daemon = True
+
+  @property
+  def history_length(self):
+    return self._history_length
+
+  @property
+  def collection_interval(self):
+    """Seconds between samples"""
+    return self._collection_interval
+
+  @property
+  def process_collector(self):
+    return self._process_collector
+
+  def register(self, monitor):
+    """Start collecting resources on behalf of a SharedResourceMonitor"""
+    with self._lock:
+      self._monitors.add(monitor)
+    # Collect the new monitor's disk usage and processes promptly rather than at the next interval.
+    self._wakeup.set()
+
+  def unregister(self, monitor):
+    with self._lock:
+      self._monitors.discard(monitor)
+
+  def registered(self, monitor):
+    with self._lock:
+      return monitor in self._monitors
+
+  def kill(self):
+    """Signal that the thread should cease collecting resources and terminate"""
+    self._kill_signal.set()
+    self._wakeup.set()
+
+  def _collect_processes(self, monitors):
+    active_processes = dict((monitor, monitor._get_active_processes()) for monitor in monitors)
+    self._process_collector.sample(
+        [process.pid for processes in active_processes.values() for process in processes])
+    for monitor, processes in active_processes.items():
+      monitor._processes = processes
+
+  def run(self):
+    """Thread entrypoint. Loop indefinitely, polling collectors and recording samples for every
+    registered monitor."""
+
+    log.debug('Commencing host-wide resource monitoring')
+    next_process_collection = 0
+    next_disk_collection = 0
+    known = set()
+
+    while not self._kill_signal.is_set():
+      self._wakeup.clear()
+      with self._lock:
+        monitors = set(self._monitors)
+      now = time.time()
+      added, known = monitors - known, monitors
+
+      if now > next_process_collection or added:
+        if now > next_process_collection:
+          next_process_collection = now + self._process_collection_interval
+        log.debug('Collecting process samples for %d tasks' % len(monitors))
+        self._collect_processes(monitors)
+
+      disk_monitors = monitors if now > next_disk_collection else added
+      if now > next_disk_collection:
+        next_disk_collection = now + self._disk_collection_interval
+      for monitor in disk_monitors:
+        monitor._disk_collector.sample()
+
+      for monitor in monitors:
+        monitor._record(now, self._process_collector)
+
+      # Disk samples complete asynchronously and are recorded along with the next process sample.
+      now = time.time()
+      next_collection = min(next_process_collection - now, next_disk_collection - now)
+      self._wakeup.wait(timeout=max(0, next_collection))
+
+    log.debug('Stopping host-wide resource monitoring')
+
+
+class SharedResourceMonitor(ResourceMonitorBase):
+  """ Per-task view over the resource consumption collected by a HostResourceSampler.  Exposes the
+      same lifecycle (start/kill/is_alive) as the TaskResourceMonitor thread, but runs no thread of
+      its own.
+  """
+
+  def __init__(self, task_monitor, sandbox, disk_collector=DiskCollector, sampler=None,
+               history_path=None):
+    """
+      task_monitor: TaskMonitor object specifying the task whose resources should be monitored
+      sandbox: Directory for which to monitor disk utilisation
+      sampler: the HostResourceSampler to collect through [default: HostResourceSampler.default()]
+      history_path: If specified, file to which resource samples are persisted
+    """
+    self._task_monitor = task_monitor
+    self._task_id = task_monitor._task_id
+    self._sandbox = sandbox
+    self._disk_collector = disk_collector(self._sandbox)
+    self._sampler = sampler or HostResourceSampler.default()
+    self._processes = []  # ProcessStatus of the active processes as of the last collection
+    if history_path is None:
+      self._history = ResourceHistory(self._sampler.history_length)
+    else:
+      self._history = ResourceHistory.persisted(
+          self._sampler.history_length, history_path, self._sampler.collection_interval)
+
+  def start(self):
+    log.debug('Registering task %s for shared resource collection' % self._task_id)
+    self._sampler.register(self)
+
+  def kill(self):
+    log.debug('Unregistering task %s from shared resource collection' % self._task_id)
+    self._sampler.unregister(self)
+    self._history.close()
+
+  def is_alive(self):
+    return self._sampler.is_alive() and self._sampler.registered(self)
+
+  def sample(self):
+    if not self.is_alive():
+      log.warning("SharedResourceMonitor not running - sample may be inaccurate")
+    return self.sample_at(time.time())
+
+  def sample_at(self, timestamp):
+    return self._history.get(timestamp)
+
+  def sample_range(self, start, end):
+    return self._history.range(start, end)
+
+  def sample_by_process(self, process_name):
+    try:
+      process = [process for process, _ in self._task_monitor.get_active_processes()
+                 if process.process == process_name].pop()
+    except IndexError:
+      raise ValueError('No active process found with name "%s" in this task' % process_name)
+    collector = self._sampler.process_collector
+    if collector.sampled(process.pid):
+      return collector.value(process.pid)
+    # Since this might be called out of band (before the sampler is aware of the process)
+    collector = ProcessTreeCollector(process.pid)
+    collector.sample()
+    return collector.value
+
+  def _get_active_processes(self):
+    """Get a list of ProcessStatus objects representing currently-running processes in the task"""
+    return [process for process, _ in self._task_monitor.get_active_processes()]
+
+  def _record(self, timestamp, process_collector):
+    pids = [process.pid for process in self._processes]
+    try:
+      self._history.add(timestamp, self.ResourceResult(
+          sum(process_collector.procs(pid) for pid in pids),
+          sum((process_collector.value(pid) for pid in pids), ProcessSample.empty()),
+          self._disk_collector.value))
+    except ValueError as err:
+      log.warning("Error recording resource sample: %s" % err)
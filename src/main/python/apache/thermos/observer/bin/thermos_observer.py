@@ -39,6 +39,13 @@ app.add_option("--port",
                help="port number to listen on.")
 
 
+app.add_option("--watch_tasks",
+               dest="watch_tasks",
+               default=False,
+               action="store_true",
+               help="use inotify to discover task transitions rather than polling the root.")
+
+
 def proxy_main():
   def main(args, opts):
     if args:
@@ -49,7 +56,7 @@ def proxy_main():
     root_server = HttpServer()
     root_server.mount_routes(DiagnosticsEndpoints())
 
-    task_observer = TaskObserver(opts.root)
+    task_observer = TaskObserver(opts.root, watch=opts.watch_tasks)
     task_observer.start()
 
     bottle_wrapper = BottleObserver(task_observer)
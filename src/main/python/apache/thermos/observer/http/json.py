@@ -51,6 +51,23 @@ class TaskObserverJSONBindings(object):
   def handle_task(self, task_id):
     return self._observer.tasks([task_id])
 
+  @HttpServer.route("/j/resources/:task_id")
+  def handle_resources(self, task_id):
+    """
+      Additional parameters:
+        start = seconds from epoch [default: an hour before end]
+        end = seconds from epoch [default: now]
+    """
+    start = HttpServer.Request.GET.get('start', None)
+    end = HttpServer.Request.GET.get('end', None)
+    try:
+      return {'samples': self._observer.resource_history(
+        task_id,
+        float(start) if start is not None else None,
+        float(end) if end is not None else None)}
+    except ValueError:
+      HttpServer.abort(400, 'Invalid start/end: %s/%s' % (start, end))
+
   @HttpServer.route("/j/process/:task_id")
   @HttpServer.route("/j/process/:task_id/:process")
   @HttpServer.route("/j/process/:task_id/:process/:run")
@@ -22,6 +22,8 @@ from twitter.common.lang import AbstractClass
 from apache.thermos.common.ckpt import CheckpointDispatcher
 from apache.thermos.config.loader import ThermosTaskWrapper
 from apache.thermos.config.schema import ThermosContext
+from apache.thermos.monitoring.history import SampleLog
+from apache.thermos.monitoring.resource import ResourceHistory
 
 
 class ObservedTask(AbstractClass):
@@ -73,8 +75,8 @@ class ObservedTask(AbstractClass):
     return mtime
 
   def context(self, task_id):
-    state = self.state
-    if state.header is None:
+    state = self.summary
+    if state is None or state.header is None:
       return None
     return ThermosContext(
       ports=state.header.ports if state.header.ports else {},
@@ -101,6 +103,11 @@ class ObservedTask(AbstractClass):
   def state(self):
     """Return state of task (gen.apache.thermos.ttypes.RunnerState)"""
 
+  @property
+  def summary(self):
+    """Return a RunnerState sufficient for header, task status and latest process run queries"""
+    return self.state
+
 
 class ActiveObservedTask(ObservedTask):
   """An active Task known by the TaskObserver"""
@@ -133,9 +140,13 @@ class ActiveObservedTask(ObservedTask):
 class FinishedObservedTask(ObservedTask):
   """A finished Task known by the TaskObserver"""
 
-  def __init__(self, task_id, pathspec):
+  RESOURCE_HISTORY_LENGTH = 180  # full resolution samples, an hour at the default interval
+
+  def __init__(self, task_id, pathspec, index=None):
     super(FinishedObservedTask, self).__init__(task_id, pathspec)
+    self._index = index
     self._state = None
+    self._resource_history = None
 
   @property
   def type(self):
@@ -148,3 +159,24 @@ class FinishedObservedTask(ObservedTask):
       path = self._pathspec.given(task_id=self._task_id).getpath('runner_checkpoint')
       self._state = CheckpointDispatcher.from_file(path)
     return self._state
+
+  @property
+  def summary(self):
+    """Return the indexed summary of the Task, avoiding a full replay of its checkpoint"""
+    if self._state is None and self._index is not None:
+      return self._index.get(self._task_id)
+    return self.state
+
+  @property
+  def resource_history(self):
+    """Return the ResourceHistory persisted while the Task was active (loaded from disk on first
+    access), or None if none was persisted"""
+    if self._resource_history is None:
+      path = self._pathspec.given(task_id=self._task_id).getpath('resource_history')
+      if not os.path.exists(path):
+        return None
+      self._resource_history = ResourceHistory(
+          self.RESOURCE_HISTORY_LENGTH,
+          initialize=False,
+          log=SampleLog(path, ResourceHistory.WIDTH))
+    return self._resource_history
@@ -30,10 +30,11 @@ from twitter.common.lang import Lockable
 from twitter.common.quantity import Amount, Time
 
 from apache.thermos.common.path import TaskPath
-from apache.thermos.monitoring.detector import TaskDetector
+from apache.thermos.monitoring.detector import TaskDetector, TaskEvent, TaskWatcher
+from apache.thermos.monitoring.index import CheckpointIndex
 from apache.thermos.monitoring.monitor import TaskMonitor
 from apache.thermos.monitoring.process import ProcessSample
-from apache.thermos.monitoring.resource import ResourceMonitorBase, TaskResourceMonitor
+from apache.thermos.monitoring.resource import ResourceMonitorBase, SharedResourceMonitor
 
 from .observed_task import ActiveObservedTask, FinishedObservedTask
 
@@ -53,13 +54,29 @@ class TaskObserver(ExceptionalThread, Lockable):
   class UnexpectedState(Exception): pass
 
   POLLING_INTERVAL = Amount(1, Time.SECONDS)
+  RESCAN_INTERVAL = Amount(1, Time.MINUTES)
 
-  def __init__(self, root, resource_monitor_class=TaskResourceMonitor):
+  def __init__(self, root, resource_monitor_class=SharedResourceMonitor, watch=False,
+               persist_history=True):
+    """
+      root (path) = the checkpoint root to observe
+      resource_monitor_class = the ResourceMonitorBase implementation used for active tasks
+      persist_history (boolean) = if True, resource samples of active tasks are also logged under
+                                  the checkpoint root, to survive observer restarts and to remain
+                                  available once tasks finish.
+      watch (boolean) = if True, discover tasks through inotify events rather than by globbing
+                        the checkpoint root every POLLING_INTERVAL.  A full rescan is still done
+                        every RESCAN_INTERVAL.  Falls back to polling if inotify is unavailable.
+    """
     self._pathspec = TaskPath(root=root)
     self._detector = TaskDetector(root)
+    self._watcher = self._create_watcher(root) if watch else None
+    self._unloaded_tasks = set()  # active task_ids whose checkpoints could not yet be loaded
+    self._index = CheckpointIndex(root)
     if not issubclass(resource_monitor_class, ResourceMonitorBase):
       raise ValueError("resource monitor class must implement ResourceMonitorBase!")
     self._resource_monitor = resource_monitor_class
+    self._persist_history = persist_history
     self._active_tasks = {}    # task_id => ActiveObservedTask
     self._finished_tasks = {}  # task_id => FinishedObservedTask
     self._stop_event = threading.Event()
@@ -67,6 +84,16 @@ class TaskObserver(ExceptionalThread, Lockable):
     Lockable.__init__(self)
     self.daemon = True
 
+  @classmethod
+  def _create_watcher(cls, root):
+    try:
+      return TaskWatcher(root)
+    except TaskWatcher.Unavailable:
+      log.debug('TaskObserver: inotify unavailable, falling back to polling.')
+    except (IOError, OSError) as e:
+      log.warning('TaskObserver: unable to watch %s, falling back to polling: %s' % (root, e))
+    return None
+
   @property
   def active_tasks(self):
     """Return a dictionary of active Tasks"""
@@ -84,6 +111,8 @@ class TaskObserver(ExceptionalThread, Lockable):
 
   def stop(self):
     self._stop_event.set()
+    if self._watcher is not None:
+      self._watcher.stop()
 
   def start(self):
     ExceptionalThread.start(self)
@@ -96,9 +125,15 @@ class TaskObserver(ExceptionalThread, Lockable):
     task_monitor = TaskMonitor(self._pathspec, task_id)
     if not task_monitor.get_state().header:
       log.info('Unable to load task "%s"' % task_id)
+      self._unloaded_tasks.add(task_id)
       return
+    self._unloaded_tasks.discard(task_id)
     sandbox = task_monitor.get_state().header.sandbox
-    resource_monitor = self._resource_monitor(task_monitor, sandbox)
+    if self._persist_history:
+      history_path = self._pathspec.given(task_id=task_id).getpath('resource_history')
+      resource_monitor = self._resource_monitor(task_monitor, sandbox, history_path=history_path)
+    else:
+      resource_monitor = self._resource_monitor(task_monitor, sandbox)
     resource_monitor.start()
     self._active_tasks[task_id] = ActiveObservedTask(
       task_id=task_id, pathspec=self._pathspec,
@@ -108,7 +143,7 @@ class TaskObserver(ExceptionalThread, Lockable):
   @Lockable.sync
   def add_finished_task(self, task_id):
     self._finished_tasks[task_id] = FinishedObservedTask(
-      task_id=task_id, pathspec=self._pathspec
+      task_id=task_id, pathspec=self._pathspec, index=self._index
     )
 
   @Lockable.sync
@@ -124,41 +159,90 @@ class TaskObserver(ExceptionalThread, Lockable):
   @Lockable.sync
   def remove_finished_task(self, task_id):
     self.finished_tasks.pop(task_id)
+    self._index.forget(task_id)
 
   def run(self):
     """
       The internal thread for the observer.  This periodically polls the
       checkpoint root for new tasks, or transitions of tasks from active to
-      finished state.
+      finished state.  If watching, task transitions are instead applied as
+      they are reported by inotify, with a periodic full rescan.
     """
+    if self._watcher is None:
+      while not self._stop_event.is_set():
+        time.sleep(self.POLLING_INTERVAL.as_(Time.SECONDS))
+        self._rescan()
+      return
+
+    self._rescan()
+    last_rescan = time.time()
     while not self._stop_event.is_set():
-      time.sleep(self.POLLING_INTERVAL.as_(Time.SECONDS))
-
-      active_tasks = [task_id for _, task_id in self._detector.get_task_ids(state='active')]
-      finished_tasks = [task_id for _, task_id in self._detector.get_task_ids(state='finished')]
-
-      with self.lock:
-
-        # Ensure all tasks currently detected on the system are observed appropriately
-        for active in active_tasks:
-          if active not in self.active_tasks:
-            log.debug('task_id %s (unknown) -> active' % active)
-            self.add_active_task(active)
-        for finished in finished_tasks:
-          if finished in self.active_tasks:
-            log.debug('task_id %s active -> finished' % finished)
-            self.active_to_finished(finished)
-          elif finished not in self.finished_tasks:
-            log.debug('task_id %s (unknown) -> finished' % finished)
-            self.add_finished_task(finished)
-
-        # Remove ObservedTasks for tasks no longer detected on the system
-        for unknown in set(self.active_tasks) - set(active_tasks + finished_tasks):
-          log.debug('task_id %s active -> (unknown)' % unknown)
-          self.remove_active_task(unknown)
-        for unknown in set(self.finished_tasks) - set(active_tasks + finished_tasks):
-          log.debug('task_id %s finished -> (unknown)' % unknown)
-          self.remove_finished_task(unknown)
+      events = self._watcher.drain(timeout=self.POLLING_INTERVAL.as_(Time.SECONDS))
+      if time.time() - last_rescan >= self.RESCAN_INTERVAL.as_(Time.SECONDS):
+        self._rescan()
+        last_rescan = time.time()
+      elif events or self._unloaded_tasks:
+        self._apply_events(events)
+
+  def _rescan(self):
+    """Reconcile the observed tasks against every task detected in the checkpoint root."""
+    active_tasks = [task_id for _, task_id in self._detector.get_task_ids(state='active')]
+    finished_tasks = [task_id for _, task_id in self._detector.get_task_ids(state='finished')]
+
+    with self.lock:
+
+      # Ensure all tasks currently detected on the system are observed appropriately
+      for active in active_tasks:
+        if active not in self.active_tasks:
+          log.debug('task_id %s (unknown) -> active' % active)
+          self.add_active_task(active)
+      for finished in finished_tasks:
+        if finished in self.active_tasks:
+          log.debug('task_id %s active -> finished' % finished)
+          self.active_to_finished(finished)
+        elif finished not in self.finished_tasks:
+          log.debug('task_id %s (unknown) -> finished' % finished)
+          self.add_finished_task(finished)
+
+      # Remove ObservedTasks for tasks no longer detected on the system
+      for unknown in set(self.active_tasks) - set(active_tasks + finished_tasks):
+        log.debug('task_id %s active -> (unknown)' % unknown)
+        self.remove_active_task(unknown)
+      for unknown in set(self.finished_tasks) - set(active_tasks + finished_tasks):
+        log.debug('task_id %s finished -> (unknown)' % unknown)
+        self.remove_finished_task(unknown)
+      self._unloaded_tasks.intersection_update(active_tasks)
+
+  def _apply_events(self, events):
+    """Apply the TaskEvents reported by the TaskWatcher, in O(len(events))."""
+    with self.lock:
+      for event in events:
+        if event.action == TaskEvent.REMOVED:
+          if event.state == 'active':
+            self._unloaded_tasks.discard(event.task_id)
+            if event.task_id in self.active_tasks:
+              log.debug('task_id %s active -> (unknown)' % event.task_id)
+              self.remove_active_task(event.task_id)
+          elif event.task_id in self.finished_tasks:
+            log.debug('task_id %s finished -> (unknown)' % event.task_id)
+            self.remove_finished_task(event.task_id)
+        elif event.state == 'active':
+          if event.task_id not in self.active_tasks:
+            log.debug('task_id %s (unknown) -> active' % event.task_id)
+            self.add_active_task(event.task_id)
+        else:
+          self._unloaded_tasks.discard(event.task_id)
+          if event.task_id in self.active_tasks:
+            log.debug('task_id %s active -> finished' % event.task_id)
+            self.active_to_finished(event.task_id)
+          elif event.task_id not in self.finished_tasks:
+            log.debug('task_id %s (unknown) -> finished' % event.task_id)
+            self.add_finished_task(event.task_id)
+
+      # Active tasks are often detected before their runner has written a checkpoint header.
+      for task_id in list(self._unloaded_tasks):
+        if task_id not in self.active_tasks:
+          self.add_active_task(task_id)
 
   @Lockable.sync
   def process_from_name(self, task_id, process_id):
@@ -207,7 +291,7 @@ class TaskObserver(ExceptionalThread, Lockable):
   @Lockable.sync
   def state(self, task_id):
     """Return a dict containing mapped information about a task's state"""
-    real_state = self.raw_state(task_id)
+    real_state = self._summary(task_id)
     if real_state is None or real_state.header is None:
       return {}
     else:
@@ -229,6 +313,16 @@ class TaskObserver(ExceptionalThread, Lockable):
       return None
     return self.all_tasks[task_id].state
 
+  @Lockable.sync
+  def _summary(self, task_id):
+    """
+      Return a summary of the runner state of a given task id, containing its header, task
+      statuses and the latest run of each process.
+    """
+    if task_id not in self.all_tasks:
+      return None
+    return self.all_tasks[task_id].summary
+
   @Lockable.sync
   def _task_processes(self, task_id):
     """
@@ -239,7 +333,7 @@ class TaskObserver(ExceptionalThread, Lockable):
     """
     if task_id not in self.all_tasks:
       return {}
-    state = self.raw_state(task_id)
+    state = self._summary(task_id)
     if state is None or state.header is None:
       return {}
 
@@ -338,6 +432,34 @@ class TaskObserver(ExceptionalThread, Lockable):
       log.debug("Got sample for task %s: %s" % (task_id, sample))
     return sample
 
+  @Lockable.sync
+  def resource_history(self, task_id, start=None, end=None):
+    """
+      Return the resource consumption of a task between start and end (seconds from epoch, by
+      default the last hour, or for finished tasks the last hour they were active), e.g. for
+      charting.
+
+      [{timestamp:, num_procs:, disk:, cpu:, ram:, ...}, ...]
+    """
+    if task_id in self.active_tasks:
+      end = time.time() if end is None else end
+      sample_range = self.active_tasks[task_id].resource_monitor.sample_range
+    elif task_id in self.finished_tasks:
+      resource_history = self.finished_tasks[task_id].resource_history
+      if resource_history is None or len(resource_history) == 0:
+        return []
+      end = resource_history.get(time.time())[0] if end is None else end
+      sample_range = resource_history.range
+    else:
+      return []
+    start = end - 3600 if start is None else start
+    history = []
+    for timestamp, result in sample_range(start, end):
+      sample = result.process_sample.to_dict()
+      sample.update(timestamp=timestamp, num_procs=result.num_procs, disk=result.disk_usage)
+      history.append(sample)
+    return history
+
   @Lockable.sync
   def task_statuses(self, task_id):
     """
@@ -354,7 +476,7 @@ class TaskObserver(ExceptionalThread, Lockable):
     if task is None:
       return []
 
-    state = self.raw_state(task_id)
+    state = self._summary(task_id)
     if state is None or state.header is None:
       return []
 
@@ -415,7 +537,7 @@ class TaskObserver(ExceptionalThread, Lockable):
       log.error('Could not find task: %s' % task_id)
       return {}
 
-    state = self.raw_state(task_id)
+    state = self._summary(task_id)
     if state is None or state.header is None:
       # TODO(wickman)  Can this happen?
       return {}
@@ -96,3 +96,19 @@ struct RunnerState {
   2: list<TaskStatus> statuses
   3: map<string, list<ProcessStatus>> processes
 }
+
+// A compacted RunnerState covering the first `offset` bytes of a runner checkpoint stream.
+// Written beside the runner checkpoint so that readers need only replay the tail of the stream.
+struct RunnerSnapshot {
+  1: RunnerState state
+  2: i64         offset
+}
+
+// An incrementally maintained summary of a runner checkpoint stream: the header, every task
+// status and only the latest run of each process.  Covers the first `offset` bytes of the stream,
+// as of its modification time `mtime`.
+struct RunnerCkptSummary {
+  1: RunnerState state
+  2: i64         offset
+  3: double      mtime
+}
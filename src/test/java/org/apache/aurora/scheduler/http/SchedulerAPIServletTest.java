@@ -0,0 +1,169 @@
+/**
+ * Licensed under the Apache License, Version 2.0 (the "License");
+ * you may not use this file except in compliance with the License.
+ * You may obtain a copy of the License at
+ *
+ *     http://www.apache.org/licenses/LICENSE-2.0
+ *
+ * Unless required by applicable law or agreed to in writing, software
+ * distributed under the License is distributed on an "AS IS" BASIS,
+ * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ * See the License for the specific language governing permissions and
+ * limitations under the License.
+ */
+package org.apache.aurora.scheduler.http;
+
+import java.io.ByteArrayInputStream;
+import java.io.ByteArrayOutputStream;
+import java.util.Arrays;
+
+import javax.servlet.ServletException;
+import javax.servlet.ServletInputStream;
+import javax.servlet.ServletOutputStream;
+import javax.servlet.http.HttpServletRequest;
+import javax.servlet.http.HttpServletResponse;
+
+import com.twitter.common.testing.easymock.EasyMockTest;
+
+import org.apache.aurora.gen.AuroraAdmin;
+import org.apache.aurora.gen.Response;
+import org.apache.aurora.gen.ResponseCode;
+import org.apache.thrift.protocol.TBinaryProtocol;
+import org.apache.thrift.protocol.TCompactProtocol;
+import org.apache.thrift.protocol.TJSONProtocol;
+import org.apache.thrift.protocol.TProtocolFactory;
+import org.apache.thrift.transport.TMemoryBuffer;
+import org.apache.thrift.transport.TMemoryInputTransport;
+import org.junit.Before;
+import org.junit.Test;
+
+import static org.easymock.EasyMock.expect;
+import static org.junit.Assert.assertEquals;
+import static org.junit.Assert.assertNull;
+
+public class SchedulerAPIServletTest extends EasyMockTest {
+
+  private static final Response OK = new Response().setResponseCode(ResponseCode.OK);
+
+  private AuroraAdmin.Iface thrift;
+  private HttpServletRequest request;
+  private HttpServletResponse response;
+  private SchedulerAPIServlet servlet;
+
+  @Before
+  public void setUp() {
+    thrift = createMock(AuroraAdmin.Iface.class);
+    request = createMock(HttpServletRequest.class);
+    response = createMock(HttpServletResponse.class);
+    servlet = new SchedulerAPIServlet(thrift);
+  }
+
+  private byte[] post(String contentType, byte[] body, String replyContentType) throws Exception {
+    final ByteArrayInputStream in = new ByteArrayInputStream(body);
+    final ByteArrayOutputStream out = new ByteArrayOutputStream();
+
+    expect(request.getContentType()).andReturn(contentType);
+    expect(request.getInputStream()).andReturn(new ServletInputStream() {
+      @Override
+      public int read() {
+        return in.read();
+      }
+    });
+    response.setContentType(replyContentType);
+    expect(response.getOutputStream()).andReturn(new ServletOutputStream() {
+      @Override
+      public void write(int b) {
+        out.write(b);
+      }
+    });
+
+    control.replay();
+
+    servlet.doPost(request, response);
+    return out.toByteArray();
+  }
+
+  private Response getRoleSummary(
+      String contentType,
+      TProtocolFactory protocolFactory,
+      String replyContentType) throws Exception {
+
+    TMemoryBuffer call = new TMemoryBuffer(64);
+    new AuroraAdmin.Client(protocolFactory.getProtocol(call)).send_getRoleSummary();
+    expect(thrift.getRoleSummary()).andReturn(OK);
+
+    byte[] reply = post(
+        contentType,
+        Arrays.copyOf(call.getArray(), call.length()),
+        replyContentType);
+    return new AuroraAdmin.Client(protocolFactory.getProtocol(new TMemoryInputTransport(reply)))
+        .recv_getRoleSummary();
+  }
+
+  @Test
+  public void testDefaultProtocol() throws Exception {
+    assertEquals(OK, getRoleSummary(
+        "application/x-thrift",
+        new TJSONProtocol.Factory(),
+        "application/x-thrift"));
+  }
+
+  @Test
+  public void testMissingContentType() throws Exception {
+    assertEquals(OK, getRoleSummary(null, new TJSONProtocol.Factory(), "application/x-thrift"));
+  }
+
+  @Test
+  public void testJsonProtocol() throws Exception {
+    assertEquals(OK, getRoleSummary(
+        "application/vnd.apache.thrift.json",
+        new TJSONProtocol.Factory(),
+        "application/vnd.apache.thrift.json"));
+  }
+
+  @Test
+  public void testBinaryProtocol() throws Exception {
+    assertEquals(OK, getRoleSummary(
+        "application/vnd.apache.thrift.binary",
+        new TBinaryProtocol.Factory(),
+        "application/vnd.apache.thrift.binary"));
+  }
+
+  @Test
+  public void testCompactProtocol() throws Exception {
+    assertEquals(OK, getRoleSummary(
+        "application/vnd.apache.thrift.compact; charset=UTF-8",
+        new TCompactProtocol.Factory(),
+        "application/vnd.apache.thrift.compact"));
+  }
+
+  @Test(expected = ServletException.class)
+  public void testBinaryProtocolLengthLimit() throws Exception {
+    // A non-strict message whose method name claims 2^31 - 1 bytes.
+    post(
+        "application/vnd.apache.thrift.binary",
+        new byte[] {(byte) 0x7f, (byte) 0xff, (byte) 0xff, (byte) 0xff},
+        "application/vnd.apache.thrift.binary");
+  }
+
+  @Test(expected = ServletException.class)
+  public void testCompactProtocolLengthLimit() throws Exception {
+    // A call with sequence id 0 whose method name claims 2^31 - 1 bytes.
+    post(
+        "application/vnd.apache.thrift.compact",
+        new byte[] {
+            (byte) 0x82, (byte) 0x21, (byte) 0x00,
+            (byte) 0xff, (byte) 0xff, (byte) 0xff, (byte) 0xff, (byte) 0x07},
+        "application/vnd.apache.thrift.compact");
+  }
+
+  @Test
+  public void testMediaType() {
+    control.replay();
+
+    assertNull(SchedulerAPIServlet.mediaType(null));
+    assertEquals(
+        "application/vnd.apache.thrift.binary",
+        SchedulerAPIServlet.mediaType(" Application/Vnd.Apache.Thrift.Binary ; charset=UTF-8"));
+  }
+}
@@ -207,6 +207,62 @@ class TestHostMaintenance(unittest.TestCase):
         assert mock_complete_maintenance.call_args_list == [
             mock.call(Hosts(set([failed_host]))), mock.call(Hosts(drained_hosts))]
 
+  @mock.patch("apache.aurora.admin.host_maintenance.HostMaintenance._complete_maintenance",
+    spec=HostMaintenance._complete_maintenance)
+  @mock.patch("apache.aurora.admin.host_maintenance.HostMaintenance._operate_on_hosts",
+    spec=HostMaintenance._operate_on_hosts)
+  @mock.patch("apache.aurora.client.api.AuroraClientAPI.maintenance_status",
+      spec=AuroraClientAPI.maintenance_status)
+  @mock.patch("apache.aurora.client.api.AuroraClientAPI.drain_hosts",
+      spec=AuroraClientAPI.drain_hosts)
+  @mock.patch("apache.aurora.admin.host_maintenance.HostMaintenance.start_maintenance",
+    spec=HostMaintenance.start_maintenance)
+  @mock.patch("apache.aurora.admin.host_maintenance.HostMaintenance._check_sla",
+    spec=HostMaintenance._check_sla)
+  def test_perform_maintenance_concurrent(self, mock_check_sla, mock_start_maintenance,
+      mock_drain_hosts, mock_maintenance_status, mock_operate_on_hosts,
+      mock_complete_maintenance):
+    fake_maintenance_status_response = [
+        Response(result=Result(maintenanceStatusResult=MaintenanceStatusResult(set([
+            HostStatus(host=TEST_HOSTNAMES[0], mode=MaintenanceMode.DRAINING),
+            HostStatus(host=TEST_HOSTNAMES[1], mode=MaintenanceMode.DRAINING)
+        ])))),
+        Response(result=Result(maintenanceStatusResult=MaintenanceStatusResult(set([
+            HostStatus(host=TEST_HOSTNAMES[0], mode=MaintenanceMode.DRAINING),
+            HostStatus(host=TEST_HOSTNAMES[1], mode=MaintenanceMode.DRAINED)
+        ])))),
+        Response(result=Result(maintenanceStatusResult=MaintenanceStatusResult(set([
+            HostStatus(host=TEST_HOSTNAMES[0], mode=MaintenanceMode.DRAINED),
+            HostStatus(host=TEST_HOSTNAMES[2], mode=MaintenanceMode.DRAINED)
+        ]))))
+    ]
+    mock_maintenance_status.side_effect = lambda hosts: fake_maintenance_status_response.pop(0)
+    mock_drain_hosts.return_value = Response(responseCode=ResponseCode.OK)
+    mock_check_sla.return_value = set()
+    mock_callback = mock.Mock()
+    clock = mock.Mock(time)
+    maintenance = HostMaintenance(DEFAULT_CLUSTER, 'quiet')
+    maintenance.perform_maintenance(
+        TEST_HOSTNAMES, callback=mock_callback, max_groups_in_flight=2, clock=clock)
+
+    assert mock_drain_hosts.call_args_list == [
+        mock.call(Hosts(set([hostname]))) for hostname in TEST_HOSTNAMES]
+    assert mock_maintenance_status.call_args_list == [
+        mock.call(Hosts(set(TEST_HOSTNAMES[0:2]))),
+        mock.call(Hosts(set(TEST_HOSTNAMES[0:2]))),
+        mock.call(Hosts(set([TEST_HOSTNAMES[0], TEST_HOSTNAMES[2]])))]
+    # The SLA of the third group is checked with the first group still draining.
+    assert mock_check_sla.call_args_list[2][0][4] == set([TEST_HOSTNAMES[0]])
+    # Polls back off while no host drains and speed up again once one does.
+    min_delay = HostMaintenance.MIN_DRAIN_POLL_DELAY.as_(Time.SECONDS)
+    assert clock.sleep.call_args_list == [
+        mock.call(min_delay), mock.call(2 * min_delay), mock.call(min_delay)]
+    assert mock_complete_maintenance.call_args_list == [
+        mock.call(Hosts(set([TEST_HOSTNAMES[1]]))),
+        mock.call(Hosts(set([TEST_HOSTNAMES[0]]))),
+        mock.call(Hosts(set([TEST_HOSTNAMES[2]])))]
+    assert mock_operate_on_hosts.call_count == 3
+
   @mock.patch("apache.aurora.client.api.AuroraClientAPI.maintenance_status",
       spec=AuroraClientAPI.maintenance_status)
   def test_check_status(self, mock_maintenance_status):
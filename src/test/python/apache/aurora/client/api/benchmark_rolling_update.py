@@ -0,0 +1,258 @@
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+"""Benchmark rolling updates with an increasing number of batches in flight.
+
+Drives the real Updater, JobMonitor and InstanceWatcher against a simulated scheduler that runs
+on a fake clock: killed tasks turn terminal after KILL_SECS and added tasks turn RUNNING after
+STARTUP_SECS, except that the first task of every FLAKY_EVERY-th instance never starts and has
+to be restarted.  Reports the simulated duration of each update and the number of scheduler
+calls it took.
+"""
+
+from __future__ import print_function
+
+import logging
+from itertools import count
+
+from apache.aurora.client.api.instance_watcher import InstanceWatcher
+from apache.aurora.client.api.job_monitor import JobMonitor
+from apache.aurora.client.api.updater import Updater
+from apache.aurora.common.aurora_job_key import AuroraJobKey
+
+from gen.apache.aurora.api.constants import TERMINAL_STATES
+from gen.apache.aurora.api.ttypes import (
+    AcquireLockResult,
+    AssignedTask,
+    Identity,
+    JobConfiguration,
+    JobKey,
+    Lock,
+    PopulateJobResult,
+    Response,
+    ResponseCode,
+    Result,
+    ScheduledTask,
+    ScheduleStatus,
+    ScheduleStatusResult,
+    TaskConfig,
+    TaskEvent
+)
+
+INSTANCES = 1000
+BATCH_SIZE = 10
+BATCHES_IN_FLIGHT = (1, 2, 4, 8)
+KILL_SECS = 5
+STARTUP_SECS = 20
+FLAKY_EVERY = 50
+UPDATE_CONFIG = {
+  'batch_size': BATCH_SIZE,
+  'restart_threshold': 60,
+  'watch_secs': 45,
+  'max_per_shard_failures': 1,
+  'max_total_failures': INSTANCES // FLAKY_EVERY,
+}
+HEALTH_CHECK_INTERVAL_SECS = 3
+
+
+class FakeClock(object):
+  def __init__(self):
+    self._now_seconds = 0.0
+
+  def time(self):
+    return self._now_seconds
+
+  def sleep(self, seconds):
+    self._now_seconds += seconds
+
+
+class SimulatedTask(object):
+  def __init__(self, task_id, instance_id, config, started, running_at):
+    self.task_id = task_id
+    self.instance_id = instance_id
+    self.config = config
+    self.started = started
+    self.running_at = running_at
+    self.killed_at = None
+
+  def status(self, now):
+    if self.killed_at is not None:
+      return ScheduleStatus.KILLED if now >= self.killed_at else ScheduleStatus.KILLING
+    if self.running_at is not None and now >= self.running_at:
+      return ScheduleStatus.RUNNING
+    return ScheduleStatus.PENDING
+
+  def to_thrift(self, now):
+    return ScheduledTask(
+        status=self.status(now),
+        assignedTask=AssignedTask(
+            taskId=self.task_id, instanceId=self.instance_id, task=self.config),
+        taskEvents=[TaskEvent(timestamp=int(self.started * 1000), status=ScheduleStatus.PENDING)])
+
+
+class SimulatedScheduler(object):
+  """Just enough of the scheduler API for the Updater, on a fake clock."""
+
+  def __init__(self, clock, old_config):
+    self._clock = clock
+    self._task_ids = count()
+    self._starts = {}
+    self._tasks = [self._start(instance_id, old_config) for instance_id in range(INSTANCES)]
+    self.calls = 0
+
+  def _ok(self, **kw):
+    self.calls += 1
+    return Response(responseCode=ResponseCode.OK, messageDEPRECATED='ok', result=Result(**kw))
+
+  def _start(self, instance_id, config):
+    now = self._clock.time()
+    starts = self._starts[instance_id] = self._starts.get(instance_id, 0) + 1
+    flaky = starts == 2 and instance_id % FLAKY_EVERY == 0
+    return SimulatedTask(
+        'task-%d' % next(self._task_ids),
+        instance_id,
+        config,
+        now,
+        None if flaky else now + STARTUP_SECS)
+
+  def _active(self, instance_ids=None):
+    now = self._clock.time()
+    return [task for task in self._tasks
+            if task.status(now) not in TERMINAL_STATES
+            and (instance_ids is None or task.instance_id in instance_ids)]
+
+  def acquireLock(self, lock_key):
+    return self._ok(acquireLockResult=AcquireLockResult(lock=Lock(key=lock_key)))
+
+  def releaseLock(self, lock, validation):
+    return self._ok()
+
+  def populateJobConfig(self, job_config):
+    return self._ok(populateJobResult=PopulateJobResult(populated=set([job_config.taskConfig])))
+
+  def getTasksStatus(self, query):
+    now = self._clock.time()
+    tasks = [task.to_thrift(now) for task in self._active(query.instanceIds)]
+    return self._ok(scheduleStatusResult=ScheduleStatusResult(tasks=tasks))
+
+  def getTasksWithoutConfigs(self, query):
+    now = self._clock.time()
+    tasks = [task.to_thrift(now) for task in self._tasks
+             if (query.instanceIds is None or task.instance_id in query.instanceIds)
+             and (query.statuses is None or task.status(now) in query.statuses)]
+    return self._ok(scheduleStatusResult=ScheduleStatusResult(tasks=tasks))
+
+  def killTasks(self, query, lock):
+    for task in self._active(query.instanceIds):
+      task.killed_at = self._clock.time() + KILL_SECS
+    return self._ok()
+
+  def addInstances(self, add_config, lock):
+    for instance_id in add_config.instanceIds:
+      self._tasks.append(self._start(instance_id, add_config.taskConfig))
+    return self._ok()
+
+  def restartShards(self, job_key, instance_ids, lock):
+    for task in self._active(instance_ids):
+      task.killed_at = self._clock.time()
+      self._tasks.append(self._start(task.instance_id, task.config))
+    return self._ok()
+
+
+class AlwaysValidQuota(object):
+  def validate_quota_from_requested(self, job_key, production, released, acquired):
+    return Response(responseCode=ResponseCode.OK, messageDEPRECATED='ok')
+
+
+class SimulatedConfig(object):
+  def __init__(self, job_config, update_config):
+    self._job_config = job_config
+    self._update_config = update_config
+
+  def role(self):
+    return self._job_config.key.role
+
+  def environment(self):
+    return self._job_config.key.environment
+
+  def name(self):
+    return self._job_config.key.name
+
+  def cluster(self):
+    return 'simulated'
+
+  def job_key(self):
+    return AuroraJobKey(self.cluster(), self.role(), self.environment(), self.name())
+
+  def update_config(self):
+    class Anon(object):
+      def get(_):
+        return self._update_config
+    return Anon()
+
+  def job(self):
+    return self._job_config
+
+  def instances(self):
+    return self._job_config.instanceCount
+
+
+def simulate(batches_in_flight):
+  job_key = JobKey(role='www-data', environment='prod', name='hello')
+  old_config = TaskConfig(
+      owner=Identity(role=job_key.role), environment=job_key.environment, jobName=job_key.name,
+      numCpus=1.0, ramMb=1024, diskMb=1024, priority=0, production=False)
+  new_config = TaskConfig(**old_config.__dict__)
+  new_config.priority = 1
+  job_config = JobConfiguration(key=job_key, taskConfig=new_config, instanceCount=INSTANCES)
+  update_config = dict(UPDATE_CONFIG, max_batches_in_flight=batches_in_flight)
+  config = SimulatedConfig(job_config, update_config)
+
+  clock = FakeClock()
+  scheduler = SimulatedScheduler(clock, old_config)
+  job_monitor = JobMonitor(scheduler, config.job_key(), clock=clock)
+  updater = Updater(
+      config,
+      HEALTH_CHECK_INTERVAL_SECS,
+      scheduler=scheduler,
+      instance_watcher=InstanceWatcher(
+          scheduler,
+          config.job_key(),
+          update_config['restart_threshold'],
+          update_config['watch_secs'],
+          HEALTH_CHECK_INTERVAL_SECS,
+          clock=clock,
+          job_monitor=job_monitor),
+      quota_check=AlwaysValidQuota(),
+      job_monitor=job_monitor)
+  response = updater.update()
+  assert response.responseCode == ResponseCode.OK, response.messageDEPRECATED
+  assert all(task.config == new_config for task in scheduler._active())
+  return clock.time(), scheduler.calls
+
+
+def main():
+  # The restarted instances are expected failures, keep the updater's logging out of the report.
+  logging.basicConfig(level=logging.CRITICAL)
+  print('%d instances in batches of %d, %ds kills, %ds startups, every %dth instance restarted once'
+        % (INSTANCES, BATCH_SIZE, KILL_SECS, STARTUP_SECS, FLAKY_EVERY))
+  print('%-18s %16s %16s' % ('batches in flight', 'simulated time', 'scheduler calls'))
+  for batches_in_flight in BATCHES_IN_FLIGHT:
+    seconds, calls = simulate(batches_in_flight)
+    print('%-18d %15.2fh %16d' % (batches_in_flight, seconds / 3600.0, calls))
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,106 @@
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+"""Benchmark SLA domain evaluation on a synthetic cluster.
+
+Spreads TASKS production tasks of JOBS jobs randomly over HOSTS hosts in racks of RACK_SIZE, with
+uptimes uniformly distributed over the last day, and reports the time it takes to build the
+DomainUpTimeSlaVector, to list the safe hosts and racks, and to probe PROBED_HOSTS hosts.
+"""
+
+from __future__ import print_function
+
+import random
+import time
+
+from apache.aurora.client.api.sla import DomainUpTimeSlaVector
+from apache.aurora.client.base import add_grouping, DEFAULT_GROUPING
+from apache.aurora.common.cluster import Cluster
+
+from gen.apache.aurora.api.ttypes import (
+    AssignedTask,
+    Identity,
+    ScheduledTask,
+    ScheduleStatus,
+    TaskConfig,
+    TaskEvent
+)
+
+TASKS = 100000
+JOBS = 1000
+HOSTS = 30000
+RACK_SIZE = 40
+PROBED_HOSTS = 1000
+PERCENTAGE = 95
+DURATION_SECS = 3600
+SEED = 42
+
+
+def rack_grouping(hostname):
+  return hostname.split('-')[1]
+
+
+def create_tasks(rnd, now):
+  tasks = []
+  for index in range(TASKS):
+    job, instance = index % JOBS, index // JOBS
+    tasks.append(ScheduledTask(
+        assignedTask=AssignedTask(
+            instanceId=instance,
+            slaveHost=create_host(rnd.randrange(HOSTS)),
+            task=TaskConfig(
+                production=True,
+                jobName='job%d' % job,
+                owner=Identity(role='role%d' % (job % 50)),
+                environment='prod')),
+        status=ScheduleStatus.RUNNING,
+        taskEvents=[TaskEvent(
+            status=ScheduleStatus.RUNNING,
+            timestamp=int((now - rnd.randrange(86400)) * 1000))]))
+  return tasks
+
+
+def create_host(index):
+  return 'host%d-rack%d' % (index, index // RACK_SIZE)
+
+
+def timed(name, fn):
+  start = time.time()
+  result = fn()
+  print('%-28s %8.2fs' % (name, time.time() - start))
+  return result
+
+
+def main():
+  rnd = random.Random(SEED)
+  tasks = create_tasks(rnd, time.time())
+  probed = [create_host(index) for index in rnd.sample(range(HOSTS), PROBED_HOSTS)]
+  cluster = Cluster(name='benchmark')
+  add_grouping('by_rack', rack_grouping)
+
+  print('%d tasks of %d jobs on %d hosts in racks of %d, %d%% over %ds'
+        % (TASKS, JOBS, HOSTS, RACK_SIZE, PERCENTAGE, DURATION_SECS))
+  vector = timed('build domain vector', lambda: DomainUpTimeSlaVector(cluster, tasks))
+  timed('get_safe_hosts by host', lambda: vector.get_safe_hosts(
+      PERCENTAGE, DURATION_SECS, grouping_function=DEFAULT_GROUPING))
+  timed('get_safe_hosts by rack', lambda: vector.get_safe_hosts(
+      PERCENTAGE, DURATION_SECS, grouping_function='by_rack'))
+  probe_vector = DomainUpTimeSlaVector(cluster, tasks, hosts=probed)
+  timed('probe_hosts %d hosts' % PROBED_HOSTS, lambda: probe_vector.probe_hosts(
+      PERCENTAGE, DURATION_SECS))
+
+
+if __name__ == '__main__':
+  main()
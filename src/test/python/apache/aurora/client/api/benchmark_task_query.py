@@ -0,0 +1,176 @@
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+"""Benchmark polling a job's tasks with and without their configs.
+
+Serves canned getTasksStatus and getTasksWithoutConfigs replies for jobs of 100, 500 and 2000
+instances from a local fake scheduler, then reports the TJSON payload of each reply and the mean
+latency of the call, including the transfer and decoding, through the client's transport.  The
+fake scheduler serializes each reply only once, so that the latency reflects the client's cost.
+"""
+
+from __future__ import print_function
+
+import json
+import time
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from threading import Thread
+
+from thrift.protocol import TJSONProtocol
+from thrift.Thrift import TMessageType
+from thrift.transport import TTransport
+
+from apache.aurora.client.api.scheduler_client import SchedulerClient
+
+from gen.apache.aurora.api import ReadOnlyScheduler
+from gen.apache.aurora.api.constants import ACTIVE_STATES
+from gen.apache.aurora.api.ttypes import (
+    AssignedTask,
+    ExecutorConfig,
+    Identity,
+    Metadata,
+    Response,
+    ResponseCode,
+    Result,
+    ScheduledTask,
+    ScheduleStatus,
+    ScheduleStatusResult,
+    TaskConfig,
+    TaskEvent,
+    TaskQuery
+)
+
+INSTANCE_COUNTS = (100, 500, 2000)
+CALLS = 5
+
+
+def executor_data(instance_id):
+  """A thermos task of a typical shape, as carried in ExecutorConfig.data."""
+  processes = [{
+      'name': 'process_%d' % index,
+      'cmdline': 'exec ./bin/server --port={{thermos.ports[http]}} --shard=%d %s' % (
+          instance_id, ' '.join('--flag_%d=value_%d' % (flag, flag) for flag in range(20))),
+      'max_failures': 1, 'daemon': False, 'ephemeral': False, 'min_duration': 5, 'final': False,
+  } for index in range(5)]
+  return json.dumps({
+      'environment': 'prod', 'role': 'www-data', 'name': 'hello', 'instance': instance_id,
+      'task': {'name': 'hello', 'processes': processes, 'max_failures': 1,
+               'resources': {'cpu': 1.0, 'ram': 1073741824, 'disk': 1073741824},
+               'constraints': [{'order': [p['name'] for p in processes]}]},
+      'health_check_config': {'initial_interval_secs': 15, 'interval_secs': 10},
+      'announce': {'primary_port': 'http', 'portmap': {'aurora': 'http'}},
+      'cluster': 'west', 'production': True, 'priority': 0, 'service': True,
+  })
+
+
+def scheduled_task(instance_id, with_config):
+  task_config = TaskConfig(
+      jobName='hello', environment='prod', owner=Identity(role='www-data', user='www-data'),
+      isService=True, numCpus=1.0, ramMb=1024, diskMb=1024, priority=0, maxTaskFailures=1,
+      production=True, contactEmail='www-data@example.com',
+      metadata=frozenset([Metadata(key='build', value='1234')]),
+      executorConfig=ExecutorConfig(
+          name='AuroraExecutor', data=executor_data(instance_id) if with_config else ''))
+  task_id = 'www-data-prod-hello-%d-0123456789abcdef' % instance_id
+  return ScheduledTask(
+      assignedTask=AssignedTask(
+          taskId=task_id, slaveId='slave-%d' % instance_id, slaveHost='host-%d' % instance_id,
+          task=task_config, assignedPorts={'http': 31000 + instance_id}, instanceId=instance_id),
+      status=ScheduleStatus.RUNNING,
+      failureCount=0,
+      taskEvents=[TaskEvent(timestamp=1400000000000 + offset, status=status, scheduler='sched')
+                  for offset, status in enumerate((ScheduleStatus.PENDING,
+                                                   ScheduleStatus.ASSIGNED,
+                                                   ScheduleStatus.RUNNING))])
+
+
+def serialize_reply(method, response):
+  buffer = TTransport.TMemoryBuffer()
+  protocol = TJSONProtocol.TJSONProtocol(buffer)
+  protocol.writeMessageBegin(method, TMessageType.REPLY, 0)
+  result = getattr(ReadOnlyScheduler, '%s_result' % method)(success=response)
+  result.write(protocol)
+  protocol.writeMessageEnd()
+  return buffer.getvalue()
+
+
+class FakeScheduler(object):
+  """An HTTP server answering each thrift method with a canned, pre-serialized reply."""
+
+  def __init__(self, replies):
+    class Handler(BaseHTTPRequestHandler):
+      def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        protocol = TJSONProtocol.TJSONProtocol(TTransport.TMemoryBuffer(body))
+        method, _, _ = protocol.readMessageBegin()
+        reply = replies[method]
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-thrift')
+        self.send_header('Content-Length', str(len(reply)))
+        self.end_headers()
+        self.wfile.write(reply)
+
+      def log_message(self, *args):
+        pass
+
+    self._server = HTTPServer(('localhost', 0), Handler)
+    self._thread = Thread(target=self._server.serve_forever)
+    self._thread.daemon = True
+
+  @property
+  def uri(self):
+    return 'http://localhost:%d/api' % self._server.socket.getsockname()[1]
+
+  def __enter__(self):
+    self._thread.start()
+    return self
+
+  def __exit__(self, *args):
+    self._server.shutdown()
+
+
+def run(instance_count):
+  replies = {}
+  for method, with_config in (('getTasksStatus', True), ('getTasksWithoutConfigs', False)):
+    tasks = [scheduled_task(instance_id, with_config) for instance_id in range(instance_count)]
+    replies[method] = serialize_reply(method, Response(
+        responseCode=ResponseCode.OK,
+        result=Result(scheduleStatusResult=ScheduleStatusResult(tasks=tasks))))
+
+  query = TaskQuery(owner=Identity(role='www-data'), environment='prod', jobName='hello',
+                    statuses=ACTIVE_STATES)
+  results = []
+  with FakeScheduler(replies) as scheduler:
+    client = SchedulerClient._connect_scheduler(scheduler.uri)
+    for method in ('getTasksStatus', 'getTasksWithoutConfigs'):
+      start = time.time()
+      for _ in range(CALLS):
+        response = getattr(client, method)(query)
+      elapsed = (time.time() - start) / CALLS
+      assert len(response.result.scheduleStatusResult.tasks) == instance_count
+      results.append((method, len(replies[method]), elapsed))
+  return results
+
+
+def main():
+  print('%-10s %-24s %14s %14s' % ('instances', 'rpc', 'payload (KB)', 'latency (ms)'))
+  for instance_count in INSTANCE_COUNTS:
+    for method, payload, elapsed in run(instance_count):
+      print('%-10d %-24s %14.1f %14.1f' % (instance_count, method, payload / 1024.0,
+                                           elapsed * 1000))
+
+
+if __name__ == '__main__':
+  main()
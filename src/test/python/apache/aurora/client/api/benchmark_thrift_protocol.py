@@ -0,0 +1,128 @@
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+
+"""Benchmark the thrift protocols the scheduler client can use on a 10k task response.
+
+Encodes and decodes a getTasksStatus reply of 10000 tasks, each carrying an executor config of a
+typical size, with each protocol of scheduler_client.THRIFT_PROTOCOLS, and reports the payload
+size and the mean encoding and decoding time.  Decoding is the client's share of the cost.
+"""
+
+from __future__ import print_function
+
+import json
+import time
+
+from thrift.Thrift import TMessageType
+from thrift.transport import TTransport
+
+from apache.aurora.client.api.scheduler_client import THRIFT_PROTOCOLS
+
+from gen.apache.aurora.api import ReadOnlyScheduler
+from gen.apache.aurora.api.ttypes import (
+    AssignedTask,
+    ExecutorConfig,
+    Identity,
+    Response,
+    ResponseCode,
+    Result,
+    ScheduledTask,
+    ScheduleStatus,
+    ScheduleStatusResult,
+    TaskConfig,
+    TaskEvent
+)
+
+try:
+  from thrift.protocol import fastbinary
+except ImportError:
+  fastbinary = None
+
+TASK_COUNT = 10000
+ROUNDS = 3
+
+
+def scheduled_task(instance_id):
+  executor_data = json.dumps({
+      'environment': 'prod', 'role': 'www-data', 'name': 'hello', 'instance': instance_id,
+      'task': {'name': 'hello', 'max_failures': 1, 'processes': [{
+          'name': 'server', 'cmdline': './bin/server --port={{thermos.ports[http]}}',
+          'max_failures': 1, 'daemon': False, 'ephemeral': False, 'min_duration': 5}],
+          'resources': {'cpu': 1.0, 'ram': 1073741824, 'disk': 1073741824}},
+  })
+  return ScheduledTask(
+      assignedTask=AssignedTask(
+          taskId='www-data-prod-hello-%d-0123456789abcdef' % instance_id,
+          slaveId='slave-%d' % instance_id,
+          slaveHost='host-%d' % instance_id,
+          task=TaskConfig(
+              jobName='hello', environment='prod', owner=Identity(role='www-data', user='www-data'),
+              isService=True, numCpus=1.0, ramMb=1024, diskMb=1024, priority=0,
+              maxTaskFailures=1, production=True,
+              executorConfig=ExecutorConfig(name='AuroraExecutor', data=executor_data)),
+          assignedPorts={'http': 31000 + instance_id % 1000},
+          instanceId=instance_id),
+      status=ScheduleStatus.RUNNING,
+      failureCount=0,
+      taskEvents=[TaskEvent(timestamp=1400000000000 + offset, status=status, scheduler='sched')
+                  for offset, status in enumerate((ScheduleStatus.PENDING,
+                                                   ScheduleStatus.ASSIGNED,
+                                                   ScheduleStatus.RUNNING))])
+
+
+def encode(protocol_factory, response):
+  buffer = TTransport.TMemoryBuffer()
+  protocol = protocol_factory.getProtocol(buffer)
+  protocol.writeMessageBegin('getTasksStatus', TMessageType.REPLY, 0)
+  ReadOnlyScheduler.getTasksStatus_result(success=response).write(protocol)
+  protocol.writeMessageEnd()
+  return buffer.getvalue()
+
+
+def decode(protocol_factory, payload):
+  protocol = protocol_factory.getProtocol(TTransport.TMemoryBuffer(payload))
+  protocol.readMessageBegin()
+  result = ReadOnlyScheduler.getTasksStatus_result()
+  result.read(protocol)
+  protocol.readMessageEnd()
+  return result.success
+
+
+def timed(fn, *args):
+  start = time.time()
+  for _ in range(ROUNDS):
+    value = fn(*args)
+  return value, (time.time() - start) / ROUNDS
+
+
+def main():
+  response = Response(
+      responseCode=ResponseCode.OK,
+      result=Result(scheduleStatusResult=ScheduleStatusResult(
+          tasks=[scheduled_task(instance_id) for instance_id in range(TASK_COUNT)])))
+
+  print('%d tasks, fastbinary %s' % (TASK_COUNT, 'available' if fastbinary else 'unavailable'))
+  print('%-10s %14s %12s %12s' % ('protocol', 'payload (KB)', 'encode (s)', 'decode (s)'))
+  for name in sorted(THRIFT_PROTOCOLS):
+    protocol_factory, _ = THRIFT_PROTOCOLS[name]
+    payload, encode_time = timed(encode, protocol_factory, response)
+    decoded, decode_time = timed(decode, protocol_factory, payload)
+    assert len(decoded.result.scheduleStatusResult.tasks) == TASK_COUNT
+    print('%-10s %14.1f %12.2f %12.2f' % (name, len(payload) / 1024.0, encode_time, decode_time))
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,76 @@
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+import threading
+import time
+
+import mock
+import pytest
+
+from apache.aurora.client.api import AuroraClientAPI
+from apache.aurora.common.aurora_job_key import AuroraJobKey
+from apache.aurora.common.cluster import Cluster
+
+from gen.apache.aurora.api.ttypes import Response, ResponseCode
+
+
+class BlockingSchedulerProxy(object):
+  """Answers getTasksStatus once released, tracking how many calls overlap."""
+
+  lock = threading.Lock()
+  release = threading.Event()
+  active = 0
+  max_active = 0
+
+  def getTasksStatus(self, query):
+    cls = BlockingSchedulerProxy
+    with cls.lock:
+      cls.active += 1
+      cls.max_active = max(cls.max_active, cls.active)
+    cls.release.wait(10)
+    with cls.lock:
+      cls.active -= 1
+    return Response(responseCode=ResponseCode.OK, messageDEPRECATED=query.jobName)
+
+
+def test_submit_bounded_concurrency():
+  with mock.patch('apache.aurora.client.api.SchedulerProxy',
+                  side_effect=lambda *args, **kwargs: BlockingSchedulerProxy()):
+    api = AuroraClientAPI(Cluster(name='west'), max_concurrency=3)
+    keys = [AuroraJobKey('west', 'bozo', 'test', 'job%d' % index) for index in range(10)]
+    futures = [api.submit('check_status', key) for key in keys]
+
+    try:
+      deadline = time.time() + 10
+      while BlockingSchedulerProxy.max_active < 3 and time.time() < deadline:
+        time.sleep(0.01)
+      assert BlockingSchedulerProxy.max_active == 3
+    finally:
+      BlockingSchedulerProxy.release.set()
+    responses = [future.result(10) for future in futures]
+
+  assert [resp.messageDEPRECATED for resp in responses] == [key.name for key in keys]
+  assert BlockingSchedulerProxy.max_active == 3
+
+
+def test_submit_errors():
+  with mock.patch('apache.aurora.client.api.SchedulerProxy'):
+    api = AuroraClientAPI(Cluster(name='west'))
+    with pytest.raises(AttributeError):
+      api.submit('no_such_method')
+
+    future = api.submit('check_status', 'not a job key')
+    with pytest.raises(AuroraClientAPI.TypeError):
+      future.result(10)
@@ -19,12 +19,13 @@ import mox
 
 from apache.aurora.client.api.health_check import HealthCheck
 from apache.aurora.client.api.instance_watcher import InstanceWatcher
+from apache.aurora.client.api.job_monitor import JobMonitor
+from apache.aurora.common.aurora_job_key import AuroraJobKey
 
 from gen.apache.aurora.api.AuroraSchedulerManager import Client as scheduler_client
 from gen.apache.aurora.api.ttypes import (
     AssignedTask,
     Identity,
-    JobKey,
     Response,
     ResponseCode,
     Result,
@@ -32,6 +33,7 @@ from gen.apache.aurora.api.ttypes import (
     ScheduleStatus,
     ScheduleStatusResult,
     TaskConfig,
+    TaskEvent,
     TaskQuery
 )
 
@@ -62,7 +64,7 @@ class InstanceWatcherTest(unittest.TestCase):
     self._name = 'jimbob'
     self._clock = FakeClock()
     self._scheduler = mox.MockObject(scheduler_client)
-    job_key = JobKey(name=self._name, environment=self._env, role=self._role)
+    job_key = AuroraJobKey('cl', self._role, self._env, self._name)
     self._health_check = mox.MockObject(HealthCheck)
     self._watcher = InstanceWatcher(self._scheduler,
                                  job_key,
@@ -76,23 +78,26 @@ class InstanceWatcherTest(unittest.TestCase):
     query.owner = Identity(role=self._role)
     query.environment = self._env
     query.jobName = self._name
-    query.statuses = set([ScheduleStatus.RUNNING])
-    query.instanceIds = set(instance_ids)
+    query.instanceIds = frozenset(instance_ids)
     return query
 
-  def create_task(self, instance_id):
+  def create_task(self, instance_id, status=ScheduleStatus.RUNNING):
     return ScheduledTask(
-        assignedTask=AssignedTask(instanceId=instance_id, task=TaskConfig()))
-
-  def expect_get_statuses(self, instance_ids=WATCH_INSTANCES, num_calls=EXPECTED_CYCLES):
-    tasks = [self.create_task(instance_id) for instance_id in instance_ids]
+        assignedTask=AssignedTask(instanceId=instance_id, task=TaskConfig()),
+        status=status,
+        taskEvents=[TaskEvent(timestamp=10, status=status)])
+
+  def expect_get_statuses(self, instance_ids=WATCH_INSTANCES, num_calls=EXPECTED_CYCLES,
+      tasks=None):
+    if tasks is None:
+      tasks = [self.create_task(instance_id) for instance_id in instance_ids]
     response = Response(responseCode=ResponseCode.OK, messageDEPRECATED='test')
     response.result = Result()
     response.result.scheduleStatusResult = ScheduleStatusResult(tasks=tasks)
 
     query = self.get_tasks_status_query(instance_ids)
     for x in range(int(num_calls)):
-      self._scheduler.getTasksStatus(query).AndReturn(response)
+      self._scheduler.getTasksWithoutConfigs(query).AndReturn(response)
 
   def expect_io_error_in_get_statuses(self, instance_ids=WATCH_INSTANCES,
       num_calls=EXPECTED_CYCLES):
@@ -103,7 +108,7 @@ class InstanceWatcherTest(unittest.TestCase):
 
     query = self.get_tasks_status_query(instance_ids)
     for x in range(int(num_calls)):
-      self._scheduler.getTasksStatus(query).AndRaise(IOError('oops'))
+      self._scheduler.getTasksWithoutConfigs(query).AndRaise(IOError('oops'))
 
   def mock_health_check(self, task, status, retry):
     self._health_check.health(task).InAnyOrder().AndReturn((status, retry))
@@ -212,3 +217,46 @@ class InstanceWatcherTest(unittest.TestCase):
     self.replay_mocks()
     self.assert_watch_result([2])
     self.verify_mocks()
+
+  def test_watch_any(self):
+    """Watches are polled together with a single query and complete independently"""
+    self.expect_get_statuses(num_calls=1)
+    self.expect_health_check(0, True, num_calls=1)
+    self.expect_health_check(1, True, num_calls=1)
+    self.expect_health_check(2, False, retry=False, num_calls=1)
+    # The first watch carries on from the shared poll, without polling again right away.
+    self.expect_get_statuses(instance_ids=[0, 1], num_calls=self.EXPECTED_CYCLES - 1)
+    self.expect_health_check(0, True, num_calls=self.EXPECTED_CYCLES - 1)
+    self.expect_health_check(1, True, num_calls=self.EXPECTED_CYCLES - 1)
+    self.replay_mocks()
+    first = self._watcher.start([0, 1], self._health_check)
+    second = self._watcher.start([2], self._health_check)
+    assert self._watcher.watch_any([first, second]) == {second: set([2])}
+    assert self._watcher.watch_any([first]) == {first: set()}
+    self.verify_mocks()
+
+  def test_only_running_tasks_are_checked(self):
+    """Instances whose latest task is not running are not health checked"""
+    self.expect_get_statuses(instance_ids=[0, 1], tasks=[
+        self.create_task(0), self.create_task(1, status=ScheduleStatus.KILLING)])
+    self.expect_health_check(0, True)
+    self.replay_mocks()
+    self.assert_watch_result([1], instances_to_watch=[0, 1])
+    self.verify_mocks()
+
+  def test_watches_share_the_job_monitor(self):
+    """Health watches are polled together with the other waiters of a shared job monitor"""
+    job_key = AuroraJobKey('cl', self._role, self._env, self._name)
+    monitor = JobMonitor(self._scheduler, job_key, clock=self._clock)
+    watcher = InstanceWatcher(self._scheduler, job_key, self.RESTART_THRESHOLD, self.WATCH_SECS,
+        health_check_interval_seconds=3, clock=self._clock, job_monitor=monitor)
+    self.expect_get_statuses(instance_ids=[0, 1], num_calls=1, tasks=[
+        self.create_task(0), self.create_task(1, status=ScheduleStatus.KILLED)])
+    self.expect_health_check(0, False, retry=False, num_calls=1)
+    self.replay_mocks()
+    watch = watcher.start([0], self._health_check)
+    kill = monitor.watch_until(JobMonitor.terminal, instances=[1])
+    monitor.wait([kill])
+    assert kill.result()
+    assert watcher.watch_any([watch]) == {watch: set([0])}
+    self.verify_mocks()
@@ -14,6 +14,7 @@
 import unittest
 
 from mock import Mock
+from twitter.common.quantity import Time
 
 from apache.aurora.client.api.job_monitor import JobMonitor
 from apache.aurora.common.aurora_job_key import AuroraJobKey
@@ -33,8 +34,14 @@ from gen.apache.aurora.api.ttypes import (
 
 
 class FakeClock(object):
+  def __init__(self):
+    self._now_seconds = 0.0
+
+  def time(self):
+    return self._now_seconds
+
   def sleep(self, seconds):
-    pass
+    self._now_seconds += seconds
 
 
 class JobMonitorTest(unittest.TestCase):
@@ -59,7 +66,7 @@ class JobMonitorTest(unittest.TestCase):
     response_code = ResponseCode.OK if response_code is None else response_code
     resp = Response(responseCode=response_code, messageDEPRECATED='test')
     resp.result = Result(scheduleStatusResult=ScheduleStatusResult(tasks=tasks))
-    self._scheduler.getTasksStatus.return_value = resp
+    self._scheduler.getTasksWithoutConfigs.return_value = resp
 
   def expect_task_status(self, once=False, instances=None):
     query = TaskQuery(
@@ -70,9 +77,9 @@ class JobMonitorTest(unittest.TestCase):
       query.instanceIds = frozenset([int(s) for s in instances])
 
     if once:
-      self._scheduler.getTasksStatus.assert_called_once_with(query)
+      self._scheduler.getTasksWithoutConfigs.assert_called_once_with(query)
     else:
-      self._scheduler.getTasksStatus.assert_called_with(query)
+      self._scheduler.getTasksWithoutConfigs.assert_called_with(query)
 
   def test_wait_until_state(self):
     self.mock_get_tasks([
@@ -111,3 +118,80 @@ class JobMonitorTest(unittest.TestCase):
     monitor = JobMonitor(self._scheduler, self._job_key, clock=self._clock)
     assert not monitor.wait_until(monitor.terminal, with_timeout=True)
     self.expect_task_status()
+
+  def test_concurrent_waiters_share_polls(self):
+    self.mock_get_tasks([
+        self.create_task(ScheduleStatus.FINISHED, '1'),
+        self.create_task(ScheduleStatus.KILLED, '2'),
+    ])
+
+    monitor = JobMonitor(self._scheduler, self._job_key, clock=self._clock)
+    first = monitor.watch_until(monitor.terminal, instances=[1])
+    second = monitor.watch_until(monitor.terminal, instances=[2])
+    monitor.wait([first, second])
+    assert first.result()
+    assert second.result()
+    self.expect_task_status(once=True, instances=[1, 2])
+
+  def test_poll_interval_adapts_to_progress(self):
+    running = [self.create_task(ScheduleStatus.RUNNING, 1)]
+    killed = [self.create_task(ScheduleStatus.KILLED, 1)]
+    responses = [running] * 5 + [killed]
+
+    def get_tasks(query):
+      resp = Response(responseCode=ResponseCode.OK, messageDEPRECATED='test')
+      resp.result = Result(scheduleStatusResult=ScheduleStatusResult(tasks=responses.pop(0)))
+      return resp
+    self._scheduler.getTasksWithoutConfigs.side_effect = get_tasks
+
+    monitor = JobMonitor(self._scheduler, self._job_key, clock=self._clock)
+    assert monitor.wait_until(monitor.terminal, instances=[1])
+    assert self._scheduler.getTasksWithoutConfigs.call_count == 6
+    # Polls follow at the minimum interval while the waiter is young, instead of doubling.
+    assert self._clock.time() == 5 * JobMonitor.MIN_POLL_INTERVAL.as_(Time.SECONDS)
+
+  def test_wait_until_timeout_without_clock_time(self):
+    self.mock_get_tasks([self.create_task(ScheduleStatus.RUNNING, 1)])
+    clock = Mock()
+    clock.time.return_value = 0
+
+    # The time slept counts towards the timeout even if the clock does not move.
+    monitor = JobMonitor(self._scheduler, self._job_key, clock=clock)
+    assert not monitor.wait_until(monitor.terminal, with_timeout=True)
+    slept = sum(args[0] for args, _ in clock.sleep.call_args_list)
+    assert slept == JobMonitor.WAIT_TIMEOUT.as_(Time.SECONDS)
+
+  def test_watch_tasks(self):
+    self.mock_get_tasks([self.create_task(ScheduleStatus.RUNNING, 1)])
+    polls = []
+
+    def callback(tasks_by_instance, now):
+      polls.append(now)
+      return set(tasks_by_instance) if len(polls) == 3 else None
+
+    monitor = JobMonitor(self._scheduler, self._job_key, clock=self._clock)
+    future = monitor.watch_tasks(callback, instances=[1], poll_interval=5)
+    monitor.wait_any([future])
+    assert future.result() == set([1])
+    assert polls == [0, 5, 10]
+    self.expect_task_status(instances=[1])
+
+  def test_wait_any_and_cancel(self):
+    self.mock_get_tasks([
+        self.create_task(ScheduleStatus.FINISHED, 1),
+        self.create_task(ScheduleStatus.RUNNING, 2),
+    ])
+
+    monitor = JobMonitor(self._scheduler, self._job_key, clock=self._clock)
+    finished = monitor.watch_until(monitor.terminal, instances=[1])
+    running = monitor.watch_until(monitor.terminal, instances=[2])
+    monitor.wait_any([finished, running])
+    assert finished.result()
+    assert not running.done()
+    self.expect_task_status(once=True, instances=[1, 2])
+
+    # A cancelled waiter is no longer polled for.
+    assert running.cancel()
+    assert monitor.wait_until(monitor.terminal, instances=[1])
+    assert self._scheduler.getTasksWithoutConfigs.call_count == 2
+    self.expect_task_status(instances=[1])
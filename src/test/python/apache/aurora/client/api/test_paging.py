@@ -0,0 +1,103 @@
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+import unittest
+
+import pytest
+from mock import Mock
+
+from apache.aurora.client.api.paging import iter_tasks, QueryError
+
+from gen.apache.aurora.api.ttypes import (
+    AssignedTask,
+    Response,
+    ResponseCode,
+    Result,
+    ScheduledTask,
+    ScheduleStatusResult,
+    TaskQuery
+)
+
+
+def make_task(task_id):
+  return ScheduledTask(assignedTask=AssignedTask(taskId=task_id))
+
+
+def make_response(tasks, code=ResponseCode.OK):
+  return Response(
+      responseCode=code,
+      messageDEPRECATED='test',
+      result=Result(scheduleStatusResult=ScheduleStatusResult(tasks=tasks)))
+
+
+class FakeScheduler(object):
+  """Serves a fixed list of tasks honouring the offset and limit of each query."""
+
+  def __init__(self, tasks):
+    self._tasks = tasks
+    self.queries = []
+
+  def getTasksStatus(self, query):
+    self.queries.append(query)
+    end = None if query.limit is None else query.offset + query.limit
+    return make_response(self._tasks[query.offset:end])
+
+
+class IterTasksTest(unittest.TestCase):
+  def ids(self, tasks):
+    return [task.assignedTask.taskId for task in tasks]
+
+  def test_pages(self):
+    scheduler = FakeScheduler([make_task('t%d' % i) for i in range(7)])
+    query = TaskQuery(jobName='hello')
+    tasks = list(iter_tasks(scheduler.getTasksStatus, query, page_size=3))
+    assert self.ids(tasks) == ['t%d' % i for i in range(7)]
+    assert [(q.offset, q.limit) for q in scheduler.queries] == [(0, 3), (3, 3), (6, 3)]
+    assert all(q.jobName == 'hello' for q in scheduler.queries)
+    assert query.offset is None and query.limit is None
+
+  def test_exact_multiple_of_page_size(self):
+    scheduler = FakeScheduler([make_task('t%d' % i) for i in range(4)])
+    tasks = list(iter_tasks(scheduler.getTasksStatus, TaskQuery(), page_size=2))
+    assert len(tasks) == 4
+    assert [(q.offset, q.limit) for q in scheduler.queries] == [(0, 2), (2, 2), (4, 2)]
+
+  def test_honours_query_offset_and_limit(self):
+    scheduler = FakeScheduler([make_task('t%d' % i) for i in range(10)])
+    query = TaskQuery(offset=2, limit=5)
+    tasks = list(iter_tasks(scheduler.getTasksStatus, query, page_size=2))
+    assert self.ids(tasks) == ['t2', 't3', 't4', 't5', 't6']
+    assert [(q.offset, q.limit) for q in scheduler.queries] == [(2, 2), (4, 2), (6, 1)]
+
+  def test_skips_tasks_repeated_by_a_later_page(self):
+    fetch = Mock(side_effect=[
+        make_response([make_task('a'), make_task('b')]),
+        make_response([make_task('b'), make_task('c')]),
+        make_response([])])
+    assert self.ids(iter_tasks(fetch, TaskQuery(), page_size=2)) == ['a', 'b', 'c']
+
+  def test_failed_page(self):
+    fetch = Mock(side_effect=[
+        make_response([make_task('a'), make_task('b')]),
+        make_response([], code=ResponseCode.ERROR)])
+    tasks = iter_tasks(fetch, TaskQuery(), page_size=2)
+    assert self.ids([next(tasks), next(tasks)]) == ['a', 'b']
+    with pytest.raises(QueryError) as e:
+      next(tasks)
+    assert e.value.response.responseCode == ResponseCode.ERROR
+
+  def test_invalid_page_size(self):
+    with pytest.raises(ValueError):
+      list(iter_tasks(Mock(), TaskQuery(), page_size=0))
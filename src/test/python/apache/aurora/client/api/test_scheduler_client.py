@@ -12,14 +12,18 @@
 # limitations under the License.
 #
 
+import contextlib
 import inspect
+import os
 import time
 import unittest
 
 import mock
 import pytest
 from mox import IgnoreArg, IsA, Mox
+from thrift.protocol import TCompactProtocol
 from thrift.transport import THttpClient, TTransport
+from twitter.common.contextutil import temporary_dir
 from twitter.common.quantity import Amount, Time
 from twitter.common.zookeeper.kazoo_client import TwitterKazooClient
 from twitter.common.zookeeper.serverset.endpoint import ServiceInstance
@@ -293,7 +297,8 @@ def test_url_when_not_connected_and_cluster_has_no_proxy_url(scheme):
   client = make_mock_client(proxy_url=None)
   client.get_thrift_client()
   assert client.url == '%s://%s:%d' % (scheme, host, port)
-  client._connect_scheduler.assert_has_calls([mock.call('%s://%s:%d/api' % (scheme, host, port))])
+  client._connect_scheduler.assert_has_calls([
+      mock.call('%s://%s:%d/api' % (scheme, host, port), thrift_protocol='json')])
   client._connect_scheduler.reset_mock()
   client.get_thrift_client()
   client._connect_scheduler.assert_has_calls([])
@@ -309,3 +314,126 @@ def test_connect_scheduler(mock_client):
   assert mock_client.return_value.open.call_count == 2
   mock_time.sleep.assert_called_once_with(
       scheduler_client.SchedulerClient.RETRY_TIMEOUT.as_(Time.SECONDS))
+
+
+@mock.patch('apache.aurora.client.api.scheduler_client.TRequestsTransport', spec=TRequestsTransport)
+def test_connect_scheduler_with_protocol(mock_transport):
+  client = scheduler_client.SchedulerClient._connect_scheduler(
+      'https://scheduler.example.com:1337',
+      thrift_protocol='compact')
+  mock_transport.assert_called_once_with(
+      'https://scheduler.example.com:1337',
+      content_type='application/vnd.apache.thrift.compact')
+  assert isinstance(client._iprot, TCompactProtocol.TCompactProtocol)
+
+
+def test_thrift_protocol_trait():
+  client = scheduler_client.SchedulerClient.get(
+      Cluster(name='west', scheduler_uri='http://scheduler:8081', thrift_protocol='binary'))
+  assert client._thrift_protocol == 'binary'
+
+  client = scheduler_client.SchedulerClient.get(
+      Cluster(name='west', scheduler_uri='http://scheduler:8081'))
+  assert client._thrift_protocol == 'json'
+
+  with pytest.raises(ValueError):
+    scheduler_client.SchedulerClient.get(
+        Cluster(name='west', scheduler_uri='http://scheduler:8081', thrift_protocol='xml'))
+
+
+class FakeClock(object):
+  def __init__(self, now=1000):
+    self.now = now
+
+  def time(self):
+    return self.now
+
+
+def test_scheduler_uri_cache():
+  cluster = Cluster(name='west', zk='zk.example.com', scheduler_zk_path='/aurora/scheduler')
+  clock = FakeClock()
+  with temporary_dir() as path:
+    cache = scheduler_client.SchedulerUriCache(
+        path=path, ttl=Amount(60, Time.SECONDS), clock=clock)
+    assert cache.get(cluster, 2181) is None
+
+    cache.put(cluster, 2181, 'http://scheduler:8081')
+    assert cache.get(cluster, 2181) == 'http://scheduler:8081'
+    assert cache.get(cluster, 2182) is None
+    assert cache.get(Cluster(name='west', zk='zk.example.com', scheduler_zk_path='/aurora/other'),
+                     2181) is None
+
+    clock.now += 60
+    assert cache.get(cluster, 2181) is None
+
+    cache.put(cluster, 2181, 'http://scheduler:8081')
+    cache.invalidate(cluster)
+    assert cache.get(cluster, 2181) is None
+    cache.invalidate(cluster)
+
+
+def test_scheduler_uri_cache_ignores_corrupt_entries():
+  cluster = Cluster(name='west', zk='zk.example.com', scheduler_zk_path='/aurora/scheduler')
+  with temporary_dir() as path:
+    with open(os.path.join(path, 'west.json'), 'w') as fp:
+      fp.write('{"uri": ')
+    assert scheduler_client.SchedulerUriCache(path=path).get(cluster, 2181) is None
+
+
+def test_zookeeper_client_uses_uri_cache():
+  cluster = Cluster(name='west', zk='zk.example.com', scheduler_zk_path='/aurora/scheduler',
+                    proxy_url=None)
+  cache = mock.create_autospec(scheduler_client.SchedulerUriCache, instance=True)
+  cache.get.return_value = 'http://scheduler:8081'
+  client = scheduler_client.ZookeeperSchedulerClient(cluster, uri_cache=cache)
+  client.get_scheduler_serverset = mock.MagicMock()
+
+  assert client.url == 'http://scheduler:8081'
+  cache.get.assert_called_once_with(cluster, 2181)
+  assert client.get_scheduler_serverset.call_count == 0
+
+  assert client.invalidate()
+  cache.invalidate.assert_called_once_with(cluster)
+  assert not client.invalidate()
+
+
+def test_scheduler_proxy_reresolves_stale_uri():
+  stale_client = mock.create_autospec(scheduler_client.SchedulerClient, instance=True)
+  stale_client.invalidate.return_value = True
+  stale_client.get_thrift_client.return_value.getVersion.side_effect = (
+      TTransport.TTransportException('Connection refused'))
+  fresh_client = mock.create_autospec(scheduler_client.SchedulerClient, instance=True)
+  fresh_client.get_thrift_client.return_value.getVersion.return_value = Response(
+      responseCode=ResponseCode.OK, result=Result(getVersionResult=CURRENT_API_VERSION))
+
+  with contextlib.nested(
+      mock.patch.object(scheduler_client.SchedulerClient, 'get',
+                        side_effect=[stale_client, fresh_client]),
+      mock.patch('time.sleep')) as (_, mock_sleep):
+    proxy = TestSchedulerProxy(Cluster(name='west'))
+    proxy.getTasksStatus(TaskQuery())
+
+  assert stale_client.invalidate.call_count == 1
+  assert mock_sleep.call_count == 0
+  fresh_client.get_thrift_client.return_value.getTasksStatus.assert_called_once_with(TaskQuery())
+
+
+def test_scheduler_proxy_pool():
+  proxies = []
+
+  def factory():
+    proxies.append(mock.Mock())
+    return proxies[-1]
+
+  pool = scheduler_client.SchedulerProxyPool(factory, 2)
+  with pool.proxy() as first:
+    with pool.proxy() as second:
+      assert first is not second
+  assert len(proxies) == 2
+
+  with pool.proxy() as proxy:
+    assert proxy in proxies
+  assert len(proxies) == 2
+
+  with pytest.raises(ValueError):
+    scheduler_client.SchedulerProxyPool(factory, 0)
@@ -18,7 +18,16 @@ from contextlib import contextmanager
 
 from mock import call, Mock, patch
 
-from apache.aurora.client.api.sla import JobUpTimeLimit, Sla, task_query
+from apache.aurora.client.api.sla import (
+    DomainTaskSnapshot,
+    DomainUpTimeSlaVector,
+    JobUpTimeLimit,
+    JobUpTimeSlaVector,
+    Sla,
+    task_query,
+    task_record,
+    TaskRecord
+)
 from apache.aurora.client.base import add_grouping, DEFAULT_GROUPING, remove_grouping
 from apache.aurora.common.aurora_job_key import AuroraJobKey
 from apache.aurora.common.cluster import Cluster
@@ -58,11 +67,12 @@ class SlaTest(unittest.TestCase):
     response_code = ResponseCode.OK if response_code is None else response_code
     resp = Response(responseCode=response_code, messageDEPRECATED='test')
     resp.result = Result(scheduleStatusResult=ScheduleStatusResult(tasks=tasks))
-    self._scheduler.getTasksStatus.return_value = resp
+    self._scheduler.getTasksWithoutConfigs.return_value = resp
 
-  def create_task(self, duration, id, host=None, name=None, prod=None):
+  def create_task(self, duration, id, host=None, name=None, prod=None, task_id=None):
     return ScheduledTask(
         assignedTask=AssignedTask(
+            taskId=task_id,
             instanceId=id,
             slaveHost=host,
             task=TaskConfig(
@@ -162,7 +172,7 @@ class SlaTest(unittest.TestCase):
     )
 
   def expect_task_status_call_job_scoped(self):
-    self._scheduler.getTasksStatus.assert_called_once_with(
+    self._scheduler.getTasksWithoutConfigs.assert_called_once_with(
         TaskQuery(
             owner=Identity(role=self._role),
             environment=self._env,
@@ -171,7 +181,7 @@ class SlaTest(unittest.TestCase):
     )
 
   def expect_task_status_call_cluster_scoped(self):
-    self._scheduler.getTasksStatus.assert_called_with(TaskQuery(statuses=LIVE_STATES))
+    self._scheduler.getTasksWithoutConfigs.assert_called_with(TaskQuery(statuses=LIVE_STATES))
 
   @contextmanager
   def group_by_rack(self):
@@ -243,6 +253,14 @@ class SlaTest(unittest.TestCase):
     self.mock_get_tasks(self.create_tasks([100, 200, 300, 400]))
     self.assert_wait_time_result(150, 80, 250)
 
+  def test_vector_without_uptimes(self):
+    vector = JobUpTimeSlaVector.from_sorted_uptimes([100, 200, 200, 300, 400])
+    filtered = vector.without([200, 400])
+    assert 3 == filtered.total_tasks()
+    assert 2 == filtered.count_up(200)
+    assert 200 == filtered.get_job_uptime(50)
+    assert 5 == vector.total_tasks()
+
   def test_domain_uptime_no_tasks(self):
     self.mock_get_tasks([])
     vector = self._sla.get_domain_uptime_vector(self._cluster, self._min_count)
@@ -277,6 +295,18 @@ class SlaTest(unittest.TestCase):
     ])
     self.assert_safe_domain_result('h1', 50, 200)
 
+  def test_domain_uptime_from_records(self):
+    tasks = [
+        self.create_task(100, 1, 'h1', self._name),
+        self.create_task(200, 2, 'h2', self._name),
+        self.create_task(100, 1, 'h2', 'j2', prod=False)
+    ]
+    from_tasks = DomainUpTimeSlaVector(self._cluster, tasks, hosts=['h1'])
+    from_records = DomainUpTimeSlaVector(self._cluster, [], hosts=['h1'],
+        records_by_job={self._job_key: [task_record(task) for task in tasks[:2]]})
+    assert from_tasks.probe_hosts(50, 100) == from_records.probe_hosts(50, 100)
+    self.assert_probe_host_job_details(from_records.probe_hosts(50, 100), 'h1', 50.0)
+
   def test_domain_uptime_with_override(self):
     self.mock_get_tasks([
         self.create_task(100, 1, 'h1', self._name),
@@ -329,6 +359,22 @@ class SlaTest(unittest.TestCase):
       assert 0 == len(vector.get_safe_hosts(50, 150, None, 'by_rack')), 'Length must be empty.'
       self.expect_task_status_call_cluster_scoped()
 
+  def test_domain_uptime_with_grouping_job_limits(self):
+    with self.group_by_rack():
+      self.mock_get_tasks([
+          self.create_task(200, 1, 'cl-r1-h01', self._name),
+          self.create_task(200, 2, 'cl-r1-h02', self._name),
+          self.create_task(200, 3, 'cl-r2-h03', self._name),
+          self.create_task(200, 4, 'cl-r3-h04', self._name),
+      ])
+      limits = {self._job_key: JobUpTimeLimit(self._job_key, 50, 150)}
+      vector = self._sla.get_domain_uptime_vector(self._cluster, self._min_count)
+      result = vector.get_safe_hosts(80, 150, limits, 'by_rack')
+      assert 3 == len(result), ('Expected length:%s Actual length:%s' % (3, len(result)))
+      assert [50.0] == [limit.percentage for limit in result[0]['cl-r1-h02']]
+      assert [75.0] == [limit.percentage for limit in result[1]['cl-r2-h03']]
+      self.expect_task_status_call_cluster_scoped()
+
   def test_probe_hosts_no_hosts(self):
     self.mock_get_tasks([])
     vector = self._sla.get_domain_uptime_vector(self._cluster, self._min_count)
@@ -422,6 +468,54 @@ class SlaTest(unittest.TestCase):
       self.assert_probe_host_job_details(result, 'cl-r2-h03', 25.0, False, 100)
       self.assert_probe_host_job_details(result, 'cl-r2-h04', 25.0, False, 100)
 
+  def test_probe_hosts_with_down_hosts(self):
+    self.mock_get_tasks([
+        self.create_task(100, 1, 'h1', self._name),
+        self.create_task(200, 2, 'h2', self._name),
+        self.create_task(300, 3, 'h3', self._name),
+        self.create_task(400, 4, 'h4', self._name),
+    ])
+    vector = self._sla.get_domain_uptime_vector(self._cluster, self._min_count, ['h1'])
+    self.assert_probe_host_job_details(vector.probe_hosts(50, 100), 'h1', 75.0)
+
+    # Tasks on hosts already going down count as down along with the probed host.
+    self.assert_probe_host_job_details(
+        vector.probe_hosts(50, 100, down_hosts=['h2']), 'h1', 50.0)
+    self.assert_probe_host_job_details(
+        vector.probe_hosts(50, 100, down_hosts=['h2', 'h3']), 'h1', 25.0, False, None)
+
+  def test_probe_hosts_with_down_hosts_in_group(self):
+    with self.group_by_rack():
+      self.mock_get_tasks([
+          self.create_task(100, 1, 'cl-r1-h01', self._name),
+          self.create_task(300, 2, 'cl-r1-h02', self._name),
+          self.create_task(300, 3, 'cl-r2-h03', self._name),
+          self.create_task(400, 4, 'cl-r2-h04', self._name),
+      ])
+      hosts = ['cl-r1-h01', 'cl-r1-h02']
+      vector = self._sla.get_domain_uptime_vector(self._cluster, self._min_count, hosts)
+
+      # A down host of the probed group is counted down once.
+      for down_hosts in (None, ['cl-r1-h02']):
+        result = vector.probe_hosts(50, 300, 'by_rack', down_hosts=down_hosts)
+        assert 1 == len(result)
+        self.assert_probe_host_job_details(result, 'cl-r1-h01', 50.0)
+        self.assert_probe_host_job_details(result, 'cl-r1-h02', 50.0)
+
+  def test_probe_hosts_with_down_hosts_wait_time(self):
+    self.mock_get_tasks([
+        self.create_task(100, 1, 'h1', self._name),
+        self.create_task(200, 2, 'h2', self._name),
+        self.create_task(300, 3, 'h3', self._name),
+        self.create_task(400, 4, 'h4', self._name),
+    ])
+    vector = self._sla.get_domain_uptime_vector(self._cluster, self._min_count, ['h1'])
+    self.assert_probe_host_job_details(vector.probe_hosts(50, 300), 'h1', 50.0)
+
+    # The wait time is that of the instances left up on the other hosts: h2 has to reach 300s.
+    self.assert_probe_host_job_details(
+        vector.probe_hosts(50, 300, down_hosts=['h3']), 'h1', 25.0, False, 100)
+
   def test_get_domain_uptime_vector_with_hosts(self):
     with patch('apache.aurora.client.api.sla.task_query', return_value=TaskQuery()) as (mock_query):
       self.mock_get_tasks([
@@ -450,6 +544,78 @@ class SlaTest(unittest.TestCase):
       self._sla.get_domain_uptime_vector(self._cluster, self._min_count, ['h1'])
       mock_query.assert_called_once_with(hosts=['h1'])
 
+  def test_get_domain_uptime_vector_with_snapshot(self):
+    self.mock_get_tasks([
+        self.create_task(100, 1, 'h1', self._name),
+        self.create_task(200, 2, 'h2', self._name),
+    ])
+    snapshot = DomainTaskSnapshot()
+
+    vector = self._sla.get_domain_uptime_vector(self._cluster, self._min_count, ['h1'], snapshot)
+    self.assert_probe_host_job_details(vector.probe_hosts(50, 100), 'h1', 50.0)
+    assert 2 == self._scheduler.getTasksWithoutConfigs.call_count
+    # Only task records are kept, not the tasks.
+    records = snapshot.records([self._job_key])[self._job_key]
+    assert [1, 2] == sorted(record.instance_id for record in records)
+    assert all(isinstance(record, TaskRecord) for record in records)
+
+    # Jobs already in the snapshot are not fetched again.
+    vector = self._sla.get_domain_uptime_vector(self._cluster, self._min_count, ['h1'], snapshot)
+    self.assert_probe_host_job_details(vector.probe_hosts(50, 100), 'h1', 50.0)
+    assert 3 == self._scheduler.getTasksWithoutConfigs.call_count
+
+    # Jobs with tasks on drained hosts are.
+    snapshot.hosts_drained(['h2'])
+    self.mock_get_tasks([
+        self.create_task(100, 1, 'h1', self._name),
+        self.create_task(50, 2, 'h3', self._name),
+    ])
+    vector = self._sla.get_domain_uptime_vector(self._cluster, self._min_count, ['h1'], snapshot)
+    self.assert_probe_host_job_details(vector.probe_hosts(50, 100), 'h1', 0.0, False, 50)
+    assert 5 == self._scheduler.getTasksWithoutConfigs.call_count
+    assert not snapshot.drained_hosts
+
+  def test_get_domain_uptime_vector_with_snapshot_tasks_changed(self):
+    self.mock_get_tasks([
+        self.create_task(100, 1, 'h1', self._name, task_id='t1'),
+        self.create_task(200, 2, 'h2', self._name, task_id='t2'),
+    ])
+    snapshot = DomainTaskSnapshot()
+
+    self._sla.get_domain_uptime_vector(self._cluster, self._min_count, ['h1'], snapshot)
+    assert 2 == self._scheduler.getTasksWithoutConfigs.call_count
+
+    # A job whose tasks on the hosts no longer match the snapshot is fetched again.
+    self.mock_get_tasks([
+        self.create_task(10, 1, 'h1', self._name, task_id='t3'),
+        self.create_task(200, 2, 'h2', self._name, task_id='t2'),
+    ])
+    self._sla.get_domain_uptime_vector(self._cluster, self._min_count, ['h1'], snapshot)
+    assert 4 == self._scheduler.getTasksWithoutConfigs.call_count
+    assert set(['t3']) == snapshot.task_ids(self._job_key, ['h1'])
+
+  def test_get_domain_uptime_vector_with_snapshot_expired(self):
+    self.mock_get_tasks([
+        self.create_task(100, 1, 'h1', self._name),
+        self.create_task(200, 2, 'h2', self._name),
+    ])
+    clock = Mock(spec=time)
+    clock.time.return_value = 0
+    snapshot = DomainTaskSnapshot(max_age_secs=60, clock=clock)
+
+    self._sla.get_domain_uptime_vector(self._cluster, self._min_count, ['h1'], snapshot)
+    assert 2 == self._scheduler.getTasksWithoutConfigs.call_count
+
+    clock.time.return_value = 60
+    self._sla.get_domain_uptime_vector(self._cluster, self._min_count, ['h1'], snapshot)
+    assert 3 == self._scheduler.getTasksWithoutConfigs.call_count
+
+    # Jobs fetched more than max_age_secs ago are fetched again.
+    clock.time.return_value = 61
+    self._sla.get_domain_uptime_vector(self._cluster, self._min_count, ['h1'], snapshot)
+    assert 5 == self._scheduler.getTasksWithoutConfigs.call_count
+    assert not snapshot.expired_jobs()
+
   def test_task_query(self):
     jobs = set([
         AuroraJobKey(self._cluster.name, self._role, self._env, 'j1'),
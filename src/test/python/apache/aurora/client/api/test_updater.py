@@ -18,11 +18,13 @@ from unittest import TestCase
 
 from mox import MockObject, Replay, Verify
 from pytest import raises
+from twitter.common.concurrent import Future
 
-from apache.aurora.client.api.instance_watcher import InstanceWatcher
+from apache.aurora.client.api.instance_watcher import InstanceWatch, InstanceWatcher
 from apache.aurora.client.api.job_monitor import JobMonitor
 from apache.aurora.client.api.quota_check import CapacityRequest, QuotaCheck
 from apache.aurora.client.api.updater import Updater
+from apache.aurora.client.api.updater_util import diff_configs, TaskConfigFingerprints
 from apache.aurora.client.fake_scheduler_proxy import FakeSchedulerProxy
 from apache.aurora.common.aurora_job_key import AuroraJobKey
 
@@ -154,6 +156,17 @@ class UpdaterTest(TestCase):
   def expect_watch_instances(self, instance_ids, failed_instances=[]):
     self._instance_watcher.watch(instance_ids).AndReturn(set(failed_instances))
 
+  def expect_start_watch(self, instance_ids):
+    watch = InstanceWatch(instance_ids, 0, 50, 50, health_check=None)
+    self._instance_watcher.start(instance_ids).AndReturn(watch)
+    return watch
+
+  def expect_watch_any(self, watches, completed):
+    self._instance_watcher.watch_any(watches).AndReturn(completed)
+
+  def expect_stop_watches(self, watches):
+    self._instance_watcher.stop(watches)
+
   def expect_populate(self, job_config, response_code=None):
     response_code = ResponseCode.OK if response_code is None else response_code
     resp = Response(responseCode=response_code, messageDEPRECATED='test')
@@ -190,7 +203,7 @@ class UpdaterTest(TestCase):
         self._lock,
         self._session_key).AndReturn(response)
 
-  def expect_kill(self, instance_ids, response_code=None, monitor_result=True):
+  def expect_kill(self, instance_ids, response_code=None, monitor_result=True, watch=False):
     response_code = ResponseCode.OK if response_code is None else response_code
     response = Response(responseCode=response_code, messageDEPRECATED='test')
     query = TaskQuery(
@@ -203,9 +216,19 @@ class UpdaterTest(TestCase):
     if response_code != ResponseCode.OK:
       return
 
+    if watch:
+      future = Future()
+      future.set_result(monitor_result)
+      self._job_monitor.watch_until(
+          JobMonitor.terminal, instance_ids, with_timeout=True).AndReturn(future)
+      return future
+
     self._job_monitor.wait_until(JobMonitor.terminal, instance_ids, with_timeout=True).AndReturn(
         monitor_result)
 
+  def expect_wait_kills(self, futures):
+    self._job_monitor.wait(futures)
+
   def expect_add(self, instance_ids, task_config, response_code=None):
     response_code = ResponseCode.OK if response_code is None else response_code
     response = Response(responseCode=response_code, messageDEPRECATED='test')
@@ -684,6 +707,13 @@ class UpdaterTest(TestCase):
     with raises(Updater.Error):
       self.init_updater(update_config)
 
+  def test_invalid_max_batches_in_flight(self):
+    """Test for out of range error for max batches in flight."""
+    update_config = self.UPDATE_CONFIG.copy()
+    update_config.update(max_batches_in_flight=0)
+    with raises(Updater.Error):
+      self.init_updater(update_config)
+
   def test_update_invalid_response(self):
     """A response code other than success is returned by a scheduler RPC."""
     old_configs = self.make_task_configs(5)
@@ -832,10 +862,32 @@ class UpdaterTest(TestCase):
     # the opposite on rare occasions as the ordering is not stable between test runs.
     to_config = deepcopy(from_config)
 
-    diff_result = self._updater._diff_configs(from_config, to_config)
+    fingerprints = TaskConfigFingerprints()
+    assert fingerprints.equal(from_config, to_config)
+    assert fingerprints.dedupe(to_config) is from_config
+
+    diff_result = diff_configs(from_config, to_config)
     assert diff_result == "", (
       'diff result must be empty but was: %s' % diff_result)
 
+  def test_fingerprint_changed_configs(self):
+    """Configs that differ in nested sets or maps get distinct fingerprints."""
+    from_config = self.make_task_configs()[0]
+    from_config.constraints = set([
+        Constraint(name='value', constraint=ValueConstraint(values=set(['1', '2'])))])
+    from_config.taskLinks = {'task1': 'link1'}
+
+    fingerprints = TaskConfigFingerprints()
+    for mutate in (
+        lambda config: next(iter(config.constraints)).constraint.values.add('3'),
+        lambda config: config.taskLinks.update(task1='link2'),
+        lambda config: setattr(config, 'priority', 5)):
+      to_config = deepcopy(from_config)
+      mutate(to_config)
+      assert not fingerprints.equal(from_config, to_config)
+      assert fingerprints.dedupe(to_config) is to_config
+      assert diff_configs(from_config, to_config) != ''
+
   def test_update_no_rollback(self):
     """Update process failures exceed total allowable count and update is not rolled back."""
     update_config = self.UPDATE_CONFIG.copy()
@@ -861,3 +913,128 @@ class UpdaterTest(TestCase):
 
     self.update_and_expect_response(ResponseCode.ERROR)
     self.verify_mocks()
+
+  def test_pipelined_update(self):
+    """A new batch starts as soon as one of the batches in flight completes."""
+    update_config = self.UPDATE_CONFIG.copy()
+    update_config.update(batch_size=2, max_batches_in_flight=2)
+    self.init_updater(update_config)
+
+    old_configs = self.make_task_configs(6)
+    new_config = deepcopy(old_configs[0])
+    new_config.priority = 5
+    job_config = self.make_job_config(new_config, 6)
+    self._config.job_config = job_config
+    self.expect_start()
+    self.expect_get_tasks(old_configs)
+    self.expect_populate(job_config)
+    self.expect_quota_check(6, 6)
+    # The kills of the batches started together are waited for together.
+    kills = [self.expect_kill([0, 1], watch=True), self.expect_kill([2, 3], watch=True)]
+    self.expect_wait_kills(kills)
+    self.expect_add([0, 1], new_config)
+    self.expect_add([2, 3], new_config)
+    first = self.expect_start_watch([0, 1])
+    second = self.expect_start_watch([2, 3])
+    self.expect_watch_any([first, second], {first: set()})
+    self.expect_wait_kills([self.expect_kill([4, 5], watch=True)])
+    self.expect_add([4, 5], new_config)
+    third = self.expect_start_watch([4, 5])
+    self.expect_watch_any([second, third], {third: set()})
+    self.expect_watch_any([second], {second: set()})
+    self.expect_finish()
+    self.replay_mocks()
+
+    self.update_and_expect_ok()
+    self.verify_mocks()
+
+  def test_pipelined_update_retries_failed(self):
+    """Retryable instances of a completed batch are restarted in a later batch."""
+    update_config = self.UPDATE_CONFIG.copy()
+    update_config.update(
+        batch_size=2, max_batches_in_flight=2, max_per_shard_failures=1, max_total_failures=1)
+    self.init_updater(update_config)
+
+    old_configs = self.make_task_configs(4)
+    new_config = deepcopy(old_configs[0])
+    new_config.priority = 5
+    job_config = self.make_job_config(new_config, 4)
+    self._config.job_config = job_config
+    self.expect_start()
+    self.expect_get_tasks(old_configs)
+    self.expect_populate(job_config)
+    self.expect_quota_check(4, 4)
+    kills = [self.expect_kill([0, 1], watch=True), self.expect_kill([2, 3], watch=True)]
+    self.expect_wait_kills(kills)
+    self.expect_add([0, 1], new_config)
+    self.expect_add([2, 3], new_config)
+    first = self.expect_start_watch([0, 1])
+    second = self.expect_start_watch([2, 3])
+    self.expect_watch_any([first, second], {first: set([1])})
+    self.expect_restart([1])
+    retry = self.expect_start_watch([1])
+    self.expect_watch_any([second, retry], {second: set(), retry: set()})
+    self.expect_finish()
+    self.replay_mocks()
+
+    self.update_and_expect_ok()
+    self.verify_mocks()
+
+  def test_pipelined_update_rollback(self):
+    """Batches in flight when the failure threshold is exceeded are rolled back."""
+    update_config = self.UPDATE_CONFIG.copy()
+    update_config.update(batch_size=2, max_batches_in_flight=2)
+    self.init_updater(update_config)
+
+    old_configs = self.make_task_configs(6)
+    new_config = deepcopy(old_configs[0])
+    new_config.priority = 5
+    job_config = self.make_job_config(new_config, 6)
+    self._config.job_config = job_config
+    self.expect_start()
+    self.expect_get_tasks(old_configs)
+    self.expect_populate(job_config)
+    self.expect_quota_check(6, 6)
+    kills = [self.expect_kill([0, 1], watch=True), self.expect_kill([2, 3], watch=True)]
+    self.expect_wait_kills(kills)
+    self.expect_add([0, 1], new_config)
+    self.expect_add([2, 3], new_config)
+    first = self.expect_start_watch([0, 1])
+    second = self.expect_start_watch([2, 3])
+    self.expect_watch_any([first, second], {first: set([0])})
+    self.expect_stop_watches([second])
+    self.expect_kill([3, 2])
+    self.expect_add([3, 2], old_configs[0])
+    self.expect_watch_instances([3, 2])
+    self.expect_kill([1, 0])
+    self.expect_add([1, 0], old_configs[0])
+    self.expect_watch_instances([1, 0])
+    self.expect_finish()
+    self.replay_mocks()
+
+    self.update_and_expect_response(ResponseCode.ERROR)
+    self.verify_mocks()
+
+  def test_pipelined_update_kill_timeout(self):
+    """Test job monitor timeout while waiting for the tasks of several batches killed."""
+    update_config = self.UPDATE_CONFIG.copy()
+    update_config.update(batch_size=2, max_batches_in_flight=2)
+    self.init_updater(update_config)
+
+    old_configs = self.make_task_configs(4)
+    new_config = deepcopy(old_configs[0])
+    new_config.priority = 5
+    job_config = self.make_job_config(new_config, 4)
+    self._config.job_config = job_config
+    self.expect_start()
+    self.expect_get_tasks(old_configs)
+    self.expect_populate(job_config)
+    self.expect_quota_check(4, 4)
+    kills = [
+        self.expect_kill([0, 1], watch=True),
+        self.expect_kill([2, 3], watch=True, monitor_result=False)]
+    self.expect_wait_kills(kills)
+    self.replay_mocks()
+
+    self.update_and_expect_response(ResponseCode.ERROR)
+    self.verify_mocks()
@@ -0,0 +1,161 @@
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+import os
+import threading
+
+import pytest
+from mock import Mock, patch
+from twitter.common.contextutil import temporary_dir
+from twitter.common.quantity import Amount, Time
+
+from apache.aurora.client.cli import Context, EXIT_COMMAND_FAILURE
+from apache.aurora.client.cli.job_list_cache import JobListCache
+from apache.aurora.client.cli.util import AuroraClientCommandTest, FakeAuroraCommandContext
+from apache.aurora.common.aurora_job_key import AuroraJobKey
+
+from gen.apache.aurora.api.ttypes import (
+    GetJobsResult,
+    JobConfiguration,
+    JobKey,
+    Result
+)
+
+
+class FakeClock(object):
+  def __init__(self, now=1000):
+    self.now = now
+
+  def time(self):
+    return self.now
+
+
+class MultiClusterContext(FakeAuroraCommandContext):
+  """A context with an API of its own for each cluster."""
+
+  def __init__(self, apis):
+    super(MultiClusterContext, self).__init__()
+    self.apis = dict(apis)
+
+  def get_api(self, cluster):
+    return self.apis[cluster]
+
+
+class TestJobList(AuroraClientCommandTest):
+  @classmethod
+  def create_getjobs_response(cls, *names):
+    resp = cls.create_simple_success_response()
+    resp.result = Result(getJobsResult=GetJobsResult(configs=frozenset(
+        JobConfiguration(key=JobKey(role='bozo', environment='test', name=name))
+        for name in names)))
+    return resp
+
+  @classmethod
+  def create_api(cls, *names):
+    api = Mock()
+    api.get_jobs.return_value = cls.create_getjobs_response(*names)
+    return api
+
+  def test_lists_clusters_concurrently(self):
+    called = []
+    all_called = threading.Event()
+
+    def get_jobs(name):
+      # Each cluster answers only once both were asked.
+      def answer(role):
+        called.append(name)
+        if len(called) == 2:
+          all_called.set()
+        assert all_called.wait(10)
+        return self.create_getjobs_response(name)
+      return answer
+
+    east, west = Mock(), Mock()
+    east.get_jobs.side_effect = get_jobs('e')
+    west.get_jobs.side_effect = get_jobs('w')
+    context = MultiClusterContext({'east': east, 'west': west})
+    assert context.get_job_list(['west', 'east'], role='bozo') == [
+        AuroraJobKey('west', 'bozo', 'test', 'w'),
+        AuroraJobKey('east', 'bozo', 'test', 'e')]
+    east.get_jobs.assert_called_once_with('bozo')
+    west.get_jobs.assert_called_once_with('bozo')
+
+  def test_partial_results(self):
+    east = self.create_api('e')
+    east.get_jobs.return_value = self.create_error_response()
+    west = self.create_api('w')
+    context = MultiClusterContext({'east': east, 'west': west})
+
+    assert context.get_job_list(['east', 'west'], role='*') == [
+        AuroraJobKey('west', 'bozo', 'test', 'w')]
+    west.get_jobs.assert_called_once_with(None)
+    assert len(context.get_err()) == 1
+    assert 'east' in context.get_err()[0]
+
+  def test_timeout(self):
+    release = threading.Event()
+    slow = Mock()
+    slow.get_jobs.side_effect = lambda role: release.wait(10)
+    context = MultiClusterContext({'slow': slow, 'west': self.create_api('w')})
+    context.JOB_LIST_TIMEOUT = Amount(10, Time.MILLISECONDS)
+    try:
+      assert context.get_job_list(['slow', 'west']) == [AuroraJobKey('west', 'bozo', 'test', 'w')]
+      assert 'slow' not in context.apis
+      assert 'Timed out' in context.get_err()[0]
+    finally:
+      release.set()
+
+  def test_all_clusters_fail(self):
+    east = Mock()
+    east.get_jobs.side_effect = Exception('Connection refused')
+    context = MultiClusterContext({'east': east})
+    with pytest.raises(Context.CommandError) as e:
+      context.get_job_list(['east'])
+    assert e.value.code == EXIT_COMMAND_FAILURE
+    assert 'Connection refused' in e.value.msg
+
+  def test_cache(self):
+    west = self.create_api('w')
+    context = MultiClusterContext({'west': west})
+    with temporary_dir() as path:
+      with patch('apache.aurora.client.cli.context.JobListCache',
+                 side_effect=lambda: JobListCache(path=path)):
+        expected = [AuroraJobKey('west', 'bozo', 'test', 'w')]
+        assert context.get_job_list(['west'], role='bozo', cache_secs=60) == expected
+        assert context.get_job_list(['west'], role='bozo', cache_secs=60) == expected
+        assert west.get_jobs.call_count == 1
+
+        assert context.get_job_list(['west'], role='bozo') == expected
+        assert west.get_jobs.call_count == 2
+
+
+def test_job_list_cache():
+  clock = FakeClock()
+  with temporary_dir() as path:
+    cache = JobListCache(path=path, clock=clock)
+    assert cache.get('west', None, 60) is None
+
+    cache.put('west', None, [('bozo', 'test', 'hello')])
+    assert cache.get('west', None, 60) == [('bozo', 'test', 'hello')]
+    assert cache.get('west', 'bozo', 60) is None
+    assert cache.get('east', None, 60) is None
+
+    clock.now += 60
+    assert cache.get('west', None, 60) is None
+    assert cache.get('west', None, 120) == [('bozo', 'test', 'hello')]
+
+    with open(os.path.join(path, 'west', 'bozo.json'), 'w') as fp:
+      fp.write('not json')
+    assert cache.get('west', 'bozo', 60) is None
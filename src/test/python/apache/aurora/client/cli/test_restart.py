@@ -72,7 +72,7 @@ class TestRestartCommand(AuroraClientCommandTest):
         # Like the update test, the exact number of calls here doesn't matter.
         # what matters is that it must have been called once before batching, plus
         # at least once per batch, and there are 4 batches.
-        assert mock_scheduler_proxy.getTasksStatus.call_count >= 4
+        assert mock_scheduler_proxy.getTasksWithoutConfigs.call_count >= 4
         # called once per batch
         assert mock_scheduler_proxy.restartShards.call_count == 4
         # parameters for all calls are generated by the same code, so we just check one
@@ -100,14 +100,14 @@ class TestRestartCommand(AuroraClientCommandTest):
         result = cmd.execute(['job', 'restart', '--batch-size=5', '--max-total-failures=-1',
             'west/bozo/test/hello', fp.name])
         assert result == EXIT_INVALID_PARAMETER
-        assert mock_scheduler_proxy.getTasksStatus.call_count == 0
+        assert mock_scheduler_proxy.getTasksWithoutConfigs.call_count == 0
         assert mock_scheduler_proxy.restartShards.call_count == 0
 
   def test_restart_failed_status(self):
     (mock_api, mock_scheduler_proxy) = self.create_mock_api()
     mock_health_check = self.setup_health_checks(mock_api)
     self.setup_mock_scheduler_for_simple_restart(mock_api)
-    mock_scheduler_proxy.getTasksStatus.return_value = self.create_error_response()
+    mock_scheduler_proxy.getTasksWithoutConfigs.return_value = self.create_error_response()
     with contextlib.nested(
         patch('apache.aurora.client.api.SchedulerProxy', return_value=mock_scheduler_proxy),
         patch('apache.aurora.client.factory.CLUSTERS', new=self.TEST_CLUSTERS),
@@ -120,7 +120,7 @@ class TestRestartCommand(AuroraClientCommandTest):
         fp.flush()
         cmd = AuroraCommandLine()
         result = cmd.execute(['job', 'restart', '--batch-size=5', 'west/bozo/test/hello', fp.name])
-        assert mock_scheduler_proxy.getTasksStatus.call_count == 1
+        assert mock_scheduler_proxy.getTasksWithoutConfigs.call_count == 1
         assert mock_scheduler_proxy.restartShards.call_count == 0
         assert result == EXIT_API_ERROR
 
@@ -128,8 +128,8 @@ class TestRestartCommand(AuroraClientCommandTest):
     (mock_api, mock_scheduler_proxy) = self.create_mock_api()
     mock_health_check = self.setup_health_checks(mock_api)
     self.setup_mock_scheduler_for_simple_restart(mock_api)
-    # Make getTasksStatus return an error, which is what happens when a job is not found.
-    mock_scheduler_proxy.getTasksStatus.return_value = self.create_error_response()
+    # Make getTasksWithoutConfigs return an error, which is what happens when a job is not found.
+    mock_scheduler_proxy.getTasksWithoutConfigs.return_value = self.create_error_response()
     with contextlib.nested(
         patch('apache.aurora.client.cli.print_aurora_log'),
         patch('apache.aurora.client.api.SchedulerProxy', return_value=mock_scheduler_proxy),
@@ -144,15 +144,15 @@ class TestRestartCommand(AuroraClientCommandTest):
         cmd = AuroraCommandLine()
         result = cmd.execute(['job', 'restart', '--batch-size=5', 'west/bozo/test/hello/1-3',
             fp.name])
-        # We need to check tat getTasksStatus was called, but that restartShards wasn't.
+        # We need to check tat getTasksWithoutConfigs was called, but that restartShards wasn't.
         # In older versions of the client, if shards were specified, but the job didn't
         # exist, the error wouldn't be detected unti0 restartShards was called, which generated
         # the wrong error message.
-        assert mock_scheduler_proxy.getTasksStatus.call_count == 1
+        assert mock_scheduler_proxy.getTasksWithoutConfigs.call_count == 1
         assert mock_scheduler_proxy.restartShards.call_count == 0
         assert result == EXIT_API_ERROR
         # Error message should be written to log, and it should be what was returned
-        # by the getTasksStatus call.
+        # by the getTasksWithoutConfigs call.
         mock_log.assert_called_with(20, 'Error executing command: %s', 'Damn')
 
   def test_restart_failed_restart(self):
@@ -174,7 +174,7 @@ class TestRestartCommand(AuroraClientCommandTest):
         fp.flush()
         cmd = AuroraCommandLine()
         result = cmd.execute(['job', 'restart', '--batch-size=5', 'west/bozo/test/hello', fp.name])
-        assert mock_scheduler_proxy.getTasksStatus.call_count == 1
+        assert mock_scheduler_proxy.getTasksWithoutConfigs.call_count == 1
         assert mock_scheduler_proxy.restartShards.call_count == 1
         mock_scheduler_proxy.restartShards.assert_called_with(JobKey(environment=self.TEST_ENV,
             role=self.TEST_ROLE, name=self.TEST_JOB), [0, 1, 2, 3, 4], None)
@@ -16,6 +16,7 @@ import contextlib
 
 from mock import Mock, patch
 
+from apache.aurora.client.api.paging import DEFAULT_PAGE_SIZE
 from apache.aurora.client.cli.client import AuroraCommandLine
 from apache.aurora.client.cli.util import AuroraClientCommandTest
 
@@ -132,7 +133,7 @@ class TestRunCommand(AuroraClientCommandTest):
           environment='test', owner=Identity(role='bozo'),
           statuses=set([ScheduleStatus.RUNNING, ScheduleStatus.KILLING, ScheduleStatus.RESTARTING,
               ScheduleStatus.PREEMPTING, ScheduleStatus.DRAINING]),
-          instanceIds=instances))
+          instanceIds=instances, offset=0, limit=DEFAULT_PAGE_SIZE))
 
       # The mock status call returns 3 three ScheduledTasks, so three commands should have been run
       assert mock_subprocess.call_count == 3
@@ -15,6 +15,7 @@
 import unittest
 
 from mock import Mock
+from twitter.common.concurrent import Future
 
 from apache.aurora.client.cli.context import AuroraCommandContext
 from apache.aurora.client.hooks.hooked_api import HookedAuroraClientAPI
@@ -65,6 +66,16 @@ class FakeAuroraCommandContext(AuroraCommandContext):
     mock_scheduler_proxy.scheduler_client.return_value = mock_scheduler_proxy
     mock_api = Mock(spec=HookedAuroraClientAPI)
     mock_api.scheduler_proxy = mock_scheduler_proxy
+
+    # Runs submitted calls right away against the mock API, so that tests observe them there.
+    def submit(method_name, *args, **kwargs):
+      future = Future()
+      try:
+        future.set_result(getattr(mock_api, method_name)(*args, **kwargs))
+      except Exception as e:
+        future.set_exception(e)
+      return future
+    mock_api.submit.side_effect = submit
     return mock_api
 
   def print_out(self, str):
@@ -88,7 +99,7 @@ class FakeAuroraCommandContext(AuroraCommandContext):
   def add_expected_status_query_result(self, expected_result):
     self.task_status.append(expected_result)
     # each call adds an expected query result, in order.
-    self.fake_api.scheduler_proxy.getTasksStatus.side_effect = self.task_status
+    self.fake_api.scheduler_proxy.getTasksWithoutConfigs.side_effect = self.task_status
     self.fake_api.check_status.side_effect = self.task_status
 
 
@@ -169,6 +180,7 @@ class AuroraClientCommandTest(unittest.TestCase):
   def setup_get_tasks_status_calls(cls, scheduler):
     status_response = cls.create_status_call_result()
     scheduler.getTasksStatus.return_value = status_response
+    scheduler.getTasksWithoutConfigs.return_value = status_response
 
   @classmethod
   def fake_time(cls, ignored):
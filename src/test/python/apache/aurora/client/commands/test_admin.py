@@ -17,6 +17,7 @@ import contextlib
 from mock import Mock, patch
 
 from apache.aurora.client.api import AuroraClientAPI
+from apache.aurora.client.api.paging import DEFAULT_PAGE_SIZE
 from apache.aurora.client.commands.admin import get_locks, increase_quota, query, set_quota
 from apache.aurora.client.commands.util import AuroraClientCommandTest
 
@@ -76,7 +77,9 @@ class TestQueryCommand(AuroraClientCommandTest):
         environment=None,
         jobName=None,
         instanceIds=set(),
-        statuses=set([ScheduleStatus.RUNNING]))
+        statuses=set([ScheduleStatus.RUNNING]),
+        offset=0,
+        limit=DEFAULT_PAGE_SIZE)
 
   def test_query(self):
     """Tests successful execution of the query command."""
@@ -90,8 +90,8 @@ class TestClientKillCommand(AuroraClientCommandTest):
 
   @classmethod
   def assert_scheduler_called(cls, mock_api, mock_query, num_queries):
-    assert mock_api.scheduler_proxy.getTasksStatus.call_count == num_queries
-    mock_api.scheduler_proxy.getTasksStatus.assert_called_with(mock_query)
+    assert mock_api.scheduler_proxy.getTasksWithoutConfigs.call_count == num_queries
+    mock_api.scheduler_proxy.getTasksWithoutConfigs.assert_called_with(mock_query)
 
   def test_kill_job_tasks_not_killed_in_time(self):
     """Test kill timed out waiting in job monitor."""
@@ -101,17 +101,10 @@ class TestClientKillCommand(AuroraClientCommandTest):
     mock_config.raw.return_value.enable_hooks.return_value.get.return_value = False
     (mock_api, mock_scheduler_proxy) = self.create_mock_api()
     mock_scheduler_proxy.killTasks.return_value = self.get_kill_job_response()
-    mock_query_results = [
-        self.create_mock_status_query_result(ScheduleStatus.RUNNING),
-        self.create_mock_status_query_result(ScheduleStatus.KILLING),
-        self.create_mock_status_query_result(ScheduleStatus.KILLING),
-        self.create_mock_status_query_result(ScheduleStatus.KILLING),
-        self.create_mock_status_query_result(ScheduleStatus.KILLING),
-        self.create_mock_status_query_result(ScheduleStatus.KILLING),
-        self.create_mock_status_query_result(ScheduleStatus.KILLING),
-        self.create_mock_status_query_result(ScheduleStatus.KILLING),
-    ]
-    mock_scheduler_proxy.getTasksStatus.side_effect = mock_query_results
+    # The job monitor polls 25 times over its wait timeout before giving up.
+    mock_query_results = [self.create_mock_status_query_result(ScheduleStatus.RUNNING)] + [
+        self.create_mock_status_query_result(ScheduleStatus.KILLING) for _ in range(24)]
+    mock_scheduler_proxy.getTasksWithoutConfigs.side_effect = mock_query_results
     with contextlib.nested(
         patch('time.sleep'),
         patch('apache.aurora.client.factory.make_client', return_value=mock_api),
@@ -132,7 +125,7 @@ class TestClientKillCommand(AuroraClientCommandTest):
       assert mock_scheduler_proxy.killTasks.call_count == 1
       query = self.get_expected_task_query()
       mock_scheduler_proxy.killTasks.assert_called_with(query, None)
-      self.assert_scheduler_called(mock_api, query, 8)
+      self.assert_scheduler_called(mock_api, query, 25)
 
   def test_kill_job_noshards_fail(self):
     mock_options = self.setup_mock_options()
@@ -170,7 +163,7 @@ class TestClientKillCommand(AuroraClientCommandTest):
         self.create_mock_status_query_result(ScheduleStatus.KILLING),
         self.create_mock_status_query_result(ScheduleStatus.KILLED),
     ]
-    mock_scheduler_proxy.getTasksStatus.side_effect = mock_query_results
+    mock_scheduler_proxy.getTasksWithoutConfigs.side_effect = mock_query_results
     with contextlib.nested(
         patch('time.sleep'),
         patch('apache.aurora.client.commands.core.make_client',
@@ -269,7 +262,7 @@ class TestClientKillCommand(AuroraClientCommandTest):
         self.create_mock_status_query_result(ScheduleStatus.KILLING),
         self.create_mock_status_query_result(ScheduleStatus.KILLED),
     ]
-    mock_scheduler_proxy.getTasksStatus.side_effect = mock_query_results
+    mock_scheduler_proxy.getTasksWithoutConfigs.side_effect = mock_query_results
     with contextlib.nested(
         patch('time.sleep'),
         patch('apache.aurora.client.factory.make_client', return_value=mock_api),
@@ -309,7 +302,7 @@ class TestClientKillCommand(AuroraClientCommandTest):
         self.create_mock_status_query_result(ScheduleStatus.KILLING),
         self.create_mock_status_query_result(ScheduleStatus.KILLED),
     ]
-    mock_scheduler_proxy.getTasksStatus.side_effect = mock_query_results
+    mock_scheduler_proxy.getTasksWithoutConfigs.side_effect = mock_query_results
     with contextlib.nested(
         patch('time.sleep'),
         patch('apache.aurora.client.factory.make_client', return_value=mock_api),
@@ -49,6 +49,7 @@ class TestMaintenanceCommands(AuroraClientCommandTest):
     mock_options.percentage = None
     mock_options.duration = None
     mock_options.reason = None
+    mock_options.max_groups_in_flight = 1
     return mock_options
 
   def create_host_statuses(self, maintenance_mode):
@@ -27,8 +27,10 @@ from gen.apache.aurora.api.ttypes import (
     JobKey,
     PopulateJobResult,
     ScheduledTask,
+    ScheduleStatus,
     ScheduleStatusResult,
-    TaskConfig
+    TaskConfig,
+    TaskEvent
 )
 
 
@@ -78,7 +80,7 @@ class TestRestartCommand(AuroraClientCommandTest):
   @classmethod
   def setup_get_tasks_status_calls(cls, scheduler):
     status_response = cls.create_simple_success_response()
-    scheduler.getTasksStatus.return_value = status_response
+    scheduler.getTasksWithoutConfigs.return_value = status_response
     schedule_status = Mock(spec=ScheduleStatusResult)
     status_response.result.scheduleStatusResult = schedule_status
     mock_task_config = Mock()
@@ -92,6 +94,8 @@ class TestRestartCommand(AuroraClientCommandTest):
       task_status.assignedTask.slaveId = "Slave%s" % i
       task_status.slaveHost = "Slave%s" % i
       task_status.assignedTask.task = mock_task_config
+      task_status.status = ScheduleStatus.RUNNING
+      task_status.taskEvents = [TaskEvent(timestamp=1000, status=ScheduleStatus.RUNNING)]
       schedule_status.tasks.append(task_status)
 
   @classmethod
@@ -125,7 +129,7 @@ class TestRestartCommand(AuroraClientCommandTest):
         # Like the update test, the exact number of calls here doesn't matter.
         # what matters is that it must have been called once before batching, plus
         # at least once per batch, and there are 4 batches.
-        assert mock_scheduler_proxy.getTasksStatus.call_count >= 4
+        assert mock_scheduler_proxy.getTasksWithoutConfigs.call_count >= 4
         # called once per batch
         assert mock_scheduler_proxy.restartShards.call_count == 4
         # parameters for all calls are generated by the same code, so we just check one
@@ -158,7 +162,7 @@ class TestRestartCommand(AuroraClientCommandTest):
         # Like the update test, the exact number of calls here doesn't matter.
         # what matters is that it must have been called once before batching, plus
         # at least once per batch, and there are 4 batches.
-        assert mock_scheduler_proxy.getTasksStatus.call_count == 0
+        assert mock_scheduler_proxy.getTasksWithoutConfigs.call_count == 0
         # called once per batch
         assert mock_scheduler_proxy.restartShards.call_count == 0
 
@@ -167,7 +171,7 @@ class TestRestartCommand(AuroraClientCommandTest):
     (mock_api, mock_scheduler_proxy) = self.create_mock_api()
     mock_health_check = self.setup_health_checks(mock_api)
     self.setup_mock_scheduler_for_simple_restart(mock_api)
-    mock_scheduler_proxy.getTasksStatus.return_value = self.create_error_response()
+    mock_scheduler_proxy.getTasksWithoutConfigs.return_value = self.create_error_response()
     with contextlib.nested(
         patch('twitter.common.app.get_options', return_value=mock_options),
         patch('apache.aurora.client.api.SchedulerProxy', return_value=mock_scheduler_proxy),
@@ -183,7 +187,7 @@ class TestRestartCommand(AuroraClientCommandTest):
         fp.write(self.get_valid_config())
         fp.flush()
         self.assertRaises(SystemExit, restart, ['west/mchucarroll/test/hello'], mock_options)
-        assert mock_scheduler_proxy.getTasksStatus.call_count == 1
+        assert mock_scheduler_proxy.getTasksWithoutConfigs.call_count == 1
         assert mock_scheduler_proxy.restartShards.call_count == 0
 
   def test_restart_failed_restart(self):
@@ -209,7 +213,7 @@ class TestRestartCommand(AuroraClientCommandTest):
         fp.write(self.get_valid_config())
         fp.flush()
         self.assertRaises(SystemExit, restart, ['west/mchucarroll/test/hello'], mock_options)
-        assert mock_scheduler_proxy.getTasksStatus.call_count == 1
+        assert mock_scheduler_proxy.getTasksWithoutConfigs.call_count == 1
         assert mock_scheduler_proxy.restartShards.call_count == 1
         mock_scheduler_proxy.restartShards.assert_called_with(JobKey(environment=self.TEST_ENV,
             role=self.TEST_ROLE, name=self.TEST_JOB), [0, 1, 2, 3, 4], None)
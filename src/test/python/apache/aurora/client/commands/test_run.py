@@ -16,6 +16,7 @@ import contextlib
 
 from mock import Mock, patch
 
+from apache.aurora.client.api.paging import DEFAULT_PAGE_SIZE
 from apache.aurora.client.commands.run import run
 from apache.aurora.client.commands.util import AuroraClientCommandTest
 
@@ -121,7 +122,7 @@ class TestRunCommand(AuroraClientCommandTest):
       # and then prints the result.
       mock_scheduler_proxy.getTasksStatus.assert_called_with(TaskQuery(jobName='hello',
           environment='test', owner=Identity(role='mchucarroll'),
-          statuses=LIVE_STATES))
+          statuses=LIVE_STATES, offset=0, limit=DEFAULT_PAGE_SIZE))
 
       # The mock status call returns 3 three ScheduledTasks, so three commands should have been run
       assert mock_subprocess.call_count == 3
@@ -40,6 +40,7 @@ from gen.apache.aurora.api.ttypes import (
     ScheduleStatus,
     ScheduleStatusResult,
     TaskConfig,
+    TaskEvent,
     TaskQuery
 )
 
@@ -171,6 +172,7 @@ class TestUpdateCommand(AuroraClientCommandTest):
   def setup_get_tasks_status_calls(cls, scheduler_proxy):
     status_response = cls.create_simple_success_response()
     scheduler_proxy.getTasksStatus.return_value = status_response
+    scheduler_proxy.getTasksWithoutConfigs.return_value = status_response
     schedule_status = Mock(spec=ScheduleStatusResult)
     status_response.result.scheduleStatusResult = schedule_status
     task_config = TaskConfig(numCpus=1.0, ramMb=10, diskMb=1)
@@ -184,6 +186,8 @@ class TestUpdateCommand(AuroraClientCommandTest):
       task_status.assignedTask.slaveId = "Slave%s" % i
       task_status.slaveHost = "Slave%s" % i
       task_status.assignedTask.task = task_config
+      task_status.status = ScheduleStatus.RUNNING
+      task_status.taskEvents = [TaskEvent(timestamp=1000, status=ScheduleStatus.RUNNING)]
       schedule_status.tasks.append(task_status)
 
   @classmethod
@@ -204,12 +208,6 @@ class TestUpdateCommand(AuroraClientCommandTest):
         cls.create_simple_success_response())
     return mock_quota_check
 
-  @classmethod
-  def setup_job_monitor(cls):
-    mock_job_monitor = Mock(spec=JobMonitor)
-    mock_job_monitor.wait_until.return_value = True
-    return mock_job_monitor
-
   def test_updater_simple(self):
     # Test the client-side updater logic in its simplest case: everything succeeds, and no rolling
     # updates.
@@ -217,7 +215,6 @@ class TestUpdateCommand(AuroraClientCommandTest):
     (mock_api, mock_scheduler_proxy) = self.create_mock_api()
     mock_health_check = self.setup_health_checks(mock_api)
     mock_quota_check = self.setup_quota_check()
-    mock_job_monitor = self.setup_job_monitor()
 
     with contextlib.nested(
         patch('twitter.common.app.get_options', return_value=mock_options),
@@ -226,12 +223,12 @@ class TestUpdateCommand(AuroraClientCommandTest):
         patch('apache.aurora.client.api.instance_watcher.StatusHealthCheck',
             return_value=mock_health_check),
         patch('apache.aurora.client.api.updater.QuotaCheck', return_value=mock_quota_check),
-        patch('apache.aurora.client.api.updater.JobMonitor', return_value=mock_job_monitor),
+        patch.object(JobMonitor, 'wait_until', return_value=True),
         patch('time.time', side_effect=functools.partial(self.fake_time, self)),
         patch('time.sleep', return_value=None)
 
     ) as (options, scheduler_proxy_class, test_clusters, mock_health_check_factory,
-          mock_quota_check_patch, mock_job_monitor_patch, time_patch, sleep_patch):
+          mock_quota_check_patch, mock_wait_until, time_patch, sleep_patch):
       self.setup_mock_scheduler_for_simple_update(mock_api)
       with temporary_file() as fp:
         fp.write(self.get_valid_config())
@@ -274,18 +271,17 @@ class TestUpdateCommand(AuroraClientCommandTest):
 
   @classmethod
   def assert_correct_status_calls(cls, api):
-    # getTasksStatus gets called a lot of times. The exact number isn't fixed; it loops
-    # over the health checks until all of them pass for a configured period of time.
-    # The minumum number of calls is 5: once before the tasks are restarted, and then
-    # once for each batch of restarts (Since the batch size is set to 5, and the
-    # total number of jobs is 20, that's 4 batches.)
-    assert api.getTasksStatus.call_count >= 5
-    # In the first getStatus call, it uses an expansive query; in the rest, it only queries for
-    # status RUNNING.
-    status_calls = api.getTasksStatus.call_args_list
-    assert status_calls[0][0][0] == TaskQuery(taskIds=None, jobName='hello', environment='test',
-        owner=Identity(role=u'mchucarroll', user=None),
-        statuses=ACTIVE_STATES)
-    for status_call in status_calls[1:]:
-      status_call[0][0] == TaskQuery(taskIds=None, jobName='hello', environment='test',
-          owner=Identity(role='mchucarroll', user=None), statuses=set([ScheduleStatus.RUNNING]))
+    # getTasksStatus is called with an expansive query to fetch the configs of the tasks before
+    # they are restarted. The instance watcher then polls getTasksWithoutConfigs for the tasks of
+    # the batch a number of times which isn't fixed; it loops over the health checks until all of
+    # them pass for a configured period of time. The minimum number of calls is 4, once for each
+    # batch of restarts (Since the batch size is set to 5, and the total number of jobs is 20,
+    # that's 4 batches.)
+    assert api.getTasksStatus.call_count >= 1
+    assert api.getTasksStatus.call_args_list[0][0][0] == TaskQuery(taskIds=None, jobName='hello',
+        environment='test', owner=Identity(role=u'mchucarroll', user=None), statuses=ACTIVE_STATES)
+    assert api.getTasksWithoutConfigs.call_count >= 4
+    status_calls = api.getTasksWithoutConfigs.call_args_list
+    batches = [frozenset(range(start, start + 5)) for start in range(0, 20, 5)]
+    for status_call in status_calls:
+      assert status_call[0][0].instanceIds in batches
@@ -0,0 +1,135 @@
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+
+"""Benchmark scheduler RPCs per second over TRequestsTransport.
+
+Calls getRoleSummary against a local HTTP/1.1 stand-in for the scheduler which answers with a
+canned, pre-serialized reply, once keeping the transport's session and its keep-alive connection
+across calls, and once closing the transport after every call.  The latter matches the transport's
+former behaviour of opening a new session, and so a new connection, for every call.
+"""
+
+from __future__ import print_function
+
+import time
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from threading import Thread
+
+from thrift.protocol import TJSONProtocol
+from thrift.Thrift import TMessageType
+from thrift.transport import TTransport
+
+from apache.aurora.common.transport import TRequestsTransport
+
+from gen.apache.aurora.api import ReadOnlyScheduler
+from gen.apache.aurora.api.ttypes import (
+    Response,
+    ResponseCode,
+    Result,
+    RoleSummary,
+    RoleSummaryResult
+)
+
+ROLE_COUNTS = (1, 100)
+CALLS = 500
+
+
+def serialize_reply(method, response):
+  buffer = TTransport.TMemoryBuffer()
+  protocol = TJSONProtocol.TJSONProtocol(buffer)
+  protocol.writeMessageBegin(method, TMessageType.REPLY, 0)
+  result = getattr(ReadOnlyScheduler, '%s_result' % method)(success=response)
+  result.write(protocol)
+  protocol.writeMessageEnd()
+  return buffer.getvalue()
+
+
+class FakeScheduler(object):
+  """A keep-alive HTTP server answering every call with the same reply."""
+
+  def __init__(self, reply):
+    server = self
+
+    class Handler(BaseHTTPRequestHandler):
+      protocol_version = 'HTTP/1.1'
+      # Sends each response in one write, as the scheduler does, rather than one per header line
+      # which Nagle's algorithm would delay on a kept-alive connection.
+      wbufsize = -1
+
+      def setup(self):
+        server.connections += 1
+        BaseHTTPRequestHandler.setup(self)
+
+      def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-thrift')
+        self.send_header('Content-Length', str(len(reply)))
+        self.end_headers()
+        self.wfile.write(reply)
+
+      def log_message(self, *args):
+        pass
+
+    self.connections = 0
+    self._server = HTTPServer(('localhost', 0), Handler)
+    self._thread = Thread(target=self._server.serve_forever)
+    self._thread.daemon = True
+
+  @property
+  def uri(self):
+    return 'http://localhost:%d/api' % self._server.socket.getsockname()[1]
+
+  def __enter__(self):
+    self._thread.start()
+    return self
+
+  def __exit__(self, *args):
+    self._server.shutdown()
+
+
+def run(role_count, reconnect):
+  reply = serialize_reply('getRoleSummary', Response(
+      responseCode=ResponseCode.OK,
+      result=Result(roleSummaryResult=RoleSummaryResult(summaries=frozenset(
+          RoleSummary(role='role_%d' % index, jobCount=index, cronJobCount=0)
+          for index in range(role_count))))))
+
+  with FakeScheduler(reply) as scheduler:
+    transport = TRequestsTransport(scheduler.uri)
+    client = ReadOnlyScheduler.Client(TJSONProtocol.TJSONProtocol(transport))
+    start = time.time()
+    for _ in range(CALLS):
+      response = client.getRoleSummary()
+      if reconnect:
+        transport.close()
+    elapsed = time.time() - start
+    transport.close()
+  assert len(response.result.roleSummaryResult.summaries) == role_count
+  return len(reply), CALLS / elapsed, scheduler.connections
+
+
+def main():
+  print('%-14s %-12s %10s %12s' % ('payload (KB)', 'connection', 'rpc/s', 'connections'))
+  for role_count in ROLE_COUNTS:
+    for reconnect in (True, False):
+      payload, rate, connections = run(role_count, reconnect)
+      print('%-14.1f %-12s %10.1f %12d' % (
+          payload / 1024.0, 'per-call' if reconnect else 'keep-alive', rate, connections))
+
+
+if __name__ == '__main__':
+  main()
@@ -12,6 +12,7 @@
 # limitations under the License.
 #
 
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
 from threading import Thread
 
 import mock
@@ -21,7 +22,7 @@ from thrift.protocol import TJSONProtocol
 from thrift.server import THttpServer
 from thrift.transport import TTransport
 
-from apache.aurora.common.transport import TRequestsTransport
+from apache.aurora.common.transport import default_requests_session_factory, TRequestsTransport
 
 from gen.apache.aurora.api import ReadOnlyScheduler
 from gen.apache.aurora.api.ttypes import Response, ResponseCode, ServerInfo
@@ -33,6 +34,105 @@ class ReadOnlySchedulerHandler(object):
     return Response(responseCode=ResponseCode.OK, serverInfo=server_info)
 
 
+class EchoServer(object):
+  """An HTTP/1.1 server echoing request bodies, counting the connections it accepts."""
+
+  def __init__(self, close_connections=False, content_type=None):
+    server = self
+
+    class Handler(BaseHTTPRequestHandler):
+      protocol_version = 'HTTP/1.1'
+
+      def setup(self):
+        server.connections += 1
+        BaseHTTPRequestHandler.setup(self)
+
+      def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Content-Type', content_type or self.headers['Content-Type'])
+        if close_connections:
+          self.send_header('Connection', 'close')
+        self.end_headers()
+        self.wfile.write(body)
+
+      def log_message(self, *args):
+        pass
+
+    self.connections = 0
+    self._server = HTTPServer(('localhost', 0), Handler)
+    self._thread = Thread(target=self._server.serve_forever)
+    self._thread.daemon = True
+
+  @property
+  def uri(self):
+    return 'http://localhost:%d' % self._server.socket.getsockname()[1]
+
+  def __enter__(self):
+    self._thread.start()
+    return self
+
+  def __exit__(self, *args):
+    self._server.shutdown()
+
+
+def roundtrip(transport, payload):
+  transport.write(payload)
+  transport.flush()
+  return transport.readAll(len(payload))
+
+
+def test_request_transport_reuses_connection():
+  with EchoServer() as server:
+    transport = TRequestsTransport(server.uri)
+    try:
+      for index in range(5):
+        assert roundtrip(transport, b'hello %d' % index) == b'hello %d' % index
+    finally:
+      transport.close()
+  assert server.connections == 1
+
+
+def test_request_transport_reconnects_after_server_close():
+  with EchoServer(close_connections=True) as server:
+    transport = TRequestsTransport(server.uri)
+    try:
+      for index in range(3):
+        assert roundtrip(transport, b'hello %d' % index) == b'hello %d' % index
+    finally:
+      transport.close()
+  assert server.connections == 3
+
+
+def test_request_transport_content_type():
+  binary = 'application/vnd.apache.thrift.binary'
+  with EchoServer() as server:
+    transport = TRequestsTransport(server.uri, content_type=binary)
+    try:
+      assert roundtrip(transport, b'hello') == b'hello'
+    finally:
+      transport.close()
+
+  with EchoServer(content_type='text/html') as server:
+    transport = TRequestsTransport(server.uri, content_type=binary)
+    try:
+      roundtrip(transport, b'hello')
+      assert False, 'a reply of another content type should be rejected'
+    except TTransport.TTransportException as e:
+      assert 'text/html' in e.message
+    finally:
+      transport.close()
+
+
+def test_request_transport_bounded_pool():
+  session = default_requests_session_factory(pool_size=2)
+  adapter = session.get_adapter('http://localhost')
+  assert adapter.poolmanager.connection_pool_kw['maxsize'] == 2
+  assert adapter.poolmanager.connection_pool_kw['block']
+  assert session.get_adapter('https://localhost') is adapter
+
+
 def test_request_transport_integration():
   handler = ReadOnlySchedulerHandler()
   processor = ReadOnlyScheduler.Processor(handler)
@@ -79,6 +179,31 @@ def test_request_transport_timeout():
   transport.close()
 
 
+def test_request_transport_reopens_after_error():
+  sessions = []
+
+  def session_factory():
+    session = mock.MagicMock(spec=requests.Session)
+    session.headers = {}
+    session.post = mock.Mock(side_effect=request_exceptions.ConnectionError())
+    sessions.append(session)
+    return session
+
+  transport = TRequestsTransport('http://localhost:12345', session_factory=session_factory)
+  for _ in range(2):
+    transport.write(b'hello')
+    try:
+      transport.flush()
+      assert False, 'flush should not succeed'
+    except TTransport.TTransportException:
+      pass
+    assert not transport.isOpen()
+
+  assert len(sessions) == 2
+  for session in sessions:
+    session.close.assert_called_once_with()
+
+
 def test_request_any_other_exception():
   session = mock.MagicMock(spec=requests.Session)
   session.headers = {}
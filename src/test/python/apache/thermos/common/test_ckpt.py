@@ -0,0 +1,120 @@
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+import os
+
+from twitter.common.contextutil import temporary_dir
+from twitter.common.recordio import ThriftRecordWriter
+
+from apache.thermos.common.ckpt import CheckpointDispatcher
+
+from gen.apache.thermos.ttypes import (
+    ProcessState,
+    ProcessStatus,
+    RunnerCkpt,
+    RunnerHeader,
+    RunnerState,
+    TaskState,
+    TaskStatus
+)
+
+
+def process_run(process, seq, fork_time, final_state=ProcessState.SUCCESS):
+  yield ProcessStatus(seq=seq, process=process, state=ProcessState.WAITING)
+  yield ProcessStatus(seq=seq + 1, process=process, state=ProcessState.FORKED,
+      fork_time=fork_time, coordinator_pid=1000 + seq)
+  if final_state == ProcessState.LOST:
+    yield ProcessStatus(seq=seq + 2, process=process, state=ProcessState.LOST)
+    return
+  yield ProcessStatus(seq=seq + 2, process=process, state=ProcessState.RUNNING,
+      start_time=fork_time + 1, pid=2000 + seq)
+  if final_state != ProcessState.RUNNING:
+    yield ProcessStatus(seq=seq + 3, process=process, state=final_state,
+        stop_time=fork_time + 2, return_code=0 if final_state == ProcessState.SUCCESS else 1)
+
+
+def make_records():
+  records = [
+    RunnerCkpt(runner_header=RunnerHeader(task_id='hello', sandbox='/sandbox', user='user')),
+    RunnerCkpt(task_status=TaskStatus(state=TaskState.ACTIVE, timestamp_ms=0, runner_pid=1)),
+  ]
+  for status in (list(process_run('failing', 0, 10, ProcessState.FAILED)) +
+                 list(process_run('other', 0, 15, ProcessState.SUCCESS)) +
+                 list(process_run('failing', 4, 20, ProcessState.LOST)) +
+                 list(process_run('failing', 7, 30, ProcessState.RUNNING))):
+    records.append(RunnerCkpt(process_status=status))
+  return records
+
+
+def write_checkpoint(filename, records):
+  with open(filename, 'a') as fp:
+    rw = ThriftRecordWriter(fp)
+    for record in records:
+      rw.write(record)
+
+
+def replay(records):
+  state = RunnerState(processes={})
+  dispatcher = CheckpointDispatcher()
+  for record in records:
+    dispatcher.dispatch(state, record)
+  return state
+
+
+def test_iter_state_updates_roundtrip():
+  state = replay(make_records())
+  assert replay(CheckpointDispatcher.iter_state_updates(state)) == state
+
+
+def test_from_file_with_snapshot():
+  records = make_records()
+  tail = [RunnerCkpt(task_status=TaskStatus(state=TaskState.KILLED, timestamp_ms=40000,
+      runner_pid=2))]
+  with temporary_dir() as td:
+    ckpt = os.path.join(td, 'runner')
+    write_checkpoint(ckpt, records)
+    CheckpointDispatcher.write_snapshot(ckpt, replay(records), os.path.getsize(ckpt))
+    write_checkpoint(ckpt, tail)
+
+    snapshot = CheckpointDispatcher.read_snapshot(ckpt)
+    assert snapshot is not None
+    assert snapshot.state == replay(records)
+
+    expected = replay(records + tail)
+    assert CheckpointDispatcher.from_file(ckpt) == expected
+    assert CheckpointDispatcher.from_file(ckpt, use_snapshot=False) == expected
+
+    truncated = CheckpointDispatcher.from_file(ckpt, truncate=True)
+    assert truncated.statuses == expected.statuses[-1:]
+    assert truncated.processes == dict(
+        (process, runs[-1:]) for process, runs in expected.processes.items())
+
+
+def test_snapshot_past_end_of_stream_ignored():
+  records = make_records()
+  with temporary_dir() as td:
+    ckpt = os.path.join(td, 'runner')
+    write_checkpoint(ckpt, records)
+    CheckpointDispatcher.write_snapshot(ckpt, RunnerState(processes={}),
+        os.path.getsize(ckpt) + 1)
+    assert CheckpointDispatcher.read_snapshot(ckpt) is None
+    assert CheckpointDispatcher.from_file(ckpt) == replay(records)
+
+
+def test_missing_snapshot():
+  with temporary_dir() as td:
+    ckpt = os.path.join(td, 'runner')
+    write_checkpoint(ckpt, make_records())
+    assert CheckpointDispatcher.read_snapshot(ckpt) is None
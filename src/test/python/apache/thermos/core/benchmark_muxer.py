@@ -0,0 +1,123 @@
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Benchmark polling vs inotify-backed ProcessMuxer.
+
+For tasks of 10, 100 and 500 processes, a writer thread appends process transitions to random
+coordinator checkpoints while the main thread collects them the same way
+TaskRunner.collect_updates does.  Reports the mean/p99 transition-to-dispatch latency and the CPU
+time consumed while collecting.
+"""
+
+from __future__ import print_function
+
+import os
+import random
+import resource
+import threading
+import time
+
+from twitter.common.contextutil import temporary_dir
+from twitter.common.quantity import Time
+from twitter.common.recordio import ThriftRecordWriter
+
+from apache.thermos.common.path import TaskPath
+from apache.thermos.core.muxer import CheckpointWatcher, ProcessMuxer
+from apache.thermos.core.runner import TaskRunner
+
+from gen.apache.thermos.ttypes import ProcessState, ProcessStatus, RunnerCkpt
+
+PROCESS_COUNTS = (10, 100, 500)
+TRANSITIONS = 50
+TRANSITION_INTERVAL = 0.05
+
+
+def cpu_time():
+  usage = resource.getrusage(resource.RUSAGE_SELF)
+  return usage.ru_utime + usage.ru_stime
+
+
+def writer(pathspec, processes, written):
+  writers = {}
+  for seq in range(1, TRANSITIONS + 1):
+    time.sleep(random.uniform(0, 2 * TRANSITION_INTERVAL))
+    process = random.choice(processes)
+    if process not in writers:
+      fp = open(pathspec.given(process=process).getpath('process_checkpoint'), 'a')
+      writers[process] = (fp, ThriftRecordWriter(fp))
+    fp, rw = writers[process]
+    written[seq] = time.time()
+    rw.write(RunnerCkpt(process_status=ProcessStatus(
+        process=process, seq=seq, state=ProcessState.RUNNING)))
+    fp.flush()
+  for fp, _ in writers.values():
+    fp.close()
+
+
+def collect(muxer, expected):
+  sleep_interval = TaskRunner.COORDINATOR_INTERVAL_SLEEP.as_(Time.SECONDS)
+  dispatched = {}
+  while len(dispatched) < expected:
+    updates = muxer.select()
+    now = time.time()
+    for update in updates:
+      dispatched[update.process_status.seq] = now
+    if not updates:
+      if muxer.watching:
+        muxer.wait(sleep_interval)
+      else:
+        time.sleep(sleep_interval)
+  return dispatched
+
+
+def run(process_count, watch):
+  processes = ['process%d' % k for k in range(process_count)]
+  with temporary_dir() as td:
+    pathspec = TaskPath(root=td, task_id='benchmark')
+    os.makedirs(pathspec.getpath('checkpoint_path'))
+    for process in processes:
+      # Coordinators create their checkpoints at fork time.
+      open(pathspec.given(process=process).getpath('process_checkpoint'), 'w').close()
+    muxer = ProcessMuxer(pathspec, watch=watch)
+    for process in processes:
+      muxer.register(process)
+    written = {}
+    writer_thread = threading.Thread(target=writer, args=(pathspec, processes, written))
+    start_cpu = cpu_time()
+    writer_thread.start()
+    dispatched = collect(muxer, TRANSITIONS)
+    writer_thread.join()
+    elapsed_cpu = cpu_time() - start_cpu
+  latencies = sorted(dispatched[seq] - written[seq] for seq in written)
+  return (sum(latencies) / len(latencies), latencies[int(len(latencies) * 0.99) - 1],
+          elapsed_cpu)
+
+
+def main():
+  modes = [('polling', False)]
+  if CheckpointWatcher.available():
+    modes.append(('inotify', True))
+  else:
+    print('watchdog unavailable, only benchmarking the polling muxer.')
+  print('%-8s %10s %14s %14s %10s' % ('mode', 'processes', 'mean lat (ms)', 'p99 lat (ms)',
+      'cpu (s)'))
+  for process_count in PROCESS_COUNTS:
+    for name, watch in modes:
+      mean, p99, cpu = run(process_count, watch)
+      print('%-8s %10d %14.1f %14.1f %10.3f' % (name, process_count, mean * 1000, p99 * 1000,
+          cpu))
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,100 @@
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import os
+import threading
+import time
+
+import pytest
+from twitter.common.contextutil import temporary_dir
+from twitter.common.recordio import ThriftRecordWriter
+
+from apache.thermos.common.path import TaskPath
+from apache.thermos.core.muxer import CheckpointWatcher, ProcessMuxer
+
+from gen.apache.thermos.ttypes import ProcessState, ProcessStatus, RunnerCkpt
+
+TASK_ID = 'muxer-task'
+
+
+def write_update(pathspec, process, seq):
+  ckpt = pathspec.given(process=process).getpath('process_checkpoint')
+  with open(ckpt, 'a') as fp:
+    ThriftRecordWriter(fp).write(RunnerCkpt(process_status=ProcessStatus(
+        process=process, seq=seq, state=ProcessState.RUNNING)))
+
+
+def make_muxer(root, watch=False, processes=('hello', 'world')):
+  pathspec = TaskPath(root=root, task_id=TASK_ID)
+  checkpoint_path = pathspec.getpath('checkpoint_path')
+  if not os.path.exists(checkpoint_path):
+    os.makedirs(checkpoint_path)
+  muxer = ProcessMuxer(pathspec, watch=watch)
+  for process in processes:
+    muxer.register(process)
+  return pathspec, muxer
+
+
+def test_select_polling():
+  with temporary_dir() as td:
+    pathspec, muxer = make_muxer(td)
+    assert not muxer.watching
+    assert muxer.select() == []
+    assert muxer.wait(0.01) is False
+    write_update(pathspec, 'hello', 1)
+    write_update(pathspec, 'world', 1)
+    updates = muxer.select()
+    assert sorted(update.process_status.process for update in updates) == ['hello', 'world']
+    assert muxer.select() == []
+
+
+def test_select_fast_forwards_to_watermark():
+  with temporary_dir() as td:
+    pathspec = TaskPath(root=td, task_id=TASK_ID)
+    os.makedirs(pathspec.getpath('checkpoint_path'))
+    for seq in range(1, 4):
+      write_update(pathspec, 'hello', seq)
+    muxer = ProcessMuxer(pathspec)
+    muxer.register('hello', watermark=2)
+    updates = muxer.select()
+    assert [update.process_status.seq for update in updates] == [3]
+
+
+@pytest.mark.skipif('not CheckpointWatcher.available()')
+def test_wait_wakes_up_on_update():
+  with temporary_dir() as td:
+    pathspec, muxer = make_muxer(td, watch=True)
+    assert muxer.watching
+    write_update(pathspec, 'hello', 1)
+    muxer.select()
+    assert muxer.select() == []
+
+    writer = threading.Timer(0.1, write_update, args=(pathspec, 'world', 1))
+    writer.start()
+    deadline = time.time() + 30
+    updates = []
+    # Events for the first write may still be in flight, so wait until the second one lands.
+    while not updates and time.time() < deadline:
+      assert muxer.wait(deadline - time.time())
+      updates = muxer.select()
+    writer.join()
+    assert [update.process_status.process for update in updates] == ['world']
+
+
+@pytest.mark.skipif('not CheckpointWatcher.available()')
+def test_wait_times_out_without_update():
+  with temporary_dir() as td:
+    _, muxer = make_muxer(td, watch=True)
+    assert muxer.select() == []
+    assert muxer.wait(0.1) is False
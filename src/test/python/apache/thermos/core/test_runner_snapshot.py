@@ -0,0 +1,85 @@
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import os
+
+from twitter.common.recordio import ThriftRecordReader
+
+from apache.thermos.common.ckpt import CheckpointDispatcher
+from apache.thermos.config.schema import Process, Resources, Task
+from apache.thermos.core.runner import TaskRunner
+from apache.thermos.testing.runner import RunnerTestBase
+
+from gen.apache.thermos.ttypes import RunnerCkpt, RunnerState, TaskState
+
+
+class TestRunnerSnapshotRecovery(RunnerTestBase):
+  @classmethod
+  def task(cls):
+    base = Process(min_duration=1)
+    task = Task(
+      name="snapshotted_task",
+      resources=Resources(cpu=1.0, ram=16 * 1024 * 1024, disk=16 * 1024),
+      max_failures=0,
+      processes=[
+          base(name="a", cmdline="echo hello world"),
+          base(name="b", max_failures=2, cmdline="exit 1"),
+          base(name="c", cmdline="echo hello world")
+      ],
+      constraints=[{'order': ['a', 'c']}]
+    )
+    return task.interpolate()[0]
+
+  def checkpoint_records(self):
+    """The records of the runner checkpoint stream, with the offset following each."""
+    with open(self.runner.pathspec.getpath('runner_checkpoint')) as fp:
+      reader = ThriftRecordReader(fp, RunnerCkpt)
+      return [(record, fp.tell()) for record in iter(reader.read, None)]
+
+  def recover(self):
+    header = self.state.header
+    return TaskRunner(self.task(), self.runner.root, header.sandbox, log_dir=header.log_dir,
+        task_id=self.runner.task_id, portmap=header.ports)
+
+  @classmethod
+  def plan(cls, runner):
+    return [(plan.running, plan.finished, plan.failed)
+            for plan in (runner._regular_plan, runner._finalizing_plan)]
+
+  def test_runner_state_success(self):
+    assert self.state.statuses[-1].state == TaskState.SUCCESS
+    assert len(self.state.processes['b']) == 2
+
+  def test_recover_from_snapshot_with_tail(self):
+    ckpt = self.runner.pathspec.getpath('runner_checkpoint')
+    full = self.recover()
+    assert full.state == self.state
+
+    records = self.checkpoint_records()
+    assert records[-1][1] == os.path.getsize(ckpt)
+    dispatcher = CheckpointDispatcher()
+    snapshot_state = RunnerState(processes={})
+    try:
+      # Snapshot every prefix of the stream, leaving the rest of it as the tail to replay.
+      for record, offset in records[:-1]:
+        dispatcher.dispatch(snapshot_state, record)
+        CheckpointDispatcher.write_snapshot(ckpt, snapshot_state, offset)
+        assert CheckpointDispatcher.read_snapshot(ckpt).offset == offset
+
+        recovered = self.recover()
+        assert recovered.state == full.state
+        assert recovered.task_state() == full.task_state()
+        assert self.plan(recovered) == self.plan(full)
+    finally:
+      os.unlink(CheckpointDispatcher.snapshot_filename(ckpt))
@@ -0,0 +1,105 @@
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+"""Benchmark the du, inotify and incremental disk collectors.
+
+Builds sandboxes of 10k and 100k files spread over 100 files per directory, then reports the time
+taken by each collector to produce a sample and the number of entries each retains in memory.  The
+incremental collector is measured on its first (cold) collection, on a collection with no changes,
+and on a collection after files were appended to and created in 1% of the directories.
+"""
+
+from __future__ import print_function
+
+import os
+import time
+
+from twitter.common.contextutil import temporary_dir
+from twitter.common.dirutil import du
+from twitter.common.quantity import Time
+
+from apache.thermos.monitoring.disk import DirectorySizeCache, InotifyDiskCollectorThread
+
+FILES_PER_DIRECTORY = 100
+FILE_COUNTS = (10000, 100000)
+
+
+def build_sandbox(root, file_count):
+  directories = []
+  for index in range(file_count // FILES_PER_DIRECTORY):
+    directory = os.path.join(root, 'd%03d' % (index // 100), 'd%03d' % (index % 100))
+    os.makedirs(directory)
+    for filename in range(FILES_PER_DIRECTORY):
+      with open(os.path.join(directory, str(filename)), 'w') as fp:
+        fp.write('0' * 100)
+    directories.append(directory)
+  # Make every file cold and every directory mtime trustworthy, as in a long-running sandbox.
+  then = time.time() - 2 * DirectorySizeCache.HOT_WINDOW.as_(Time.SECONDS)
+  for path, dirs, files in os.walk(root):
+    for name in dirs + files:
+      os.utime(os.path.join(path, name), (then, then))
+  return directories
+
+
+def timed(function, *args):
+  start = time.time()
+  result = function(*args)
+  return time.time() - start, result
+
+
+def touch_some(directories):
+  for directory in directories[::100]:
+    with open(os.path.join(directory, '0'), 'a') as fp:
+      fp.write('0' * 100)
+    with open(os.path.join(directory, 'new'), 'w') as fp:
+      fp.write('0' * 100)
+  # Directory mtimes within MTIME_GRANULARITY of a collection are not trusted by the next one.
+  time.sleep(DirectorySizeCache.MTIME_GRANULARITY.as_(Time.SECONDS))
+
+
+def run(file_count):
+  with temporary_dir() as root:
+    directories = build_sandbox(root, file_count)
+    results = []
+
+    elapsed, _ = timed(du, root)
+    results.append(('du', elapsed, 0))
+
+    inotify = InotifyDiskCollectorThread(root)
+    elapsed, _ = timed(inotify._initialize)
+    results.append(('inotify (initial walk)', elapsed, len(inotify._files)))
+    inotify._observer.stop()
+
+    cache = DirectorySizeCache(root)
+    elapsed, _ = timed(cache.update)
+    results.append(('incremental (cold)', elapsed, len(cache)))
+    elapsed, _ = timed(cache.update)
+    results.append(('incremental (unchanged)', elapsed, len(cache)))
+    touch_some(directories)
+    elapsed, total = timed(cache.update)
+    results.append(('incremental (1% changed)', elapsed, len(cache)))
+    assert total == du(root)
+  return results
+
+
+def main():
+  print('%-8s %-26s %12s %16s' % ('files', 'collector', 'sample (s)', 'entries held'))
+  for file_count in FILE_COUNTS:
+    for name, elapsed, entries in run(file_count):
+      print('%-8d %-26s %12.3f %16d' % (file_count, name, elapsed, entries))
+
+
+if __name__ == '__main__':
+  main()
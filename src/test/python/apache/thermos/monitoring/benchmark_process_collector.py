@@ -0,0 +1,89 @@
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+"""Benchmark the psutil and /proc process tree collectors.
+
+For process trees of 1, 50 and 500 processes, repeatedly samples the tree with each
+ProcessTreeCollector implementation and reports the mean wall time and CPU time per sample.
+"""
+
+from __future__ import print_function
+
+import os
+import resource
+import signal
+import subprocess
+import time
+
+from apache.thermos.monitoring.process_collector_procfs import (
+    ProcessTreeCollector as ProcfsProcessTreeCollector
+)
+from apache.thermos.monitoring.process_collector_psutil import (
+    ProcessTreeCollector as PsutilProcessTreeCollector
+)
+
+TREE_SIZES = (1, 50, 500)
+SAMPLES = 20
+COLLECTORS = (
+  ('psutil', PsutilProcessTreeCollector),
+  ('procfs', ProcfsProcessTreeCollector),
+)
+
+
+def cpu_time():
+  usage = resource.getrusage(resource.RUSAGE_SELF)
+  return usage.ru_utime + usage.ru_stime
+
+
+def spawn_tree(size):
+  """Spawn a shell with size - 1 sleeping children, in its own process group."""
+  command = 'exec sleep 600' if size == 1 else (
+      'for i in $(seq %d); do sleep 600 & done; wait' % (size - 1))
+  parent = subprocess.Popen(['sh', '-c', command], preexec_fn=os.setsid)
+  collector = ProcfsProcessTreeCollector(parent.pid)
+  for _ in range(100):
+    collector.sample()
+    if collector.procs >= size:
+      break
+    time.sleep(0.1)
+  else:
+    raise RuntimeError('Only %d of %d processes started' % (collector.procs, size))
+  return parent
+
+
+def run(collector_class, pid):
+  collector = collector_class(pid)
+  start_wall, start_cpu = time.time(), cpu_time()
+  for _ in range(SAMPLES):
+    collector.sample()
+  return ((time.time() - start_wall) / SAMPLES, (cpu_time() - start_cpu) / SAMPLES,
+      collector.procs)
+
+
+def main():
+  print('%-8s %10s %16s %16s' % ('backend', 'processes', 'wall/sample (ms)', 'cpu/sample (ms)'))
+  for size in TREE_SIZES:
+    parent = spawn_tree(size)
+    try:
+      for name, collector_class in COLLECTORS:
+        wall, cpu, procs = run(collector_class, parent.pid)
+        print('%-8s %10d %16.2f %16.2f' % (name, procs, wall * 1000, cpu * 1000))
+    finally:
+      os.killpg(parent.pid, signal.SIGKILL)
+      parent.wait()
+
+
+if __name__ == '__main__':
+  main()
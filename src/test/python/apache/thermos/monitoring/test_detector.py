@@ -0,0 +1,79 @@
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+import os
+
+import pytest
+from twitter.common.contextutil import temporary_dir
+
+from apache.thermos.common.path import TaskPath
+from apache.thermos.monitoring.detector import TaskDetector, TaskEvent, TaskWatcher
+
+
+def task_path(root, state, task_id):
+  return TaskPath(root=root, state=state, task_id=task_id).getpath('task_path')
+
+
+def drain_until(watcher, count, timeout=5):
+  events = []
+  for _ in range(int(timeout * 10)):
+    events.extend(watcher.drain(timeout=0.1))
+    if len(events) >= count:
+      break
+  return events
+
+
+def test_get_task_ids():
+  with temporary_dir() as root:
+    os.makedirs(os.path.dirname(task_path(root, 'active', 'x')))
+    os.makedirs(os.path.dirname(task_path(root, 'finished', 'x')))
+    for state, task_id in (('active', 'a'), ('finished', 'b'), ('finished', 'c')):
+      open(task_path(root, state, task_id), 'w').close()
+    detector = TaskDetector(root)
+    assert set(detector.get_task_ids()) == set(
+        [('active', 'a'), ('finished', 'b'), ('finished', 'c')])
+    assert list(detector.get_task_ids(state='active')) == [('active', 'a')]
+
+
+@pytest.mark.skipif('not TaskWatcher.available()')
+def test_watcher_lifecycle():
+  with temporary_dir() as root:
+    watcher = TaskWatcher(root)
+    try:
+      with open(task_path(root, 'active', 'hello'), 'w') as fp:
+        fp.write('{}')
+      assert drain_until(watcher, 1) == [TaskEvent(TaskEvent.ADDED, 'active', 'hello')]
+
+      os.rename(task_path(root, 'active', 'hello'), task_path(root, 'finished', 'hello'))
+      assert drain_until(watcher, 1) == [TaskEvent(TaskEvent.MOVED, 'finished', 'hello')]
+
+      os.unlink(task_path(root, 'finished', 'hello'))
+      assert drain_until(watcher, 1) == [TaskEvent(TaskEvent.REMOVED, 'finished', 'hello')]
+    finally:
+      watcher.stop()
+
+
+@pytest.mark.skipif('not TaskWatcher.available()')
+def test_watcher_ignores_other_paths():
+  with temporary_dir() as root:
+    watcher = TaskWatcher(root)
+    try:
+      open(task_path(root, 'active', '.hidden'), 'w').close()
+      open(os.path.join(root, 'tasks', 'stray'), 'w').close()
+      open(task_path(root, 'finished', 'hello'), 'w').close()
+      assert drain_until(watcher, 1) == [TaskEvent(TaskEvent.ADDED, 'finished', 'hello')]
+      assert watcher.drain(timeout=0.1) == []
+    finally:
+      watcher.stop()
@@ -17,10 +17,16 @@ import time
 from tempfile import mkstemp
 
 import pytest
-from twitter.common.dirutil import safe_mkdtemp
+from twitter.common.contextutil import temporary_dir
+from twitter.common.dirutil import du, safe_mkdtemp
 from twitter.common.quantity import Amount, Data, Time
 
-from apache.thermos.monitoring.disk import DiskCollector, InotifyDiskCollector
+from apache.thermos.monitoring.disk import (
+    DirectorySizeCache,
+    DiskCollector,
+    IncrementalDiskCollector,
+    InotifyDiskCollector
+)
 
 TEST_AMOUNT_1 = Amount(100, Data.MB)
 TEST_AMOUNT_2 = Amount(10, Data.MB)
@@ -77,3 +83,105 @@ def test_inotify_diskcollector():
     time.sleep((2 * INTERVAL).as_(Time.SECONDS))
 
   _run_collector_tests(collector, target, wait)
+
+
+def test_incremental_diskcollector():
+  target = safe_mkdtemp()
+  collector = IncrementalDiskCollector(target)
+
+  def wait():
+    collector.sample()
+    if collector._thread is not None:
+      collector._thread.event.wait()
+
+  _run_collector_tests(collector, target, wait)
+
+
+def make_tree(root):
+  for d in ('a', 'a/b', 'a/b/c', 'd'):
+    os.makedirs(os.path.join(root, d))
+    for name in ('x', 'y'):
+      with open(os.path.join(root, d, name), 'w') as fp:
+        fp.write('0' * 10000)
+  os.symlink('a', os.path.join(root, 'link_to_dir'))
+  os.symlink('a/x', os.path.join(root, 'link_to_file'))
+
+
+def age(path, seconds):
+  """Backdate the mtime of path and of every directory and file under it."""
+  then = time.time() - seconds
+  for root, dirs, files in os.walk(path):
+    for name in dirs + files:
+      if not os.path.islink(os.path.join(root, name)):
+        os.utime(os.path.join(root, name), (then, then))
+  os.utime(path, (then, then))
+
+
+def test_directory_size_cache_matches_du():
+  with temporary_dir() as root:
+    make_tree(root)
+    cache = DirectorySizeCache(root)
+    assert cache.update() == du(root)
+    assert len(cache) == 5
+
+
+def test_directory_size_cache_incremental():
+  with temporary_dir() as root:
+    make_tree(root)
+    age(root, 2 * DirectorySizeCache.HOT_WINDOW.as_(Time.SECONDS))
+    cache = DirectorySizeCache(root)
+    total = cache.update()
+
+    # Unchanged directories are not listed again.
+    listdir = os.listdir
+    listed = []
+    def recording_listdir(path):
+      listed.append(path)
+      return listdir(path)
+    os.listdir = recording_listdir
+    try:
+      assert cache.update() == total
+      assert listed == []
+
+      os.unlink(os.path.join(root, 'a', 'b', 'x'))
+      then = time.time() - 2 * DirectorySizeCache.MTIME_GRANULARITY.as_(Time.SECONDS)
+      os.utime(os.path.join(root, 'a', 'b'), (then, then))
+      total = cache.update()
+      assert listed == [os.path.join(root, 'a', 'b')]
+    finally:
+      os.listdir = listdir
+    assert total == du(root)
+
+
+def test_directory_size_cache_hot_files():
+  with temporary_dir() as root:
+    with open(os.path.join(root, 'stdout'), 'w') as fp:
+      fp.write('0' * 10000)
+    age(root, 2 * DirectorySizeCache.MTIME_GRANULARITY.as_(Time.SECONDS))
+    os.utime(os.path.join(root, 'stdout'), None)
+    cache = DirectorySizeCache(root)
+    cache.update()
+
+    # Appending to a file does not change the mtime of its directory.
+    with open(os.path.join(root, 'stdout'), 'a') as fp:
+      fp.write('0' * 100000)
+    assert cache.update() == du(root)
+
+
+def test_directory_size_cache_persistence():
+  with temporary_dir() as root:
+    make_tree(os.path.join(root, 'sandbox'))
+    age(root, 2 * DirectorySizeCache.HOT_WINDOW.as_(Time.SECONDS))
+    cache_file = os.path.join(root, 'cache', 'sandbox.json')
+    cache = DirectorySizeCache(os.path.join(root, 'sandbox'))
+    total = cache.update()
+    cache.save(cache_file)
+
+    restored = DirectorySizeCache(os.path.join(root, 'sandbox'))
+    restored.load(cache_file)
+    assert len(restored) == len(cache)
+    assert restored.update() == total
+
+    other = DirectorySizeCache(os.path.join(root, 'cache'))
+    other.load(cache_file)
+    assert len(other) == 0
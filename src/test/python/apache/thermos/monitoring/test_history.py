@@ -0,0 +1,108 @@
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+import os
+
+import pytest
+from twitter.common.contextutil import temporary_dir
+
+from apache.thermos.monitoring.history import ColumnarRingBuffer, SampleLog
+
+
+def test_columnar_ring_buffer():
+  buffer = ColumnarRingBuffer(3, 2)
+  assert len(buffer) == 0
+  for timestamp in range(5):
+    buffer.append((timestamp, timestamp * 10))
+  assert len(buffer) == 3
+  assert list(buffer) == [(2, 20), (3, 30), (4, 40)]
+  assert buffer[0] == (2, 20)
+  assert buffer[-1] == (4, 40)
+  with pytest.raises(IndexError):
+    buffer[3]
+
+
+def test_columnar_ring_buffer_bisect():
+  buffer = ColumnarRingBuffer(4, 1)
+  for timestamp in (1, 2, 3, 4, 5, 6):
+    buffer.append((timestamp,))
+  assert buffer.bisect_left(0) == 0
+  assert buffer.bisect_left(4) == 1
+  assert buffer.bisect_left(4.5) == 2
+  assert buffer.bisect_right(4) == 2
+  assert buffer.bisect_left(7) == 4
+  assert buffer.range(4, 5) == [(4,), (5,)]
+  assert buffer.range(7, 8) == []
+
+
+def test_columnar_ring_buffer_capacity():
+  with pytest.raises(ValueError):
+    ColumnarRingBuffer(0, 1)
+
+
+def test_sample_log():
+  with temporary_dir() as td:
+    filename = os.path.join(td, 'task', 'resources')
+    sample_log = SampleLog(filename, 2)
+    assert len(sample_log) == 0
+    assert sample_log.rows() == []
+    assert sample_log.last() is None
+    for timestamp in range(3):
+      sample_log.append((timestamp, timestamp * 10))
+    sample_log.close()
+    assert len(sample_log) == 3
+    assert sample_log.rows() == [(0, 0), (1, 10), (2, 20)]
+    assert SampleLog(filename, 2).last() == (2, 20)
+
+
+def test_sample_log_partial_row():
+  with temporary_dir() as td:
+    filename = os.path.join(td, 'resources')
+    sample_log = SampleLog(filename, 2)
+    sample_log.append((1, 10))
+    sample_log.close()
+    with open(filename, 'ab') as fp:
+      fp.write(b'\0' * 5)
+    assert SampleLog(filename, 2).rows() == [(1, 10)]
+
+    sample_log = SampleLog(filename, 2)
+    sample_log.append((2, 20))
+    sample_log.close()
+    assert sample_log.rows() == [(1, 10), (2, 20)]
+
+
+def test_sample_log_bad_header():
+  with temporary_dir() as td:
+    filename = os.path.join(td, 'resources')
+    sample_log = SampleLog(filename, 2)
+    sample_log.append((1, 10))
+    sample_log.close()
+
+    # A log written with a different row width is discarded rather than misread.
+    sample_log = SampleLog(filename, 3)
+    assert sample_log.rows() == []
+    assert sample_log.last() is None
+    sample_log.append((2, 20, 200))
+    sample_log.close()
+    assert sample_log.rows() == [(2, 20, 200)]
+
+
+def test_sample_log_compaction():
+  with temporary_dir() as td:
+    sample_log = SampleLog(os.path.join(td, 'resources'), 1, max_rows=3)
+    for timestamp in range(7):
+      sample_log.append((timestamp,))
+    sample_log.close()
+    assert sample_log.rows() == [(4,), (5,), (6,)]
@@ -0,0 +1,140 @@
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+import os
+
+import mock
+from twitter.common.contextutil import temporary_dir
+from twitter.common.recordio import ThriftRecordWriter
+
+from apache.thermos.common.ckpt import CheckpointDispatcher
+from apache.thermos.common.path import TaskPath
+from apache.thermos.monitoring.index import CheckpointIndex
+
+from gen.apache.thermos.ttypes import (
+    ProcessState,
+    ProcessStatus,
+    RunnerCkpt,
+    RunnerHeader,
+    TaskState,
+    TaskStatus
+)
+
+
+def header_records():
+  return [
+    RunnerCkpt(runner_header=RunnerHeader(task_id='hello', sandbox='/sandbox', user='user')),
+    RunnerCkpt(task_status=TaskStatus(state=TaskState.ACTIVE, timestamp_ms=0, runner_pid=1)),
+  ]
+
+
+def process_records(process, seq, final_state):
+  return [
+    RunnerCkpt(process_status=ProcessStatus(seq=seq, process=process, state=ProcessState.WAITING)),
+    RunnerCkpt(process_status=ProcessStatus(seq=seq + 1, process=process,
+        state=ProcessState.FORKED, fork_time=seq, coordinator_pid=1000 + seq)),
+    RunnerCkpt(process_status=ProcessStatus(seq=seq + 2, process=process,
+        state=ProcessState.RUNNING, start_time=seq, pid=2000 + seq)),
+    RunnerCkpt(process_status=ProcessStatus(seq=seq + 3, process=process, state=final_state,
+        stop_time=seq + 1, return_code=0 if final_state == ProcessState.SUCCESS else 1)),
+  ]
+
+
+def checkpoint_path(root):
+  path = TaskPath(root=root).given(task_id='hello').getpath('runner_checkpoint')
+  if not os.path.exists(os.path.dirname(path)):
+    os.makedirs(os.path.dirname(path))
+  return path
+
+
+def write_checkpoint(filename, records):
+  with open(filename, 'a') as fp:
+    rw = ThriftRecordWriter(fp)
+    for record in records:
+      rw.write(record)
+
+
+def test_missing_checkpoint():
+  with temporary_dir() as root:
+    assert CheckpointIndex(root).get('hello') is None
+
+
+def test_incremental_update():
+  with temporary_dir() as root:
+    checkpoint = checkpoint_path(root)
+    write_checkpoint(checkpoint, header_records() + process_records('p', 0, ProcessState.FAILED))
+    index = CheckpointIndex(root)
+    state = index.get('hello')
+    assert state.header.task_id == 'hello'
+    assert [run.state for run in state.processes['p']] == [ProcessState.FAILED]
+
+    write_checkpoint(checkpoint, process_records('p', 4, ProcessState.SUCCESS) + [
+        RunnerCkpt(task_status=TaskStatus(state=TaskState.SUCCESS, timestamp_ms=10))])
+    state = index.get('hello')
+    assert [run.state for run in state.processes['p']] == [ProcessState.SUCCESS]
+    assert [status.state for status in state.statuses] == [TaskState.ACTIVE, TaskState.SUCCESS]
+
+    full_state = CheckpointDispatcher.from_file(checkpoint)
+    assert len(full_state.processes['p']) == 2
+    assert state.header == full_state.header
+    assert state.statuses == full_state.statuses
+    assert state.processes['p'][-1] == full_state.processes['p'][-1]
+
+
+def test_summary_reused_across_instances():
+  with temporary_dir() as root:
+    checkpoint = checkpoint_path(root)
+    write_checkpoint(checkpoint, header_records() + process_records('p', 0, ProcessState.SUCCESS))
+    state = CheckpointIndex(root).get('hello')
+    assert os.path.exists(CheckpointIndex.index_filename(checkpoint))
+
+    # A fresh index must not need to read the checkpoint again.
+    with mock.patch.object(CheckpointIndex, '_apply_tail') as apply_tail:
+      assert CheckpointIndex(root).get('hello') == state
+      assert apply_tail.call_count == 0
+
+
+def test_no_persist():
+  with temporary_dir() as root:
+    checkpoint = checkpoint_path(root)
+    write_checkpoint(checkpoint, header_records())
+    assert CheckpointIndex(root, persist=False).get('hello') is not None
+    assert not os.path.exists(CheckpointIndex.index_filename(checkpoint))
+
+
+def test_corrupt_checkpoint():
+  with temporary_dir() as root:
+    checkpoint = checkpoint_path(root)
+    write_checkpoint(checkpoint, header_records() + process_records('p', 0, ProcessState.SUCCESS))
+    # An out of order sequence number is rejected by the dispatcher.
+    write_checkpoint(checkpoint, process_records('p', 0, ProcessState.SUCCESS))
+    index = CheckpointIndex(root)
+    assert index.get('hello') is None
+    assert index.get('hello') is None
+
+
+def test_rebuild_after_truncation():
+  with temporary_dir() as root:
+    checkpoint = checkpoint_path(root)
+    write_checkpoint(checkpoint, header_records() + process_records('p', 0, ProcessState.FAILED))
+    index = CheckpointIndex(root)
+    assert index.get('hello').processes['p'][-1].state == ProcessState.FAILED
+
+    os.unlink(checkpoint)
+    write_checkpoint(checkpoint, header_records()[:1])
+    state = index.get('hello')
+    assert state.header.task_id == 'hello'
+    assert state.processes == {}
+    assert CheckpointIndex(root).get('hello') == state
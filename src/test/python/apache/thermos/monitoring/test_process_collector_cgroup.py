@@ -0,0 +1,131 @@
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+import os
+
+import mock
+from twitter.common.contextutil import temporary_dir
+
+from apache.thermos.monitoring.process import ProcessSample
+from apache.thermos.monitoring.process_collector_cgroup import (
+    CLOCK_TICKS,
+    Cgroup,
+    CgroupCollector,
+    CgroupV1,
+    CgroupV2
+)
+from apache.thermos.monitoring.resource import TaskResourceMonitor
+
+V1_CGROUP = '''9:name=systemd:/mesos/task
+4:memory:/mesos/task
+3:blkio:/mesos/task
+2:cpu,cpuacct:/mesos/task
+1:cpuset:/
+'''
+
+
+def write(path, content):
+  if not os.path.isdir(os.path.dirname(path)):
+    os.makedirs(os.path.dirname(path))
+  with open(path, 'w') as fp:
+    fp.write(content)
+
+
+def fake_v1(root, user=100, system=50):
+  write(os.path.join(root, 'proc', '1234', 'cgroup'), V1_CGROUP)
+  cgroups = os.path.join(root, 'cgroup')
+  write(os.path.join(cgroups, 'cpu,cpuacct', 'mesos', 'task', 'cpuacct.stat'),
+        'user %d\nsystem %d\n' % (user, system))
+  memory = os.path.join(cgroups, 'memory', 'mesos', 'task')
+  write(os.path.join(memory, 'memory.stat'), 'cache 4096\nrss 1024\ntotal_rss 2048\n')
+  write(os.path.join(memory, 'cgroup.procs'), '1234\n1235\n')
+  write(os.path.join(memory, 'tasks'), '1234\n1235\n1236\n')
+  write(os.path.join(cgroups, 'blkio', 'mesos', 'task', 'blkio.throttle.io_service_bytes'),
+        '8:0 Read 100\n8:0 Write 200\n8:16 Read 1\n8:16 Write 2\nTotal 303\n')
+  return os.path.join(root, 'proc'), cgroups
+
+
+def fake_v2(root):
+  write(os.path.join(root, 'proc', '1234', 'cgroup'), '0::/mesos/task\n')
+  path = os.path.join(root, 'cgroup', 'mesos', 'task')
+  write(os.path.join(path, 'cpu.stat'), 'usage_usec 3000000\nuser_usec 2000000\n'
+                                        'system_usec 1000000\n')
+  write(os.path.join(path, 'memory.stat'), 'anon 8192\nfile 4096\n')
+  write(os.path.join(path, 'cgroup.procs'), '1234\n')
+  write(os.path.join(path, 'cgroup.threads'), '1234\n1240\n')
+  write(os.path.join(path, 'io.stat'), '8:0 rbytes=10 wbytes=20 rios=1 wios=2\n')
+  return os.path.join(root, 'proc'), os.path.join(root, 'cgroup')
+
+
+def test_cgroup_v1():
+  with temporary_dir() as root:
+    proc, cgroups = fake_v1(root)
+    cgroup = Cgroup.from_pid(1234, cgroup_root=cgroups, proc=proc)
+    assert isinstance(cgroup, CgroupV1)
+    usage = cgroup.read()
+    assert usage.user == 100.0 / CLOCK_TICKS
+    assert usage.system == 50.0 / CLOCK_TICKS
+    assert usage.rss == 2048
+    assert (usage.procs, usage.threads) == (2, 3)
+    assert (usage.read_bytes, usage.write_bytes) == (101, 202)
+
+
+def test_cgroup_v2():
+  with temporary_dir() as root:
+    proc, cgroups = fake_v2(root)
+    cgroup = Cgroup.from_pid(1234, cgroup_root=cgroups, proc=proc)
+    assert isinstance(cgroup, CgroupV2)
+    usage = cgroup.read()
+    assert (usage.user, usage.system) == (2.0, 1.0)
+    assert usage.rss == 8192
+    assert (usage.procs, usage.threads) == (1, 2)
+    assert (usage.read_bytes, usage.write_bytes) == (10, 20)
+
+
+def test_collector_rate():
+  with temporary_dir() as root:
+    proc, cgroups = fake_v1(root)
+    collector = CgroupCollector(1234, cgroup_root=cgroups, proc=proc)
+    with mock.patch('apache.thermos.monitoring.process_collector_cgroup.time', return_value=10):
+      collector.sample()
+    assert collector.value.rate == 0
+    assert collector.procs == 2
+    assert collector.io == (101, 202)
+
+    fake_v1(root, user=100 + 2 * CLOCK_TICKS, system=50 + CLOCK_TICKS)
+    with mock.patch('apache.thermos.monitoring.process_collector_cgroup.time', return_value=13):
+      collector.sample()
+    assert collector.value.rate == 1.0
+    assert collector.value.rss == 2048
+    assert collector.scope == os.path.join(cgroups, 'cpu,cpuacct', 'mesos', 'task')
+
+
+def test_collector_fallback():
+  with temporary_dir() as root:
+    write(os.path.join(root, '1234', 'cgroup'), '4:memory:/\n2:cpu,cpuacct:/\n0::/\n')
+    fallback = mock.Mock(value=ProcessSample.empty()._replace(rss=1), procs=3)
+    collector = CgroupCollector(1234, cgroup_root=root, proc=root,
+                                fallback=lambda pid: fallback)
+    collector.sample()
+    assert fallback.sample.call_count == 1
+    assert collector.scope is None
+    assert collector.value.rss == 1
+    assert collector.procs == 3
+
+
+def test_unique_collectors():
+  shared = [mock.Mock(scope='/cgroup/task'), mock.Mock(scope='/cgroup/task')]
+  unscoped = [mock.Mock(scope=None), mock.Mock(scope=None)]
+  assert TaskResourceMonitor._unique_collectors(shared + unscoped) == shared[:1] + unscoped
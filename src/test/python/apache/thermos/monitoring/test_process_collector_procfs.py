@@ -0,0 +1,92 @@
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+import os
+import subprocess
+import time
+
+from twitter.common.contextutil import temporary_dir
+
+from apache.thermos.monitoring.process import ProcessSample
+from apache.thermos.monitoring.process_collector_procfs import (
+    PAGE_SIZE,
+    ProcessStat,
+    ProcessTableCollector,
+    ProcessTreeCollector,
+    read_process_table
+)
+from apache.thermos.monitoring.process_collector_psutil import (
+    ProcessTreeCollector as PsutilProcessTreeCollector
+)
+
+STAT = ('%d (%s) S %d 100 100 0 -1 4202496 500 0 0 0 %d %d 0 0 20 %d %d 0 1000 %d %d '
+        '18446744073709551615 1 1 0 0 0 0 0 0 0 0 0 0 17 0 0 0 0 0 0')
+
+
+def write_stat(proc, pid, ppid, comm='sleep', utime=0, stime=0, nice=0, threads=1, vsize=0,
+               rss=0, statm=None):
+  os.makedirs(os.path.join(proc, str(pid)))
+  with open(os.path.join(proc, str(pid), 'stat'), 'w') as fp:
+    fp.write(STAT % (pid, comm, ppid, utime, stime, nice, threads, vsize, rss))
+  if statm is not None:
+    with open(os.path.join(proc, str(pid), 'statm'), 'w') as fp:
+      fp.write('%d %d 0 0 0 0 0\n' % statm)
+
+
+def test_parse_stat():
+  stat = ProcessStat.parse(10, STAT % (10, 'a) (b', 1, 200, 100, 5, 3, 4096, 2))
+  assert stat.pid == 10
+  assert stat.ppid == 1
+  assert stat.sample == ProcessSample(
+      rate=0, user=200.0 / os.sysconf('SC_CLK_TCK'), system=100.0 / os.sysconf('SC_CLK_TCK'),
+      rss=2 * PAGE_SIZE, vms=4096, nice=5, status='sleeping', threads=3)
+
+
+def test_fake_process_table():
+  with temporary_dir() as proc:
+    write_stat(proc, 1, 0)
+    write_stat(proc, 10, 1, rss=1, threads=2)
+    write_stat(proc, 11, 10, rss=2)
+    write_stat(proc, 12, 11, rss=3, statm=(2, 5))
+    write_stat(proc, 20, 1, rss=4)
+    os.makedirs(os.path.join(proc, 'self'))
+    assert sorted(read_process_table(proc)) == [1, 10, 11, 12, 20]
+
+    collector = ProcessTableCollector(proc=proc)
+    collector.sample([10, 20, 30])
+    assert collector.procs(10) == 3
+    # statm takes precedence over stat where it is available.
+    assert collector.value(10).rss == 8 * PAGE_SIZE
+    assert collector.value(10).vms == 2 * PAGE_SIZE
+    assert collector.value(10).threads == 4
+    assert collector.procs(20) == 1
+    assert not collector.sampled(30)
+    assert collector.procs(30) == 0
+
+
+def test_matches_psutil():
+  parent = subprocess.Popen(['sh', '-c', 'sleep 30; true'])
+  try:
+    time.sleep(0.2)
+    procfs, psutil = ProcessTreeCollector(parent.pid), PsutilProcessTreeCollector(parent.pid)
+    procfs.sample()
+    psutil.sample()
+    assert procfs.procs == psutil.procs == 2
+    for field in ('rss', 'vms', 'nice', 'threads'):
+      assert getattr(procfs.value, field) == getattr(psutil.value, field)
+    assert str(procfs.value.status) == str(psutil.value.status)
+  finally:
+    parent.kill()
+    parent.wait()
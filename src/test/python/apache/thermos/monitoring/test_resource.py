@@ -0,0 +1,223 @@
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+
+import os
+import subprocess
+import time
+
+import mock
+import pytest
+from twitter.common.contextutil import temporary_dir
+from twitter.common.quantity import Amount, Time
+
+from apache.thermos.monitoring.history import SampleLog
+from apache.thermos.monitoring.process import ProcessSample
+from apache.thermos.monitoring.process_collector_psutil import ProcessTableCollector
+from apache.thermos.monitoring.resource import (
+    HostResourceSampler,
+    ResourceHistory,
+    ResourceMonitorBase,
+    SharedResourceMonitor
+)
+
+from gen.apache.thermos.ttypes import ProcessStatus
+
+
+def test_process_table_collector():
+  # A shell with a sleeping child, so that the tree contains two processes.
+  parent = subprocess.Popen(['sh', '-c', 'sleep 30; true'])
+  try:
+    time.sleep(0.2)
+    collector = ProcessTableCollector()
+    collector.sample([parent.pid, os.getpid()])
+    assert collector.sampled(parent.pid)
+    assert collector.procs(parent.pid) == 2
+    assert collector.value(parent.pid).rss > 0
+    assert collector.value(parent.pid).rate == 0
+    assert collector.procs(os.getpid()) >= 3
+
+    collector.sample([parent.pid])
+    assert not collector.sampled(os.getpid())
+    assert collector.value(os.getpid()) == ProcessSample.empty()
+  finally:
+    parent.kill()
+    parent.wait()
+
+  collector.sample([parent.pid])
+  assert not collector.sampled(parent.pid)
+  assert collector.procs(parent.pid) == 0
+
+
+class FakeCollector(object):
+  def __init__(self):
+    self.sampled_pids = []
+
+  def sample(self, pids):
+    self.sampled_pids.append(sorted(pids))
+
+  def sampled(self, pid):
+    return True
+
+  def value(self, pid):
+    return ProcessSample.empty()._replace(rss=pid)
+
+  def procs(self, pid):
+    return 1
+
+
+class FakeDiskCollector(object):
+  def __init__(self, root):
+    self.value = 0
+
+  def sample(self):
+    self.value = 1024
+
+
+def task_monitor(task_id, pids):
+  monitor = mock.Mock()
+  monitor._task_id = task_id
+  monitor.get_active_processes.return_value = [
+      (ProcessStatus(process='process%d' % pid, pid=pid), 0) for pid in pids]
+  return monitor
+
+
+def wait_until(predicate, timeout=5):
+  deadline = time.time() + timeout
+  while not predicate() and time.time() < deadline:
+    time.sleep(0.05)
+  return predicate()
+
+
+def test_shared_resource_monitor():
+  sampler = HostResourceSampler(process_collector=FakeCollector,
+                                process_collection_interval=Amount(1, Time.HOURS),
+                                disk_collection_interval=Amount(1, Time.HOURS),
+                                history_time=Amount(1, Time.HOURS))
+  sampler.start()
+  try:
+    monitors = [SharedResourceMonitor(task_monitor('task%d' % index, pids), '/sandbox',
+                                      disk_collector=FakeDiskCollector, sampler=sampler)
+                for index, pids in enumerate([(100, 101), (200,)])]
+    for monitor in monitors:
+      monitor.start()
+    assert wait_until(lambda: all(monitor.sample()[1].num_procs > 0 for monitor in monitors))
+
+    # One sampler thread collects on behalf of every task, whatever the number of tasks.
+    assert [100, 101, 200] in sampler.process_collector.sampled_pids
+    _, result = monitors[0].sample()
+    assert result.num_procs == 2
+    assert result.process_sample.rss == 201
+    assert monitors[1].sample_by_process('process200').rss == 200
+    assert all(monitor.is_alive() for monitor in monitors)
+
+    monitors[0].kill()
+    assert not monitors[0].is_alive()
+    assert not sampler.registered(monitors[0])
+  finally:
+    sampler.kill()
+    sampler.join()
+
+
+def result(rss, status='running', nice=0, disk=0):
+  return ResourceMonitorBase.ResourceResult(1, ProcessSample(
+      rate=0.5, user=1.5, system=0.25, rss=rss, vms=2 * rss, nice=nice, status=status,
+      threads=3), disk)
+
+
+def test_resource_history():
+  history = ResourceHistory(3, initialize=False)
+  for timestamp in (10, 20, 30, 40):
+    history.add(timestamp, result(timestamp))
+  assert len(history) == 3
+  assert [timestamp for timestamp, _ in history] == [20, 30, 40]
+  assert history.get(25) == (30, result(30))
+  assert history.get(30) == (30, result(30))
+  assert history.get(100) == (40, result(40))
+
+  history.add(50, result(50, status=None, nice=None, disk=None))
+  assert history.get(50) == (50, result(50, status=None, nice=None, disk=None))
+  with pytest.raises(ValueError):
+    history.add(45, result(45))
+
+
+def test_resource_history_initialize():
+  history = ResourceHistory(1)
+  assert len(history) == 1
+  _, sample = history.get(0)
+  assert sample == ResourceMonitorBase.ResourceResult(0, ProcessSample.empty(), 0)
+
+
+def test_resource_history_rollups():
+  history = ResourceHistory(6, initialize=False,
+      rollups=((Amount(1, Time.MINUTES), Amount(10, Time.MINUTES)),))
+  # Ten minutes of samples every 20 seconds, of which the last two minutes are at full resolution.
+  for timestamp in range(0, 600, 20):
+    history.add(timestamp, result(timestamp, status='sleeping' if timestamp < 300 else 'running'))
+
+  # Older timestamps are served from the one minute rollup, averaging the rss of each minute.
+  timestamp, sample = history.get(70)
+  assert timestamp == 60
+  assert sample.process_sample.rss == 80
+  assert sample.process_sample.status == 'sleeping'
+  assert history.get(119)[0] == 60
+  assert history.get(120)[0] == 120
+  assert history.get(450)[0] == 420
+  timestamp, sample = history.get(-100)
+  assert timestamp == 0
+  assert history.get(500) == (500, result(500, status='running'))
+
+  # Minutes which have not been rolled up yet are filled in at full resolution.
+  samples = history.range(400, 600)
+  assert [timestamp for timestamp, _ in samples] == [420, 480, 540, 560, 580]
+  assert [timestamp for timestamp, _ in history.range(490, 530)] == [500, 520]
+
+
+def test_resource_history_persisted():
+  with temporary_dir() as td:
+    filename = os.path.join(td, 'resources')
+    history = ResourceHistory.persisted(10, filename, 20)
+    assert len(history) == 1
+    for timestamp in (time.time() + 10, time.time() + 20):
+      history.add(timestamp, result(int(timestamp), status='idle'))
+    history.add(time.time() + 30, result(1, status='unknown'))
+    history.close()
+    samples = list(history)
+
+    # Samples are reloaded lazily, and only checked against the last persisted sample until then.
+    restored = ResourceHistory.persisted(10, filename, 20)
+    assert not restored.loaded
+    with pytest.raises(ValueError):
+      restored.add(samples[1][0], result(1))
+    restored.add(samples[-1][0] + 10, result(2))
+    assert not restored.loaded
+    assert list(restored)[:3] == samples[:3]
+    assert restored.loaded
+    assert list(restored)[-2][1].process_sample.status is None
+    assert list(restored)[-1] == (samples[-1][0] + 10, result(2))
+    assert len(SampleLog(filename, ResourceHistory.WIDTH)) == 5
+
+
+def test_resource_history_persisted_rollups():
+  with temporary_dir() as td:
+    filename = os.path.join(td, 'resources')
+    rollups = ((Amount(1, Time.MINUTES), Amount(10, Time.MINUTES)),)
+    history = ResourceHistory.persisted(6, filename, 20, initialize=False, rollups=rollups)
+    for timestamp in range(0, 600, 20):
+      history.add(timestamp, result(timestamp))
+    history.close()
+
+    restored = ResourceHistory.persisted(6, filename, 20, initialize=False, rollups=rollups)
+    assert restored.range(0, 600) == history.range(0, 600)
+    assert restored.get(70) == history.get(70)